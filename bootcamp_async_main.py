@@ -0,0 +1,291 @@
+"""
+Bootcamp F2025
+
+Alternative to bootcamp_main that runs all the work as coroutines on one event loop in a single
+process, for computers where a process per worker is too much
+"""
+
+import asyncio
+import time
+
+from pymavlink import mavutil
+
+from modules.command import command
+from modules.common.modules.logger import logger
+from modules.common.modules.logger import logger_main_setup
+from modules.common.modules.read_yaml import read_yaml
+from modules.heartbeat import heartbeat_receiver
+from modules.heartbeat import heartbeat_sender
+from modules.telemetry import telemetry
+from utilities import async_mavlink
+
+
+# MAVLink connection
+CONNECTION_STRING = "tcp:localhost:12345"
+
+# Set queue max sizes, the oldest item is dropped when full
+HEARTBEAT_STATUS_QUEUE_MAX_SIZE = 10
+# Command always steers on the latest telemetry
+TELEMETRY_QUEUE_MAX_SIZE = 1
+COMMAND_QUEUE_MAX_SIZE = 10
+# Set how many received messages are kept until used
+HEARTBEAT_MAILBOX_MAX_SIZE = 1
+TELEMETRY_MAILBOX_MAX_SIZE = 10
+# Any other constants
+HEARTBEAT_PERIOD_S = 1
+DISCONNECT_THRESHOLD = 5
+TELEMETRY_TIMEOUT_S = 1
+TELEMETRY_MESSAGE_TYPES = ["LOCAL_POSITION_NED", "ATTITUDE"]
+TARGET = command.Position(10, 20, 30)
+MAIN_RUN_SECONDS = 100
+# Assume the drone disconnected if there is no heartbeat status for this long
+HEARTBEAT_STATUS_TIMEOUT_S = 2 * HEARTBEAT_PERIOD_S
+
+
+def put_latest(output_queue: "asyncio.Queue[object]", item: object) -> None:
+    """
+    Puts the item without waiting, dropping the oldest item if the queue is full.
+    """
+    if output_queue.full():
+        output_queue.get_nowait()
+
+    output_queue.put_nowait(item)
+
+
+async def heartbeat_sender_task(
+    sender: heartbeat_sender.HeartbeatSender, heartbeat_period: float
+) -> None:
+    """
+    Sends a heartbeat every period.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        start_time = loop.time()
+        sender.run()
+        await asyncio.sleep(max(0.0, heartbeat_period - (loop.time() - start_time)))
+
+
+async def heartbeat_receiver_task(
+    receiver: heartbeat_receiver.HeartbeatReceiver,
+    heartbeat_period: float,
+    output_queue: "asyncio.Queue[bool]",
+) -> None:
+    """
+    Checks for a heartbeat received every period, and outputs whether connected.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        start_time = loop.time()
+        put_latest(output_queue, receiver.run())
+        await asyncio.sleep(max(0.0, heartbeat_period - (loop.time() - start_time)))
+
+
+async def telemetry_task(
+    telemetry_instance: telemetry.Telemetry,
+    mailbox: async_mavlink.MessageMailbox,
+    telemetry_timeout: float,
+    output_queue: "asyncio.Queue[telemetry.TelemetryData]",
+    local_logger: logger.Logger,
+) -> None:
+    """
+    Waits for a position and an attitude message and outputs them combined.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        # Telemetry waits by blocking on its connection, so only run it once it will not wait
+        deadline = loop.time() + telemetry_timeout
+        while not mailbox.has_types(TELEMETRY_MESSAGE_TYPES) and loop.time() < deadline:
+            await mailbox.wait_for_message(deadline - loop.time())
+
+        if not mailbox.has_types(TELEMETRY_MESSAGE_TYPES):
+            local_logger.warning("Timed out waiting for telemetry data", True)
+            continue
+
+        result, telemetry_data = telemetry_instance.run()
+        if result:
+            put_latest(output_queue, telemetry_data)
+
+
+async def command_task(
+    command_instance: command.Command,
+    input_queue: "asyncio.Queue[telemetry.TelemetryData]",
+    output_queue: "asyncio.Queue[str]",
+    local_logger: logger.Logger,
+) -> None:
+    """
+    Decides a command for each telemetry data.
+    """
+    while True:
+        telemetry_data = await input_queue.get()
+        try:
+            result, command_data = command_instance.run(telemetry_data)
+        except (AttributeError, ValueError, EOFError, AssertionError) as e:
+            local_logger.error(f"Command processing error: {e}", True)
+            continue
+
+        if result and command_data is not None:
+            put_latest(output_queue, command_data)
+
+
+async def command_output_task(
+    input_queue: "asyncio.Queue[str]", local_logger: logger.Logger
+) -> None:
+    """
+    Logs every command output.
+    """
+    while True:
+        command_data = await input_queue.get()
+        local_logger.info(f"Command output: {command_data}")
+
+
+async def run(connection: mavutil.mavfile, main_logger: logger.Logger) -> int:
+    """
+    Runs every task until the time is up or the drone disconnects.
+    """
+    heartbeat_mailbox = async_mavlink.MessageMailbox(
+        connection, ["HEARTBEAT"], HEARTBEAT_MAILBOX_MAX_SIZE
+    )
+    telemetry_mailbox = async_mavlink.MessageMailbox(
+        connection, TELEMETRY_MESSAGE_TYPES, TELEMETRY_MAILBOX_MAX_SIZE
+    )
+    reader = async_mavlink.MavlinkReader(connection, [heartbeat_mailbox, telemetry_mailbox])
+
+    heartbeat_status_queue = asyncio.Queue(HEARTBEAT_STATUS_QUEUE_MAX_SIZE)
+    telemetry_to_command_queue = asyncio.Queue(TELEMETRY_QUEUE_MAX_SIZE)
+    command_to_main_queue = asyncio.Queue(COMMAND_QUEUE_MAX_SIZE)
+
+    # Same logic as the workers, receiving from the mailboxes instead of the connection
+    result, sender = heartbeat_sender.HeartbeatSender.create(connection, main_logger)
+    if not result:
+        print("Failed to create Heartbeat Sender")
+        return -1
+
+    assert sender is not None
+
+    result, receiver = heartbeat_receiver.HeartbeatReceiver.create(
+        heartbeat_mailbox, main_logger, DISCONNECT_THRESHOLD
+    )
+    if not result:
+        print("Failed to create Heartbeat Receiver")
+        return -1
+
+    assert receiver is not None
+
+    result, telemetry_instance = telemetry.Telemetry.create(
+        telemetry_mailbox, main_logger, TELEMETRY_TIMEOUT_S
+    )
+    if not result:
+        print("Failed to create Telemetry")
+        return -1
+
+    assert telemetry_instance is not None
+
+    result, command_instance = command.Command.create(connection, TARGET, main_logger)
+    if not result:
+        print("Failed to create Command")
+        return -1
+
+    assert command_instance is not None
+
+    if not reader.start():
+        print("Failed to read the connection, it must be a socket")
+        return -1
+
+    tasks = [
+        asyncio.create_task(heartbeat_sender_task(sender, HEARTBEAT_PERIOD_S)),
+        asyncio.create_task(
+            heartbeat_receiver_task(receiver, HEARTBEAT_PERIOD_S, heartbeat_status_queue)
+        ),
+        asyncio.create_task(
+            telemetry_task(
+                telemetry_instance,
+                telemetry_mailbox,
+                TELEMETRY_TIMEOUT_S,
+                telemetry_to_command_queue,
+                main_logger,
+            )
+        ),
+        asyncio.create_task(
+            command_task(
+                command_instance, telemetry_to_command_queue, command_to_main_queue, main_logger
+            )
+        ),
+        asyncio.create_task(command_output_task(command_to_main_queue, main_logger)),
+    ]
+
+    main_logger.info("Started")
+
+    # Continue running for 100 seconds or until the drone disconnects
+    start_time_main = time.time()
+    was_connected = False
+    while time.time() - start_time_main < MAIN_RUN_SECONDS:
+        try:
+            is_connected = await asyncio.wait_for(
+                heartbeat_status_queue.get(), HEARTBEAT_STATUS_TIMEOUT_S
+            )
+        except asyncio.TimeoutError:
+            main_logger.warning("No heartbeat status received, assuming drone disconnected!")
+            break
+
+        main_logger.info(f"Heartbeat status: {is_connected}")
+        # Not connected until the first heartbeat arrives
+        if was_connected and not is_connected:
+            main_logger.warning("Drone disconnected!")
+            break
+
+        was_connected = was_connected or is_connected
+
+        if reader.is_closed():
+            main_logger.warning("Drone closed the connection!")
+            break
+
+    main_logger.info("Requested exit")
+    for task in tasks:
+        task.cancel()
+
+    await asyncio.gather(*tasks, return_exceptions=True)
+    reader.stop()
+
+    main_logger.info("Stopped")
+
+    return 0
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    # Configuration settings
+    result, config = read_yaml.open_config(logger.CONFIG_FILE_PATH)
+    if not result:
+        print("ERROR: Failed to load configuration file")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert config is not None
+
+    # Setup main logger
+    result, main_logger, _ = logger_main_setup.setup_main_logger(config)
+    if not result:
+        print("ERROR: Failed to create main logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert main_logger is not None
+
+    # Create a connection to the drone, only this process uses it
+    connection = mavutil.mavlink_connection(CONNECTION_STRING)
+    connection.wait_heartbeat(timeout=30)  # Wait for the "drone" to connect
+
+    result_run = asyncio.run(run(connection, main_logger))
+    connection.close()
+
+    return result_run
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Success!")
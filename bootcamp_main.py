@@ -5,49 +5,70 @@ Main process to setup and manage all the other working processes
 """
 
 import multiprocessing as mp
+import pathlib
 import queue
 import time
 
-from pymavlink import mavutil
-
 from modules.common.modules.logger import logger
 from modules.common.modules.logger import logger_main_setup
 from modules.common.modules.read_yaml import read_yaml
 from modules.command import command
-from modules.command import command_worker
-from modules.heartbeat import heartbeat_receiver_worker
-from modules.heartbeat import heartbeat_sender_worker
-from modules.telemetry import telemetry_worker
-from utilities.workers import queue_proxy_wrapper
+from utilities import mavlink_reconnect
+from utilities import mavlink_sender
+from utilities.workers import pipeline
+from utilities.workers import priority_lanes
 from utilities.workers import worker_controller
-from utilities.workers import worker_manager
+from utilities.workers import worker_restart
 
 
 # MAVLink connection
 CONNECTION_STRING = "tcp:localhost:12345"
+# Reconnects in the background if the drone closes the connection or is silent for 3 s
+RECONNECT_POLICY = mavlink_reconnect.ReconnectPolicy(silence_timeout=3.0)
 
 # =================================================================================================
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
-# Set queue max sizes (<= 0 for infinity)
-HEARTBEAT_STATUS_QUEUE_MAX_SIZE = 10
-TELEMETRY_QUEUE_MAX_SIZE = 10
-COMMAND_QUEUE_MAX_SIZE = 10
-# Set worker counts
-HEARTBEAT_SENDER_WORKER_COUNT = 1
-HEARTBEAT_RECEIVER_WORKER_COUNT = 1
-TELEMETRY_WORKER_COUNT = 1
-COMMAND_WORKER_COUNT = 1
+# Queues and worker pools, see the file for queue kinds, sizes and worker counts
+PIPELINE_CONFIG_FILE_PATH = pathlib.Path("pipeline.yaml")
+# Record queue, sender and connection statistics and log them periodically
+QUEUE_STATISTICS_PERIOD_S = 10
+# Sample CPU, memory, context switches and open files of every worker and log them periodically
+RESOURCE_SAMPLE_PERIOD_S = 10
+# Main serves heartbeat statuses before command outputs,
+# which still get at least 1 of every this many items
+MAIN_LANE_FAIRNESS_PERIOD = 4
+# Index of each queue in main_input_queues of the pipeline configuration
+HEARTBEAT_STATUS_LANE = 0
+COMMAND_LANE = 1
+# Set how worker processes are started: fork, spawn, or forkserver
+# Main runs the router, sender and heartbeat threads and reconnects in a thread, so forking it
+# would copy their held locks and the socket into the workers, and their restarts and spares
+# Forkserver starts workers from a process without those threads
+# Only threads of main get the connection, processes get routed and sending connections
+WORKER_START_METHOD = "forkserver"
+# Imported once by the forkserver, so its workers start without importing them again
+# Workers also run this module again, so include what it imports
+FORKSERVER_PRELOAD = [
+    "pymavlink.mavutil",
+    "modules.common.modules.read_yaml.read_yaml",
+    "utilities.mavlink_reconnect",
+    "utilities.mavlink_router",
+    "utilities.mavlink_sender",
+    "utilities.workers.pipeline",
+    "utilities.workers.priority_lanes",
+    "modules.command.command_worker",
+    "modules.heartbeat.heartbeat_receiver_worker",
+    "modules.heartbeat.heartbeat_sender_worker",
+    "modules.telemetry.telemetry_worker",
+]
+# Restarts with backoff, main stops if workers keep dying instead of restarting them forever
+WORKER_RESTART_POLICY = worker_restart.RestartPolicy(max_restarts=5, window=60.0)
 # Any other constants
-HEARTBEAT_PERIOD_S = 1
-DISCONNECT_THRESHOLD = 5
-TELEMETRY_TIMEOUT_S = 1
-HEIGHT_TOLERANCE = 0.5
-ANGLE_TOLERANCE = 5
-Z_SPEED = 1
-TURNING_SPEED = 5
 TARGET = command.Position(10, 20, 30)
 MAIN_RUN_SECONDS = 100
+# Time for all workers to exit once the queues are closed, before they are terminated
+JOIN_TIMEOUT_S = 5
 
 # =================================================================================================
 #                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -80,180 +101,166 @@ def main() -> int:
     # In reality, this will not work, but to simplify the bootamp, preetend it is allowed
     # To test, you will run each of your workers individually to see if they work
     # (test "drones" are provided for you test your workers)
-    # NOTE: If you want to have type annotations for the connection, it is of type mavutil.mavfile
-    connection = mavutil.mavlink_connection(CONNECTION_STRING)
+    # NOTE: If you want to have type annotations for the connection, it is of type
+    # mavlink_reconnect.ReconnectingConnection , with the attributes of a mavutil.mavfile
+    # Reconnecting keeps the same handle, so the workers keep using it
+    result, connection = mavlink_reconnect.ReconnectingConnection.create(
+        CONNECTION_STRING, RECONNECT_POLICY, main_logger
+    )
+    if not result:
+        print("ERROR: Failed to connect to the drone")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert connection is not None
+
     connection.wait_heartbeat(timeout=30)  # Wait for the "drone" to connect
 
     # =============================================================================================
     #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
     # =============================================================================================
+    # Locks and queues passed to spawn or forkserver workers cannot be created with fork,
+    # so they are created with the context of the start method of the workers
+    worker_context = mp.get_context(WORKER_START_METHOD)
+    if WORKER_START_METHOD == "forkserver":
+        worker_context.set_forkserver_preload(FORKSERVER_PRELOAD)
+
     # Create a worker controller
-    controller = worker_controller.WorkerController()
+    controller = worker_controller.WorkerController(worker_context)
     # Create a multiprocess manager for synchronized queues
-    mp_manager = mp.Manager()
-    # Create queues
-    heartbeat_status_queue = queue_proxy_wrapper.QueueProxyWrapper(
-        mp_manager,
-        HEARTBEAT_STATUS_QUEUE_MAX_SIZE,
-    )
-    telemetry_to_command_queue = queue_proxy_wrapper.QueueProxyWrapper(
-        mp_manager,
-        TELEMETRY_QUEUE_MAX_SIZE,
-    )
-    command_to_main_queue = queue_proxy_wrapper.QueueProxyWrapper(
-        mp_manager,
-        COMMAND_QUEUE_MAX_SIZE,
-    )
+    mp_manager = worker_context.Manager()
 
-    # Create worker properties for each worker type (what inputs it takes, how many workers)
-    # Heartbeat sender
-    result, heartbeat_sender_worker_properties = worker_manager.WorkerProperties.create(
-        count=HEARTBEAT_SENDER_WORKER_COUNT,
-        target=heartbeat_sender_worker.heartbeat_sender_worker,
-        work_arguments=(
-            connection,
-            HEARTBEAT_PERIOD_S,
-        ),
-        input_queues=[],
-        output_queues=[],
-        controller=controller,
-        local_logger=main_logger,
-    )
+    # Create the queues and workers of every stage in the pipeline configuration
+    result, pipeline_config = read_yaml.open_config(PIPELINE_CONFIG_FILE_PATH)
     if not result:
-        print("Failed arguments for Heartbeat Sender")
+        print("ERROR: Failed to load pipeline configuration file")
         return -1
 
-    assert heartbeat_sender_worker_properties is not None
-    # Heartbeat receiver
-    result, heartbeat_receiver_worker_properties = worker_manager.WorkerProperties.create(
-        count=HEARTBEAT_RECEIVER_WORKER_COUNT,
-        target=heartbeat_receiver_worker.heartbeat_receiver_worker,
-        work_arguments=(
-            connection,
-            HEARTBEAT_PERIOD_S,
-            DISCONNECT_THRESHOLD,
-        ),
-        input_queues=[],
-        output_queues=[heartbeat_status_queue],
-        controller=controller,
-        local_logger=main_logger,
-    )
-
-    if not result:
-        print("Failed arguments for Heartbeat Receiver")
-        return -1
-    assert heartbeat_receiver_worker_properties is not None
-    # Telemetry
-    result, telemetry_worker_properties = worker_manager.WorkerProperties.create(
-        count=TELEMETRY_WORKER_COUNT,
-        target=telemetry_worker.telemetry_worker,
-        work_arguments=(
-            connection,
-            TELEMETRY_TIMEOUT_S,
-        ),
-        input_queues=[],
-        output_queues=[telemetry_to_command_queue],
+    # Get Pylance to stop complaining
+    assert pipeline_config is not None
+
+    # Counters of the MAVLink sender, logged with the queue statistics
+    sender_statistics = mavlink_sender.SenderStatistics(worker_context)
+
+    result, worker_pipeline = pipeline.Pipeline.create(
+        config=pipeline_config,
+        resources={
+            "connection": connection,
+            "target": TARGET,
+            "sender_statistics": sender_statistics,
+        },
         controller=controller,
+        mp_manager=mp_manager,
         local_logger=main_logger,
+        restart_policy=WORKER_RESTART_POLICY,
+        start_method=WORKER_START_METHOD,
     )
     if not result:
-        print("Failed arguments for Telemetry")
+        print("Failed to create pipeline")
         return -1
-    assert telemetry_worker_properties is not None
-    # Command
-    result, command_worker_properties = worker_manager.WorkerProperties.create(
-        count=COMMAND_WORKER_COUNT,
-        target=command_worker.command_worker,
-        work_arguments=(
-            connection,
-            TARGET,
-            HEIGHT_TOLERANCE,
-            ANGLE_TOLERANCE,
-            Z_SPEED,
-            TURNING_SPEED,
-        ),
-        input_queues=[telemetry_to_command_queue],
-        output_queues=[command_to_main_queue],
-        controller=controller,
-        local_logger=main_logger,
-    )
 
-    if not result:
-        print("Failed arguments for Command")
-        return -1
-    assert command_worker_properties is not None
-    # Create the workers (processes) and obtain their managers
+    # Get Pylance to stop complaining
+    assert worker_pipeline is not None
 
-    result, heartbeat_sender_manager = worker_manager.create_workers(
-        heartbeat_sender_worker_properties
+    # Queues that output to main, by priority
+    main_lanes = priority_lanes.PriorityLanes(
+        worker_pipeline.get_main_input_queues(),
+        MAIN_LANE_FAIRNESS_PERIOD,
     )
-    if not result:
-        print("Failed to create Heartbeat Sender workers")
-        return -1
-    assert heartbeat_sender_manager is not None
-    result, heartbeat_receiver_manager = worker_manager.create_workers(
-        heartbeat_receiver_worker_properties
-    )
-    if not result:
-        print("Failed to create Heartbeat Receiver workers")
-        return -1
-    assert heartbeat_receiver_manager is not None
-    result, telemetry_manager = worker_manager.create_workers(telemetry_worker_properties)
-    if not result:
-        print("Failed to create Telemetry workers")
-        return -1
-    assert telemetry_manager is not None
-    result, command_manager = worker_manager.create_workers(command_worker_properties)
-    if not result:
-        print("Failed to create Command workers")
-        return -1
-    assert command_manager is not None
 
     # Start worker processes
 
     main_logger.info("Started")
 
-    heartbeat_sender_manager.start_workers()
-    heartbeat_receiver_manager.start_workers()
-    telemetry_manager.start_workers()
-    command_manager.start_workers()
+    worker_pipeline.start()
 
     # Main's work: read from all queues that output to main, and log any commands that we make
     # Continue running for 100 seconds or until the drone disconnects
 
     start_time_main = time.time()
+    last_statistics_time = start_time_main
+    last_resource_sample_time = start_time_main
+    last_heartbeat_status_time = start_time_main
     while time.time() - start_time_main < MAIN_RUN_SECONDS:
-        # Check if drone disconnected by reading from heartbeat status queue
+        # Log queue statistics to find bottlenecks
+        if time.time() - last_statistics_time >= QUEUE_STATISTICS_PERIOD_S:
+            last_statistics_time = time.time()
+            for queue_name, statistics_queue in worker_pipeline.get_queues().items():
+                result, statistics = statistics_queue.get_statistics()
+                if result:
+                    main_logger.info(f"{queue_name} queue statistics: {statistics}")
+
+                result, dropped_counts = statistics_queue.get_dropped_counts()
+                if result:
+                    dropped_text = ", ".join(
+                        f"{policy.name}: {count}" for policy, count in dropped_counts.items()
+                    )
+                    main_logger.info(f"{queue_name} queue dropped: {dropped_text}")
+
+            main_logger.info(f"Sender statistics: {sender_statistics.snapshot()}")
+            main_logger.info(f"Connection: {connection.get_status()}")
+
+        # Log worker resource usage to find workers that spin, leak memory or leak files
+        if time.time() - last_resource_sample_time >= RESOURCE_SAMPLE_PERIOD_S:
+            last_resource_sample_time = time.time()
+            for stage_name, manager in worker_pipeline.get_managers().items():
+                for snapshot in manager.get_resource_usage():
+                    main_logger.info(f"{stage_name} resource usage: {snapshot}")
+
+        # Replace dead workers, warm spares take over without a cold start
+        is_crash_looping = False
+        for manager in worker_pipeline.get_managers().values():
+            if not manager.check_and_restart_dead_workers():
+                main_logger.error("Failed to restart dead workers")
+
+            restart_status = manager.get_restart_status()
+            if restart_status.circuit_state == worker_restart.CircuitState.OPEN:
+                main_logger.error(f"Workers keep dying: {restart_status}")
+                is_crash_looping = True
+
+        if is_crash_looping:
+            break
+
+        # Check if drone disconnected by reading from heartbeat status lane
+        # A backlog of command outputs does not delay heartbeat statuses
         try:
-            heartbeat_status = heartbeat_status_queue.queue.get(timeout=0.2)
-            main_logger.info(f"Heartbeat status: {heartbeat_status}")
-            if heartbeat_status == "Disconnected":
+            lane_index, item = main_lanes.get(timeout=0.2)
+        except queue.Empty:
+            lane_index, item = -1, None
+
+        if lane_index == HEARTBEAT_STATUS_LANE:
+            last_heartbeat_status_time = time.time()
+            main_logger.info(f"Heartbeat status: {item}")
+            if item == "Disconnected":
                 main_logger.warning("Drone disconnected!")
                 break
-            command_msg = command_to_main_queue.queue.get(timeout=0.2)
-            main_logger.info(f"Command output: {command_msg}")
-        except queue.Empty:
+        elif lane_index == COMMAND_LANE:
+            main_logger.info(f"Command output: {item}")
+
+        if time.time() - last_heartbeat_status_time > 0.2:
             main_logger.warning("No heartbeat status received, assuming drone disconnected!")
             break
 
     # Stop the processes
 
     main_logger.info("Requested exit")
+    shutdown_start_time = time.time()
     controller.request_exit()
 
-    # Fill and drain queues from END TO START
+    # Clean up worker processes, joining closes their queues to wake any blocked worker
+    # Workers still running at the deadline are terminated, then killed
+    join_report = worker_pipeline.join(time.monotonic() + JOIN_TIMEOUT_S)
+    main_logger.info(f"Workers joined: {join_report}")
+    if not join_report.is_all_exited():
+        main_logger.warning("Some workers did not exit")
+
+    main_logger.info(f"Stopped, shutdown took {time.time() - shutdown_start_time:.3f} s")
 
-    main_logger.info("Queues cleared")
-    command_to_main_queue.fill_and_drain_queue()
-    telemetry_to_command_queue.fill_and_drain_queue()
-    heartbeat_status_queue.fill_and_drain_queue()
-    # Clean up worker processes
-    heartbeat_sender_manager.join_workers()
-    heartbeat_receiver_manager.join_workers()
-    telemetry_manager.join_workers()
-    command_manager.join_workers()
+    # Free queue storage now that no worker is using it
+    worker_pipeline.release()
 
-    main_logger.info("Stopped")
+    main_logger.info(f"Connection: {connection.get_status()}")
+    connection.close()
 
     # We can reset controller in case we want to reuse it
     # Alternatively, create a new WorkerController instance
@@ -198,13 +198,8 @@ def main() -> int:
 
     main_logger.info("Requested exit", True)
 
-    # Fill and drain queues from END TO START
-    countup_to_add_random_queue.fill_and_drain_queue()
-    add_random_to_concatenator_queue.fill_and_drain_queue()
-
-    main_logger.info("Queues cleared", True)
-
     # Clean up worker processes
+    # Joining closes their queues, which wakes any worker blocked on a queue
     for manager in worker_managers:
         manager.join_workers()
 
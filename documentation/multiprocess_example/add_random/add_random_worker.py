@@ -6,6 +6,7 @@ import os
 import pathlib
 
 from modules.common.modules.logger import logger
+from utilities.workers import closable_queue
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
 from . import add_random
@@ -44,7 +45,7 @@ def add_random_worker(
         seed, max_random_term, add_change_count, local_logger
     )
 
-    # Loop forever until exit has been requested or sentinel value (consumer)
+    # Loop forever until exit has been requested or the queue is closed (consumer)
     while not controller.is_exit_requested():
         # Method blocks worker if pause has been requested
         controller.check_pause()
@@ -52,10 +53,10 @@ def add_random_worker(
         # Get an item from the queue
         # If the queue is empty, the worker process will block
         # until the queue is non-empty
-        term = input_queue.queue.get()
-
-        # Exit on sentinel
-        if term is None:
+        # Exit once the queue is closed
+        try:
+            term = input_queue.queue.get()
+        except closable_queue.Closed:
             break
 
         # All of the work should be done within the class
@@ -70,4 +71,7 @@ def add_random_worker(
         # Put an item into the queue
         # If the queue is full, the worker process will block
         # until the queue is non-empty
-        output_queue.queue.put(value)
+        try:
+            output_queue.queue.put(value)
+        except closable_queue.Closed:
+            break
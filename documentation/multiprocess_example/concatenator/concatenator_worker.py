@@ -6,6 +6,7 @@ import os
 import pathlib
 
 from modules.common.modules.logger import logger
+from utilities.workers import closable_queue
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
 from . import concatenator
@@ -40,7 +41,7 @@ def concatenator_worker(
     # Instantiate class object
     concatenator_instance = concatenator.Concatenator(prefix, suffix, local_logger)
 
-    # Loop forever until exit has been requested or sentinel value (consumer)
+    # Loop forever until exit has been requested or the queue is closed (consumer)
     while not controller.is_exit_requested():
         # Method blocks worker if pause has been requested
         controller.check_pause()
@@ -48,10 +49,10 @@ def concatenator_worker(
         # Get an item from the queue
         # If the queue is empty, the worker process will block
         # until the queue is non-empty
-        input_data = input_queue.queue.get()
-
-        # Exit on sentinel
-        if input_data is None:
+        # Exit once the queue is closed
+        try:
+            input_data = input_queue.queue.get()
+        except closable_queue.Closed:
             break
 
         # All of the work should be done within the class
@@ -6,6 +6,7 @@ import os
 import pathlib
 
 from modules.common.modules.logger import logger
+from utilities.workers import closable_queue
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
 from . import countup
@@ -58,4 +59,7 @@ def countup_worker(
         # Put an item into the queue
         # If the queue is full, the worker process will block
         # until the queue is non-empty
-        output_queue.queue.put(value)
+        try:
+            output_queue.queue.put(value)
+        except closable_queue.Closed:
+            break
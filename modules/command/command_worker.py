@@ -4,14 +4,15 @@ Command worker to make decisions based on Telemetry Data.
 
 import os
 import pathlib
-import queue
 
 from pymavlink import mavutil
 
+from utilities.workers import closable_queue
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
 from . import command
 from ..common.modules.logger import logger
+from ..telemetry import telemetry
 
 
 # =================================================================================================
@@ -20,7 +21,7 @@ from ..common.modules.logger import logger
 def command_worker(
     connection: mavutil.mavfile,
     target: command.Position,
-    input_queue: queue_proxy_wrapper.QueueProxyWrapper,  # TelemetryData in
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,  # TelemetryData or its bytes in
     output_queue: queue_proxy_wrapper.QueueProxyWrapper,
     controller: worker_controller.WorkerController,
 ) -> None:
@@ -64,25 +65,39 @@ def command_worker(
 
     while not controller.is_exit_requested():
         controller.check_pause()
+        # Take everything that has arrived so bursts are handled in one transaction
+        # An empty batch is fine! It just means no new data arrived or exit was requested.
         try:
-            telemetry_data = input_queue.queue.get(timeout=0.5)
+            _, telemetry_batch = controller.wait_for_items(input_queue, 0.5)
+        except closable_queue.Closed:
+            break
+
+        command_batch = []
+        for telemetry_data in telemetry_batch:
             if telemetry_data is None:
                 continue
-        except queue.Empty:
-            # This is fine! It just means no new data arrived.
-            continue
 
-        try:
-            # Process telemetry data to get command
-            result, command_data = command_instance.run(telemetry_data)
-        except (AttributeError, ValueError, EOFError, AssertionError) as e:
-            local_logger.error(f"Command processing error: {e}", True)
-            continue
-        if not result:
-            continue
-
-        if command_data is not None:
-            output_queue.queue.put(command_data)
+            # Telemetry workers send the encoded form
+            if isinstance(telemetry_data, bytes):
+                telemetry_data = telemetry.TelemetryData.from_bytes(telemetry_data)
+
+            try:
+                # Process telemetry data to get command
+                result, command_data = command_instance.run(telemetry_data)
+            except (AttributeError, ValueError, EOFError, AssertionError) as e:
+                local_logger.error(f"Command processing error: {e}", True)
+                continue
+            if not result:
+                continue
+
+            if command_data is not None:
+                command_batch.append(command_data)
+
+        if len(command_batch) > 0:
+            try:
+                output_queue.put_many(command_batch)
+            except closable_queue.Closed:
+                break
     local_logger.info("Worker Done", True)
 
 
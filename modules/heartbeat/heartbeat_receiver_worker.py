@@ -8,6 +8,7 @@ import pathlib
 import time
 from pymavlink import mavutil
 
+from utilities.workers import closable_queue
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
 from . import heartbeat_receiver
@@ -69,11 +70,15 @@ def heartbeat_receiver_worker(
         # Run receiver
         state = receiver.run()
         # Put state into output queue loll
-        output_queue.queue.put(state)
+        try:
+            output_queue.queue.put(state)
+        except closable_queue.Closed:
+            break
 
         elapsed = time.time() - start_time
         sleep_time = max(0.0, heartbeat_period - elapsed)
-        time.sleep(sleep_time)
+        # Wakes early if exit or pause is requested
+        controller.wait(sleep_time)
 
 
 # =================================================================================================
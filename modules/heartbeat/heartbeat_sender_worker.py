@@ -69,7 +69,8 @@ def heartbeat_sender_worker(
 
         elapsed = time.time() - start_time
         sleep_time = max(0.0, heartbeat_period - elapsed)
-        time.sleep(sleep_time)
+        # Wakes early if exit or pause is requested
+        controller.wait(sleep_time)
     local_logger.info("Exiting heartbeat sender worker", True)
 
 
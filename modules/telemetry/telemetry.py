@@ -2,10 +2,12 @@
 Telemetry gathering logic.
 """
 
+import struct
 import time
 
 from pymavlink import mavutil
 
+from utilities.workers import worker_controller
 from ..common.modules.logger import logger
 
 
@@ -14,6 +16,11 @@ class TelemetryData:  # pylint: disable=too-many-instance-attributes
     Python struct to represent Telemtry Data. Contains the most recent attitude and position reading.
     """
 
+    # Fixed layout for queues: presence bitmask, time_since_boot, then the float fields in order
+    # Bit i of the bitmask is set if the i-th field is not None, time_since_boot is bit 0
+    __WIRE_FORMAT = struct.Struct("<HI12d")
+    __ALL_PRESENT = (1 << 13) - 1
+
     def __init__(
         self,
         time_since_boot: int | None = None,  # ms
@@ -44,6 +51,50 @@ class TelemetryData:  # pylint: disable=too-many-instance-attributes
         self.pitch_speed = pitch_speed
         self.yaw_speed = yaw_speed
 
+    def to_bytes(self) -> bytes:
+        """
+        Encodes into the fixed layout, None fields are sent as 0 with their presence bit cleared.
+        """
+        fields = (
+            self.time_since_boot,
+            self.x,
+            self.y,
+            self.z,
+            self.x_velocity,
+            self.y_velocity,
+            self.z_velocity,
+            self.roll,
+            self.pitch,
+            self.yaw,
+            self.roll_speed,
+            self.pitch_speed,
+            self.yaw_speed,
+        )
+
+        # Telemetry is usually complete, so skip building the bitmask
+        if None not in fields:
+            return TelemetryData.__WIRE_FORMAT.pack(TelemetryData.__ALL_PRESENT, *fields)
+
+        presence = 0
+        for i, field in enumerate(fields):
+            if field is not None:
+                presence |= 1 << i
+
+        return TelemetryData.__WIRE_FORMAT.pack(
+            presence, *(0 if field is None else field for field in fields)
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TelemetryData":
+        """
+        Decodes from the fixed layout produced by to_bytes().
+        """
+        presence, *fields = TelemetryData.__WIRE_FORMAT.unpack(data)
+        if presence == TelemetryData.__ALL_PRESENT:
+            return cls(*fields)
+
+        return cls(*(field if presence & (1 << i) else None for i, field in enumerate(fields)))
+
     def __str__(self) -> str:
         return f"""{{
             time_since_boot: {self.time_since_boot},
@@ -72,15 +123,21 @@ class Telemetry:
 
     __private_key = object()
 
+    __MESSAGE_TYPES = ["LOCAL_POSITION_NED", "ATTITUDE"]
+    __RECEIVE_TIMEOUT = 0.2  # seconds
+
     @classmethod
     def create(
         cls,
         connection: mavutil.mavfile,
         local_logger: logger.Logger,
         telemetry_period: float,  # seconds
+        controller: worker_controller.WorkerController | None = None,
     ) -> "tuple[True, Telemetry] | tuple[False, None]":
         """
         Factory method to safely instantiate the Telemetry class.
+
+        controller: If given, waiting for messages stops as soon as exit or pause is requested.
         """
         instance = None
         try:
@@ -89,6 +146,7 @@ class Telemetry:
                 connection=connection,
                 local_logger=local_logger,
                 telemetry_period=telemetry_period,
+                controller=controller,
             )
         except (AttributeError, ValueError, AssertionError) as e:
             local_logger.error(f"Exception raised while creating Telemetry: {e}", True)
@@ -101,6 +159,7 @@ class Telemetry:
         connection: mavutil.mavfile,
         local_logger: logger.Logger,
         telemetry_period: float,  # seconds
+        controller: worker_controller.WorkerController | None,
     ) -> None:
         assert key is Telemetry.__private_key, "Use create() method"
 
@@ -109,6 +168,37 @@ class Telemetry:
         self._connection = connection
         self._local_logger = local_logger
         self._telemetry_period = telemetry_period
+        self._controller = controller
+
+    def __receive(self, timeout: float) -> "tuple[bool, object | None]":
+        """
+        Waits up to timeout seconds for a position or attitude message.
+
+        Returns False if exit or pause was requested, and the message if one arrived.
+        """
+        if self._controller is None or self._connection.fd is None:
+            msg = self._connection.recv_match(
+                type=self.__MESSAGE_TYPES, blocking=True, timeout=timeout
+            )
+            # A routed connection stops waiting as soon as exit or pause is requested
+            if msg is None and self._controller is not None:
+                is_wake_requested, _ = self._controller.wait(0.0)
+                if is_wake_requested:
+                    return False, None
+
+            return True, msg
+
+        # Parse anything already buffered before waiting on the socket
+        msg = self._connection.recv_match(type=self.__MESSAGE_TYPES, blocking=False)
+        if msg is not None:
+            return True, msg
+
+        wait_objects = [] if self._connection.fd is None else [self._connection.fd]
+        is_wake_requested, _ = self._controller.wait(timeout, wait_objects)
+        if is_wake_requested:
+            return False, None
+
+        return True, self._connection.recv_match(type=self.__MESSAGE_TYPES, blocking=False)
 
     def run(
         self,
@@ -129,9 +219,11 @@ class Telemetry:
 
         while (time.time() - start_time) < self._telemetry_period:
             try:
-                msg = self._connection.recv_match(
-                    type=["LOCAL_POSITION_NED", "ATTITUDE"], blocking=True, timeout=0.2
-                )
+                remaining = self._telemetry_period - (time.time() - start_time)
+                result, msg = self.__receive(min(remaining, self.__RECEIVE_TIMEOUT))
+                if not result:
+                    return False, None
+
                 if msg is None:
                     continue
 
@@ -7,6 +7,7 @@ import pathlib
 
 from pymavlink import mavutil
 
+from utilities.workers import closable_queue
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
 from . import telemetry
@@ -18,9 +19,9 @@ from ..common.modules.logger import logger
 # =================================================================================================
 def telemetry_worker(
     connection: mavutil.mavfile,
+    telemetry_period: float,
     output_queue: queue_proxy_wrapper.QueueProxyWrapper,
     controller: worker_controller.WorkerController,
-    telemetry_period: float,
 ) -> None:
     """
     Worker process.
@@ -52,6 +53,7 @@ def telemetry_worker(
         connection,
         local_logger,
         telemetry_period,
+        controller,
     )
     local_logger.info("Telemetry instance created", True)
     # Main loop: do work.
@@ -67,10 +69,13 @@ def telemetry_worker(
         if not result:
             continue
         local_logger.info(f"Delivering telemetry data: {telemetry_data}", True)
-        # Put an item into the queue
+        # Put an item into the queue, encoded so it is not pickled on the way
         # If the queue is full, the worker process will block
-        # until the queue is non-empty
-        output_queue.queue.put(telemetry_data)
+        # until the queue is non-empty, unless the queue drops items under backpressure
+        try:
+            output_queue.queue.put(telemetry_data.to_bytes())
+        except closable_queue.Closed:
+            break
 
 
 # =================================================================================================
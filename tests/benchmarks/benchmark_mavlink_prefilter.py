@@ -0,0 +1,166 @@
+"""
+Compare the time to parse a high rate stream with the message mix of an autopilot when every
+message is decoded, as recv_match() does, and when only the subscribed types are decoded.
+To run:
+```
+python -m tests.benchmarks.benchmark_mavlink_prefilter
+```
+"""
+
+import random
+import time
+
+from pymavlink import mavutil
+
+from utilities import mavlink_frame
+
+
+# Messages per second of each type streamed by an ArduPilot autopilot with high stream rates
+MESSAGE_RATES = {
+    "HEARTBEAT": 1,
+    "SYS_STATUS": 2,
+    "SYSTEM_TIME": 2,
+    "POWER_STATUS": 2,
+    "MEMINFO": 2,
+    "MISSION_CURRENT": 2,
+    "BATTERY_STATUS": 2,
+    "GPS_RAW_INT": 5,
+    "EKF_STATUS_REPORT": 5,
+    "VIBRATION": 5,
+    "GLOBAL_POSITION_INT": 10,
+    "LOCAL_POSITION_NED": 50,
+    "NAV_CONTROLLER_OUTPUT": 10,
+    "VFR_HUD": 10,
+    "SERVO_OUTPUT_RAW": 10,
+    "RC_CHANNELS": 10,
+    "SCALED_PRESSURE": 10,
+    "AHRS": 10,
+    "AHRS2": 10,
+    "TIMESYNC": 10,
+    "RAW_IMU": 50,
+    "SCALED_IMU2": 50,
+    "ATTITUDE": 50,
+}
+SUBSCRIBED_TYPES = ["HEARTBEAT", "ATTITUDE", "LOCAL_POSITION_NED"]
+RECORDING_S = 60
+# Bytes handed to the parser at a time, like the reads of a receiver
+CHUNK_SIZE = 4096
+REPEAT_COUNT = 3
+
+
+def create_message(message_type: str, random_generator: random.Random) -> object:
+    """
+    Returns a message of the type with random field values.
+    """
+    message_class = getattr(mavutil.mavlink, f"MAVLink_{message_type.lower()}_message")
+    # Array lengths are in wire order, the constructor takes fields in definition order
+    array_lengths = dict(zip(message_class.ordered_fieldnames, message_class.array_lengths))
+    fields = []
+    for field_name, field_type in zip(message_class.fieldnames, message_class.fieldtypes):
+        array_length = array_lengths[field_name]
+        if field_type == "char":
+            fields.append(b"")
+        elif array_length > 0:
+            fields.append([random_generator.randint(0, 100) for _ in range(array_length)])
+        elif field_type in ["float", "double"]:
+            fields.append(random_generator.uniform(-100.0, 100.0))
+        else:
+            fields.append(random_generator.randint(0, 100))
+
+    return message_class(*fields)
+
+
+def record_stream(duration: float) -> bytes:
+    """
+    Returns the encoded stream the autopilot sends in the duration in seconds, in send order.
+    """
+    random_generator = random.Random(0)
+    timed_messages = []
+    for message_type, rate in MESSAGE_RATES.items():
+        # Streams start at different times, like the autopilot
+        offset = random_generator.uniform(0.0, 1.0 / rate)
+        for index in range(int(duration * rate)):
+            timed_messages.append((offset + index / rate, message_type))
+
+    timed_messages.sort()
+    encoder = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+    frames = []
+    for _, message_type in timed_messages:
+        frames.append(create_message(message_type, random_generator).pack(encoder))
+        encoder.seq = (encoder.seq + 1) % 256
+
+    return b"".join(frames)
+
+
+def parse_decoding_all(stream: bytes) -> int:
+    """
+    Decodes every message, keeping the subscribed types.
+
+    Returns the number of subscribed messages.
+    """
+    decoder = mavutil.mavlink.MAVLink(None)
+    decoder.robust_parsing = True
+    kept_count = 0
+    for start in range(0, len(stream), CHUNK_SIZE):
+        for msg in decoder.parse_buffer(stream[start : start + CHUNK_SIZE]) or []:
+            if msg.get_type() in SUBSCRIBED_TYPES:
+                kept_count += 1
+
+    return kept_count
+
+
+def parse_prefiltered(stream: bytes) -> int:
+    """
+    Checks every frame, decoding the subscribed types.
+
+    Returns the number of subscribed messages.
+    """
+    parser = mavlink_frame.FrameParser()
+    decoder = mavutil.mavlink.MAVLink(None)
+    message_ids = mavlink_frame.get_message_ids(SUBSCRIBED_TYPES)
+    kept_count = 0
+    for start in range(0, len(stream), CHUNK_SIZE):
+        for _, frame in parser.parse(stream[start : start + CHUNK_SIZE], message_ids):
+            decoder.decode(bytearray(frame))
+            kept_count += 1
+
+    return kept_count
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    stream = record_stream(RECORDING_S)
+    message_count = sum(int(RECORDING_S * rate) for rate in MESSAGE_RATES.values())
+    print(
+        f"Recording: {RECORDING_S} s, "
+        f"{message_count} messages ({message_count / RECORDING_S:.0f}/s), "
+        f"{len(stream)} bytes, {len(MESSAGE_RATES)} types"
+    )
+
+    for name, parse in [("decode all", parse_decoding_all), ("prefilter", parse_prefiltered)]:
+        best_time = None
+        kept_count = 0
+        for _ in range(REPEAT_COUNT):
+            start_time = time.perf_counter()
+            kept_count = parse(stream)
+            elapsed = time.perf_counter() - start_time
+            best_time = elapsed if best_time is None else min(best_time, elapsed)
+
+        print(
+            f"{name:>10}: "
+            f"{best_time / message_count * 1e6:.2f} us/message, "
+            f"{best_time / RECORDING_S * 100:.2f}% of a CPU at the stream rate, "
+            f"kept {kept_count}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
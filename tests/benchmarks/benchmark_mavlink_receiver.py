@@ -0,0 +1,209 @@
+"""
+Compare the CPU used and the latency from the drone sending a message to its handler, when
+receiving with recv_match() and when receiving with the event driven MavlinkReceiver .
+To run:
+```
+python -m tests.benchmarks.benchmark_mavlink_receiver
+```
+"""
+
+import ctypes
+import multiprocessing as mp
+import statistics
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from utilities import mavlink_receiver
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+DRONE_CONNECTION_STRING = "tcpin:localhost:12349"
+CONNECTION_STRING = "tcp:localhost:12349"
+# Name and recv_match() timeout of each design, None for the receiver
+DESIGNS = [
+    ("recv_match, 10 ms timeout", 0.01),
+    ("recv_match, 200 ms timeout", 0.2),
+    ("receiver", None),
+]
+RUN_S = 5.0
+# Long enough for the mock drone to listen before connecting
+DRONE_START_S = 0.5
+# Timed messages sent every tick, with other messages the reader has to parse past
+DRONE_TICK_S = 0.005
+DRONE_OTHER_COUNT = 20
+TIMED_TYPE = "SYSTEM_TIME"
+MAX_SAMPLE_COUNT = int(RUN_S / DRONE_TICK_S) * 2
+RECEIVER_WAIT_TIMEOUT_S = 0.5
+JOIN_TIMEOUT_S = 5
+# Time after the drone stops sending for the reader to read what was sent
+DRAIN_S = 0.5
+# Time the drone keeps the connection open after that, so the reader exits before it closes
+DRONE_LINGER_S = 1.0
+
+
+def mock_drone(run_time: float) -> None:
+    """
+    Sends messages carrying the time they were sent, among other messages.
+    """
+    connection = mavutil.mavlink_connection(
+        DRONE_CONNECTION_STRING, source_system=1, source_component=0
+    )
+
+    # Accept the connection
+    while connection.recv_match(blocking=True, timeout=DRONE_TICK_S) is None:
+        pass
+
+    start_time = time.monotonic()
+    next_send_time = start_time
+    while time.monotonic() - start_time < run_time:
+        next_send_time += DRONE_TICK_S
+        time.sleep(max(0.0, next_send_time - time.monotonic()))
+
+        for _ in range(DRONE_OTHER_COUNT):
+            connection.mav.attitude_send(0, 0.0, 0.0, 0.1, 0.0, 0.0, 0.0)
+
+        # Microseconds of time.monotonic(), which every process shares
+        connection.mav.system_time_send(time.monotonic_ns() // 1000, 0)
+
+    time.sleep(DRAIN_S + DRONE_LINGER_S)
+
+
+def reader_worker(
+    connection: mavutil.mavfile,
+    recv_match_timeout: "float | None",
+    latencies: "mp.Array",
+    latency_count: "mp.Value",
+    cpu_time: "mp.Value",
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Receives the timed messages, recording the latency of each and the CPU time used.
+    """
+
+    def handle(msg: object) -> None:
+        if latency_count.value < len(latencies):
+            latencies[latency_count.value] = time.monotonic() - msg.time_unix_usec / 1e6
+            latency_count.value += 1
+
+    controller.check_pause()
+    start_cpu_time = time.process_time()
+    if recv_match_timeout is None:
+        receiver = mavlink_receiver.MavlinkReceiver(connection, controller)
+        receiver.subscribe([TIMED_TYPE], handle)
+        while not controller.is_exit_requested():
+            _, is_open = receiver.poll(RECEIVER_WAIT_TIMEOUT_S)
+            if not is_open:
+                break
+
+        receiver.close()
+    else:
+        while not controller.is_exit_requested():
+            msg = connection.recv_match(type=TIMED_TYPE, blocking=True, timeout=recv_match_timeout)
+            if msg is not None:
+                handle(msg)
+
+    cpu_time.value = time.process_time() - start_cpu_time
+
+
+def run_design(
+    recv_match_timeout: "float | None", local_logger: logger.Logger
+) -> "tuple[list[float], float] | None":
+    """
+    Runs the drone for RUN_S with the reader of the design.
+
+    Returns the latency in seconds of each timed message, and the CPU time of the reader in
+    seconds, None if the worker could not be created.
+    """
+    latencies = mp.RawArray(ctypes.c_double, MAX_SAMPLE_COUNT)
+    latency_count = mp.RawValue(ctypes.c_int64, 0)
+    cpu_time = mp.RawValue(ctypes.c_double, 0.0)
+
+    drone = mp.Process(target=mock_drone, args=(RUN_S,))
+    drone.start()
+    time.sleep(DRONE_START_S)
+
+    connection = mavutil.mavlink_connection(CONNECTION_STRING)
+    # Accepted by the drone once it reads something
+    connection.mav.heartbeat_send(
+        mavutil.mavlink.MAV_TYPE_GCS, mavutil.mavlink.MAV_AUTOPILOT_INVALID, 0, 0, 0
+    )
+
+    controller = worker_controller.WorkerController()
+    result, worker_properties = worker_manager.WorkerProperties.create(
+        count=1,
+        target=reader_worker,
+        work_arguments=(connection, recv_match_timeout, latencies, latency_count, cpu_time),
+        input_queues=[],
+        output_queues=[],
+        controller=controller,
+        local_logger=local_logger,
+    )
+    if not result:
+        return None
+
+    # Get Pylance to stop complaining
+    assert worker_properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(worker_properties, local_logger)
+    if not result:
+        return None
+
+    # Get Pylance to stop complaining
+    assert manager is not None
+
+    manager.start_workers()
+    time.sleep(RUN_S + DRAIN_S)
+
+    controller.request_exit()
+    manager.join_workers(time.monotonic() + JOIN_TIMEOUT_S)
+    drone.join()
+    connection.close()
+
+    return list(latencies[: latency_count.value]), cpu_time.value
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    result, local_logger = logger.Logger.create("benchmark_mavlink_receiver", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    for name, recv_match_timeout in DESIGNS:
+        measurements = run_design(recv_match_timeout, local_logger)
+        if measurements is None:
+            print("ERROR: Failed to create worker")
+            return -1
+
+        latencies, cpu_time = measurements
+        if len(latencies) == 0:
+            print(f"{name:>26}: no messages received")
+            continue
+
+        latencies.sort()
+        print(
+            f"{name:>26}: "
+            f"CPU {cpu_time / (RUN_S + DRAIN_S) * 100:.1f}%, "
+            f"received {len(latencies)}, "
+            f"latency median {statistics.median(latencies) * 1e3:.3f} ms, "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.3f} ms, "
+            f"max {latencies[-1] * 1e3:.3f} ms"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,194 @@
+"""
+Compare the messages received from a drone that drops the connection every few seconds, the time
+to receive again once the drone is back, and the longest a read blocks the reader, with no
+reconnect, with pymavlink's autoreconnect, and with the ReconnectingConnection .
+To run:
+```
+python -m tests.benchmarks.benchmark_mavlink_reconnect
+```
+"""
+
+import contextlib
+import ctypes
+import multiprocessing as mp
+import os
+import statistics
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from utilities import mavlink_reconnect
+
+
+DRONE_CONNECTION_STRING = "tcpin:localhost:12350"
+CONNECTION_STRING = "tcp:localhost:12350"
+DESIGNS = ["no reconnect", "pymavlink autoreconnect", "reconnecting connection"]
+RUN_S = 20.0
+# Long enough for the mock drone to listen before connecting
+DRONE_START_S = 0.5
+# The drone sends for DRONE_UP_S, then closes the connection and stops listening for the next
+# of the outages, of lengths that do not line up with any retry period
+DRONE_UP_S = 2.0
+DRONE_OUTAGES_S = [0.5, 1.3, 2.2, 0.8]
+DRONE_TICK_S = 0.01
+TIMED_TYPE = "SYSTEM_TIME"
+MAX_SAMPLE_COUNT = int(RUN_S / DRONE_TICK_S) * 2
+MAX_OUTAGE_COUNT = int(RUN_S / DRONE_UP_S) + 2
+# Longest a read should wait, like a worker checking for exit or pause
+READ_TIMEOUT_S = 0.1
+RECONNECT_POLICY = mavlink_reconnect.ReconnectPolicy()
+
+
+def mock_drone(run_time: float, up_times: "mp.Array", up_count: "mp.Value") -> None:
+    """
+    Sends timed messages, dropping the connection every DRONE_UP_S for each of DRONE_OUTAGES_S
+    in turn.
+    """
+    start_time = time.monotonic()
+    outage_index = 0
+    while time.monotonic() - start_time < run_time:
+        connection = mavutil.mavlink_connection(
+            DRONE_CONNECTION_STRING, source_system=1, source_component=0
+        )
+        up_times[up_count.value] = time.monotonic()
+        up_count.value += 1
+
+        up_time = time.monotonic()
+        next_send_time = up_time
+        while time.monotonic() - up_time < DRONE_UP_S:
+            next_send_time += DRONE_TICK_S
+            time.sleep(max(0.0, next_send_time - time.monotonic()))
+
+            # Accepts the connection
+            connection.recv_match(blocking=False)
+            connection.mav.system_time_send(time.monotonic_ns() // 1000, 0)
+
+        connection.close()
+        time.sleep(DRONE_OUTAGES_S[outage_index % len(DRONE_OUTAGES_S)])
+        outage_index += 1
+
+
+def reader(
+    design: str,
+    run_time: float,
+    receive_times: "mp.Array",
+    receive_count: "mp.Value",
+    longest_read: "mp.Value",
+    cpu_time: "mp.Value",
+) -> None:
+    """
+    Reads the timed messages with the design, recording when each arrived.
+    """
+    result, local_logger = logger.Logger.create("benchmark_mavlink_reconnect", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    if design == "reconnecting connection":
+        result, connection = mavlink_reconnect.ReconnectingConnection.create(
+            CONNECTION_STRING, RECONNECT_POLICY, local_logger
+        )
+        if not result:
+            return
+    else:
+        connection = mavutil.mavlink_connection(
+            CONNECTION_STRING, autoreconnect=design == "pymavlink autoreconnect"
+        )
+
+    start_cpu_time = time.process_time()
+    end_time = time.monotonic() + run_time
+    # pymavlink prints every end of stream and reconnect attempt
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        while time.monotonic() < end_time:
+            read_start_time = time.monotonic()
+            try:
+                msg = connection.recv_match(type=TIMED_TYPE, blocking=True, timeout=READ_TIMEOUT_S)
+            except OSError:
+                # Failed reconnect of pymavlink
+                msg = None
+
+            longest_read.value = max(longest_read.value, time.monotonic() - read_start_time)
+            if msg is not None and receive_count.value < len(receive_times):
+                receive_times[receive_count.value] = time.monotonic()
+                receive_count.value += 1
+
+    cpu_time.value = time.process_time() - start_cpu_time
+    if design == "reconnecting connection":
+        print(f"{'':>25}  {connection.get_status()}")
+
+    connection.close()
+
+
+def run_design(design: str) -> "tuple[list[float], list[float], float, float]":
+    """
+    Runs the drone for RUN_S with the reader of the design.
+
+    Returns the times each timed message was received and each time the drone started
+    listening, the longest read in seconds, and the CPU time of the reader in seconds.
+    """
+    receive_times = mp.RawArray(ctypes.c_double, MAX_SAMPLE_COUNT)
+    receive_count = mp.RawValue(ctypes.c_int64, 0)
+    up_times = mp.RawArray(ctypes.c_double, MAX_OUTAGE_COUNT)
+    up_count = mp.RawValue(ctypes.c_int64, 0)
+    longest_read = mp.RawValue(ctypes.c_double, 0.0)
+    cpu_time = mp.RawValue(ctypes.c_double, 0.0)
+
+    drone = mp.Process(target=mock_drone, args=(RUN_S, up_times, up_count))
+    drone.start()
+    time.sleep(DRONE_START_S)
+
+    reader_process = mp.Process(
+        target=reader,
+        args=(design, RUN_S, receive_times, receive_count, longest_read, cpu_time),
+    )
+    reader_process.start()
+    reader_process.join()
+    drone.join()
+
+    return (
+        list(receive_times[: receive_count.value]),
+        list(up_times[: up_count.value]),
+        longest_read.value,
+        cpu_time.value,
+    )
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    for design in DESIGNS:
+        receive_times, up_times, longest_read, cpu_time = run_design(design)
+
+        # Time from the drone listening again to the first message received after
+        delays = []
+        for up_time in up_times[1:]:
+            later_times = [receive_time for receive_time in receive_times if receive_time > up_time]
+            if len(later_times) > 0:
+                delays.append(later_times[0] - up_time)
+
+        delay_text = "never"
+        if len(delays) > 0:
+            delay_text = f"median {statistics.median(delays) * 1e3:.0f} ms"
+
+        print(
+            f"{design:>25}: "
+            f"received {len(receive_times)} in {RUN_S:.0f} s, "
+            f"receiving again after {len(delays)}/{len(up_times) - 1} outages, {delay_text}, "
+            f"longest read {longest_read * 1e3:.0f} ms, "
+            f"CPU {cpu_time / RUN_S * 100:.1f}%"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,259 @@
+"""
+Compare the messages delivered to the heartbeat and telemetry readers when both read the shared
+connection, and when the MAVLink router alone reads it and routes messages by type.
+To run:
+```
+python -m tests.benchmarks.benchmark_mavlink_router
+```
+"""
+
+import ctypes
+import multiprocessing as mp
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from utilities import mavlink_router
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+DRONE_CONNECTION_STRING = "tcpin:localhost:12347"
+CONNECTION_STRING = "tcp:localhost:12347"
+DESIGNS = ["shared connection", "router"]
+RUN_S = 5.0
+# Long enough for the mock drone to listen before connecting, and for readers to start
+DRONE_START_S = 0.5
+DRONE_TICK_S = 0.01
+# Messages of each type sent every tick, heartbeats are sent every HEARTBEAT_TICKS ticks
+DRONE_TELEMETRY_BURST = 10
+DRONE_HEARTBEAT_TICKS = 10
+HEARTBEAT_TYPES = ["HEARTBEAT"]
+TELEMETRY_TYPES = ["ATTITUDE", "LOCAL_POSITION_NED"]
+QUEUE_MAX_SIZE = 100
+JOIN_TIMEOUT_S = 5
+# Time after the drone stops sending for delivered messages to be read
+DRAIN_S = 0.5
+# Time the drone keeps the connection open after that, so readers exit before it closes
+DRONE_LINGER_S = 1.0
+
+
+def mock_drone(run_time: float, heartbeat_count: "mp.Value", telemetry_count: "mp.Value") -> None:
+    """
+    Sends heartbeats and bursts of telemetry, counting each.
+    """
+    connection = mavutil.mavlink_connection(
+        DRONE_CONNECTION_STRING, source_system=1, source_component=0
+    )
+
+    # Accept the connection
+    while connection.recv_match(blocking=True, timeout=DRONE_TICK_S) is None:
+        pass
+
+    start_time = time.monotonic()
+    tick = 0
+    while time.monotonic() - start_time < run_time:
+        if tick % DRONE_HEARTBEAT_TICKS == 0:
+            connection.mav.heartbeat_send(
+                mavutil.mavlink.MAV_TYPE_GENERIC, mavutil.mavlink.MAV_AUTOPILOT_GENERIC, 0, 0, 0
+            )
+            heartbeat_count.value += 1
+
+        time_boot_ms = int((time.monotonic() - start_time) * 1000)
+        for _ in range(DRONE_TELEMETRY_BURST):
+            connection.mav.attitude_send(time_boot_ms, 0.0, 0.0, 0.1, 0.0, 0.0, 0.0)
+            connection.mav.local_position_ned_send(time_boot_ms, 1.0, 2.0, -3.0, 0.0, 0.0, 0.0)
+            telemetry_count.value += 2
+
+        tick += 1
+        time.sleep(DRONE_TICK_S)
+
+    time.sleep(DRAIN_S + DRONE_LINGER_S)
+
+
+def reader_worker(
+    connection: "mavutil.mavfile | mavlink_router.RoutedConnection",
+    message_types: "list[str]",
+    received_count: "mp.Value",
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Receives messages of the types like the heartbeat receiver and telemetry, counting each.
+    """
+    controller.check_pause()
+    while not controller.is_exit_requested():
+        try:
+            msg = connection.recv_match(type=message_types, blocking=True, timeout=0.1)
+        except EOFError:
+            break
+
+        if msg is not None and msg.get_type() in message_types:
+            received_count.value += 1
+
+
+def create_manager(
+    target: "(...) -> object",  # type: ignore
+    work_arguments: "tuple",
+    controller: worker_controller.WorkerController,
+    local_logger: logger.Logger,
+) -> "worker_manager.WorkerManager | None":
+    """
+    Creates a pool of 1 worker process.
+    """
+    result, worker_properties = worker_manager.WorkerProperties.create(
+        count=1,
+        target=target,
+        work_arguments=work_arguments,
+        input_queues=[],
+        output_queues=[],
+        controller=controller,
+        local_logger=local_logger,
+    )
+    if not result:
+        return None
+
+    # Get Pylance to stop complaining
+    assert worker_properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(worker_properties, local_logger)
+    if not result:
+        return None
+
+    return manager
+
+
+def run_design(design: str, local_logger: logger.Logger) -> "tuple[int, int, int, int] | None":
+    """
+    Runs the drone for RUN_S with the readers of the design.
+
+    Returns the heartbeats and telemetry messages sent, and the heartbeats and telemetry
+    messages received, None if the workers could not be created.
+    """
+    sent_heartbeat_count = mp.RawValue(ctypes.c_int64, 0)
+    sent_telemetry_count = mp.RawValue(ctypes.c_int64, 0)
+    received_heartbeat_count = mp.RawValue(ctypes.c_int64, 0)
+    received_telemetry_count = mp.RawValue(ctypes.c_int64, 0)
+
+    drone = mp.Process(target=mock_drone, args=(RUN_S, sent_heartbeat_count, sent_telemetry_count))
+    drone.start()
+    time.sleep(DRONE_START_S)
+
+    connection = mavutil.mavlink_connection(CONNECTION_STRING)
+    # Accepted by the drone once it reads something
+    connection.mav.heartbeat_send(
+        mavutil.mavlink.MAV_TYPE_GCS, mavutil.mavlink.MAV_AUTOPILOT_INVALID, 0, 0, 0
+    )
+
+    controller = worker_controller.WorkerController()
+    mp_manager = mp.Manager()
+    queues = []
+    heartbeat_connection = connection
+    telemetry_connection = connection
+    managers = []
+    if design == "router":
+        heartbeat_subscription = mavlink_router.Subscription(
+            HEARTBEAT_TYPES,
+            queue_proxy_wrapper.QueueProxyWrapper(
+                mp_manager, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+            ),
+        )
+        telemetry_subscription = mavlink_router.Subscription(
+            TELEMETRY_TYPES,
+            queue_proxy_wrapper.QueueProxyWrapper(
+                mp_manager, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+            ),
+        )
+        queues = [heartbeat_subscription.queue, telemetry_subscription.queue]
+        heartbeat_connection = mavlink_router.RoutedConnection(
+            connection, heartbeat_subscription, controller
+        )
+        telemetry_connection = mavlink_router.RoutedConnection(
+            connection, telemetry_subscription, controller
+        )
+        managers.append(
+            create_manager(
+                mavlink_router.mavlink_router_worker,
+                (connection, [heartbeat_subscription, telemetry_subscription]),
+                controller,
+                local_logger,
+            )
+        )
+
+    managers += [
+        create_manager(
+            reader_worker,
+            (heartbeat_connection, HEARTBEAT_TYPES, received_heartbeat_count),
+            controller,
+            local_logger,
+        ),
+        create_manager(
+            reader_worker,
+            (telemetry_connection, TELEMETRY_TYPES, received_telemetry_count),
+            controller,
+            local_logger,
+        ),
+    ]
+    if None in managers:
+        return None
+
+    for manager in managers:
+        manager.start_workers()
+
+    time.sleep(RUN_S + DRAIN_S)
+
+    controller.request_exit()
+    worker_manager.WorkerManager.join_all(managers, time.monotonic() + JOIN_TIMEOUT_S)
+    drone.join()
+
+    for subscription_queue in queues:
+        subscription_queue.release()
+
+    mp_manager.shutdown()
+    connection.close()
+
+    return (
+        sent_heartbeat_count.value,
+        sent_telemetry_count.value,
+        received_heartbeat_count.value,
+        received_telemetry_count.value,
+    )
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    result, local_logger = logger.Logger.create("benchmark_mavlink_router", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    for design in DESIGNS:
+        counts = run_design(design, local_logger)
+        if counts is None:
+            print("ERROR: Failed to create workers")
+            return -1
+
+        sent_heartbeat_count, sent_telemetry_count, heartbeat_count, telemetry_count = counts
+        print(
+            f"{design:>17}: "
+            f"sent {(sent_heartbeat_count + sent_telemetry_count) / RUN_S:.0f} messages/s, "
+            f"delivered {(heartbeat_count + telemetry_count) / RUN_S:.0f} messages/s, "
+            f"heartbeats {heartbeat_count}/{sent_heartbeat_count}, "
+            f"telemetry {telemetry_count}/{sent_telemetry_count}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,288 @@
+"""
+Compare the writes and the sequence numbers received by the drone when the heartbeat sender and
+command send on the shared connection, and when they submit to the MAVLink sender.
+To run:
+```
+python -m tests.benchmarks.benchmark_mavlink_sender
+```
+"""
+
+import ctypes
+import multiprocessing as mp
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from utilities import mavlink_sender
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+DRONE_CONNECTION_STRING = "tcpin:localhost:12348"
+CONNECTION_STRING = "tcp:localhost:12348"
+DESIGNS = ["shared connection", "sender"]
+RUN_S = 5.0
+# Long enough for the mock drone to listen before connecting
+DRONE_START_S = 0.5
+DRONE_TICK_S = 0.01
+# Commands sent by each command worker every tick, like a burst of telemetry decided on together
+SENDER_TICK_S = 0.01
+COMMAND_BURST = 5
+HEARTBEAT_PERIOD_S = 0.1
+COMMAND_WORKER_COUNT = 2
+QUEUE_MAX_SIZE = 100
+JOIN_TIMEOUT_S = 5
+# Time after the workers stop for the drone to read what was sent
+DRAIN_S = 0.5
+
+
+def count_writes(connection: mavutil.mavfile, write_count: "mp.Value") -> None:
+    """
+    Counts the writes to the connection by this process.
+    """
+    write = connection.write
+
+    def counting_write(buffer: bytes) -> None:
+        with write_count.get_lock():
+            write_count.value += 1
+
+        write(buffer)
+
+    connection.write = counting_write
+
+
+def mock_drone(
+    run_time: float,
+    received_count: "mp.Value",
+    seq_gap_count: "mp.Value",
+) -> None:
+    """
+    Receives heartbeats and commands, counting each and the gaps in their sequence numbers.
+    """
+    connection = mavutil.mavlink_connection(
+        DRONE_CONNECTION_STRING, source_system=1, source_component=0
+    )
+
+    previous_seq = None
+    start_time = time.monotonic()
+    while time.monotonic() - start_time < run_time:
+        msg = connection.recv_match(blocking=True, timeout=DRONE_TICK_S)
+        if msg is None or msg.get_type() not in ["HEARTBEAT", "COMMAND_LONG"]:
+            continue
+
+        seq = msg.get_header().seq
+        if previous_seq is not None and seq != (previous_seq + 1) % 256:
+            seq_gap_count.value += 1
+
+        previous_seq = seq
+        received_count.value += 1
+
+
+def heartbeat_worker(
+    connection: "mavutil.mavfile | mavlink_sender.SendingConnection",
+    sent_count: "mp.Value",
+    write_count: "mp.Value",
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Sends heartbeats like the heartbeat sender.
+    """
+    if isinstance(connection, mavutil.mavfile):
+        count_writes(connection, write_count)
+
+    while not controller.is_exit_requested():
+        connection.mav.heartbeat_send(
+            mavutil.mavlink.MAV_TYPE_GCS, mavutil.mavlink.MAV_AUTOPILOT_INVALID, 0, 0, 0
+        )
+        with sent_count.get_lock():
+            sent_count.value += 1
+
+        controller.wait(HEARTBEAT_PERIOD_S)
+
+
+def command_worker(
+    connection: "mavutil.mavfile | mavlink_sender.SendingConnection",
+    sent_count: "mp.Value",
+    write_count: "mp.Value",
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Sends bursts of commands like command deciding on a batch of telemetry.
+    """
+    if isinstance(connection, mavutil.mavfile):
+        count_writes(connection, write_count)
+
+    while not controller.is_exit_requested():
+        for _ in range(COMMAND_BURST):
+            connection.mav.command_long_send(
+                1, 0, mavutil.mavlink.MAV_CMD_CONDITION_YAW, 0, 10.0, 5.0, 0, 1, 0, 0, 0
+            )
+            with sent_count.get_lock():
+                sent_count.value += 1
+
+        controller.wait(SENDER_TICK_S)
+
+
+def sender_worker(
+    connection: mavutil.mavfile,
+    write_count: "mp.Value",
+    send_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    MAVLink sender, counting its writes.
+    """
+    count_writes(connection, write_count)
+    mavlink_sender.mavlink_sender_worker(
+        connection, {}, mavlink_sender.SenderStatistics(), send_queue, controller
+    )
+
+
+def create_manager(
+    count: int,
+    target: "(...) -> object",  # type: ignore
+    work_arguments: "tuple",
+    input_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    controller: worker_controller.WorkerController,
+    local_logger: logger.Logger,
+) -> "worker_manager.WorkerManager | None":
+    """
+    Creates a pool of worker processes.
+    """
+    result, worker_properties = worker_manager.WorkerProperties.create(
+        count=count,
+        target=target,
+        work_arguments=work_arguments,
+        input_queues=input_queues,
+        output_queues=[],
+        controller=controller,
+        local_logger=local_logger,
+    )
+    if not result:
+        return None
+
+    # Get Pylance to stop complaining
+    assert worker_properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(worker_properties, local_logger)
+    if not result:
+        return None
+
+    return manager
+
+
+def run_design(design: str, local_logger: logger.Logger) -> "tuple[int, int, int, int] | None":
+    """
+    Runs the senders for RUN_S with the design.
+
+    Returns the messages sent, the messages received by the drone, the gaps in their sequence
+    numbers, and the writes to the connection, None if the workers could not be created.
+    """
+    # Counted by several workers
+    sent_count = mp.Value(ctypes.c_int64, 0)
+    received_count = mp.RawValue(ctypes.c_int64, 0)
+    seq_gap_count = mp.RawValue(ctypes.c_int64, 0)
+    write_count = mp.Value(ctypes.c_int64, 0)
+
+    drone = mp.Process(target=mock_drone, args=(RUN_S + DRAIN_S * 2, received_count, seq_gap_count))
+    drone.start()
+    time.sleep(DRONE_START_S)
+
+    connection = mavutil.mavlink_connection(CONNECTION_STRING)
+
+    controller = worker_controller.WorkerController()
+    mp_manager = mp.Manager()
+    send_queue = None
+    sending_connection = connection
+    managers = []
+    if design == "sender":
+        send_queue = queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+        )
+        sending_connection = mavlink_sender.SendingConnection(connection, send_queue)
+        managers.append(
+            create_manager(
+                1, sender_worker, (connection, write_count), [send_queue], controller, local_logger
+            )
+        )
+
+    managers += [
+        create_manager(
+            1,
+            heartbeat_worker,
+            (sending_connection, sent_count, write_count),
+            [],
+            controller,
+            local_logger,
+        ),
+        create_manager(
+            COMMAND_WORKER_COUNT,
+            command_worker,
+            (sending_connection, sent_count, write_count),
+            [],
+            controller,
+            local_logger,
+        ),
+    ]
+    if None in managers:
+        return None
+
+    for manager in managers:
+        manager.start_workers()
+
+    time.sleep(RUN_S)
+
+    controller.request_exit()
+    # Senders first, so the sender writes everything they submitted
+    for manager in reversed(managers):
+        manager.join_workers(time.monotonic() + JOIN_TIMEOUT_S)
+
+    drone.join()
+
+    if send_queue is not None:
+        send_queue.release()
+
+    mp_manager.shutdown()
+    connection.close()
+
+    return sent_count.value, received_count.value, seq_gap_count.value, write_count.value
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    result, local_logger = logger.Logger.create("benchmark_mavlink_sender", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    for design in DESIGNS:
+        counts = run_design(design, local_logger)
+        if counts is None:
+            print("ERROR: Failed to create workers")
+            return -1
+
+        sent_count, received_count, seq_gap_count, write_count = counts
+        print(
+            f"{design:>17}: "
+            f"sent {sent_count / RUN_S:.0f} messages/s, "
+            f"received {received_count}/{sent_count}, "
+            f"sequence gaps {seq_gap_count}, "
+            f"writes {write_count} ({write_count / max(sent_count, 1):.2f} per message)"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,124 @@
+"""
+Compare throughput and latency of the queue backends. To run:
+```
+python -m tests.benchmarks.benchmark_queue_backend
+```
+"""
+
+import multiprocessing as mp
+import multiprocessing.managers
+import statistics
+import time
+
+from utilities.workers import queue_proxy_wrapper
+
+
+THROUGHPUT_ITEM_COUNT = 20_000
+ROUND_TRIP_COUNT = 2_000
+QUEUE_MAX_SIZE = 10
+# Roughly the size of a pickled TelemetryData
+PAYLOAD = {f"field_{i}": float(i) for i in range(13)}
+
+
+def producer(output_queue: queue_proxy_wrapper.QueueProxyWrapper, item_count: int) -> None:
+    """
+    Puts items into the queue, followed by a sentinel.
+    """
+    for _ in range(item_count):
+        output_queue.queue.put(PAYLOAD)
+
+    output_queue.queue.put(None)
+
+
+def echo(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+) -> None:
+    """
+    Puts every item received back, until the sentinel.
+    """
+    while True:
+        item = input_queue.queue.get()
+        output_queue.queue.put(item)
+        if item is None:
+            return
+
+
+def measure_throughput(
+    mp_manager: multiprocessing.managers.SyncManager, backend: queue_proxy_wrapper.QueueBackend
+) -> float:
+    """
+    Moves items from a producer process to this process as fast as possible.
+
+    Returns the throughput in items per second.
+    """
+    transfer_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, backend)
+    producer_process = mp.Process(target=producer, args=(transfer_queue, THROUGHPUT_ITEM_COUNT))
+
+    start_time = time.perf_counter()
+    producer_process.start()
+    while transfer_queue.queue.get() is not None:
+        pass
+
+    elapsed = time.perf_counter() - start_time
+    producer_process.join()
+    transfer_queue.release()
+
+    return THROUGHPUT_ITEM_COUNT / elapsed
+
+
+def measure_latency(
+    mp_manager: multiprocessing.managers.SyncManager, backend: queue_proxy_wrapper.QueueBackend
+) -> "list[float]":
+    """
+    Sends single items to an echo process and waits for each to come back.
+
+    Returns the one way latency of each item in seconds.
+    """
+    to_echo_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, backend)
+    from_echo_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, backend)
+    echo_process = mp.Process(target=echo, args=(to_echo_queue, from_echo_queue))
+    echo_process.start()
+
+    latencies = []
+    for _ in range(ROUND_TRIP_COUNT):
+        start_time = time.perf_counter()
+        to_echo_queue.queue.put(PAYLOAD)
+        from_echo_queue.queue.get()
+        latencies.append((time.perf_counter() - start_time) / 2)
+
+    to_echo_queue.queue.put(None)
+    from_echo_queue.queue.get()
+    echo_process.join()
+    to_echo_queue.release()
+    from_echo_queue.release()
+
+    return latencies
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    mp_manager = mp.Manager()
+
+    for backend in queue_proxy_wrapper.QueueBackend:
+        throughput = measure_throughput(mp_manager, backend)
+        latencies_us = sorted(latency * 1e6 for latency in measure_latency(mp_manager, backend))
+        print(
+            f"{backend.name:>13}: {throughput:>8.0f} items/s, "
+            f"latency median {statistics.median(latencies_us):>4.0f} us, "
+            f"p99 {latencies_us[int(len(latencies_us) * 0.99)]:>4.0f} us"
+        )
+
+    mp_manager.shutdown()
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
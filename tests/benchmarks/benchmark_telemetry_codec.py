@@ -0,0 +1,80 @@
+"""
+Compare the fixed layout TelemetryData encoding against pickle. To run:
+```
+python -m tests.benchmarks.benchmark_telemetry_codec
+```
+"""
+
+import pickle
+import timeit
+
+from modules.telemetry import telemetry
+
+
+REPEAT_COUNT = 5
+CALL_COUNT = 100_000
+
+
+def best_time_per_call_us(statement: "(...) -> object") -> float:  # type: ignore
+    """
+    Returns the best time per call of the statement over REPEAT_COUNT runs, in microseconds.
+    """
+    return min(timeit.repeat(statement, number=CALL_COUNT, repeat=REPEAT_COUNT)) / CALL_COUNT * 1e6
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    telemetry_data = telemetry.TelemetryData(
+        time_since_boot=123_456,
+        x=1.5,
+        y=-2.25,
+        z=30.0,
+        x_velocity=0.1,
+        y_velocity=0.2,
+        z_velocity=-0.3,
+        roll=0.01,
+        pitch=-0.02,
+        yaw=1.1071487177940904,
+        roll_speed=0.001,
+        pitch_speed=0.002,
+        yaw_speed=0.003,
+    )
+
+    encoded = telemetry_data.to_bytes()
+    pickled = pickle.dumps(telemetry_data, pickle.HIGHEST_PROTOCOL)
+
+    # Sanity check before timing
+    decoded = telemetry.TelemetryData.from_bytes(encoded)
+    if vars(decoded) != vars(telemetry_data):
+        print("ERROR: Round trip changed the telemetry data")
+        return -1
+
+    results = [
+        (
+            "to_bytes/from_bytes",
+            len(encoded),
+            best_time_per_call_us(telemetry_data.to_bytes),
+            best_time_per_call_us(lambda: telemetry.TelemetryData.from_bytes(encoded)),
+        ),
+        (
+            "pickle",
+            len(pickled),
+            best_time_per_call_us(lambda: pickle.dumps(telemetry_data, pickle.HIGHEST_PROTOCOL)),
+            best_time_per_call_us(lambda: pickle.loads(pickled)),
+        ),
+    ]
+
+    for name, size, encode_us, decode_us in results:
+        print(f"{name:>19}: {size:>4} bytes, encode {encode_us:.2f} us, decode {decode_us:.2f} us")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,163 @@
+"""
+Measure WorkerController per loop overhead and exit propagation latency, for busy workers and for
+periodic workers that sleep between loops. To run:
+```
+python -m tests.benchmarks.benchmark_worker_controller
+```
+"""
+
+import ctypes
+import multiprocessing as mp
+import statistics
+import time
+
+from utilities.workers import worker_controller
+
+
+POOL_COUNT = 4
+RUN_SECONDS = 2.0
+TRIAL_COUNT = 5
+# Same as the heartbeat workers
+PERIOD_S = 1.0
+
+
+def spin_worker(
+    index: int,
+    iteration_counts: "mp.Array",
+    cpu_times: "mp.Array",
+    exit_times: "mp.Array",
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Worker loop that does nothing except the controller checks.
+    """
+    iteration_count = 0
+    start_cpu_time = time.process_time()
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        iteration_count += 1
+
+    exit_times[index] = time.perf_counter()
+    cpu_times[index] = time.process_time() - start_cpu_time
+    iteration_counts[index] = iteration_count
+
+
+def period_worker(
+    index: int,
+    exit_times: "mp.Array",
+    controller: worker_controller.WorkerController,
+    is_interruptible: bool,
+) -> None:
+    """
+    Worker loop that sleeps for the period, with time.sleep() or the controller.
+    """
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        if is_interruptible:
+            controller.wait(PERIOD_S)
+        else:
+            time.sleep(PERIOD_S)
+
+    exit_times[index] = time.perf_counter()
+
+
+def run_period_trial(is_interruptible: bool) -> float:
+    """
+    Runs POOL_COUNT periodic workers and requests exit part way through a period.
+
+    Returns the time in seconds for all workers to exit their loop.
+    """
+    controller = worker_controller.WorkerController()
+    exit_times = mp.RawArray(ctypes.c_double, POOL_COUNT)
+
+    workers = [
+        mp.Process(target=period_worker, args=(i, exit_times, controller, is_interruptible))
+        for i in range(POOL_COUNT)
+    ]
+    for worker in workers:
+        worker.start()
+
+    time.sleep(PERIOD_S * 1.5)
+
+    request_time = time.perf_counter()
+    controller.request_exit()
+    for worker in workers:
+        worker.join()
+
+    controller.clear_exit()
+
+    return max(exit_times) - request_time
+
+
+def run_trial() -> "tuple[float, float]":
+    """
+    Runs POOL_COUNT workers for RUN_SECONDS and then requests exit.
+
+    Returns the CPU time per loop iteration and the time for all workers to see the exit request,
+    both in seconds.
+    """
+    controller = worker_controller.WorkerController()
+    iteration_counts = mp.RawArray(ctypes.c_int64, POOL_COUNT)
+    cpu_times = mp.RawArray(ctypes.c_double, POOL_COUNT)
+    exit_times = mp.RawArray(ctypes.c_double, POOL_COUNT)
+
+    workers = [
+        mp.Process(
+            target=spin_worker,
+            args=(i, iteration_counts, cpu_times, exit_times, controller),
+        )
+        for i in range(POOL_COUNT)
+    ]
+    for worker in workers:
+        worker.start()
+
+    time.sleep(RUN_SECONDS)
+
+    request_time = time.perf_counter()
+    controller.request_exit()
+    for worker in workers:
+        worker.join()
+
+    controller.clear_exit()
+
+    time_per_iteration = sum(cpu_times) / sum(iteration_counts)
+    exit_latency = max(exit_times) - request_time
+
+    return time_per_iteration, exit_latency
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    times_per_iteration = []
+    exit_latencies = []
+    for _ in range(TRIAL_COUNT):
+        time_per_iteration, exit_latency = run_trial()
+        times_per_iteration.append(time_per_iteration)
+        exit_latencies.append(exit_latency)
+
+    print(
+        f"{POOL_COUNT} workers: "
+        f"loop overhead median {statistics.median(times_per_iteration) * 1e9:.0f} ns, "
+        f"exit latency median {statistics.median(exit_latencies) * 1e3:.2f} ms, "
+        f"max {max(exit_latencies) * 1e3:.2f} ms"
+    )
+
+    for is_interruptible, name in [(False, "time.sleep()"), (True, "controller.wait()")]:
+        period_exit_latencies = [run_period_trial(is_interruptible) for _ in range(TRIAL_COUNT)]
+        print(
+            f"{POOL_COUNT} workers sleeping with {name}: "
+            f"exit latency median {statistics.median(period_exit_latencies) * 1e3:.2f} ms, "
+            f"max {max(period_exit_latencies) * 1e3:.2f} ms"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,343 @@
+"""
+Compare memory and context switches of the bootcamp_main deployment with the heartbeat workers
+run as processes or as threads of main, against a local mock drone.
+To run:
+```
+python -m tests.benchmarks.benchmark_worker_executor
+```
+"""
+
+import multiprocessing as mp
+import os
+import pathlib
+import queue
+import time
+
+from pymavlink import mavutil
+
+from modules.command import command
+from modules.command import command_worker
+from modules.common.modules.logger import logger
+from modules.heartbeat import heartbeat_receiver_worker
+from modules.heartbeat import heartbeat_sender_worker
+from modules.telemetry import telemetry_worker
+from utilities.workers import priority_lanes
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+DRONE_CONNECTION_STRING = "tcpin:localhost:12346"
+CONNECTION_STRING = "tcp:localhost:12346"
+# Executor of the heartbeat sender and receiver, telemetry and command are always processes
+HEARTBEAT_EXECUTOR_KINDS = [
+    worker_manager.ExecutorKind.PROCESS,
+    worker_manager.ExecutorKind.THREAD,
+]
+# Context switches are counted after startup
+WARMUP_S = 2.0
+RUN_S = 10.0
+DRONE_TICK_S = 0.05
+DRONE_HEARTBEAT_PERIOD_S = 1.0
+DRONE_TELEMETRY_PERIOD_S = 0.1
+QUEUE_MAX_SIZE = 10
+HEARTBEAT_PERIOD_S = 1
+DISCONNECT_THRESHOLD = 5
+TELEMETRY_PERIOD_S = 1
+TARGET = command.Position(10, 20, 30)
+JOIN_TIMEOUT_S = 5
+# Long enough for the mock drone to listen before connecting
+DRONE_START_S = 0.5
+
+
+def mock_drone(run_time: float) -> None:
+    """
+    Sends heartbeats and telemetry to the deployment.
+    """
+    connection = mavutil.mavlink_connection(
+        DRONE_CONNECTION_STRING, source_system=1, source_component=0
+    )
+
+    start_time = time.monotonic()
+    last_heartbeat_time = 0.0
+    last_telemetry_time = 0.0
+    while time.monotonic() - start_time < run_time:
+        # Reading also accepts the connection
+        while connection.recv_match(blocking=False) is not None:
+            pass
+
+        now = time.monotonic()
+        if now - last_heartbeat_time >= DRONE_HEARTBEAT_PERIOD_S:
+            last_heartbeat_time = now
+            connection.mav.heartbeat_send(
+                mavutil.mavlink.MAV_TYPE_GENERIC, mavutil.mavlink.MAV_AUTOPILOT_GENERIC, 0, 0, 0
+            )
+
+        if now - last_telemetry_time >= DRONE_TELEMETRY_PERIOD_S:
+            last_telemetry_time = now
+            time_boot_ms = int((now - start_time) * 1000)
+            connection.mav.attitude_send(time_boot_ms, 0.0, 0.0, 0.1, 0.0, 0.0, 0.0)
+            connection.mav.local_position_ned_send(time_boot_ms, 1.0, 2.0, -3.0, 0.0, 0.0, 0.0)
+
+        time.sleep(DRONE_TICK_S)
+
+
+def read_status_fields(status_path: pathlib.Path, fields: "list[str]") -> "dict[str, int]":
+    """
+    Returns the integer fields of a /proc status file, 0 if it is gone.
+    """
+    values = {field: 0 for field in fields}
+    try:
+        lines = status_path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return values
+
+    for line in lines:
+        name, _, value = line.partition(":")
+        if name in values:
+            values[name] = int(value.split()[0])
+
+    return values
+
+
+def get_descendants(process_id: int) -> "list[int]":
+    """
+    Returns the process IDs of every descendant of the process.
+    """
+    descendants = []
+    for task_path in pathlib.Path(f"/proc/{process_id}/task").glob("*"):
+        try:
+            children = (task_path / "children").read_text(encoding="utf-8").split()
+        except OSError:
+            continue
+
+        for child in children:
+            descendants.append(int(child))
+            descendants.extend(get_descendants(int(child)))
+
+    return descendants
+
+
+def sample_deployment(
+    exclude_process_ids: "list[int]",
+) -> "tuple[int, int, int, dict[int, int]]":
+    """
+    Totals this process and its descendants.
+
+    Returns the process count, RSS and PSS in kB, and the context switches of each thread so far.
+    """
+    process_ids = [os.getpid()] + [
+        process_id
+        for process_id in get_descendants(os.getpid())
+        if process_id not in exclude_process_ids
+    ]
+
+    rss = 0
+    pss = 0
+    context_switch_counts = {}
+    for process_id in process_ids:
+        rss += read_status_fields(pathlib.Path(f"/proc/{process_id}/status"), ["VmRSS"])["VmRSS"]
+        pss += read_status_fields(pathlib.Path(f"/proc/{process_id}/smaps_rollup"), ["Pss"])["Pss"]
+        for task_path in pathlib.Path(f"/proc/{process_id}/task").glob("*"):
+            switches = read_status_fields(
+                task_path / "status", ["voluntary_ctxt_switches", "nonvoluntary_ctxt_switches"]
+            )
+            context_switch_counts[int(task_path.name)] = sum(switches.values())
+
+    return len(process_ids), rss, pss, context_switch_counts
+
+
+def create_manager(
+    target: "(...) -> object",  # type: ignore
+    work_arguments: "tuple",
+    input_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    controller: worker_controller.WorkerController,
+    executor_kind: worker_manager.ExecutorKind,
+    local_logger: logger.Logger,
+) -> "worker_manager.WorkerManager | None":
+    """
+    Creates a pool of 1 worker.
+    """
+    result, worker_properties = worker_manager.WorkerProperties.create(
+        count=1,
+        target=target,
+        work_arguments=work_arguments,
+        input_queues=input_queues,
+        output_queues=output_queues,
+        controller=controller,
+        local_logger=local_logger,
+        executor_kind=executor_kind,
+    )
+    if not result:
+        return None
+
+    # Get Pylance to stop complaining
+    assert worker_properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(worker_properties, local_logger)
+    if not result:
+        return None
+
+    return manager
+
+
+def run_deployment(
+    heartbeat_executor_kind: worker_manager.ExecutorKind, local_logger: logger.Logger
+) -> "tuple[int, int, int, int, int, int] | None":
+    """
+    Runs the deployment for WARMUP_S and RUN_S .
+
+    Returns the process and thread counts, RSS and PSS in kB, context switches per second, and
+    the number of heartbeat statuses main received, None if the workers could not be created.
+    """
+    drone = mp.Process(target=mock_drone, args=(WARMUP_S + RUN_S + 5.0,))
+    drone.start()
+    time.sleep(DRONE_START_S)
+
+    connection = mavutil.mavlink_connection(CONNECTION_STRING)
+
+    controller = worker_controller.WorkerController()
+    mp_manager = mp.Manager()
+    heartbeat_status_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+    )
+    telemetry_to_command_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.CONFLATING
+    )
+    command_to_main_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+    )
+    main_lanes = priority_lanes.PriorityLanes([heartbeat_status_queue, command_to_main_queue], 4)
+
+    managers = [
+        create_manager(
+            heartbeat_sender_worker.heartbeat_sender_worker,
+            (connection, HEARTBEAT_PERIOD_S),
+            [],
+            [],
+            controller,
+            heartbeat_executor_kind,
+            local_logger,
+        ),
+        create_manager(
+            heartbeat_receiver_worker.heartbeat_receiver_worker,
+            (connection, HEARTBEAT_PERIOD_S, DISCONNECT_THRESHOLD),
+            [],
+            [heartbeat_status_queue],
+            controller,
+            heartbeat_executor_kind,
+            local_logger,
+        ),
+        create_manager(
+            telemetry_worker.telemetry_worker,
+            (connection, TELEMETRY_PERIOD_S),
+            [],
+            [telemetry_to_command_queue],
+            controller,
+            worker_manager.ExecutorKind.PROCESS,
+            local_logger,
+        ),
+        create_manager(
+            command_worker.command_worker,
+            (connection, TARGET),
+            [telemetry_to_command_queue],
+            [command_to_main_queue],
+            controller,
+            worker_manager.ExecutorKind.PROCESS,
+            local_logger,
+        ),
+    ]
+    if None in managers:
+        return None
+
+    for manager in managers:
+        manager.start_workers()
+
+    start_context_switch_counts = {}
+    heartbeat_status_count = 0
+    start_time = time.monotonic()
+    while time.monotonic() - start_time < WARMUP_S + RUN_S:
+        if len(start_context_switch_counts) == 0 and time.monotonic() - start_time >= WARMUP_S:
+            _, _, _, start_context_switch_counts = sample_deployment([drone.pid])
+
+        try:
+            lane_index, _ = main_lanes.get(timeout=0.2)
+        except queue.Empty:
+            continue
+
+        if lane_index == 0:
+            heartbeat_status_count += 1
+
+    process_count, rss, pss, context_switch_counts = sample_deployment([drone.pid])
+    context_switch_count = sum(
+        count - start_context_switch_counts[thread_id]
+        for thread_id, count in context_switch_counts.items()
+        if thread_id in start_context_switch_counts
+    )
+    thread_count = read_status_fields(pathlib.Path("/proc/self/status"), ["Threads"])["Threads"]
+
+    controller.request_exit()
+    worker_manager.WorkerManager.join_all(managers, time.monotonic() + JOIN_TIMEOUT_S)
+
+    command_to_main_queue.release()
+    telemetry_to_command_queue.release()
+    heartbeat_status_queue.release()
+    mp_manager.shutdown()
+    drone.terminate()
+    drone.join()
+    connection.close()
+
+    return (
+        process_count,
+        thread_count,
+        rss,
+        pss,
+        int(context_switch_count / RUN_S),
+        heartbeat_status_count,
+    )
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    result, local_logger = logger.Logger.create("benchmark_worker_executor", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    for heartbeat_executor_kind in HEARTBEAT_EXECUTOR_KINDS:
+        deployment = run_deployment(heartbeat_executor_kind, local_logger)
+        if deployment is None:
+            print("ERROR: Failed to create workers")
+            return -1
+
+        (
+            process_count,
+            thread_count,
+            rss,
+            pss,
+            context_switch_rate,
+            heartbeat_status_count,
+        ) = deployment
+        print(
+            f"heartbeat {heartbeat_executor_kind.name.lower():>7}: "
+            f"{process_count} processes, {thread_count} threads in main, "
+            f"RSS {rss / 1024:.1f} MiB, PSS {pss / 1024:.1f} MiB, "
+            f"{context_switch_rate} context switches/s, "
+            f"{heartbeat_status_count} heartbeat statuses"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,158 @@
+"""
+Measure how long WorkerManager takes to replace a dead worker, with and without a warm spare.
+To run:
+```
+python -m tests.benchmarks.benchmark_worker_failover
+```
+"""
+
+import ctypes
+import multiprocessing as mp
+import statistics
+import time
+
+# Imported like the real workers, so a cold start pays for it under spawn
+from pymavlink import mavutil  # pylint: disable=unused-import
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+from utilities.workers import worker_restart
+
+
+START_METHODS = ["fork", "spawn"]
+SPARE_COUNTS = [0, 1]
+TRIAL_COUNT = 5
+# Long enough for the next warm spare to be ready before the worker dies
+WORKER_LIFETIME_S = 2.0
+# Long enough for a dead worker to be reaped
+EXIT_SETTLE_S = 0.1
+# Restarts at once every trial, so the restart is measured without the backoff
+RESTART_POLICY = worker_restart.RestartPolicy(max_restarts=TRIAL_COUNT, backoff_initial=0.0)
+
+
+def failover_worker(
+    start_count: "mp.Value",
+    start_time: "mp.Value",
+    exit_count: "mp.Value",
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Worker that records when it starts, then dies after WORKER_LIFETIME_S .
+    """
+    result, local_logger = logger.Logger.create("benchmark_failover_worker", False)
+    if not result:
+        print("ERROR: Worker failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    start_time.value = time.perf_counter()
+    start_count.value += 1
+
+    controller.wait(WORKER_LIFETIME_S)
+    exit_count.value += 1
+
+
+def wait_for_change(value: "mp.Value", previous: int) -> None:
+    """
+    Polls until the shared value changes.
+    """
+    while value.value == previous:
+        time.sleep(0.001)
+
+
+def run_trials(start_method: str, spare_count: int, local_logger: logger.Logger) -> "list[float]":
+    """
+    Kills the worker TRIAL_COUNT times and restarts it.
+
+    Returns the time in seconds from each restart call to the replacement running the target.
+    """
+    # Locks passed to spawn or forkserver workers cannot be created with fork
+    controller = worker_controller.WorkerController(mp.get_context(start_method))
+    start_count = mp.RawValue(ctypes.c_int64, 0)
+    start_time = mp.RawValue(ctypes.c_double, 0.0)
+    exit_count = mp.RawValue(ctypes.c_int64, 0)
+
+    result, worker_properties = worker_manager.WorkerProperties.create(
+        count=1,
+        target=failover_worker,
+        work_arguments=(start_count, start_time, exit_count),
+        input_queues=[],
+        output_queues=[],
+        controller=controller,
+        local_logger=local_logger,
+        restart_policy=RESTART_POLICY,
+        start_method=start_method,
+    )
+    if not result:
+        return []
+
+    # Get Pylance to stop complaining
+    assert worker_properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(
+        worker_properties, local_logger, spare_count
+    )
+    if not result:
+        return []
+
+    # Get Pylance to stop complaining
+    assert manager is not None
+
+    manager.start_workers()
+    wait_for_change(start_count, 0)
+
+    failover_latencies = []
+    for _ in range(TRIAL_COUNT):
+        wait_for_change(exit_count, exit_count.value)
+        time.sleep(EXIT_SETTLE_S)
+
+        previous_start_count = start_count.value
+        restart_time = time.perf_counter()
+        manager.check_and_restart_dead_workers()
+        wait_for_change(start_count, previous_start_count)
+        failover_latencies.append(start_time.value - restart_time)
+
+    controller.request_exit()
+    manager.join_workers(time.monotonic() + 5.0)
+    controller.clear_exit()
+
+    return failover_latencies
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    result, local_logger = logger.Logger.create("benchmark_worker_failover", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    for start_method in START_METHODS:
+        for spare_count in SPARE_COUNTS:
+            failover_latencies = run_trials(start_method, spare_count, local_logger)
+            if len(failover_latencies) == 0:
+                print("ERROR: Failed to create workers")
+                return -1
+
+            print(
+                f"{start_method:>5}, {spare_count} spare: "
+                f"failover median {statistics.median(failover_latencies) * 1e3:.2f} ms, "
+                f"max {max(failover_latencies) * 1e3:.2f} ms"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
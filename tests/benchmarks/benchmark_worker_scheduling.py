@@ -0,0 +1,216 @@
+"""
+Measure the jitter of the command loop under CPU load, with and without a scheduling policy.
+To run:
+```
+python -m tests.benchmarks.benchmark_worker_scheduling
+```
+"""
+
+import ctypes
+import math
+import multiprocessing as mp
+import os
+import statistics
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import closable_queue
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+from utilities.workers import worker_scheduling
+
+
+# Telemetry rate of the mock drone
+TELEMETRY_PERIOD_S = 0.01
+SAMPLE_COUNT = 1000
+WARMUP_S = 1.0
+QUEUE_MAX_SIZE = 10
+# Busy processes standing in for logging and the manager process, one per CPU
+LOAD_COUNT = os.cpu_count() or 1
+
+
+def busy_worker(cpus: "set[int] | None", stop: "mp.Value") -> None:
+    """
+    Competes for the CPUs until stopped.
+    """
+    if cpus is not None:
+        os.sched_setaffinity(0, cpus)
+
+    while not stop.value:
+        pass
+
+
+def command_loop_worker(
+    latencies: "mp.Array",
+    latency_count: "mp.Value",
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Waits for telemetry like the command worker and records the time from each put to the
+    decision on it.
+    """
+    controller.check_pause()
+    while not controller.is_exit_requested():
+        try:
+            _, send_times = controller.wait_for_items(input_queue, 0.5)
+        except closable_queue.Closed:
+            break
+
+        for send_time in send_times:
+            # The decision of Command.run()
+            yaw_diff = math.degrees(math.atan2(20.0, 10.0))
+            if yaw_diff > 180:
+                yaw_diff -= 360
+
+            if latency_count.value < len(latencies):
+                latencies[latency_count.value] = time.perf_counter() - send_time
+                latency_count.value += 1
+
+
+def get_modes() -> "list[tuple[str, worker_scheduling.SchedulingPolicy | None, set[int] | None]]":
+    """
+    Returns the name, command policy and load CPUs of each mode.
+    The command worker is pinned to the last CPU and the load to the others.
+    """
+    all_cpus = os.sched_getaffinity(0)
+    command_cpus = {max(all_cpus)}
+    # With a single CPU, the load has to share it
+    load_cpus = all_cpus - command_cpus or None
+
+    return [
+        ("unpinned", None, None),
+        ("pinned", worker_scheduling.SchedulingPolicy(cpus=command_cpus), load_cpus),
+        (
+            "pinned, nice -10",
+            worker_scheduling.SchedulingPolicy(cpus=command_cpus, nice=-10),
+            load_cpus,
+        ),
+        (
+            "pinned, SCHED_FIFO 50",
+            worker_scheduling.SchedulingPolicy(cpus=command_cpus, fifo_priority=50),
+            load_cpus,
+        ),
+    ]
+
+
+def run_mode(
+    scheduling_policy: "worker_scheduling.SchedulingPolicy | None",
+    load_cpus: "set[int] | None",
+    local_logger: logger.Logger,
+) -> "list[float] | None":
+    """
+    Sends SAMPLE_COUNT telemetry items to the command loop while the load runs.
+
+    Returns the latency in seconds of each item, None if the worker could not be created.
+    """
+    controller = worker_controller.WorkerController()
+    mp_manager = mp.Manager()
+    input_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+    )
+    latencies = mp.RawArray(ctypes.c_double, SAMPLE_COUNT)
+    latency_count = mp.RawValue(ctypes.c_int64, 0)
+
+    result, worker_properties = worker_manager.WorkerProperties.create(
+        count=1,
+        target=command_loop_worker,
+        work_arguments=(latencies, latency_count),
+        input_queues=[input_queue],
+        output_queues=[],
+        controller=controller,
+        local_logger=local_logger,
+        scheduling_policy=scheduling_policy,
+    )
+    if not result:
+        input_queue.release()
+        return None
+
+    # Get Pylance to stop complaining
+    assert worker_properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(worker_properties, local_logger)
+    if not result:
+        input_queue.release()
+        return None
+
+    # Get Pylance to stop complaining
+    assert manager is not None
+
+    stop = mp.RawValue(ctypes.c_bool, False)
+    load_processes = [
+        mp.Process(target=busy_worker, args=(load_cpus, stop)) for _ in range(LOAD_COUNT)
+    ]
+    for load_process in load_processes:
+        load_process.start()
+
+    manager.start_workers()
+    time.sleep(WARMUP_S)
+
+    next_send_time = time.perf_counter()
+    for _ in range(SAMPLE_COUNT):
+        next_send_time += TELEMETRY_PERIOD_S
+        time.sleep(max(0.0, next_send_time - time.perf_counter()))
+        input_queue.queue.put(time.perf_counter())
+
+    # Wait for the last items to be decided
+    time.sleep(WARMUP_S)
+
+    controller.request_exit()
+    manager.join_workers(time.monotonic() + 5.0)
+    stop.value = True
+    for load_process in load_processes:
+        load_process.join()
+
+    input_queue.release()
+    mp_manager.shutdown()
+
+    return list(latencies[: latency_count.value])
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    result, local_logger = logger.Logger.create("benchmark_worker_scheduling", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    for name, scheduling_policy, load_cpus in get_modes():
+        if scheduling_policy is not None:
+            result, reason = scheduling_policy.check()
+            if not result:
+                print(f"{name:>22}: skipped, {reason}")
+                continue
+
+        latencies = run_mode(scheduling_policy, load_cpus, local_logger)
+        if latencies is None:
+            print("ERROR: Failed to create workers")
+            return -1
+
+        if len(latencies) < SAMPLE_COUNT:
+            print(f"{name:>22}: only {len(latencies)} of {SAMPLE_COUNT} items were decided")
+
+        latencies.sort()
+        print(
+            f"{name:>22}: latency "
+            f"median {statistics.median(latencies) * 1e3:.3f} ms, "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.3f} ms, "
+            f"max {latencies[-1] * 1e3:.3f} ms, "
+            f"jitter (stdev) {statistics.stdev(latencies) * 1e3:.3f} ms"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,154 @@
+"""
+Measure the cold start of the four bootcamp worker pools with each start method.
+To run:
+```
+python -m tests.benchmarks.benchmark_worker_start_method
+```
+"""
+
+import importlib
+import multiprocessing as mp
+import statistics
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+# Forkserver last, its server can only be started once with the preloaded modules
+START_METHODS = ["fork", "spawn", "forkserver"]
+# Module of each pool in bootcamp_main
+POOL_MODULES = [
+    "modules.heartbeat.heartbeat_sender_worker",
+    "modules.heartbeat.heartbeat_receiver_worker",
+    "modules.telemetry.telemetry_worker",
+    "modules.command.command_worker",
+]
+# Everything this module imports, so forkserver workers only run its definitions again
+FORKSERVER_PRELOAD = ["pymavlink.mavutil", "utilities.workers.worker_manager"] + POOL_MODULES
+TRIAL_COUNT = 5
+READY_POLL_PERIOD_S = 0.001
+
+
+def cold_start_worker(pool_module: str, controller: worker_controller.WorkerController) -> None:
+    """
+    Worker that imports its pool module like the real worker, then reports ready and waits
+    for exit.
+    """
+    importlib.import_module(pool_module)
+
+    controller.check_pause()
+    while not controller.is_exit_requested():
+        controller.wait(1.0)
+
+
+def run_trial(start_method: str, local_logger: logger.Logger) -> "tuple[float, list[float]] | None":
+    """
+    Starts the four pools and waits for every worker to report ready.
+
+    Returns the time in seconds until all pools are ready and the time to ready of each pool,
+    None if the pools could not be created.
+    """
+    # Locks passed to spawn or forkserver workers cannot be created with fork
+    controller = worker_controller.WorkerController(mp.get_context(start_method))
+
+    managers = []
+    for pool_module in POOL_MODULES:
+        result, worker_properties = worker_manager.WorkerProperties.create(
+            count=1,
+            target=cold_start_worker,
+            work_arguments=(pool_module,),
+            input_queues=[],
+            output_queues=[],
+            controller=controller,
+            local_logger=local_logger,
+            start_method=start_method,
+        )
+        if not result:
+            return None
+
+        # Get Pylance to stop complaining
+        assert worker_properties is not None
+
+        result, manager = worker_manager.WorkerManager.create(worker_properties, local_logger)
+        if not result:
+            return None
+
+        # Get Pylance to stop complaining
+        assert manager is not None
+
+        managers.append(manager)
+
+    start_time = time.perf_counter()
+    for manager in managers:
+        manager.start_workers()
+
+    # Readiness is recorded by the manager when checking its workers
+    while True:
+        for manager in managers:
+            manager.check_and_restart_dead_workers()
+
+        ready_times = [manager.get_restart_status().last_time_to_ready for manager in managers]
+        if None not in ready_times:
+            break
+
+        time.sleep(READY_POLL_PERIOD_S)
+
+    all_ready_time = time.perf_counter() - start_time
+
+    controller.request_exit()
+    for manager in managers:
+        manager.join_workers(time.monotonic() + 5.0)
+
+    return all_ready_time, ready_times
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    result, local_logger = logger.Logger.create("benchmark_worker_start_method", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    # Imported like bootcamp_main, so forked workers already have them
+    for pool_module in POOL_MODULES:
+        importlib.import_module(pool_module)
+
+    for start_method in START_METHODS:
+        if start_method == "forkserver":
+            mp.get_context(start_method).set_forkserver_preload(FORKSERVER_PRELOAD)
+
+        all_ready_times = []
+        pool_ready_times = []
+        for _ in range(TRIAL_COUNT):
+            trial = run_trial(start_method, local_logger)
+            if trial is None:
+                print("ERROR: Failed to create workers")
+                return -1
+
+            all_ready_time, ready_times = trial
+            all_ready_times.append(all_ready_time)
+            pool_ready_times.extend(ready_times)
+
+        print(
+            f"{start_method:>10}: all pools ready "
+            f"first {all_ready_times[0] * 1e3:.1f} ms, "
+            f"median {statistics.median(all_ready_times) * 1e3:.1f} ms, "
+            f"per pool median {statistics.median(pool_ready_times) * 1e3:.1f} ms"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -16,6 +16,7 @@ from modules.common.modules.logger import logger
 from modules.common.modules.logger import logger_main_setup
 from modules.common.modules.read_yaml import read_yaml
 from modules.telemetry import telemetry
+from utilities.workers import closable_queue
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
 
@@ -64,8 +65,8 @@ def stop(
     Stop the workers.
     """
     controller.request_exit()
-    input_queue.fill_and_drain_queue()
-    output_queue.fill_and_drain_queue()
+    input_queue.close()
+    output_queue.close()
 
 
 def read_queue(
@@ -78,7 +79,10 @@ def read_queue(
     """
     while not controller.is_exit_requested():
         if not output_queue.queue.empty():
-            msg = output_queue.queue.get(timeout=0.2)
+            try:
+                msg = output_queue.queue.get(timeout=0.2)
+            except closable_queue.Closed:
+                break
             main_logger.info(f"Received command: {msg}", True)
         time.sleep(0.1)
 
@@ -91,7 +95,10 @@ def put_queue(
     Place mocked inputs into the input queue periodically with period TELEMETRY_PERIOD.
     """
     for item in data:
-        input_queue.queue.put(item)
+        try:
+            input_queue.queue.put(item)
+        except closable_queue.Closed:
+            break
         time.sleep(TELEMETRY_PERIOD)
 
 
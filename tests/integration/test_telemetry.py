@@ -129,7 +129,7 @@ def main() -> int:
 
     # Read the main queue (worker outputs)
     threading.Thread(target=read_queue, args=(output_queue, controller, main_logger)).start()
-    telemetry_worker.telemetry_worker(connection, output_queue, controller, TELEMETRY_PERIOD)
+    telemetry_worker.telemetry_worker(connection, TELEMETRY_PERIOD, output_queue, controller)
     # =============================================================================================
     #                          ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
     # =============================================================================================
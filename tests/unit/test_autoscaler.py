@@ -0,0 +1,363 @@
+"""
+Test scaling decisions of the autoscaler.
+"""
+
+import pytest
+
+from utilities.workers import autoscaler
+from utilities.workers import queue_statistics
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+COOLDOWN_UP = 2.0  # seconds
+COOLDOWN_DOWN = 10.0  # seconds
+SCALE_UP_DEPTH = 5
+SCALE_UP_RESIDENCE = 0.1  # seconds
+SCALE_DOWN_IDLE = 0.5  # fraction
+
+
+class FakeTime:
+    """
+    Stands in for the time module, with a clock that only moves when set.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        """
+        Returns the set time.
+        """
+        return self.now
+
+
+class FakeQueue:
+    """
+    Input queue with settable statistics, or settable depth if not instrumented.
+    """
+
+    class Inner:
+        """
+        Queue behind the wrapper, only for its size.
+        """
+
+        def __init__(self) -> None:
+            self.depth = 0
+
+        def qsize(self) -> int:
+            """
+            Returns the set depth.
+            """
+            return self.depth
+
+    def __init__(self, snapshot: "queue_statistics.QueueStatisticsSnapshot | None") -> None:
+        self.snapshot = snapshot
+        self.queue = FakeQueue.Inner()
+
+    def get_statistics(self) -> "tuple[bool, queue_statistics.QueueStatisticsSnapshot | None]":
+        """
+        Returns the set snapshot, None if not instrumented.
+        """
+        return self.snapshot is not None, self.snapshot
+
+
+class FakeManager:
+    """
+    Keeps the requested worker counts instead of starting or retiring workers.
+    """
+
+    def __init__(self, worker_count: int, input_queues: "list[FakeQueue]") -> None:
+        self.worker_count = worker_count
+        self.input_queues = input_queues
+        self.scale_requests = []
+
+    def get_worker_count(self) -> int:
+        """
+        Returns the worker count.
+        """
+        return self.worker_count
+
+    def get_input_queues(self) -> "list[FakeQueue]":
+        """
+        Returns the input queues.
+        """
+        return self.input_queues
+
+    def scale_to(self, count: int) -> bool:
+        """
+        Keeps the count.
+        """
+        self.scale_requests.append(count)
+        self.worker_count = count
+        return True
+
+
+class FakeLogger:
+    """
+    Drops every message.
+    """
+
+    def info(self, message: str, _log_with_frame_info: bool = True) -> None:
+        """
+        Drops the message.
+        """
+
+
+def create_snapshot(
+    timestamp: float,
+    depth: int = 0,
+    dequeued_count: int = 0,
+    residence_time: float = 0.0,
+    consumer_wait_time: float = 0.0,
+) -> queue_statistics.QueueStatisticsSnapshot:
+    """
+    Returns a snapshot with the fields the autoscaler reads, the rest 0 .
+    """
+    return queue_statistics.QueueStatisticsSnapshot(
+        timestamp,
+        dequeued_count + depth,
+        dequeued_count,
+        depth,
+        depth,
+        0,
+        0.0,
+        [],
+        consumer_wait_time,
+        [],
+        residence_time,
+    )
+
+
+@pytest.fixture()
+def fake_time(monkeypatch: pytest.MonkeyPatch) -> FakeTime:  # type: ignore
+    """
+    Replaces the clock of the autoscaler, starting at 0 .
+    """
+    clock = FakeTime()
+    monkeypatch.setattr(autoscaler, "time", clock)
+    yield clock  # type: ignore
+
+
+@pytest.fixture()
+def policy() -> autoscaler.AutoscalePolicy:  # type: ignore
+    """
+    Creates a policy of 1 to 4 workers.
+    """
+    yield autoscaler.AutoscalePolicy(  # type: ignore
+        1,
+        4,
+        SCALE_UP_DEPTH,
+        SCALE_UP_RESIDENCE,
+        SCALE_DOWN_IDLE,
+        COOLDOWN_UP,
+        COOLDOWN_DOWN,
+    )
+
+
+def create_autoscaler(
+    worker_count: int,
+    input_queues: "list[FakeQueue]",
+    policy: autoscaler.AutoscalePolicy,
+) -> "tuple[autoscaler.Autoscaler, FakeManager]":
+    """
+    Returns an autoscaler of a fake manager, and the manager.
+    """
+    manager = FakeManager(worker_count, input_queues)
+    return autoscaler.Autoscaler(manager, policy, FakeLogger()), manager
+
+
+class TestAutoscalePolicy:
+    """
+    Bounds of the policy.
+    """
+
+    @pytest.mark.parametrize("min_workers, max_workers", [(0, 1), (-1, 1), (3, 2)])
+    def test_invalid_bounds(self, min_workers: int, max_workers: int) -> None:
+        """
+        Bounds that do not contain a worker are rejected.
+        """
+        # Run
+        with pytest.raises(ValueError):
+            autoscaler.AutoscalePolicy(min_workers, max_workers)
+
+
+class TestAutoscaler:
+    """
+    When and how far update() scales.
+    """
+
+    @pytest.mark.parametrize("worker_count, expected", [(0, 2), (1, 2), (7, 3)])
+    def test_clamp(self, fake_time: FakeTime, worker_count: int, expected: int) -> None:
+        """
+        A count outside the bounds is brought to the nearest bound at once, even during the
+        cooldown.
+        """
+        # Setup
+        input_queue = FakeQueue(None)
+        input_queue.queue.depth = SCALE_UP_DEPTH
+        scaler, manager = create_autoscaler(
+            worker_count, [input_queue], autoscaler.AutoscalePolicy(2, 3)
+        )
+        fake_time.now = 0.1
+
+        # Run
+        result = scaler.update()
+
+        # Test
+        assert result
+        assert manager.scale_requests == [expected]
+
+    def test_scale_up_one_step_per_cooldown(
+        self, fake_time: FakeTime, policy: autoscaler.AutoscalePolicy
+    ) -> None:
+        """
+        A backed up queue adds a single worker per update, once per up cooldown, up to the
+        maximum.
+        """
+        # Setup
+        input_queue = FakeQueue(None)
+        input_queue.queue.depth = SCALE_UP_DEPTH * 100
+        scaler, manager = create_autoscaler(1, [input_queue], policy)
+
+        # Run
+        counts = []
+        for now in [1.0, 2.0, 3.0, 4.0, 6.0, 8.0, 10.0]:
+            fake_time.now = now
+            assert scaler.update()
+            counts.append(manager.worker_count)
+
+        # Test
+        assert counts == [1, 2, 2, 3, 4, 4, 4]
+        assert manager.scale_requests == [2, 3, 4]
+
+    def test_scale_down_cooldown(
+        self, fake_time: FakeTime, policy: autoscaler.AutoscalePolicy
+    ) -> None:
+        """
+        An empty queue retires a single worker per update, once per down cooldown, which is
+        counted from any scaling, including scaling up.
+        """
+        # Setup
+        input_queue = FakeQueue(None)
+        input_queue.queue.depth = SCALE_UP_DEPTH
+        scaler, manager = create_autoscaler(2, [input_queue], policy)
+        fake_time.now = COOLDOWN_UP
+        scaler.update()
+        input_queue.queue.depth = 0
+
+        # Run
+        counts = []
+        for now in [4.0, COOLDOWN_UP + COOLDOWN_DOWN - 1.0, COOLDOWN_UP + COOLDOWN_DOWN, 15.0]:
+            fake_time.now = now
+            scaler.update()
+            counts.append(manager.worker_count)
+
+        # Test
+        assert counts == [3, 3, 2, 2]
+        assert manager.scale_requests == [3, 2]
+
+    def test_scale_down_stops_at_minimum(
+        self, fake_time: FakeTime, policy: autoscaler.AutoscalePolicy
+    ) -> None:
+        """
+        An idle pool is not scaled below the minimum.
+        """
+        # Setup
+        scaler, manager = create_autoscaler(1, [FakeQueue(None)], policy)
+        fake_time.now = COOLDOWN_DOWN * 2
+
+        # Run
+        result = scaler.update()
+
+        # Test
+        assert result
+        assert len(manager.scale_requests) == 0
+
+    @pytest.mark.parametrize(
+        "wait_time, expected",
+        [
+            # 2 workers over 1 second, so 0.8 seconds of waiting is 0.4 idle
+            (0.8, []),
+            (1.0, [1]),
+            (1.6, [1]),
+        ],
+    )
+    def test_idle_fraction(
+        self,
+        fake_time: FakeTime,
+        policy: autoscaler.AutoscalePolicy,
+        wait_time: float,
+        expected: "list[int]",
+    ) -> None:
+        """
+        The idle fraction is the wait time since the last update over the time of every worker,
+        and an empty queue only retires a worker once it reaches scale_down_idle .
+        """
+        # Setup
+        input_queue = FakeQueue(create_snapshot(100.0, consumer_wait_time=50.0))
+        scaler, manager = create_autoscaler(2, [input_queue], policy)
+        input_queue.snapshot = create_snapshot(101.0, consumer_wait_time=50.0 + wait_time)
+        fake_time.now = COOLDOWN_DOWN
+
+        # Run
+        scaler.update()
+
+        # Test
+        assert manager.scale_requests == expected
+
+    @pytest.mark.parametrize(
+        "residence_time, expected",
+        [
+            # 10 items dequeued, so 0.5 seconds is 0.05 seconds each
+            (0.5, []),
+            (2.0, [3]),
+        ],
+    )
+    def test_residence_time(
+        self,
+        fake_time: FakeTime,
+        policy: autoscaler.AutoscalePolicy,
+        residence_time: float,
+        expected: "list[int]",
+    ) -> None:
+        """
+        Items that waited long enough since the last update add a worker, even with a short
+        queue.
+        """
+        # Setup
+        input_queue = FakeQueue(create_snapshot(100.0, dequeued_count=40, residence_time=1.0))
+        scaler, manager = create_autoscaler(2, [input_queue], policy)
+        input_queue.snapshot = create_snapshot(
+            101.0, depth=1, dequeued_count=50, residence_time=1.0 + residence_time
+        )
+        fake_time.now = COOLDOWN_UP
+
+        # Run
+        scaler.update()
+
+        # Test
+        assert manager.scale_requests == expected
+
+    def test_depth_of_every_queue(
+        self, fake_time: FakeTime, policy: autoscaler.AutoscalePolicy
+    ) -> None:
+        """
+        The depth is summed over the input queues, instrumented or not.
+        """
+        # Setup
+        instrumented_queue = FakeQueue(create_snapshot(100.0))
+        plain_queue = FakeQueue(None)
+        scaler, manager = create_autoscaler(2, [instrumented_queue, plain_queue], policy)
+        instrumented_queue.snapshot = create_snapshot(101.0, depth=SCALE_UP_DEPTH - 2)
+        plain_queue.queue.depth = 2
+        fake_time.now = COOLDOWN_UP
+
+        # Run
+        scaler.update()
+
+        # Test
+        assert manager.scale_requests == [3]
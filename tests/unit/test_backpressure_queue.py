@@ -0,0 +1,143 @@
+"""
+Test the backpressure policies.
+"""
+
+import queue
+
+import pytest
+
+from utilities.workers import backpressure_queue
+from utilities.workers import shared_memory_queue
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 4
+SLOT_SIZE = 64  # bytes
+ITEM_COUNT = 10
+SAMPLE_PERIOD = 3
+
+
+@pytest.fixture()
+def inner_queue() -> shared_memory_queue.SharedMemoryQueue:  # type: ignore
+    """
+    Creates a small shared memory queue, freeing it after the test.
+    """
+    items = shared_memory_queue.SharedMemoryQueue(QUEUE_MAX_SIZE, SLOT_SIZE)
+    yield items  # type: ignore
+
+    items.close()
+    items.unlink()
+
+
+def put_each(pressured: backpressure_queue.BackpressureQueue, items: "list[object]") -> None:
+    """
+    Puts the items one at a time without blocking.
+    """
+    for item in items:
+        pressured.put_nowait(item)
+
+
+def put_all(pressured: backpressure_queue.BackpressureQueue, items: "list[object]") -> None:
+    """
+    Puts the items in a single batch.
+    """
+    pressured.put_many(items, 0.0)
+
+
+class TestBackpressurePolicy:
+    """
+    Items kept and dropped by each policy, put one at a time and in a batch.
+    """
+
+    @pytest.mark.parametrize("put", [put_each, put_all])
+    @pytest.mark.parametrize(
+        "policy, expected_items",
+        [
+            (backpressure_queue.BackpressurePolicy.DROP_NEWEST, [0, 1, 2, 3]),
+            (backpressure_queue.BackpressurePolicy.DROP_OLDEST, [6, 7, 8, 9]),
+            (backpressure_queue.BackpressurePolicy.SAMPLE, [0, 3, 6, 9]),
+        ],
+    )
+    def test_dropped_counts(
+        self,
+        inner_queue: shared_memory_queue.SharedMemoryQueue,
+        put: object,
+        policy: backpressure_queue.BackpressurePolicy,
+        expected_items: "list[int]",
+    ) -> None:
+        """
+        Putting more than fits keeps the items of the policy, and counts the rest as dropped
+        under the policy only.
+        """
+        # Setup
+        pressured = backpressure_queue.BackpressureQueue(inner_queue, policy, SAMPLE_PERIOD)
+        expected_counts = {
+            dropping_policy: 0
+            for dropping_policy in backpressure_queue.BackpressurePolicy
+            if dropping_policy != backpressure_queue.BackpressurePolicy.BLOCK
+        }
+        expected_counts[policy] = ITEM_COUNT - len(expected_items)
+
+        # Run
+        put(pressured, list(range(ITEM_COUNT)))
+
+        # Test
+        assert pressured.get_many() == expected_items
+        assert pressured.dropped_counts() == expected_counts
+
+    def test_block_raises_when_full(
+        self, inner_queue: shared_memory_queue.SharedMemoryQueue
+    ) -> None:
+        """
+        BLOCK drops nothing and leaves a full queue to the caller.
+        """
+        # Setup
+        pressured = backpressure_queue.BackpressureQueue(
+            inner_queue, backpressure_queue.BackpressurePolicy.BLOCK, 1
+        )
+
+        # Run
+        put_count = pressured.put_many(list(range(ITEM_COUNT)), 0.0)
+
+        # Test
+        assert put_count == QUEUE_MAX_SIZE
+        with pytest.raises(queue.Full):
+            pressured.put_nowait(ITEM_COUNT)
+
+        assert all(count == 0 for count in pressured.dropped_counts().values())
+
+    def test_sample_continues_across_calls(
+        self, inner_queue: shared_memory_queue.SharedMemoryQueue
+    ) -> None:
+        """
+        SAMPLE keeps every Nth item offered, counting across separate puts.
+        """
+        # Setup
+        pressured = backpressure_queue.BackpressureQueue(
+            inner_queue, backpressure_queue.BackpressurePolicy.SAMPLE, SAMPLE_PERIOD
+        )
+
+        # Run
+        pressured.put_many([0, 1], 0.0)
+        pressured.put(2)
+        pressured.put_many([3, 4, 5, 6], 0.0)
+
+        # Test
+        assert pressured.get_many() == [0, 3, 6]
+        assert pressured.dropped_counts()[backpressure_queue.BackpressurePolicy.SAMPLE] == 4
+
+    def test_invalid_sample_period(
+        self, inner_queue: shared_memory_queue.SharedMemoryQueue
+    ) -> None:
+        """
+        A sample period that is not positive is rejected.
+        """
+        # Run
+        with pytest.raises(ValueError):
+            backpressure_queue.BackpressureQueue(
+                inner_queue, backpressure_queue.BackpressurePolicy.SAMPLE, 0
+            )
@@ -0,0 +1,158 @@
+"""
+Test the close protocol of manager queues.
+"""
+
+import multiprocessing as mp
+import multiprocessing.managers
+import queue
+import threading
+
+import pytest
+
+from utilities.workers import closable_queue
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 2
+GETTER_COUNT = 3
+# Long enough for a blocked caller to be waiting, short enough to fail fast
+BLOCK_WAIT_S = 0.2
+JOIN_TIMEOUT_S = 10.0
+
+
+@pytest.fixture(scope="module")
+def mp_manager() -> multiprocessing.managers.SyncManager:  # type: ignore
+    """
+    Starts a manager shared by the tests of the module.
+    """
+    manager = mp.Manager()
+    yield manager  # type: ignore
+
+    manager.shutdown()
+
+
+@pytest.fixture()
+def closable(
+    mp_manager: multiprocessing.managers.SyncManager,
+) -> closable_queue.ClosableManagerQueue:  # type: ignore
+    """
+    Creates a small closable manager queue.
+    """
+    items = closable_queue.ClosableManagerQueue(mp_manager.Queue(QUEUE_MAX_SIZE))
+    yield items  # type: ignore
+
+    items.close()
+
+
+def get_outcome(closable: closable_queue.ClosableManagerQueue, outcomes: "mp.Queue") -> None:
+    """
+    Gets an item, putting what happened on the outcomes.
+    """
+    try:
+        closable.get()
+        outcomes.put("item")
+    except closable_queue.Closed:
+        outcomes.put("closed")
+
+
+class TestClosableManagerQueue:
+    """
+    Blocked and later calls raise Closed once the queue is closed.
+    """
+
+    def test_items_before_close(self, closable: closable_queue.ClosableManagerQueue) -> None:
+        """
+        Items pass through until the queue is closed.
+        """
+        # Run
+        closable.put(1)
+        closable.put(2)
+
+        # Test
+        assert closable.full()
+        with pytest.raises(queue.Full):
+            closable.put_nowait(3)
+
+        assert closable.get() == 1
+        assert closable.get_nowait() == 2
+        with pytest.raises(queue.Empty):
+            closable.get_nowait()
+
+    def test_close_wakes_blocked_getters(
+        self, closable: closable_queue.ClosableManagerQueue
+    ) -> None:
+        """
+        Every getter blocked in another process raises Closed once the queue is closed.
+        """
+        # Setup
+        outcomes = mp.Queue()
+        getters = [
+            mp.Process(target=get_outcome, args=(closable, outcomes)) for _ in range(GETTER_COUNT)
+        ]
+        for getter in getters:
+            getter.start()
+
+        getters[0].join(BLOCK_WAIT_S)
+
+        # Run
+        closable.close()
+        actual = [outcomes.get(timeout=JOIN_TIMEOUT_S) for _ in getters]
+        for getter in getters:
+            getter.join(JOIN_TIMEOUT_S)
+
+        # Test
+        assert actual == ["closed"] * GETTER_COUNT
+        assert not any(getter.is_alive() for getter in getters)
+
+    def test_close_wakes_blocked_putter(
+        self, closable: closable_queue.ClosableManagerQueue
+    ) -> None:
+        """
+        A putter blocked on the full queue raises Closed once the queue is closed.
+        """
+        # Setup
+        closable.put(1)
+        closable.put(2)
+        outcomes = []
+
+        def blocked_put() -> None:
+            try:
+                closable.put(3)
+                outcomes.append("put")
+            except closable_queue.Closed:
+                outcomes.append("closed")
+
+        putter = threading.Thread(target=blocked_put)
+        putter.start()
+        putter.join(BLOCK_WAIT_S)
+
+        # Run
+        closable.close()
+        putter.join(JOIN_TIMEOUT_S)
+
+        # Test
+        assert not putter.is_alive()
+        assert outcomes == ["closed"]
+
+    def test_calls_after_close(self, closable: closable_queue.ClosableManagerQueue) -> None:
+        """
+        Calls after close raise Closed, and closing again does nothing.
+        """
+        # Setup
+        closable.put(1)
+
+        # Run
+        closable.close()
+        closable.close()
+
+        # Test
+        assert closable.is_closed()
+        with pytest.raises(closable_queue.Closed):
+            closable.get()
+
+        with pytest.raises(closable_queue.Closed):
+            closable.put(2)
@@ -0,0 +1,152 @@
+"""
+Test the conflating mailbox.
+"""
+
+import multiprocessing as mp
+import queue
+import threading
+
+import pytest
+
+from utilities.workers import closable_queue
+from utilities.workers import conflating_mailbox
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+SLOT_SIZE = 64  # bytes
+PUT_COUNT = 500
+# Long enough for a blocked caller to be waiting, short enough to fail fast
+BLOCK_WAIT_S = 0.2
+JOIN_TIMEOUT_S = 10.0
+
+
+@pytest.fixture()
+def mailbox() -> conflating_mailbox.ConflatingMailbox:  # type: ignore
+    """
+    Creates a mailbox, freeing it after the test.
+    """
+    latest = conflating_mailbox.ConflatingMailbox(SLOT_SIZE)
+    yield latest  # type: ignore
+
+    latest.close()
+    latest.unlink()
+
+
+def put_numbers(mailbox: conflating_mailbox.ConflatingMailbox, count: int) -> None:
+    """
+    Puts the numbers 0 to count - 1 in order.
+    """
+    for number in range(count):
+        mailbox.put(number)
+
+
+class TestConflatingMailbox:
+    """
+    Only the latest item is kept and every overwrite is counted.
+    """
+
+    def test_get_latest(self, mailbox: conflating_mailbox.ConflatingMailbox) -> None:
+        """
+        A get returns the last item put, and the ones before it are dropped.
+        """
+        # Run
+        for number in range(3):
+            mailbox.put(number)
+
+        sequence, actual = mailbox.get_with_sequence(False)
+
+        # Test
+        assert actual == 2
+        assert sequence == 3
+        assert mailbox.dropped_count() == 2
+        assert mailbox.empty()
+        with pytest.raises(queue.Empty):
+            mailbox.get_nowait()
+
+    def test_put_never_blocks(self, mailbox: conflating_mailbox.ConflatingMailbox) -> None:
+        """
+        Puts keep succeeding without a consumer.
+        """
+        # Run
+        for number in range(PUT_COUNT):
+            mailbox.put_nowait(number)
+
+        # Test
+        assert not mailbox.full()
+        assert mailbox.qsize() == 1
+        assert mailbox.sequence() == PUT_COUNT
+        assert mailbox.dropped_count() == PUT_COUNT - 1
+
+    def test_taken_item_is_not_dropped(self, mailbox: conflating_mailbox.ConflatingMailbox) -> None:
+        """
+        A put after a get does not count as a drop.
+        """
+        # Run
+        mailbox.put(0)
+        mailbox.get()
+        mailbox.put(1)
+
+        # Test
+        assert mailbox.dropped_count() == 0
+        assert mailbox.get() == 1
+
+    def test_other_process_items_in_order(
+        self, mailbox: conflating_mailbox.ConflatingMailbox
+    ) -> None:
+        """
+        Items from a producer process arrive newer each time, and every put is either taken or
+        counted as dropped.
+        """
+        # Setup
+        producer = mp.Process(target=put_numbers, args=(mailbox, PUT_COUNT))
+
+        # Run
+        producer.start()
+        sequences = []
+        items = []
+        while len(sequences) == 0 or sequences[-1] < PUT_COUNT:
+            sequence, item = mailbox.get_with_sequence(timeout=JOIN_TIMEOUT_S)
+            sequences.append(sequence)
+            items.append(item)
+
+        producer.join(JOIN_TIMEOUT_S)
+
+        # Test
+        assert items == sorted(set(items))
+        assert items[-1] == PUT_COUNT - 1
+        assert [sequence - 1 for sequence in sequences] == items
+        assert len(items) + mailbox.dropped_count() == PUT_COUNT
+
+    def test_close_wakes_blocked_getter(
+        self, mailbox: conflating_mailbox.ConflatingMailbox
+    ) -> None:
+        """
+        close() raises Closed in a getter waiting on the empty mailbox, and in later puts.
+        """
+        # Setup
+        outcomes = []
+
+        def blocked_get() -> None:
+            try:
+                mailbox.get()
+                outcomes.append("item")
+            except closable_queue.Closed:
+                outcomes.append("closed")
+
+        getter = threading.Thread(target=blocked_get)
+        getter.start()
+        getter.join(BLOCK_WAIT_S)
+
+        # Run
+        mailbox.close()
+        getter.join(JOIN_TIMEOUT_S)
+
+        # Test
+        assert not getter.is_alive()
+        assert outcomes == ["closed"]
+        with pytest.raises(closable_queue.Closed):
+            mailbox.put(0)
@@ -0,0 +1,239 @@
+"""
+Test the MAVLink frame parser.
+"""
+
+from pymavlink import mavutil
+from pymavlink.dialects.v10 import ardupilotmega as mavlink_1
+from pymavlink.dialects.v20 import ardupilotmega as mavlink_2
+import pytest
+
+from utilities import mavlink_frame
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+HEARTBEAT_ID = mavutil.mavlink.MAVLINK_MSG_ID_HEARTBEAT
+ATTITUDE_ID = mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE
+# Not a start byte of either version
+GARBAGE = bytes([0x00, 0x55, 0xAA, 0x12])
+
+
+def encode_heartbeat(seq: int, source: "tuple[int, int]" = (1, 1), version: int = 2) -> bytes:
+    """
+    Returns an encoded heartbeat with the sequence number from the source system and component.
+    """
+    dialect = mavlink_2 if version == 2 else mavlink_1
+    encoder = dialect.MAVLink(None, srcSystem=source[0], srcComponent=source[1])
+    encoder.seq = seq
+    return encoder.heartbeat_encode(0, 0, 0, 0, 0).pack(encoder)
+
+
+def encode_attitude(seq: int) -> bytes:
+    """
+    Returns an encoded MAVLink 2 attitude with the sequence number.
+    """
+    encoder = mavlink_2.MAVLink(None, srcSystem=1, srcComponent=1)
+    encoder.seq = seq
+    return encoder.attitude_encode(1, 0.1, 0.2, 0.3, 0.0, 0.0, 0.0).pack(encoder)
+
+
+def encode_signed_heartbeat(seq: int) -> bytes:
+    """
+    Returns a signed MAVLink 2 heartbeat with the sequence number.
+    """
+    encoder = mavlink_2.MAVLink(None, srcSystem=1, srcComponent=1)
+    encoder.seq = seq
+    encoder.signing.secret_key = bytes(32)
+    encoder.signing.link_id = 0
+    encoder.signing.timestamp = 1
+    encoder.signing.sign_outgoing = True
+    return encoder.heartbeat_encode(0, 0, 0, 0, 0).pack(encoder)
+
+
+@pytest.fixture()
+def parser() -> mavlink_frame.FrameParser:  # type: ignore
+    """
+    Creates a parser.
+    """
+    yield mavlink_frame.FrameParser()  # type: ignore
+
+
+class TestFrameParser:
+    """
+    Frames found, rejected and counted by the parser.
+    """
+
+    @pytest.mark.parametrize("version", [1, 2])
+    def test_valid_frames(self, parser: mavlink_frame.FrameParser, version: int) -> None:
+        """
+        Valid frames of either version are returned whole, in order.
+        """
+        # Setup
+        frames = [encode_heartbeat(seq, version=version) for seq in range(3)]
+
+        # Run
+        actual = parser.parse(b"".join(frames), None)
+
+        # Test
+        assert actual == [(HEARTBEAT_ID, frame) for frame in frames]
+        assert parser.frame_count == 3
+        assert parser.bad_frame_count == 0
+        assert parser.lost_count == 0
+
+    def test_signed_frame(self, parser: mavlink_frame.FrameParser) -> None:
+        """
+        A signed frame is returned with its signature.
+        """
+        # Setup
+        frame = encode_signed_heartbeat(0)
+
+        # Run
+        actual = parser.parse(frame, None)
+
+        # Test
+        assert actual == [(HEARTBEAT_ID, frame)]
+
+    def test_filter_by_message_id(self, parser: mavlink_frame.FrameParser) -> None:
+        """
+        Only frames of the wanted IDs are returned, every valid frame is counted.
+        """
+        # Setup
+        stream = encode_heartbeat(0) + encode_attitude(1) + encode_heartbeat(2)
+
+        # Run
+        actual = parser.parse(stream, {ATTITUDE_ID})
+
+        # Test
+        assert actual == [(ATTITUDE_ID, encode_attitude(1))]
+        assert parser.frame_count == 3
+
+    def test_partial_frames(self, parser: mavlink_frame.FrameParser) -> None:
+        """
+        Frames split across reads are returned once the rest arrives.
+        """
+        # Setup
+        frames = [encode_heartbeat(0), encode_attitude(1)]
+        stream = b"".join(frames)
+
+        # Run
+        actual = []
+        for index in range(len(stream)):
+            actual.extend(parser.parse(stream[index : index + 1], None))
+
+        # Test
+        assert [frame for _, frame in actual] == frames
+
+    def test_bad_crc_rejected(self, parser: mavlink_frame.FrameParser) -> None:
+        """
+        A frame with a corrupted payload is counted as bad and skipped, the next frame is kept.
+        """
+        # Setup
+        corrupted = bytearray(encode_attitude(0))
+        corrupted[mavlink_frame.MAVLINK_2_HEADER_LENGTH] ^= 0xFF
+        valid = encode_heartbeat(1)
+
+        # Run
+        actual = parser.parse(bytes(corrupted) + valid, None)
+
+        # Test
+        assert actual == [(HEARTBEAT_ID, valid)]
+        assert parser.bad_frame_count >= 1
+        assert parser.frame_count == 1
+
+    def test_resync_after_garbage(self, parser: mavlink_frame.FrameParser) -> None:
+        """
+        Bytes that are not frames, including false start bytes, are skipped.
+        """
+        # Setup
+        false_starts = bytes([mavlink_frame.MAVLINK_2_START, 0x05, mavlink_frame.MAVLINK_1_START])
+        valid = encode_heartbeat(0)
+
+        # Run
+        actual = parser.parse(GARBAGE + false_starts + GARBAGE * 10 + valid, None)
+
+        # Test
+        assert actual == [(HEARTBEAT_ID, valid)]
+
+    def test_resync_after_corrupted_length(self, parser: mavlink_frame.FrameParser) -> None:
+        """
+        A frame whose length was corrupted does not take the frames after it with it, once the
+        bytes of the length it claims have arrived.
+        """
+        # Setup
+        corrupted = bytearray(encode_heartbeat(0))
+        corrupted[1] = 0xFF
+        valid = [encode_heartbeat(seq) for seq in range(1, 20)]
+
+        # Run
+        actual = parser.parse(bytes(corrupted) + b"".join(valid), None)
+
+        # Test
+        assert [frame for _, frame in actual] == valid
+
+    def test_lost_count(self, parser: mavlink_frame.FrameParser) -> None:
+        """
+        Gaps in the sequence numbers of each source are counted, including across wrap around.
+        """
+        # Setup
+        stream = b"".join(
+            [
+                encode_heartbeat(254, (1, 1)),
+                encode_heartbeat(10, (2, 1)),
+                encode_heartbeat(255, (1, 1)),
+                encode_heartbeat(1, (1, 1)),
+                encode_heartbeat(11, (2, 1)),
+                encode_heartbeat(15, (2, 1)),
+            ]
+        )
+
+        # Run
+        parser.parse(stream, None)
+
+        # Test
+        # 0 from source 1, and 12 to 14 from source 2
+        assert parser.lost_count == 4
+
+    def test_clear(self, parser: mavlink_frame.FrameParser) -> None:
+        """
+        clear() drops a partial frame and the sequence numbers.
+        """
+        # Setup
+        parser.parse(encode_heartbeat(0), None)
+        parser.parse(encode_heartbeat(1)[:5], None)
+
+        # Run
+        parser.clear()
+        actual = parser.parse(encode_heartbeat(100), None)
+
+        # Test
+        assert actual == [(HEARTBEAT_ID, encode_heartbeat(100))]
+        assert parser.lost_count == 0
+
+
+class TestMessageIds:
+    """
+    Message IDs of frames and message types.
+    """
+
+    def test_get_message_id(self) -> None:
+        """
+        The ID is read from the header of either version.
+        """
+        # Test
+        assert mavlink_frame.get_message_id(encode_heartbeat(0, version=1)) == HEARTBEAT_ID
+        assert mavlink_frame.get_message_id(encode_attitude(0)) == ATTITUDE_ID
+
+    def test_get_message_ids(self) -> None:
+        """
+        Types are looked up in the dialect, and unknown types rejected.
+        """
+        # Test
+        assert mavlink_frame.get_message_ids(["HEARTBEAT", "ATTITUDE"]) == {
+            HEARTBEAT_ID,
+            ATTITUDE_ID,
+        }
+        with pytest.raises(ValueError):
+            mavlink_frame.get_message_ids(["NOT_A_MESSAGE"])
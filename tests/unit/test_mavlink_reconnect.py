@@ -0,0 +1,420 @@
+"""
+Test the backoff of the reconnect policy, and losing and regaining the link of a reconnecting
+connection.
+"""
+
+import select
+import socket
+import threading
+import time
+
+from pymavlink import mavutil
+import pytest
+
+from utilities import mavlink_reconnect
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+CONNECTION_STRING = "tcp:localhost:5760"
+BACKOFF_INITIAL = 0.01  # seconds
+BACKOFF_MAX = 0.08  # seconds
+BACKOFF_MULTIPLIER = 2.0
+TIMEOUT_S = 5.0
+# Short enough to be lost during a test
+SILENCE_TIMEOUT_S = 0.1
+
+
+class FakeMavfile:
+    """
+    Connection over one end of a socket pair, reading, waiting and writing like
+    mavutil.mavtcp , including calling its end of stream handler.
+    """
+
+    def __init__(self, port: socket.socket) -> None:
+        self.port = port
+        self.fd = port.fileno()
+        self.is_closed = False
+
+    def recv(self, n: "int | None" = None) -> bytes:
+        """
+        Reads what has arrived, without blocking.
+        """
+        if len(select.select([self.port], [], [], 0.0)[0]) == 0:
+            return b""
+
+        try:
+            data = self.port.recv(1024 if n is None else n)
+        except ConnectionResetError:
+            self.handle_disconnect()
+            raise
+
+        if len(data) == 0:
+            self.handle_eof()
+
+        return data
+
+    def select(self, timeout: float) -> bool:
+        """
+        Waits for data to read.
+        """
+        return len(select.select([self.port], [], [], timeout)[0]) == 1
+
+    def write(self, buffer: bytes) -> None:
+        """
+        Sends the buffer.
+        """
+        self.port.sendall(buffer)
+
+    def close(self) -> None:
+        """
+        Closes the socket.
+        """
+        self.is_closed = True
+        self.port.close()
+
+    def handle_eof(self) -> None:
+        """
+        Replaced by the reconnecting connection.
+        """
+
+    def handle_disconnect(self) -> None:
+        """
+        Replaced by the reconnecting connection.
+        """
+
+
+class FakeDrone:
+    """
+    Stands in for mavutil.mavlink_connection() , keeping the other end of each connection.
+    """
+
+    def __init__(self) -> None:
+        self.connections = []
+        self.peers = []
+        self.connection_options = []
+        # Number of attempts to fail before connecting again
+        self.failing_attempt_count = 0
+        self.attempt_count = 0
+
+    def __call__(self, connection_string: str, **connection_options: object) -> FakeMavfile:
+        """
+        Returns a new connection, or raises OSError while failing attempts.
+        """
+        assert connection_string == CONNECTION_STRING
+        self.attempt_count += 1
+        if self.failing_attempt_count > 0:
+            self.failing_attempt_count -= 1
+            raise ConnectionRefusedError("Connection refused")
+
+        port, peer = socket.socketpair()
+        connection = FakeMavfile(port)
+        self.connections.append(connection)
+        self.peers.append(peer)
+        self.connection_options.append(connection_options)
+        return connection
+
+    def close(self) -> None:
+        """
+        Closes every end kept.
+        """
+        for peer in self.peers:
+            peer.close()
+
+
+class FakeLogger:
+    """
+    Keeps every message.
+    """
+
+    def __init__(self) -> None:
+        self.messages = []
+
+    def info(self, message: str, _log_with_frame_info: bool = True) -> None:
+        """
+        Keeps the message.
+        """
+        self.messages.append(message)
+
+    def warning(self, message: str, _log_with_frame_info: bool = True) -> None:
+        """
+        Keeps the message.
+        """
+        self.messages.append(message)
+
+    def error(self, message: str, _log_with_frame_info: bool = True) -> None:
+        """
+        Keeps the message.
+        """
+        self.messages.append(message)
+
+
+def create_policy(silence_timeout: "float | None" = None) -> mavlink_reconnect.ReconnectPolicy:
+    """
+    Returns a policy with short waits and no jitter.
+    """
+    return mavlink_reconnect.ReconnectPolicy(
+        silence_timeout, BACKOFF_INITIAL, BACKOFF_MAX, BACKOFF_MULTIPLIER, 0.0
+    )
+
+
+def wait_until(condition: "() -> bool") -> bool:  # type: ignore
+    """
+    Returns whether the condition became true before TIMEOUT_S .
+    """
+    deadline = time.monotonic() + TIMEOUT_S
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+
+        time.sleep(BACKOFF_INITIAL)
+
+    return True
+
+
+@pytest.fixture()
+def drone(monkeypatch: pytest.MonkeyPatch) -> FakeDrone:  # type: ignore
+    """
+    Replaces opening connections with socket pairs, closing them after the test.
+    """
+    fake_drone = FakeDrone()
+    monkeypatch.setattr(mavutil, "mavlink_connection", fake_drone)
+    yield fake_drone  # type: ignore
+
+    fake_drone.close()
+
+
+def create_connection(
+    drone: FakeDrone, policy: mavlink_reconnect.ReconnectPolicy
+) -> "tuple[mavlink_reconnect.ReconnectingConnection, FakeLogger]":
+    """
+    Returns an open reconnecting connection, and its logger.
+    """
+    local_logger = FakeLogger()
+    result, connection = mavlink_reconnect.ReconnectingConnection.create(
+        CONNECTION_STRING, policy, local_logger, source_system=255
+    )
+    assert result
+    assert connection is not None
+    assert len(drone.connections) == 1
+    return connection, local_logger
+
+
+class TestReconnectPolicy:
+    """
+    Waits between attempts.
+    """
+
+    def test_no_failures(self) -> None:
+        """
+        The first attempt is made at once.
+        """
+        # Test
+        assert create_policy().backoff(0) == 0.0
+        assert create_policy().backoff(-1) == 0.0
+
+    def test_exponential_up_to_max(self) -> None:
+        """
+        The wait grows by the multiplier per failed attempt, up to the max.
+        """
+        # Setup
+        policy = create_policy()
+
+        # Run
+        actual = [policy.backoff(failure_count) for failure_count in range(1, 7)]
+
+        # Test
+        assert actual == pytest.approx([0.01, 0.02, 0.04, 0.08, 0.08, 0.08])
+
+    def test_jitter_bounds(self) -> None:
+        """
+        Jitter randomizes the wait by at most its fraction, both ways.
+        """
+        # Setup
+        policy = mavlink_reconnect.ReconnectPolicy(None, 1.0, 10.0, 2.0, 0.25)
+
+        # Run
+        actual = [policy.backoff(2) for _ in range(1000)]
+
+        # Test
+        assert all(1.5 <= delay <= 2.5 for delay in actual)
+        assert min(actual) < 1.9
+        assert max(actual) > 2.1
+
+    @pytest.mark.parametrize(
+        "silence_timeout, jitter", [(0.0, 0.2), (-1.0, 0.2), (None, -0.1), (None, 1.1)]
+    )
+    def test_invalid(self, silence_timeout: "float | None", jitter: float) -> None:
+        """
+        A silence timeout that is not positive, and jitter outside 0 to 1, are rejected.
+        """
+        # Run
+        with pytest.raises(ValueError):
+            mavlink_reconnect.ReconnectPolicy(silence_timeout, jitter=jitter)
+
+
+class TestReconnectingConnection:
+    """
+    Losing the link, reconnecting and writing while lost.
+    """
+
+    def test_create_fails(self, drone: FakeDrone) -> None:
+        """
+        A first connection that cannot be opened is reported and logged.
+        """
+        # Setup
+        drone.failing_attempt_count = 1
+        local_logger = FakeLogger()
+
+        # Run
+        result, connection = mavlink_reconnect.ReconnectingConnection.create(
+            CONNECTION_STRING, create_policy(), local_logger
+        )
+
+        # Test
+        assert not result
+        assert connection is None
+        assert len(local_logger.messages) == 1
+
+    def test_reconnect_after_eof(self, drone: FakeDrone) -> None:
+        """
+        The other end closing the connection is seen by a read, and a new connection takes its
+        place behind the same handle, with a single attempt per reconnect.
+        """
+        # Setup
+        connection, local_logger = create_connection(drone, create_policy())
+        first_connection = drone.connections[0]
+        drone.peers[0].close()
+
+        # Run
+        data = connection.recv()
+        is_connected, reconnect_count = connection.wait_connected(TIMEOUT_S)
+        connection.write(b"after")
+        # Hooks kept by references to the first connection use the current one
+        first_connection.write(b"kept")
+        status = connection.get_status()
+        connection.close()
+
+        # Test
+        assert data == b""
+        assert is_connected
+        assert reconnect_count == 1
+        assert first_connection.is_closed
+        assert connection.port is drone.connections[1].port
+        assert drone.connection_options == [
+            {"source_system": 255},
+            {"source_system": 255, "retries": 0},
+        ]
+        assert drone.peers[1].recv(1024) == b"afterkept"
+        assert status.is_connected
+        assert status.reconnect_count == 1
+        assert status.failed_attempt_count == 0
+        assert status.dropped_write_count == 0
+        assert any("lost" in message for message in local_logger.messages)
+        assert any("reconnected" in message for message in local_logger.messages)
+
+    def test_lost_by_silence(self, drone: FakeDrone) -> None:
+        """
+        Nothing received for the silence timeout loses the link, counting the downtime from
+        the last bytes received.
+        """
+        # Setup
+        connection, _ = create_connection(drone, create_policy(SILENCE_TIMEOUT_S))
+        drone.peers[0].sendall(b"data")
+        assert wait_until(lambda: len(connection.recv()) > 0)
+        receive_time = time.monotonic()
+
+        # Run
+        is_reconnected = wait_until(lambda: len(drone.connections) == 2)
+        is_connected, reconnect_count = connection.wait_connected(TIMEOUT_S)
+        status = connection.get_status()
+        connection.close()
+
+        # Test
+        assert is_reconnected
+        assert is_connected
+        assert reconnect_count == 1
+        assert time.monotonic() - receive_time >= SILENCE_TIMEOUT_S
+        # Downtime starts at the last bytes, not when the silence was noticed
+        assert status.longest_outage >= SILENCE_TIMEOUT_S
+
+    def test_writes_dropped_while_lost(self, drone: FakeDrone) -> None:
+        """
+        While every attempt fails, writes are dropped and counted, reads return nothing and
+        waits time out, then the link comes back once an attempt succeeds.
+        """
+        # Setup
+        connection, _ = create_connection(drone, create_policy())
+        # Enough failures for the backoff to reach the max
+        drone.failing_attempt_count = 6
+        connection.report_lost(0)
+        assert wait_until(lambda: drone.attempt_count >= 3)
+
+        # Run
+        connection.write(b"dropped")
+        connection.write(b"dropped")
+        data = connection.recv()
+        is_readable = connection.select(BACKOFF_INITIAL)
+        lost_status = connection.get_status()
+        is_connected, reconnect_count = connection.wait_connected(TIMEOUT_S)
+        status = connection.get_status()
+        # Nothing dropped reaches the new connection
+        is_peer_readable = len(select.select([drone.peers[-1]], [], [], 0.0)[0]) > 0
+        connection.close()
+
+        # Test
+        assert data == b""
+        assert not is_readable
+        assert not lost_status.is_connected
+        assert lost_status.dropped_write_count == 2
+        assert lost_status.downtime > 0.0
+        assert is_connected
+        assert reconnect_count == 1
+        assert status.failed_attempt_count == 6
+        assert status.dropped_write_count == 2
+        assert drone.attempt_count == 8
+        assert not is_peer_readable
+
+    def test_stale_report_ignored(self, drone: FakeDrone) -> None:
+        """
+        A lost link reported with the reconnect count of an older connection is ignored.
+        """
+        # Setup
+        connection, _ = create_connection(drone, create_policy())
+        connection.report_lost(0)
+        is_connected, reconnect_count = connection.wait_connected(TIMEOUT_S)
+        assert is_connected
+
+        # Run
+        connection.report_lost(reconnect_count - 1)
+        time.sleep(BACKOFF_MAX)
+        status = connection.get_status()
+        connection.close()
+
+        # Test
+        assert status.is_connected
+        assert status.reconnect_count == 1
+        assert len(drone.connections) == 2
+
+    def test_close_while_lost(self, drone: FakeDrone) -> None:
+        """
+        Closing stops reconnecting at once, and waits return not connected.
+        """
+        # Setup
+        connection, _ = create_connection(drone, create_policy())
+        drone.failing_attempt_count = 1000
+        connection.report_lost(0)
+        assert wait_until(lambda: drone.attempt_count >= 2)
+
+        # Run
+        closer = threading.Thread(target=connection.close)
+        closer.start()
+        closer.join(TIMEOUT_S)
+        is_connected, _ = connection.wait_connected(0.0)
+
+        # Test
+        assert not closer.is_alive()
+        assert not is_connected
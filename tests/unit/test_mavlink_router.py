@@ -0,0 +1,158 @@
+"""
+Test receiving routed messages and sending through a routed connection.
+"""
+
+import multiprocessing as mp
+import threading
+
+from pymavlink import mavutil
+from pymavlink.dialects.v20 import ardupilotmega as mavlink_2
+import pytest
+
+from utilities import mavlink_frame
+from utilities import mavlink_router
+from utilities import mavlink_sender
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+HEARTBEAT_ID = mavutil.mavlink.MAVLINK_MSG_ID_HEARTBEAT
+QUEUE_MAX_SIZE = 4
+SLOT_SIZE = 128  # bytes
+TIMEOUT_S = 1.0
+JOIN_TIMEOUT_S = 10.0
+
+
+class LockedConnection:
+    """
+    Connection that cannot be pickled, like one holding a socket, keeping every write.
+    """
+
+    def __init__(self) -> None:
+        self.mav = mavlink_2.MAVLink(self, srcSystem=1, srcComponent=1)
+        self.lock = threading.Lock()
+        self.writes = []
+
+    def write(self, buffer: bytes) -> None:
+        """
+        Keeps the buffer.
+        """
+        self.writes.append(buffer)
+
+
+def encode_heartbeat(mav_type: int) -> bytes:
+    """
+    Returns an encoded heartbeat of the vehicle type.
+    """
+    encoder = mavlink_2.MAVLink(None, srcSystem=1, srcComponent=1)
+    return encoder.heartbeat_encode(mav_type, 0, 0, 0, 0).pack(encoder)
+
+
+def echo_worker(routed_connection: mavlink_router.RoutedConnection) -> None:
+    """
+    Worker process that sends back the type of the heartbeat it receives, plus 1 .
+    """
+    msg = routed_connection.recv_match(type="HEARTBEAT", blocking=True, timeout=JOIN_TIMEOUT_S)
+    if msg is None:
+        return
+
+    routed_connection.mav.heartbeat_send(msg.type + 1, 0, 0, 0, 0)
+
+
+@pytest.fixture()
+def queues() -> "tuple[queue_proxy_wrapper.QueueProxyWrapper, queue_proxy_wrapper.QueueProxyWrapper]":  # type: ignore
+    """
+    Creates the subscription and send queues for forkserver processes, releasing them after the
+    test.
+    """
+    context = mp.get_context("forkserver")
+    # The manager is only used by the manager backend
+    subscription_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        None,
+        QUEUE_MAX_SIZE,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        SLOT_SIZE,
+        context=context,
+    )
+    send_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        None,
+        QUEUE_MAX_SIZE,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        SLOT_SIZE,
+        context=context,
+    )
+    yield subscription_queue, send_queue  # type: ignore
+
+    for routing_queue in [subscription_queue, send_queue]:
+        routing_queue.close()
+        routing_queue.release()
+
+
+class TestRoutedConnection:
+    """
+    Receiving and sending of a routed connection.
+    """
+
+    def test_forkserver_process(
+        self,
+        queues: "tuple[queue_proxy_wrapper.QueueProxyWrapper, queue_proxy_wrapper.QueueProxyWrapper]",
+    ) -> None:
+        """
+        A process receives the routed messages without the connection being pickled, and its
+        sends go to the send queue instead of the connection.
+        """
+        # Setup
+        subscription_queue, send_queue = queues
+        connection = LockedConnection()
+        routed_connection = mavlink_router.RoutedConnection(
+            connection,
+            mavlink_router.Subscription(["HEARTBEAT"], subscription_queue),
+            None,
+            mavlink_sender.SendingConnection(connection, send_queue),
+        )
+        worker = mp.get_context("forkserver").Process(target=echo_worker, args=(routed_connection,))
+        subscription_queue.queue.put(encode_heartbeat(1))
+
+        # Run
+        worker.start()
+        worker.join(JOIN_TIMEOUT_S)
+        items = send_queue.get_many(0, 0.0)
+
+        # Test
+        assert worker.exitcode == 0
+        assert len(connection.writes) == 0
+        assert len(items) == 1
+        _, frame = items[0]
+        assert mavlink_frame.get_message_id(frame) == HEARTBEAT_ID
+        msg = mavlink_2.MAVLink(None).decode(bytearray(frame))
+        assert msg.type == 2
+
+    def test_receive_only(
+        self,
+        queues: "tuple[queue_proxy_wrapper.QueueProxyWrapper, queue_proxy_wrapper.QueueProxyWrapper]",
+    ) -> None:
+        """
+        Without a sending connection, sends raise instead of writing to the connection, and
+        routed messages are still received.
+        """
+        # Setup
+        subscription_queue, _ = queues
+        connection = LockedConnection()
+        routed_connection = mavlink_router.RoutedConnection(
+            connection, mavlink_router.Subscription(["HEARTBEAT"], subscription_queue)
+        )
+        subscription_queue.queue.put(encode_heartbeat(3))
+
+        # Run
+        msg = routed_connection.recv_match(type="HEARTBEAT", blocking=True, timeout=TIMEOUT_S)
+        with pytest.raises(OSError):
+            routed_connection.mav.heartbeat_send(0, 0, 0, 0, 0)
+
+        # Test
+        assert msg is not None
+        assert msg.type == 3
+        assert len(connection.writes) == 0
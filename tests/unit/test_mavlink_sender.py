@@ -0,0 +1,453 @@
+"""
+Test the renumbering and rate caps of the MAVLink sender.
+"""
+
+import multiprocessing as mp
+import struct
+import threading
+import time
+
+from pymavlink import mavutil
+from pymavlink.dialects.v10 import ardupilotmega as mavlink_1
+from pymavlink.dialects.v20 import ardupilotmega as mavlink_2
+import pytest
+
+from utilities import mavlink_frame
+from utilities import mavlink_sender
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+COMMAND_LONG_ID = mavutil.mavlink.MAVLINK_MSG_ID_COMMAND_LONG
+COMMAND_INT_ID = mavutil.mavlink.MAVLINK_MSG_ID_COMMAND_INT
+HEARTBEAT_ID = mavutil.mavlink.MAVLINK_MSG_ID_HEARTBEAT
+ARM_COMMAND = mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM
+REPOSITION_COMMAND = mavutil.mavlink.MAV_CMD_DO_REPOSITION
+COMMAND_RATE = 20.0  # messages per second
+JOIN_TIMEOUT_S = 10.0
+
+
+class RecordingConnection:
+    """
+    Connection that keeps every write instead of sending it.
+    """
+
+    class Encoder:
+        """
+        Holds the sequence number set by the sender.
+        """
+
+        def __init__(self) -> None:
+            self.seq = 0
+
+    def __init__(self) -> None:
+        self.mav = RecordingConnection.Encoder()
+        self.writes = []
+        # Set to a lock by tests of connections that cannot be pickled, like a socket
+        self.lock = None
+
+    def write(self, buffer: bytes) -> None:
+        """
+        Keeps the buffer.
+        """
+        self.writes.append(buffer)
+
+
+def heartbeat_worker(sending_connection: mavlink_sender.SendingConnection) -> None:
+    """
+    Worker process that sends a heartbeat.
+    """
+    sending_connection.mav.heartbeat_send(0, 0, 0, 0, 0)
+
+
+def create_encoder(version: int = 2) -> object:
+    """
+    Returns an encoder of the MAVLink version that does not write anywhere.
+    """
+    dialect = mavlink_2 if version == 2 else mavlink_1
+    return dialect.MAVLink(None, srcSystem=1, srcComponent=1)
+
+
+def encode_heartbeat(version: int = 2) -> bytes:
+    """
+    Returns an encoded heartbeat with sequence number 0 .
+    """
+    encoder = create_encoder(version)
+    return encoder.heartbeat_encode(0, 0, 0, 0, 0).pack(encoder)
+
+
+def encode_command_long(command: int, param1: float = 0.0, version: int = 2) -> bytes:
+    """
+    Returns an encoded COMMAND_LONG of the command, trailing zero bytes dropped in MAVLink 2.
+    """
+    encoder = create_encoder(version)
+    return encoder.command_long_encode(1, 1, command, 0, param1, 0, 0, 0, 0, 0, 0).pack(encoder)
+
+
+def encode_command_int(command: int) -> bytes:
+    """
+    Returns an encoded MAVLink 2 COMMAND_INT of the command.
+    """
+    encoder = create_encoder()
+    return encoder.command_int_encode(1, 1, 0, command, 0, 0, 0, 0, 0, 0, 0, 0, 0).pack(encoder)
+
+
+def encode_signed_heartbeat() -> bytes:
+    """
+    Returns a signed MAVLink 2 heartbeat.
+    """
+    encoder = create_encoder()
+    encoder.signing.secret_key = bytes(32)
+    encoder.signing.link_id = 0
+    encoder.signing.timestamp = 1
+    encoder.signing.sign_outgoing = True
+    return encoder.heartbeat_encode(0, 0, 0, 0, 0).pack(encoder)
+
+
+def split_frames(buffer: bytes) -> "list[bytes]":
+    """
+    Returns the valid frames in the buffer, checking their checksums.
+    """
+    return [frame for _, frame in mavlink_frame.FrameParser().parse(buffer, None)]
+
+
+def get_seq(frame: bytes) -> int:
+    """
+    Returns the sequence number of the frame.
+    """
+    if frame[0] == mavlink_frame.MAVLINK_2_START:
+        return frame[mavlink_frame.MAVLINK_2_SEQ_INDEX]
+
+    return frame[mavlink_frame.MAVLINK_1_SEQ_INDEX]
+
+
+@pytest.fixture()
+def statistics() -> mavlink_sender.SenderStatistics:  # type: ignore
+    """
+    Creates sender statistics.
+    """
+    yield mavlink_sender.SenderStatistics()  # type: ignore
+
+
+@pytest.fixture()
+def rate_caps() -> mavlink_sender.SendRateCaps:  # type: ignore
+    """
+    Creates rate caps of COMMAND_LONG only.
+    """
+    yield mavlink_sender.SendRateCaps({"COMMAND_LONG": COMMAND_RATE})  # type: ignore
+
+
+class TestRenumber:
+    """
+    Sequence numbers set by the sender.
+    """
+
+    @pytest.mark.parametrize("version", [1, 2])
+    def test_checksum_recalculated(self, version: int) -> None:
+        """
+        The renumbered frame has the new sequence number and a valid checksum.
+        """
+        # Setup
+        frame = encode_command_long(ARM_COMMAND, 1.0, version)
+
+        # Run
+        renumbered = mavlink_sender._renumber(frame, 200)
+
+        # Test
+        assert get_seq(renumbered) == 200
+        assert split_frames(renumbered) == [renumbered]
+        decoded = create_encoder(version).decode(bytearray(renumbered))
+        assert decoded.get_seq() == 200
+        assert decoded.command == ARM_COMMAND
+
+    def test_signed_frame_unchanged(self) -> None:
+        """
+        Signed frames keep their sequence number, which the signature covers.
+        """
+        # Setup
+        frame = encode_signed_heartbeat()
+
+        # Run
+        renumbered = mavlink_sender._renumber(frame, 200)
+
+        # Test
+        assert renumbered == frame
+
+    def test_unknown_message_unchanged(self) -> None:
+        """
+        Frames of a message ID outside the dialect cannot be checked, so are left as is.
+        """
+        # Setup
+        frame = bytearray(encode_heartbeat())
+        # Message ID 0xFFFFFF
+        frame[7:10] = b"\xff\xff\xff"
+
+        # Run
+        renumbered = mavlink_sender._renumber(bytes(frame), 200)
+
+        # Test
+        assert renumbered == bytes(frame)
+
+
+class TestHoldKey:
+    """
+    Keys that held back messages are replaced by.
+    """
+
+    def test_other_message(self) -> None:
+        """
+        Messages other than commands are held per message ID.
+        """
+        # Test
+        assert mavlink_sender._get_hold_key(encode_heartbeat()) == (HEARTBEAT_ID, None)
+
+    @pytest.mark.parametrize("version", [1, 2])
+    def test_command_long(self, version: int) -> None:
+        """
+        COMMAND_LONG is held per command in either version.
+        """
+        # Setup
+        frame = encode_command_long(ARM_COMMAND, version=version)
+
+        # Run
+        actual = mavlink_sender._get_hold_key(frame)
+
+        # Test
+        assert actual == (COMMAND_LONG_ID, ARM_COMMAND)
+
+    def test_truncated_command(self) -> None:
+        """
+        A command whose upper byte was dropped with the trailing zero bytes is still read.
+        """
+        # Setup
+        encoder = create_encoder()
+        # Broadcast, so the target bytes after the command are zero too
+        frame = encoder.command_long_encode(
+            0, 0, mavutil.mavlink.MAV_CMD_NAV_TAKEOFF, 0, 0, 0, 0, 0, 0, 0, 0
+        ).pack(encoder)
+
+        # Run
+        actual = mavlink_sender._get_hold_key(frame)
+
+        # Test
+        assert frame[1] < mavlink_sender.COMMAND_PAYLOAD_OFFSET + 2
+        assert actual == (COMMAND_LONG_ID, mavutil.mavlink.MAV_CMD_NAV_TAKEOFF)
+
+    def test_command_int(self) -> None:
+        """
+        COMMAND_INT is held per command.
+        """
+        # Test
+        assert mavlink_sender._get_hold_key(encode_command_int(REPOSITION_COMMAND)) == (
+            COMMAND_INT_ID,
+            REPOSITION_COMMAND,
+        )
+
+
+class TestSendAvailable:
+    """
+    Writes of the sender with rate caps.
+    """
+
+    def test_single_write_in_order(
+        self,
+        rate_caps: mavlink_sender.SendRateCaps,
+        statistics: mavlink_sender.SenderStatistics,
+    ) -> None:
+        """
+        Available messages are written in a single write, in submit order, numbered in turn.
+        """
+        # Setup
+        connection = RecordingConnection()
+        connection.mav.seq = 255
+        submitted = [(1.0, encode_heartbeat()), (2.0, encode_command_long(ARM_COMMAND))]
+
+        # Run
+        mavlink_sender.send_available(connection, submitted, {}, {}, rate_caps, statistics)
+
+        # Test
+        assert len(connection.writes) == 1
+        frames = split_frames(connection.writes[0])
+        assert [get_seq(frame) for frame in frames] == [255, 0]
+        assert [mavlink_frame.get_message_id(frame) for frame in frames] == [
+            HEARTBEAT_ID,
+            COMMAND_LONG_ID,
+        ]
+        snapshot = statistics.snapshot()
+        assert snapshot.message_count == 2
+        assert snapshot.write_count == 1
+        assert snapshot.byte_count == len(connection.writes[0])
+
+    def test_same_command_replaced(
+        self,
+        rate_caps: mavlink_sender.SendRateCaps,
+        statistics: mavlink_sender.SenderStatistics,
+    ) -> None:
+        """
+        A held back command is replaced by a newer one of the same command.
+        """
+        # Setup
+        connection = RecordingConnection()
+        held = {}
+        last_send_times = {COMMAND_LONG_ID: time.monotonic()}
+        submitted = [
+            (1.0, encode_command_long(ARM_COMMAND, 1.0)),
+            (2.0, encode_command_long(ARM_COMMAND, 0.0)),
+        ]
+
+        # Run
+        mavlink_sender.send_available(
+            connection, submitted, held, last_send_times, rate_caps, statistics
+        )
+
+        # Test
+        assert len(connection.writes) == 0
+        assert list(held) == [(COMMAND_LONG_ID, ARM_COMMAND)]
+        assert held[(COMMAND_LONG_ID, ARM_COMMAND)] == submitted[1]
+        assert statistics.snapshot().replaced_count == 1
+
+    def test_different_commands_sent_in_turn(
+        self,
+        rate_caps: mavlink_sender.SendRateCaps,
+        statistics: mavlink_sender.SenderStatistics,
+    ) -> None:
+        """
+        Different commands are not replaced, but sent oldest first, one per interval.
+        """
+        # Setup
+        connection = RecordingConnection()
+        held = {}
+        last_send_times = {}
+        submitted = [
+            (1.0, encode_command_long(REPOSITION_COMMAND)),
+            (2.0, encode_command_long(ARM_COMMAND)),
+        ]
+
+        # Run
+        mavlink_sender.send_available(
+            connection, submitted, held, last_send_times, rate_caps, statistics
+        )
+        first_writes = list(connection.writes)
+        timeout = mavlink_sender.get_hold_timeout(held, last_send_times, rate_caps)
+
+        # Interval has passed
+        last_send_times[COMMAND_LONG_ID] -= 1.0 / COMMAND_RATE
+        mavlink_sender.send_available(connection, [], held, last_send_times, rate_caps, statistics)
+
+        # Test
+        assert len(first_writes) == 1
+        assert mavlink_sender._get_hold_key(first_writes[0]) == (
+            COMMAND_LONG_ID,
+            REPOSITION_COMMAND,
+        )
+        assert 0.0 < timeout <= 1.0 / COMMAND_RATE
+        assert len(connection.writes) == 2
+        assert mavlink_sender._get_hold_key(connection.writes[1]) == (COMMAND_LONG_ID, ARM_COMMAND)
+        assert len(held) == 0
+        assert statistics.snapshot().replaced_count == 0
+
+
+class TestSendRateCaps:
+    """
+    Rate caps by message type.
+    """
+
+    def test_min_intervals(self) -> None:
+        """
+        Each rate becomes the shortest interval between messages of its ID.
+        """
+        # Run
+        rate_caps = mavlink_sender.SendRateCaps({"COMMAND_LONG": 20.0, "HEARTBEAT": 2.0})
+
+        # Test
+        assert rate_caps.min_intervals == pytest.approx({COMMAND_LONG_ID: 0.05, HEARTBEAT_ID: 0.5})
+
+    @pytest.mark.parametrize("rates", [{"NOT_A_MESSAGE": 1.0}, {"HEARTBEAT": 0.0}])
+    def test_invalid(self, rates: "dict[str, float]") -> None:
+        """
+        Unknown types and rates that are not positive are rejected.
+        """
+        # Run
+        with pytest.raises(ValueError):
+            mavlink_sender.SendRateCaps(rates)
+
+
+class TestSenderStatistics:
+    """
+    Counters of the sender.
+    """
+
+    def test_queueing_delay(self, statistics: mavlink_sender.SenderStatistics) -> None:
+        """
+        The delay from submitting to writing is summed and its maximum kept.
+        """
+        # Run
+        statistics.record_write([1.0, 1.5], 40, 2.0)
+        statistics.record_write([2.0], 20, 2.25)
+
+        # Test
+        snapshot = statistics.snapshot()
+        assert snapshot.message_count == 3
+        assert snapshot.byte_count == 60
+        assert snapshot.write_count == 2
+        assert snapshot.total_queueing_delay == pytest.approx(1.75)
+        assert snapshot.max_queueing_delay == pytest.approx(1.0)
+
+
+class TestSendingConnection:
+    """
+    Submitting messages to the send queue.
+    """
+
+    def test_forkserver_process(self) -> None:
+        """
+        Only the dialect and source IDs of the connection are pickled into a process, so a
+        connection that cannot be pickled is never copied, and the process submits to the send
+        queue instead of writing to the connection.
+        """
+        # Setup
+        context = mp.get_context("forkserver")
+        connection = RecordingConnection()
+        connection.mav = create_encoder()
+        connection.lock = threading.Lock()
+        # The manager is only used by the manager backend
+        send_queue = queue_proxy_wrapper.QueueProxyWrapper(
+            None, 4, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY, 128, context=context
+        )
+        sending_connection = mavlink_sender.SendingConnection(connection, send_queue)
+        worker = context.Process(target=heartbeat_worker, args=(sending_connection,))
+
+        # Run
+        worker.start()
+        worker.join(JOIN_TIMEOUT_S)
+        items = send_queue.get_many(0, 0.0)
+        send_queue.close()
+        send_queue.release()
+
+        # Test
+        assert worker.exitcode == 0
+        assert len(connection.writes) == 0
+        assert len(items) == 1
+        _, frame = items[0]
+        assert mavlink_frame.get_message_id(frame) == HEARTBEAT_ID
+        # Source system and component
+        assert frame[5:7] == bytes([1, 1])
+
+
+def test_command_payload_offset() -> None:
+    """
+    The command is at COMMAND_PAYLOAD_OFFSET in the payload of both command messages.
+    """
+    # Setup
+    frame = encode_command_long(ARM_COMMAND, version=1)
+    payload = frame[mavlink_frame.MAVLINK_1_HEADER_LENGTH :]
+
+    # Run
+    (command,) = struct.unpack_from("<H", payload, mavlink_sender.COMMAND_PAYLOAD_OFFSET)
+
+    # Test
+    assert command == ARM_COMMAND
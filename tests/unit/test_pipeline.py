@@ -0,0 +1,356 @@
+"""
+Test the validation of pipeline configurations.
+"""
+
+import copy
+import pathlib
+
+import pytest
+
+from modules.common.modules.read_yaml import read_yaml
+from utilities.workers import pipeline
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+PIPELINE_CONFIG_FILE_PATH = pathlib.Path("pipeline.yaml")
+STAGE_TARGET = "tests.unit.test_pipeline.stage_worker"
+# Stands in for the connection created by main
+RESOURCES = {"connection": object(), "target": (1, 2, 3)}
+# Removes the setting instead of replacing it
+REMOVE = object()
+
+
+def stage_worker() -> None:
+    """
+    Target of the stages, never run.
+    """
+
+
+@pytest.fixture()
+def config() -> "dict[str, object]":  # type: ignore
+    """
+    Creates a valid configuration with a router, a stage that subscribes and sends, and a sender.
+    """
+    valid_config = {
+        "queues": {
+            "results": {"backend": "SHARED_MEMORY", "max_size": 2},
+            "messages": {"backend": "SHARED_MEMORY", "max_size": 2},
+            "sends": {"backend": "SHARED_MEMORY", "max_size": 2},
+        },
+        "main_input_queues": ["results"],
+        "stages": {
+            "router": {
+                "target": STAGE_TARGET,
+                "args": ["$connection", "$subscriptions"],
+                "executor": "THREAD",
+            },
+            "worker": {
+                "target": STAGE_TARGET,
+                "args": ["$routed_connection", "$sending_connection", "$target"],
+                "subscribe": {"queue": "messages", "message_types": ["HEARTBEAT"]},
+                "send": "sends",
+                "output_queues": ["results"],
+                "executor": "THREAD",
+            },
+            "sender": {
+                "target": STAGE_TARGET,
+                "args": ["$connection"],
+                "input_queues": ["sends"],
+                "executor": "THREAD",
+            },
+        },
+    }
+    yield valid_config  # type: ignore
+
+
+def change_setting(config: "dict[str, object]", path: "tuple[str, ...]", value: object) -> None:
+    """
+    Replaces the setting at the path of keys with the value, or removes it if REMOVE.
+    """
+    parent = config
+    for key in path[:-1]:
+        parent = parent[key]
+
+    if value is REMOVE:
+        del parent[path[-1]]
+    else:
+        parent[path[-1]] = value
+
+
+def parse(
+    config: "dict[str, object]", start_method: "str | None" = "fork"
+) -> "tuple[bool, tuple | str]":
+    """
+    Validates the configuration without creating anything.
+    """
+    return pipeline.Pipeline._Pipeline__parse(config, RESOURCES, start_method)
+
+
+class TestValidConfiguration:
+    """
+    Configurations that are accepted.
+    """
+
+    def test_valid(self, config: "dict[str, object]") -> None:
+        """
+        Defaults are filled in, resources replaced, and producers ordered before consumers.
+        """
+        # Run
+        result, definitions = parse(config)
+
+        # Test
+        assert result, definitions
+        queue_definitions, stage_definitions, main_input_queue_names, stage_order = definitions
+        assert queue_definitions["results"]["backpressure"] == "BLOCK"
+        assert stage_definitions["worker"]["target"] is stage_worker
+        assert stage_definitions["worker"]["args"][2] == RESOURCES["target"]
+        assert stage_definitions["router"]["routed_queues"] == ["messages"]
+        assert main_input_queue_names == ["results"]
+        assert stage_order == ["router", "worker", "sender"]
+
+    def test_pipeline_yaml(self) -> None:
+        """
+        The pipeline of bootcamp_main is accepted, with the resources main creates.
+        """
+        # Setup
+        result, pipeline_config = read_yaml.open_config(PIPELINE_CONFIG_FILE_PATH)
+        assert result
+
+        resources = {"connection": object(), "target": object(), "sender_statistics": object()}
+
+        # Run
+        result, reason = pipeline.Pipeline._Pipeline__parse(
+            pipeline_config, resources, "forkserver"
+        )
+
+        # Test
+        assert result, reason
+
+
+class TestInvalidConfiguration:
+    """
+    Every reason a configuration is rejected.
+    """
+
+    @pytest.mark.parametrize(
+        "path, value, expected_reason",
+        [
+            (("queues",), [], "queues and stages must be mappings"),
+            (("main_input_queues",), "results", "main_input_queues must be a list"),
+            (("queues", "results"), 10, "Queue results must be a mapping"),
+            (("queues", "results", "size"), 10, "Queue results has unknown setting size"),
+            (("queues", "results", "max_size"), "10", "setting max_size must be int, got '10'"),
+            (("queues", "results", "max_size"), True, "setting max_size must be int, got True"),
+            (("queues", "results", "instrumented"), 1, "setting instrumented must be bool"),
+            (("queues", "results", "backend"), "DISK", "Queue results has unknown backend DISK"),
+            (("queues", "results", "backpressure"), "DROP", "has unknown backpressure DROP"),
+            (("stages", "sender", "target"), REMOVE, "Stage sender is missing setting target"),
+            (("stages", "sender", "workers"), 2, "Stage sender has unknown setting workers"),
+            (("stages", "sender", "nice"), "low", "setting nice must be int or None"),
+            (("stages", "sender", "subscribe"), [], "setting subscribe must be dict or None"),
+            (("stages", "sender", "target"), "tests.unit.missing", "cannot be imported"),
+            (("stages", "sender", "args"), ["$camera"], "uses unknown resource camera"),
+            (("stages", "worker", "count"), 0, "Stage worker requires count > 0"),
+            (("stages", "worker", "spare_count"), -1, "Stage worker requires count > 0"),
+            (("stages", "sender", "executor"), "FIBER", "has unknown executor FIBER"),
+            (("stages", "sender", "nice"), 50, "Stage sender has invalid scheduling"),
+            (("stages", "sender", "cpus"), [], "Stage sender has invalid scheduling"),
+            (("stages", "worker", "output_queues"), ["missing"], "uses unknown queue missing"),
+            (("stages", "worker", "output_queues"), [1], "uses unknown queue 1"),
+            (("main_input_queues",), ["missing"], "Main uses unknown queue missing"),
+            (
+                ("stages", "worker", "subscribe"),
+                {"queue": "messages"},
+                "Stage worker subscribe requires a queue and message_types",
+            ),
+            (
+                ("stages", "worker", "subscribe", "message_types"),
+                [],
+                "Stage worker subscribe requires a queue and message_types",
+            ),
+            (
+                ("stages", "worker", "subscribe", "message_types"),
+                [0],
+                "Stage worker subscribe requires a queue and message_types",
+            ),
+            (
+                ("stages", "worker", "subscribe", "queue"),
+                "missing",
+                "Stage worker subscribes to unknown queue missing",
+            ),
+            (
+                ("stages", "listener"),
+                {
+                    "target": STAGE_TARGET,
+                    "subscribe": {"queue": "messages", "message_types": ["ATTITUDE"]},
+                    "executor": "THREAD",
+                },
+                "Stage listener subscribes to queue messages of another",
+            ),
+            (
+                ("stages", "worker", "subscribe"),
+                None,
+                "Stage worker uses routed_connection without subscribe",
+            ),
+            (
+                ("stages", "router2"),
+                {"target": STAGE_TARGET, "args": ["$subscriptions"], "executor": "THREAD"},
+                "Stages router, router2 all route, only one may",
+            ),
+            (("stages", "router", "count"), 2, "Stage router routes, so it requires count 1"),
+            (("stages", "router", "spare_count"), 1, "Stage router routes, so it requires count 1"),
+            (
+                ("stages", "router", "args"),
+                ["$connection"],
+                "Stages subscribe but no stage has $subscriptions in its args",
+            ),
+            (
+                ("stages", "worker", "send"),
+                None,
+                "Stage worker uses sending_connection without send",
+            ),
+            (
+                ("stages", "worker", "send"),
+                "missing",
+                "Stage worker sends to unknown queue missing",
+            ),
+            (
+                ("stages", "sender", "input_queues"),
+                [],
+                "Send queue sends requires a single stage reading it",
+            ),
+            (("stages", "sender", "count"), 2, "Stage sender writes sends, so it requires count 1"),
+            (
+                ("queues", "unused"),
+                {"backend": "SHARED_MEMORY", "max_size": 2},
+                "Queue unused is orphaned",
+            ),
+        ],
+    )
+    def test_rejected(
+        self,
+        config: "dict[str, object]",
+        path: "tuple[str, ...]",
+        value: object,
+        expected_reason: str,
+    ) -> None:
+        """
+        Changing a single setting of a valid configuration rejects it with the reason.
+        """
+        # Setup
+        change_setting(config, path, value)
+
+        # Run
+        result, reason = parse(config)
+
+        # Test
+        assert not result
+        assert expected_reason in reason
+
+    def test_queue_too_small(self, config: "dict[str, object]") -> None:
+        """
+        A bounded queue smaller than its producer count is rejected.
+        """
+        # Setup
+        change_setting(config, ("stages", "worker", "count"), 3)
+
+        # Run
+        result, reason = parse(config)
+
+        # Test
+        assert not result
+        assert reason == "Queue results requires max_size >= 3"
+
+    def test_cycle(self, config: "dict[str, object]") -> None:
+        """
+        Stages that feed each other are rejected.
+        """
+        # Setup
+        change_setting(config, ("queues", "back"), {"backend": "SHARED_MEMORY", "max_size": 2})
+        change_setting(config, ("stages", "worker", "input_queues"), ["back"])
+        change_setting(
+            config,
+            ("stages", "echo"),
+            {
+                "target": STAGE_TARGET,
+                "input_queues": ["results"],
+                "output_queues": ["back"],
+            },
+        )
+
+        # Run
+        result, reason = parse(config)
+
+        # Test
+        assert not result
+        assert reason == "Stages worker, sender, echo form a cycle"
+
+    def test_unavailable_start_method(self, config: "dict[str, object]") -> None:
+        """
+        A start method the platform does not have is rejected.
+        """
+        # Run
+        result, reason = parse(config, "bogus")
+
+        # Test
+        assert not result
+        assert reason == "Start method bogus is not available"
+
+    @pytest.mark.parametrize("start_method", ["fork", "spawn", "forkserver"])
+    def test_connection_in_process(self, config: "dict[str, object]", start_method: str) -> None:
+        """
+        A process stage getting the connection is rejected with any start method, while one
+        getting routed and sending connections is accepted.
+        """
+        # Setup
+        change_setting(config, ("stages", "worker", "executor"), "PROCESS")
+        connection_config = copy.deepcopy(config)
+        change_setting(connection_config, ("stages", "sender", "executor"), "PROCESS")
+
+        # Run
+        result, reason = parse(config, start_method)
+        connection_result, connection_reason = parse(connection_config, start_method)
+
+        # Test
+        assert result, reason
+        assert not connection_result
+        assert connection_reason == (
+            "Stage sender gets connection, which only threads of main can use, run it as THREAD"
+        )
+
+    def test_routed_connection_without_connection(self, config: "dict[str, object]") -> None:
+        """
+        Routing requires the connection resource.
+        """
+        # Setup
+        change_setting(config, ("stages", "router", "args"), ["$subscriptions"])
+        change_setting(config, ("stages", "sender", "args"), [])
+
+        # Run
+        result, reason = pipeline.Pipeline._Pipeline__parse(config, {"target": None}, "fork")
+
+        # Test
+        assert not result
+        assert reason == "Stage worker uses routed_connection without connection"
+
+    def test_sending_connection_without_connection(self, config: "dict[str, object]") -> None:
+        """
+        Sending requires the connection resource.
+        """
+        # Setup
+        change_setting(config, ("stages", "router", "args"), [])
+        change_setting(config, ("stages", "worker", "subscribe"), None)
+        change_setting(config, ("stages", "worker", "args"), ["$sending_connection"])
+        change_setting(config, ("stages", "sender", "args"), [])
+        del config["queues"]["messages"]
+
+        # Run
+        result, reason = pipeline.Pipeline._Pipeline__parse(config, {}, "fork")
+
+        # Test
+        assert not result
+        assert reason == "Stage worker uses sending_connection without connection"
@@ -0,0 +1,228 @@
+"""
+Test serving several queues by priority.
+"""
+
+import queue
+import threading
+
+import pytest
+
+from utilities.workers import closable_queue
+from utilities.workers import priority_lanes
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+LANE_COUNT = 3
+LANE_MAX_SIZE = 10
+FAIRNESS_PERIOD = 3
+TIMEOUT_S = 0.05
+# Long enough for a blocked caller to be waiting, short enough to fail fast
+BLOCK_WAIT_S = 0.2
+JOIN_TIMEOUT_S = 10.0
+
+
+@pytest.fixture()
+def lanes() -> "list[queue_proxy_wrapper.QueueProxyWrapper]":  # type: ignore
+    """
+    Creates shared memory lanes, from highest to lowest priority, releasing them after the test.
+    """
+    # The manager is only used by the manager backend
+    queues = [
+        queue_proxy_wrapper.QueueProxyWrapper(
+            None, LANE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY, 64
+        )
+        for _ in range(LANE_COUNT)
+    ]
+    yield queues  # type: ignore
+
+    for lane in queues:
+        lane.close()
+        lane.release()
+
+
+@pytest.fixture()
+def prioritized(
+    lanes: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+) -> priority_lanes.PriorityLanes:  # type: ignore
+    """
+    Serves the lanes with FAIRNESS_PERIOD .
+    """
+    yield priority_lanes.PriorityLanes(lanes, FAIRNESS_PERIOD)  # type: ignore
+
+
+def fill(lane: queue_proxy_wrapper.QueueProxyWrapper, lane_index: int, count: int) -> None:
+    """
+    Puts the numbered items of the lane.
+    """
+    for index in range(count):
+        lane.queue.put((lane_index, index))
+
+
+class TestPriorityLanes:
+    """
+    Order items are served in, and waiting on the lanes.
+    """
+
+    def test_higher_lane_first(
+        self,
+        lanes: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+        prioritized: priority_lanes.PriorityLanes,
+    ) -> None:
+        """
+        An item of a higher lane is served before the items of lower lanes put before it.
+        """
+        # Setup
+        fill(lanes[2], 2, 1)
+        fill(lanes[1], 1, 1)
+        fill(lanes[0], 0, 1)
+
+        # Run
+        actual = [prioritized.get(TIMEOUT_S)[0] for _ in range(LANE_COUNT)]
+
+        # Test
+        assert actual == [0, 1, 2]
+
+    def test_fairness(
+        self,
+        lanes: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+        prioritized: priority_lanes.PriorityLanes,
+    ) -> None:
+        """
+        While the lower lanes have items, every FAIRNESS_PERIOD-th item comes from a lower lane in
+        turn, so each gets at least 1 of every FAIRNESS_PERIOD * (LANE_COUNT - 1) items.
+        """
+        # Setup
+        fill(lanes[0], 0, 8)
+        fill(lanes[1], 1, 4)
+        fill(lanes[2], 2, 4)
+        window = FAIRNESS_PERIOD * (LANE_COUNT - 1)
+
+        # Run
+        served = []
+        for _ in range(16):
+            lane_index, item = prioritized.get(TIMEOUT_S)
+            served.append(lane_index)
+            # Items of a lane keep their order
+            assert item[0] == lane_index
+
+        # Test
+        assert served[:12] == [0, 0, 1, 0, 0, 2, 0, 0, 1, 0, 0, 2]
+        for start in range(0, 12 - window + 1):
+            assert 1 in served[start : start + window]
+            assert 2 in served[start : start + window]
+
+        assert prioritized.served_counts() == [8, 4, 4]
+        with pytest.raises(queue.Empty):
+            prioritized.get(TIMEOUT_S)
+
+    def test_get_many_in_service_order(
+        self,
+        lanes: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+        prioritized: priority_lanes.PriorityLanes,
+    ) -> None:
+        """
+        get_many() takes the available items in the same order as get() .
+        """
+        # Setup
+        fill(lanes[0], 0, 4)
+        fill(lanes[1], 1, 1)
+
+        # Run
+        actual = prioritized.get_many(0, TIMEOUT_S)
+
+        # Test
+        assert [lane_index for lane_index, _ in actual] == [0, 0, 1, 0, 0]
+        assert prioritized.served_counts() == [4, 1, 0]
+
+    def test_timeout(self, prioritized: priority_lanes.PriorityLanes) -> None:
+        """
+        Empty lanes raise queue.Empty after the timeout, and get_many() returns nothing.
+        """
+        # Run
+        with pytest.raises(queue.Empty):
+            prioritized.get(TIMEOUT_S)
+
+        actual = prioritized.get_many(0, TIMEOUT_S)
+
+        # Test
+        assert actual == []
+
+    def test_closed_lanes_skipped(
+        self,
+        lanes: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+        prioritized: priority_lanes.PriorityLanes,
+    ) -> None:
+        """
+        With the higher lanes closed, items of the open lane are still served.
+        """
+        # Setup
+        lanes[0].close()
+        lanes[1].close()
+        served = []
+
+        def blocked_get() -> None:
+            served.append(prioritized.get(JOIN_TIMEOUT_S))
+
+        getter = threading.Thread(target=blocked_get)
+        getter.start()
+        getter.join(BLOCK_WAIT_S)
+
+        # Run
+        lanes[2].queue.put("low")
+        getter.join(JOIN_TIMEOUT_S)
+
+        # Test
+        assert served == [(2, "low")]
+
+    def test_all_closed(
+        self,
+        lanes: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+        prioritized: priority_lanes.PriorityLanes,
+    ) -> None:
+        """
+        A waiting get raises Closed once every lane is closed.
+        """
+        # Setup
+        outcomes = []
+
+        def blocked_get() -> None:
+            try:
+                prioritized.get()
+                outcomes.append("item")
+            except closable_queue.Closed:
+                outcomes.append("closed")
+
+        getter = threading.Thread(target=blocked_get)
+        getter.start()
+        getter.join(BLOCK_WAIT_S)
+
+        # Run
+        lanes[0].close()
+        getter.join(BLOCK_WAIT_S)
+        is_waiting_with_open_lanes = getter.is_alive()
+        prioritized.close()
+        getter.join(JOIN_TIMEOUT_S)
+
+        # Test
+        assert is_waiting_with_open_lanes
+        assert not getter.is_alive()
+        assert outcomes == ["closed"]
+
+    @pytest.mark.parametrize("fairness_period", [0, -1])
+    def test_invalid_fairness_period(
+        self, lanes: "list[queue_proxy_wrapper.QueueProxyWrapper]", fairness_period: int
+    ) -> None:
+        """
+        A fairness period that is not positive is rejected, as are no lanes.
+        """
+        # Run
+        with pytest.raises(ValueError):
+            priority_lanes.PriorityLanes(lanes, fairness_period)
+
+        with pytest.raises(ValueError):
+            priority_lanes.PriorityLanes([], FAIRNESS_PERIOD)
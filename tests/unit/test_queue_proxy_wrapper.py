@@ -0,0 +1,114 @@
+"""
+Test the batched calls of the queue wrapper.
+"""
+
+import multiprocessing as mp
+import multiprocessing.managers
+
+import pytest
+
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 4
+SLOT_SIZE = 64  # bytes
+TIMEOUT_S = 0.05
+
+
+@pytest.fixture(scope="module")
+def mp_manager() -> multiprocessing.managers.SyncManager:  # type: ignore
+    """
+    Starts a manager shared by the tests of the module.
+    """
+    manager = mp.Manager()
+    yield manager  # type: ignore
+
+    manager.shutdown()
+
+
+@pytest.fixture(
+    params=[
+        queue_proxy_wrapper.QueueBackend.MANAGER,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+    ]
+)
+def wrapper(
+    mp_manager: multiprocessing.managers.SyncManager, request: pytest.FixtureRequest
+) -> queue_proxy_wrapper.QueueProxyWrapper:  # type: ignore
+    """
+    Creates a small queue with each bounded backend, releasing it after the test.
+    """
+    queue = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager, QUEUE_MAX_SIZE, request.param, SLOT_SIZE
+    )
+    yield queue  # type: ignore
+
+    queue.close()
+    queue.release()
+
+
+class TestBatching:
+    """
+    put_many() and get_many() with each backend.
+    """
+
+    def test_put_many_get_many_in_order(
+        self, wrapper: queue_proxy_wrapper.QueueProxyWrapper
+    ) -> None:
+        """
+        Items come out in the order put.
+        """
+        # Setup
+        expected = ["a", "b", "c"]
+
+        # Run
+        put_count = wrapper.put_many(expected, TIMEOUT_S)
+        actual = wrapper.get_many(0, TIMEOUT_S)
+
+        # Test
+        assert put_count == len(expected)
+        assert actual == expected
+
+    def test_put_many_stops_when_full(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Items past the size of the queue are not put.
+        """
+        # Setup
+        items = list(range(QUEUE_MAX_SIZE + 2))
+
+        # Run
+        put_count = wrapper.put_many(items, TIMEOUT_S)
+
+        # Test
+        assert put_count == QUEUE_MAX_SIZE
+        assert wrapper.get_many(0, TIMEOUT_S) == items[:QUEUE_MAX_SIZE]
+
+    def test_get_many_max_items(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        get_many() returns at most max_items, leaving the rest.
+        """
+        # Setup
+        wrapper.put_many([1, 2, 3], TIMEOUT_S)
+
+        # Run
+        first = wrapper.get_many(2, TIMEOUT_S)
+        rest = wrapper.get_many(2, TIMEOUT_S)
+
+        # Test
+        assert first == [1, 2]
+        assert rest == [3]
+
+    def test_get_many_timeout(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        get_many() on an empty queue returns nothing after the timeout.
+        """
+        # Run
+        actual = wrapper.get_many(0, TIMEOUT_S)
+
+        # Test
+        assert actual == []
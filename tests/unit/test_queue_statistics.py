@@ -0,0 +1,203 @@
+"""
+Test the statistics recorded by instrumented queues.
+"""
+
+import threading
+import time
+
+import pytest
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_statistics
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 4
+SLOT_SIZE = 64  # bytes
+TIMEOUT_S = 0.05
+# Long enough to land past the 0.01 second bucket, short enough to stay in the 0.1 second bucket
+HOLD_S = 0.03
+# Histogram bucket of HOLD_S
+HOLD_BUCKET = 3
+JOIN_TIMEOUT_S = 10.0
+
+
+@pytest.fixture()
+def wrapper() -> queue_proxy_wrapper.QueueProxyWrapper:  # type: ignore
+    """
+    Creates a small instrumented shared memory queue, releasing it after the test.
+    """
+    # The manager is only used by the manager backend
+    queue = queue_proxy_wrapper.QueueProxyWrapper(
+        None,
+        QUEUE_MAX_SIZE,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        SLOT_SIZE,
+        instrumented=True,
+    )
+    yield queue  # type: ignore
+
+    queue.close()
+    queue.release()
+
+
+def get_snapshot(
+    wrapper: queue_proxy_wrapper.QueueProxyWrapper,
+) -> queue_statistics.QueueStatisticsSnapshot:
+    """
+    Returns the statistics of the instrumented queue.
+    """
+    result, snapshot = wrapper.get_statistics()
+    assert result
+    assert snapshot is not None
+    return snapshot
+
+
+class TestQueueStatistics:
+    """
+    Counters and histograms of the snapshot.
+    """
+
+    def test_counts_and_high_water(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Enqueued and dequeued items are counted by single and batched calls, and the high water
+        depth is the deepest the queue has been.
+        """
+        # Setup
+        for item in range(3):
+            wrapper.queue.put(item)
+
+        wrapper.queue.get()
+        wrapper.put_many([3, 4])
+
+        # Run
+        full_snapshot = get_snapshot(wrapper)
+        items = wrapper.get_many(0, TIMEOUT_S)
+        snapshot = get_snapshot(wrapper)
+
+        # Test
+        assert items == [1, 2, 3, 4]
+        assert full_snapshot.enqueued_count == 5
+        assert full_snapshot.dequeued_count == 1
+        assert full_snapshot.depth == QUEUE_MAX_SIZE
+        assert snapshot.enqueued_count == 5
+        assert snapshot.dequeued_count == 5
+        assert snapshot.depth == 0
+        assert snapshot.high_water_depth == QUEUE_MAX_SIZE
+        assert snapshot.producer_blocked_count == 0
+        assert snapshot.timestamp > full_snapshot.timestamp
+
+    def test_producer_blocked_time(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        A put into a full queue is counted as blocked for as long as it waited for space.
+        """
+        # Setup
+        wrapper.put_many(list(range(QUEUE_MAX_SIZE)))
+        producer = threading.Thread(target=wrapper.queue.put, args=(QUEUE_MAX_SIZE,))
+        producer.start()
+        time.sleep(HOLD_S)
+
+        # Run
+        wrapper.queue.get()
+        producer.join(JOIN_TIMEOUT_S)
+        snapshot = get_snapshot(wrapper)
+
+        # Test
+        assert not producer.is_alive()
+        assert snapshot.enqueued_count == QUEUE_MAX_SIZE + 1
+        assert snapshot.producer_blocked_count == 1
+        assert snapshot.producer_blocked_time >= HOLD_S
+
+    def test_residence_histogram(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Each dequeued item is counted in the bucket of how long it was queued.
+        """
+        # Setup
+        wrapper.put_many([0, 1])
+        time.sleep(HOLD_S)
+
+        # Run
+        wrapper.get_many(0, TIMEOUT_S)
+        snapshot = get_snapshot(wrapper)
+
+        # Test
+        assert sum(snapshot.residence_histogram) == 2
+        assert sum(snapshot.residence_histogram[:HOLD_BUCKET]) == 0
+        assert snapshot.residence_time >= 2 * HOLD_S
+        assert snapshot.mean_residence_time() >= HOLD_S
+
+    def test_consumer_wait_histogram(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        A get that waited for an item is counted in the bucket of its wait, and a get that timed
+        out only adds to the wait time.
+        """
+        # Setup
+        producer = threading.Timer(HOLD_S, wrapper.queue.put, args=("item",))
+        producer.start()
+
+        # Run
+        item = wrapper.queue.get(True, JOIN_TIMEOUT_S)
+        waited_snapshot = get_snapshot(wrapper)
+        timed_out_items = wrapper.get_many(0, TIMEOUT_S)
+        snapshot = get_snapshot(wrapper)
+        producer.join(JOIN_TIMEOUT_S)
+
+        # Test
+        assert item == "item"
+        assert sum(waited_snapshot.consumer_wait_histogram) == 1
+        assert sum(waited_snapshot.consumer_wait_histogram[:HOLD_BUCKET]) == 0
+        assert waited_snapshot.consumer_wait_time >= HOLD_S
+        assert len(timed_out_items) == 0
+        assert snapshot.consumer_wait_histogram == waited_snapshot.consumer_wait_histogram
+        assert snapshot.consumer_wait_time >= waited_snapshot.consumer_wait_time + TIMEOUT_S
+
+
+class TestEnqueueTime:
+    """
+    How items are stored with their enqueue time.
+    """
+
+    def test_bytes_with_header(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        `bytes` items are stored behind a fixed header, so the backend copies them as is, and
+        come back without it.
+        """
+        # Setup
+        item = bytes(range(SLOT_SIZE - queue_statistics.ENQUEUE_TIME_HEADER.size))
+        backend_queue = wrapper._QueueProxyWrapper__backend_queue
+        start_time = time.monotonic()
+
+        # Run
+        wrapper.queue.put(item)
+        entry = backend_queue.get(False)
+        backend_queue.put(entry)
+        actual = wrapper.queue.get(False)
+
+        # Test
+        assert isinstance(entry, bytes)
+        assert entry[queue_statistics.ENQUEUE_TIME_HEADER.size :] == item
+        (enqueue_time,) = queue_statistics.ENQUEUE_TIME_HEADER.unpack_from(entry)
+        assert start_time <= enqueue_time <= time.monotonic()
+        assert actual == item
+
+    def test_other_items_in_tuple(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Items that are not `bytes` are stored in a tuple with their enqueue time.
+        """
+        # Setup
+        item = {"x": 1.0}
+        backend_queue = wrapper._QueueProxyWrapper__backend_queue
+
+        # Run
+        wrapper.put_many([item, bytearray(b"\x01")])
+        entries = [backend_queue.get(False), backend_queue.get(False)]
+        backend_queue.put_many(entries)
+        actual = wrapper.get_many(0, TIMEOUT_S)
+
+        # Test
+        assert [type(entry) for entry in entries] == [tuple, tuple]
+        assert actual == [item, bytearray(b"\x01")]
@@ -0,0 +1,267 @@
+"""
+Test the shared memory queue.
+"""
+
+import multiprocessing as mp
+import queue
+import threading
+
+import pytest
+
+from utilities.workers import closable_queue
+from utilities.workers import shared_memory_queue
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 4
+SLOT_SIZE = 64  # bytes
+PRODUCER_COUNT = 3
+CONSUMER_COUNT = 3
+ITEMS_PER_PRODUCER = 200
+# Long enough for a blocked caller to be waiting, short enough to fail fast
+BLOCK_WAIT_S = 0.2
+JOIN_TIMEOUT_S = 10.0
+
+
+@pytest.fixture()
+def shared_queue() -> shared_memory_queue.SharedMemoryQueue:  # type: ignore
+    """
+    Creates a small shared memory queue, freeing it after the test.
+    """
+    items = shared_memory_queue.SharedMemoryQueue(QUEUE_MAX_SIZE, SLOT_SIZE)
+    yield items  # type: ignore
+
+    items.close()
+    items.unlink()
+
+
+def produce(
+    items: shared_memory_queue.SharedMemoryQueue, producer_id: int, item_count: int
+) -> None:
+    """
+    Puts the numbered items of the producer.
+    """
+    for index in range(item_count):
+        items.put((producer_id, index))
+
+
+def consume(items: shared_memory_queue.SharedMemoryQueue, results: "mp.Queue") -> None:
+    """
+    Gets items until None, putting the list received on the results.
+    """
+    received = []
+    while True:
+        item = items.get()
+        if item is None:
+            break
+
+        received.append(item)
+
+    results.put(received)
+
+
+class TestSharedMemoryQueue:
+    """
+    Order, wrap-around and close of the queue.
+    """
+
+    def test_put_get_in_order(self, shared_queue: shared_memory_queue.SharedMemoryQueue) -> None:
+        """
+        Items come out in the order put, bytes as is and others unpickled.
+        """
+        # Setup
+        expected = [b"\x00\x01", "text", {"key": [1, 2]}]
+
+        # Run
+        for item in expected:
+            shared_queue.put(item)
+
+        actual = [shared_queue.get() for _ in expected]
+
+        # Test
+        assert actual == expected
+        assert shared_queue.empty()
+
+    def test_wrap_around(self, shared_queue: shared_memory_queue.SharedMemoryQueue) -> None:
+        """
+        Items keep their order over many laps of the slot ring.
+        """
+        # Setup
+        lap_count = 5
+        expected = list(range(QUEUE_MAX_SIZE * lap_count + 1))
+
+        # Run
+        actual = []
+        for item in expected:
+            shared_queue.put(item)
+            # Keeps the ring partly filled so head and tail wrap at different times
+            if shared_queue.qsize() == QUEUE_MAX_SIZE - 1:
+                actual.extend(shared_queue.get_many(2))
+
+        actual.extend(shared_queue.get_many())
+
+        # Test
+        assert actual == expected
+
+    def test_full_and_empty(self, shared_queue: shared_memory_queue.SharedMemoryQueue) -> None:
+        """
+        Non-blocking calls raise once the queue is full or empty.
+        """
+        # Run
+        for index in range(QUEUE_MAX_SIZE):
+            shared_queue.put_nowait(index)
+
+        # Test
+        assert shared_queue.full()
+        with pytest.raises(queue.Full):
+            shared_queue.put_nowait(QUEUE_MAX_SIZE)
+
+        for _ in range(QUEUE_MAX_SIZE):
+            shared_queue.get_nowait()
+
+        with pytest.raises(queue.Empty):
+            shared_queue.get_nowait()
+
+    def test_put_many_partial(self, shared_queue: shared_memory_queue.SharedMemoryQueue) -> None:
+        """
+        put_many() puts what fits before the timeout.
+        """
+        # Setup
+        items = list(range(QUEUE_MAX_SIZE + 2))
+
+        # Run
+        put_count = shared_queue.put_many(items, 0.0)
+
+        # Test
+        assert put_count == QUEUE_MAX_SIZE
+        assert shared_queue.get_many() == items[:QUEUE_MAX_SIZE]
+
+    def test_item_too_large(self, shared_queue: shared_memory_queue.SharedMemoryQueue) -> None:
+        """
+        Items that do not fit in a slot are rejected without taking a slot.
+        """
+        # Run
+        with pytest.raises(ValueError):
+            shared_queue.put(bytes(SLOT_SIZE + 1))
+
+        # Test
+        assert shared_queue.empty()
+
+    def test_multiple_producers_and_consumers(
+        self, shared_queue: shared_memory_queue.SharedMemoryQueue
+    ) -> None:
+        """
+        Every item put by the producer processes is received exactly once by the consumer
+        processes, in the order each producer put them.
+        """
+        # Setup
+        results = mp.Queue()
+        producers = [
+            mp.Process(target=produce, args=(shared_queue, producer_id, ITEMS_PER_PRODUCER))
+            for producer_id in range(PRODUCER_COUNT)
+        ]
+        consumers = [
+            mp.Process(target=consume, args=(shared_queue, results)) for _ in range(CONSUMER_COUNT)
+        ]
+
+        # Run
+        for process in consumers + producers:
+            process.start()
+
+        for producer in producers:
+            producer.join(JOIN_TIMEOUT_S)
+
+        for _ in consumers:
+            shared_queue.put(None)
+
+        received_lists = [results.get(timeout=JOIN_TIMEOUT_S) for _ in consumers]
+        for consumer in consumers:
+            consumer.join(JOIN_TIMEOUT_S)
+
+        # Test
+        received = [item for received_list in received_lists for item in received_list]
+        expected = [
+            (producer_id, index)
+            for producer_id in range(PRODUCER_COUNT)
+            for index in range(ITEMS_PER_PRODUCER)
+        ]
+        assert sorted(received) == expected
+
+        # Each consumer sees the items of a producer in order
+        for received_list in received_lists:
+            for producer_id in range(PRODUCER_COUNT):
+                indices = [index for item_id, index in received_list if item_id == producer_id]
+                assert indices == sorted(indices)
+
+    def test_close_wakes_blocked_getters(
+        self, shared_queue: shared_memory_queue.SharedMemoryQueue
+    ) -> None:
+        """
+        close() raises Closed in every getter blocked on the empty queue.
+        """
+        # Setup
+        outcomes = []
+        outcomes_lock = threading.Lock()
+
+        def blocked_get() -> None:
+            try:
+                shared_queue.get()
+                outcome = "item"
+            except closable_queue.Closed:
+                outcome = "closed"
+
+            with outcomes_lock:
+                outcomes.append(outcome)
+
+        getters = [threading.Thread(target=blocked_get) for _ in range(CONSUMER_COUNT)]
+        for getter in getters:
+            getter.start()
+
+        getters[0].join(BLOCK_WAIT_S)
+
+        # Run
+        shared_queue.close()
+        for getter in getters:
+            getter.join(JOIN_TIMEOUT_S)
+
+        # Test
+        assert not any(getter.is_alive() for getter in getters)
+        assert outcomes == ["closed"] * CONSUMER_COUNT
+        assert shared_queue.is_closed()
+        with pytest.raises(closable_queue.Closed):
+            shared_queue.put(0)
+
+    def test_close_wakes_blocked_putter(
+        self, shared_queue: shared_memory_queue.SharedMemoryQueue
+    ) -> None:
+        """
+        close() raises Closed in a putter blocked on the full queue.
+        """
+        # Setup
+        for index in range(QUEUE_MAX_SIZE):
+            shared_queue.put(index)
+
+        outcomes = []
+
+        def blocked_put() -> None:
+            try:
+                shared_queue.put(QUEUE_MAX_SIZE)
+                outcomes.append("put")
+            except closable_queue.Closed:
+                outcomes.append("closed")
+
+        putter = threading.Thread(target=blocked_put)
+        putter.start()
+        putter.join(BLOCK_WAIT_S)
+
+        # Run
+        shared_queue.close()
+        putter.join(JOIN_TIMEOUT_S)
+
+        # Test
+        assert not putter.is_alive()
+        assert outcomes == ["closed"]
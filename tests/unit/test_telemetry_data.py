@@ -0,0 +1,123 @@
+"""
+Test the fixed layout of telemetry data sent through queues.
+"""
+
+import pytest
+
+from modules.telemetry import telemetry
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+FIELD_NAMES = [
+    "time_since_boot",
+    "x",
+    "y",
+    "z",
+    "x_velocity",
+    "y_velocity",
+    "z_velocity",
+    "roll",
+    "pitch",
+    "yaw",
+    "roll_speed",
+    "pitch_speed",
+    "yaw_speed",
+]
+
+
+@pytest.fixture()
+def complete_data() -> telemetry.TelemetryData:  # type: ignore
+    """
+    Creates telemetry data with every field present.
+    """
+    data = telemetry.TelemetryData(
+        time_since_boot=123456,
+        x=1.5,
+        y=-2.25,
+        z=-10.0,
+        x_velocity=0.5,
+        y_velocity=-0.125,
+        z_velocity=0.0625,
+        roll=0.1,
+        pitch=-0.2,
+        yaw=3.0,
+        roll_speed=0.01,
+        pitch_speed=-0.02,
+        yaw_speed=0.03,
+    )
+    yield data  # type: ignore
+
+
+def get_fields(data: telemetry.TelemetryData) -> "dict[str, object]":
+    """
+    Returns every field of the data by name.
+    """
+    return {name: getattr(data, name) for name in FIELD_NAMES}
+
+
+class TestTelemetryDataBytes:
+    """
+    Round trips through to_bytes() and from_bytes() .
+    """
+
+    def test_complete_round_trip(self, complete_data: telemetry.TelemetryData) -> None:
+        """
+        Every field of a complete record comes back unchanged.
+        """
+        # Run
+        actual = telemetry.TelemetryData.from_bytes(complete_data.to_bytes())
+
+        # Test
+        assert get_fields(actual) == get_fields(complete_data)
+
+    def test_partial_round_trip(self) -> None:
+        """
+        Fields that are None come back as None instead of 0 .
+        """
+        # Setup
+        expected = telemetry.TelemetryData(time_since_boot=1000, x=1.0, roll=0.5)
+
+        # Run
+        actual = telemetry.TelemetryData.from_bytes(expected.to_bytes())
+
+        # Test
+        assert get_fields(actual) == get_fields(expected)
+        assert actual.y is None
+        assert actual.yaw_speed is None
+
+    def test_empty_round_trip(self) -> None:
+        """
+        A record without any field comes back without any field.
+        """
+        # Run
+        actual = telemetry.TelemetryData.from_bytes(telemetry.TelemetryData().to_bytes())
+
+        # Test
+        assert all(value is None for value in get_fields(actual).values())
+
+    def test_zero_is_present(self) -> None:
+        """
+        A field that is 0 is kept as 0, not mistaken for a missing field.
+        """
+        # Setup
+        expected = telemetry.TelemetryData(time_since_boot=0, x=0.0, z_velocity=0.0)
+
+        # Run
+        actual = telemetry.TelemetryData.from_bytes(expected.to_bytes())
+
+        # Test
+        assert actual.time_since_boot == 0
+        assert actual.x == 0.0
+        assert actual.z_velocity == 0.0
+        assert actual.y is None
+
+    def test_fixed_length(self, complete_data: telemetry.TelemetryData) -> None:
+        """
+        Complete and partial records have the same length, so they fit the same queue slot.
+        """
+        # Test
+        assert len(complete_data.to_bytes()) == len(telemetry.TelemetryData(x=1.0).to_bytes())
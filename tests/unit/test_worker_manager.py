@@ -0,0 +1,446 @@
+"""
+Test scaling and joining the workers of a worker manager.
+"""
+
+import multiprocessing as mp
+import signal
+import threading
+import time
+
+import pytest
+
+from utilities.workers import closable_queue
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 20
+SLOT_SIZE = 64
+TIMEOUT_S = 0.05
+JOIN_TIMEOUT_S = 10.0
+# Time until the deadline of joins that are expected to escalate
+JOIN_DEADLINE_S = 0.5
+ESCALATION_TIMEOUT_S = 0.5
+
+
+class FakeLogger:
+    """
+    Keeps every warning and error.
+    """
+
+    def __init__(self) -> None:
+        self.messages = []
+
+    def info(self, message: str, _log_with_frame_info: bool = True) -> None:
+        """
+        Drops the message.
+        """
+
+    def warning(self, message: str, _log_with_frame_info: bool = True) -> None:
+        """
+        Keeps the message.
+        """
+        self.messages.append(message)
+
+    def error(self, message: str, _log_with_frame_info: bool = True) -> None:
+        """
+        Keeps the message.
+        """
+        self.messages.append(message)
+
+
+def holding_worker(
+    gate: threading.Event,
+    held_items: "list[object]",
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Takes a single item at a time and holds it until the gate opens, then passes it on.
+    """
+    while not controller.is_exit_requested():
+        try:
+            _, items = controller.wait_for_items(input_queue, TIMEOUT_S, 1)
+        except closable_queue.Closed:
+            break
+
+        for item in items:
+            held_items.append(item)
+            gate.wait()
+            output_queue.queue.put(item)
+
+
+def closing_worker(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Waits for items until the input queue is closed.
+    """
+    while not controller.is_exit_requested():
+        try:
+            controller.wait_for_items(input_queue, JOIN_TIMEOUT_S)
+        except closable_queue.Closed:
+            break
+
+
+def sigterm_ignoring_worker(
+    started: "mp.synchronize.Event", _controller: worker_controller.WorkerController
+) -> None:
+    """
+    Ignores SIGTERM and never exits by itself.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    started.set()
+    while True:
+        time.sleep(JOIN_TIMEOUT_S)
+
+
+def blocking_worker(
+    started: "mp.synchronize.Event | threading.Event",
+    release: "mp.synchronize.Event | threading.Event",
+    _controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Blocks without checking the controller until released.
+    """
+    started.set()
+    release.wait()
+
+
+def create_manager(
+    target: "(...) -> object",  # type: ignore
+    work_arguments: "tuple",
+    input_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    executor_kind: worker_manager.ExecutorKind,
+) -> "tuple[worker_manager.WorkerManager, FakeLogger]":
+    """
+    Returns a started manager of a single worker, and its logger.
+    """
+    local_logger = FakeLogger()
+    result, worker_properties = worker_manager.WorkerProperties.create(
+        1,
+        target,
+        work_arguments,
+        input_queues,
+        [],
+        worker_controller.WorkerController(),
+        local_logger,
+        executor_kind=executor_kind,
+    )
+    assert result
+    assert worker_properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(worker_properties, local_logger)
+    assert result
+    assert manager is not None
+
+    manager.start_workers()
+    return manager, local_logger
+
+
+def wait_until(condition: "() -> bool") -> bool:  # type: ignore
+    """
+    Returns whether the condition became true before JOIN_TIMEOUT_S .
+    """
+    deadline = time.monotonic() + JOIN_TIMEOUT_S
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+
+        time.sleep(TIMEOUT_S)
+
+    return True
+
+
+@pytest.fixture()
+def queues() -> "tuple[queue_proxy_wrapper.QueueProxyWrapper, queue_proxy_wrapper.QueueProxyWrapper]":  # type: ignore
+    """
+    Creates shared memory input and output queues, releasing them after the test.
+    """
+    # The manager is only used by the manager backend
+    input_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        None, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY, SLOT_SIZE
+    )
+    output_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        None, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY, SLOT_SIZE
+    )
+    yield input_queue, output_queue  # type: ignore
+
+    for worker_queue in [input_queue, output_queue]:
+        worker_queue.close()
+        worker_queue.release()
+
+
+class TestScaleTo:
+    """
+    Starting and retiring workers.
+    """
+
+    def test_retire_worker_holding_items(
+        self,
+        queues: "tuple[queue_proxy_wrapper.QueueProxyWrapper, queue_proxy_wrapper.QueueProxyWrapper]",
+    ) -> None:
+        """
+        A worker retired while it holds an item passes the item on before exiting, and the other
+        workers process the rest of the queue.
+        """
+        # Setup
+        input_queue, output_queue = queues
+        controller = worker_controller.WorkerController()
+        local_logger = FakeLogger()
+        gate = threading.Event()
+        held_items = []
+        result, worker_properties = worker_manager.WorkerProperties.create(
+            2,
+            holding_worker,
+            (gate, held_items),
+            [input_queue],
+            [output_queue],
+            controller,
+            local_logger,
+            executor_kind=worker_manager.ExecutorKind.THREAD,
+        )
+        assert result
+        assert worker_properties is not None
+
+        result, manager = worker_manager.WorkerManager.create(worker_properties, local_logger)
+        assert result
+        assert manager is not None
+
+        manager.start_workers()
+        for item in range(2):
+            input_queue.queue.put(item)
+
+        # Both workers are holding an item
+        assert wait_until(lambda: len(held_items) == 2)
+        retired_worker = manager._WorkerManager__workers[-1]
+        for item in range(2, 10):
+            input_queue.queue.put(item)
+
+        # Run
+        result = manager.scale_to(1)
+        worker_count = manager.get_worker_count()
+        gate.set()
+
+        processed_items = []
+
+        def is_all_processed() -> bool:
+            processed_items.extend(output_queue.get_many(0, TIMEOUT_S))
+            return len(processed_items) >= 10
+
+        is_all_processed_in_time = wait_until(is_all_processed)
+        retired_worker.join(JOIN_TIMEOUT_S)
+
+        controller.request_exit()
+        report = manager.join_workers(time.monotonic() + JOIN_TIMEOUT_S)
+
+        # Test
+        assert result
+        assert worker_count == 1
+        assert is_all_processed_in_time
+        assert sorted(processed_items) == list(range(10))
+        assert not retired_worker.is_alive()
+        assert report.is_all_clean(), str(report)
+        assert len(local_logger.messages) == 0
+
+    def test_scale_up(
+        self,
+        queues: "tuple[queue_proxy_wrapper.QueueProxyWrapper, queue_proxy_wrapper.QueueProxyWrapper]",
+    ) -> None:
+        """
+        Workers are started until there are count workers, and a count that is not positive is
+        rejected.
+        """
+        # Setup
+        input_queue, output_queue = queues
+        controller = worker_controller.WorkerController()
+        local_logger = FakeLogger()
+        gate = threading.Event()
+        gate.set()
+        result, worker_properties = worker_manager.WorkerProperties.create(
+            1,
+            holding_worker,
+            (gate, []),
+            [input_queue],
+            [output_queue],
+            controller,
+            local_logger,
+            executor_kind=worker_manager.ExecutorKind.THREAD,
+        )
+        assert result
+        assert worker_properties is not None
+
+        result, manager = worker_manager.WorkerManager.create(worker_properties, local_logger)
+        assert result
+        assert manager is not None
+
+        manager.start_workers()
+
+        # Run
+        result = manager.scale_to(3)
+        worker_count = manager.get_worker_count()
+        rejected_result = manager.scale_to(0)
+
+        controller.request_exit()
+        report = manager.join_workers(time.monotonic() + JOIN_TIMEOUT_S)
+
+        # Test
+        assert result
+        assert worker_count == 3
+        assert not rejected_result
+        assert manager.get_worker_count() == 3
+        assert len(report.results) == 3
+        assert report.is_all_clean(), str(report)
+
+
+class TestJoin:
+    """
+    How joined workers are reported, and escalation of those that do not exit.
+    """
+
+    def test_join_all(
+        self,
+        queues: "tuple[queue_proxy_wrapper.QueueProxyWrapper, queue_proxy_wrapper.QueueProxyWrapper]",
+    ) -> None:
+        """
+        Workers of every manager are joined together: a worker blocked on its closed input
+        queue exits, a worker blocking forever is terminated, a worker ignoring SIGTERM is
+        killed, and a thread worker blocking forever is left alive without holding up the join.
+        """
+        # Setup
+        input_queue, _ = queues
+        ignoring_started = mp.Event()
+        blocking_started = mp.Event()
+        # Never set for the process, it is terminated
+        blocking_release = mp.Event()
+        thread_started = threading.Event()
+        thread_release = threading.Event()
+
+        closing_manager, closing_logger = create_manager(
+            closing_worker, (), [input_queue], worker_manager.ExecutorKind.PROCESS
+        )
+        ignoring_manager, ignoring_logger = create_manager(
+            sigterm_ignoring_worker, (ignoring_started,), [], worker_manager.ExecutorKind.PROCESS
+        )
+        blocking_manager, _ = create_manager(
+            blocking_worker,
+            (blocking_started, blocking_release),
+            [],
+            worker_manager.ExecutorKind.PROCESS,
+        )
+        thread_manager, _ = create_manager(
+            blocking_worker,
+            (thread_started, thread_release),
+            [],
+            worker_manager.ExecutorKind.THREAD,
+        )
+        for started in [ignoring_started, blocking_started, thread_started]:
+            assert started.wait(JOIN_TIMEOUT_S)
+
+        # Run
+        start_time = time.monotonic()
+        report = worker_manager.WorkerManager.join_all(
+            [closing_manager, ignoring_manager, blocking_manager, thread_manager],
+            start_time + JOIN_DEADLINE_S,
+            ESCALATION_TIMEOUT_S,
+        )
+        join_time = time.monotonic() - start_time
+        thread_release.set()
+
+        # Test
+        closing_result, ignoring_result, blocking_result, thread_result = report.results
+        assert closing_result.target_name == "closing_worker"
+        assert closing_result.exit_kind == worker_manager.WorkerExitKind.EXITED
+        assert closing_result.exit_code == 0
+        assert closing_result.exit_time is not None
+        assert 0.0 <= closing_result.exit_time < JOIN_DEADLINE_S
+        assert closing_result.is_clean()
+
+        assert blocking_result.exit_kind == worker_manager.WorkerExitKind.TERMINATED
+        assert blocking_result.exit_code == -signal.SIGTERM
+        assert blocking_result.exit_time is not None
+        assert blocking_result.exit_time >= JOIN_DEADLINE_S
+
+        assert ignoring_result.exit_kind == worker_manager.WorkerExitKind.KILLED
+        assert ignoring_result.exit_code == -signal.SIGKILL
+        assert ignoring_result.exit_time is not None
+        assert ignoring_result.exit_time >= JOIN_DEADLINE_S + ESCALATION_TIMEOUT_S
+
+        assert thread_result.exit_kind == worker_manager.WorkerExitKind.ALIVE
+        assert thread_result.exit_code is None
+        assert thread_result.exit_time is None
+
+        # SIGTERM and SIGKILL are each given the escalation timeout, with room for a slow host
+        assert join_time < JOIN_DEADLINE_S + 2 * ESCALATION_TIMEOUT_S + 1.0
+        assert not report.is_all_exited()
+        assert report.get_unclean_results() == [ignoring_result, blocking_result, thread_result]
+        assert len(closing_logger.messages) == 0
+        assert len(ignoring_logger.messages) == 1
+
+    def test_begin_and_end_join(
+        self,
+        queues: "tuple[queue_proxy_wrapper.QueueProxyWrapper, queue_proxy_wrapper.QueueProxyWrapper]",
+    ) -> None:
+        """
+        begin_join() closes the queues and returns every worker, and end_join() logs only the
+        workers that did not exit cleanly.
+        """
+        # Setup
+        input_queue, _ = queues
+        manager, local_logger = create_manager(
+            closing_worker, (), [input_queue], worker_manager.ExecutorKind.PROCESS
+        )
+
+        # Run
+        workers = manager.begin_join()
+        is_closed = input_queue.is_closed()
+        for _, worker in workers:
+            worker.join(JOIN_TIMEOUT_S)
+
+        clean_result = worker_manager.WorkerJoinResult(
+            "closing_worker", workers[0][1].name, worker_manager.WorkerExitKind.EXITED, 0, 0.1
+        )
+        alive_result = worker_manager.WorkerJoinResult(
+            "closing_worker", workers[0][1].name, worker_manager.WorkerExitKind.ALIVE, None, None
+        )
+        manager.end_join([clean_result])
+        clean_message_count = len(local_logger.messages)
+        manager.end_join([alive_result])
+
+        # Test
+        assert is_closed
+        assert [target_name for target_name, _ in workers] == ["closing_worker"]
+        assert workers[0][1].exitcode == 0
+        assert clean_message_count == 0
+        assert len(local_logger.messages) == 1
+        assert "ALIVE" in local_logger.messages[0]
+
+    def test_join_workers_without_deadline(
+        self,
+        queues: "tuple[queue_proxy_wrapper.QueueProxyWrapper, queue_proxy_wrapper.QueueProxyWrapper]",
+    ) -> None:
+        """
+        Without a deadline, a worker that exits by itself is reported with its join time.
+        """
+        # Setup
+        input_queue, _ = queues
+        manager, _ = create_manager(
+            closing_worker, (), [input_queue], worker_manager.ExecutorKind.THREAD
+        )
+
+        # Run
+        report = manager.join_workers()
+
+        # Test
+        assert report.is_all_clean(), str(report)
+        assert report.results[0].exit_kind == worker_manager.WorkerExitKind.EXITED
+        assert report.results[0].exit_code is None
+        assert report.results[0].exit_time is not None
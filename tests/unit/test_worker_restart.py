@@ -0,0 +1,223 @@
+"""
+Test the restart policy and circuit breaker of dead workers.
+"""
+
+import pytest
+
+from utilities.workers import worker_restart
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+MAX_RESTARTS = 2
+WINDOW_S = 10.0
+CIRCUIT_RESET_S = 5.0
+
+
+@pytest.fixture()
+def tracker() -> worker_restart.RestartTracker:  # type: ignore
+    """
+    Creates a tracker without backoff or jitter, that opens after MAX_RESTARTS in the window.
+    """
+    policy = worker_restart.RestartPolicy(
+        max_restarts=MAX_RESTARTS,
+        window=WINDOW_S,
+        backoff_initial=0.0,
+        jitter=0.0,
+        circuit_reset=CIRCUIT_RESET_S,
+    )
+    yield worker_restart.RestartTracker(policy)  # type: ignore
+
+
+def open_circuit(tracker: worker_restart.RestartTracker) -> float:
+    """
+    Fails and restarts until the circuit opens.
+
+    Returns the time it opened.
+    """
+    now = 0.0
+    for _ in range(MAX_RESTARTS):
+        tracker.record_death(now, False)
+        assert tracker.is_restart_allowed(now)
+        tracker.record_restart(now)
+        now += 1.0
+
+    tracker.record_death(now, False)
+    assert not tracker.is_restart_allowed(now)
+    return now
+
+
+class TestBackoff:
+    """
+    Wait before each restart in a row of failures.
+    """
+
+    def test_backoff_grows_to_max(self) -> None:
+        """
+        The first failure restarts at once, then the wait doubles up to the maximum.
+        """
+        # Setup
+        policy = worker_restart.RestartPolicy(
+            backoff_initial=0.1, backoff_max=0.5, backoff_multiplier=2.0, jitter=0.0
+        )
+        expected = [0.0, 0.1, 0.2, 0.4, 0.5, 0.5]
+
+        # Run
+        actual = [policy.backoff(failure_count) for failure_count in range(1, 7)]
+
+        # Test
+        assert actual == pytest.approx(expected)
+
+    def test_backoff_jitter(self) -> None:
+        """
+        The wait is randomized within the jitter.
+        """
+        # Setup
+        policy = worker_restart.RestartPolicy(backoff_initial=1.0, jitter=0.2)
+
+        # Run
+        actual = [policy.backoff(2) for _ in range(100)]
+
+        # Test
+        assert all(0.8 <= delay <= 1.2 for delay in actual)
+
+    def test_restart_waits_for_backoff(self) -> None:
+        """
+        A restart after failures in a row is only allowed once the backoff has passed.
+        """
+        # Setup
+        policy = worker_restart.RestartPolicy(backoff_initial=1.0, jitter=0.0)
+        tracker = worker_restart.RestartTracker(policy)
+        tracker.record_death(0.0, False)
+        tracker.record_restart(0.0)
+
+        # Run
+        tracker.record_death(1.0, False)
+
+        # Test
+        assert not tracker.is_restart_allowed(1.5)
+        assert tracker.is_restart_allowed(2.0)
+
+    def test_ready_worker_resets_failures(self) -> None:
+        """
+        A worker that was ready before dying starts a new run of failures.
+        """
+        # Setup
+        policy = worker_restart.RestartPolicy(backoff_initial=1.0, jitter=0.0)
+        tracker = worker_restart.RestartTracker(policy)
+        tracker.record_death(0.0, False)
+        tracker.record_restart(0.0)
+        tracker.record_ready(0.5)
+
+        # Run
+        tracker.record_death(1.0, True)
+
+        # Test
+        assert tracker.is_restart_allowed(1.0)
+        assert tracker.status().failure_count == 1
+
+    @pytest.mark.parametrize(
+        "max_restarts, jitter",
+        [(0, 0.2), (5, -0.1), (5, 1.5)],
+        ids=["no restarts", "negative jitter", "jitter above 1"],
+    )
+    def test_invalid_policy(self, max_restarts: int, jitter: float) -> None:
+        """
+        Policies without restarts or with jitter outside 0 to 1 are rejected.
+        """
+        # Run
+        with pytest.raises(ValueError):
+            worker_restart.RestartPolicy(max_restarts=max_restarts, jitter=jitter)
+
+
+class TestCircuit:
+    """
+    Circuit states of the tracker.
+    """
+
+    def test_opens_when_window_full(self, tracker: worker_restart.RestartTracker) -> None:
+        """
+        The circuit opens once the window holds the most restarts, and stays open until the reset.
+        """
+        # Run
+        open_time = open_circuit(tracker)
+
+        # Test
+        assert tracker.status().circuit_state == worker_restart.CircuitState.OPEN
+        assert not tracker.is_restart_allowed(open_time + CIRCUIT_RESET_S - 0.1)
+
+    def test_restarts_outside_window_not_counted(
+        self, tracker: worker_restart.RestartTracker
+    ) -> None:
+        """
+        Restarts older than the window do not open the circuit.
+        """
+        # Setup
+        now = 0.0
+        for _ in range(MAX_RESTARTS):
+            tracker.record_death(now, False)
+            tracker.record_restart(now)
+            now += WINDOW_S + 1.0
+
+        # Run
+        tracker.record_death(now, False)
+
+        # Test
+        assert tracker.is_restart_allowed(now)
+        assert tracker.status().circuit_state == worker_restart.CircuitState.CLOSED
+
+    def test_half_open_allows_single_trial(self, tracker: worker_restart.RestartTracker) -> None:
+        """
+        After the reset time, a single trial restart is allowed.
+        """
+        # Setup
+        reset_time = open_circuit(tracker) + CIRCUIT_RESET_S
+
+        # Run
+        is_trial_allowed = tracker.is_restart_allowed(reset_time)
+        tracker.record_restart(reset_time)
+
+        # Test
+        assert is_trial_allowed
+        assert tracker.status().circuit_state == worker_restart.CircuitState.HALF_OPEN
+        assert not tracker.is_restart_allowed(reset_time)
+
+    def test_ready_trial_closes(self, tracker: worker_restart.RestartTracker) -> None:
+        """
+        A trial restart that becomes ready closes the circuit and clears the window.
+        """
+        # Setup
+        reset_time = open_circuit(tracker) + CIRCUIT_RESET_S
+        tracker.is_restart_allowed(reset_time)
+        tracker.record_restart(reset_time)
+
+        # Run
+        tracker.record_ready(0.25)
+
+        # Test
+        status = tracker.status()
+        assert status.circuit_state == worker_restart.CircuitState.CLOSED
+        assert status.failure_count == 0
+        assert status.last_time_to_ready == 0.25
+        tracker.record_death(reset_time + 1.0, True)
+        assert tracker.is_restart_allowed(reset_time + 1.0)
+
+    def test_failed_trial_reopens(self, tracker: worker_restart.RestartTracker) -> None:
+        """
+        A trial restart that dies before it is ready opens the circuit for another reset time.
+        """
+        # Setup
+        reset_time = open_circuit(tracker) + CIRCUIT_RESET_S
+        tracker.is_restart_allowed(reset_time)
+        tracker.record_restart(reset_time)
+
+        # Run
+        tracker.record_death(reset_time + 1.0, False)
+
+        # Test
+        assert tracker.status().circuit_state == worker_restart.CircuitState.OPEN
+        assert not tracker.is_restart_allowed(reset_time + CIRCUIT_RESET_S)
+        assert tracker.is_restart_allowed(reset_time + 1.0 + CIRCUIT_RESET_S)
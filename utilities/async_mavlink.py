@@ -0,0 +1,166 @@
+"""
+Reads a MAVLink connection on an asyncio event loop.
+"""
+
+import asyncio
+import collections
+
+from pymavlink import mavutil
+
+from utilities import mavlink_receiver
+
+
+class MessageMailbox:
+    """
+    Messages of some types received by a MavlinkReader, with the receiving surface of a
+    connection, so logic written for a connection reads from it. Sends go to the connection.
+
+    Only use from the event loop.
+    """
+
+    def __init__(
+        self, connection: mavutil.mavfile, message_types: "list[str]", max_size: int
+    ) -> None:
+        """
+        connection: Connection the messages are received from and sends go to.
+        message_types: Types of messages to keep.
+        max_size: Most messages kept, the oldest are discarded first. Must be greater than 0 .
+        """
+        if max_size <= 0:
+            raise ValueError(f"Message mailbox requires max_size > 0, got {max_size}")
+
+        self.mav = connection.mav
+        # Nothing to wait on, wait with wait_for_message() instead
+        self.fd = None
+        self.message_types = set(message_types)
+        self.__messages = collections.deque(maxlen=max_size)
+        self.__has_new_message = asyncio.Event()
+
+    def deliver(self, msg: object) -> None:
+        """
+        Keeps the message, waking the waiting coroutine.
+        """
+        self.__messages.append(msg)
+        self.__has_new_message.set()
+
+    def has_types(self, message_types: "list[str]") -> bool:
+        """
+        Returns whether there is a message of each type.
+        """
+        kept_types = {msg.get_type() for msg in self.__messages}
+        return all(message_type in kept_types for message_type in message_types)
+
+    # Same signature as mavutil.mavfile.recv_match()
+    def recv_match(  # pylint: disable=redefined-builtin,unused-argument
+        self,
+        condition: "str | None" = None,
+        type: "str | list[str] | None" = None,
+        blocking: bool = False,
+        timeout: "float | None" = None,
+    ) -> "object | None":
+        """
+        Takes the oldest message of the type. Never blocks, the event loop would stop.
+        Conditions are not supported.
+
+        Returns the message, None if there is none.
+        """
+        if isinstance(type, str):
+            type = [type]
+
+        for index, msg in enumerate(self.__messages):
+            if type is None or msg.get_type() in type:
+                del self.__messages[index]
+                return msg
+
+        return None
+
+    async def wait_for_message(self, timeout: float) -> bool:
+        """
+        Waits for a message delivered after this call.
+
+        timeout: Time waiting in seconds.
+
+        Returns whether a message was delivered.
+        """
+        self.__has_new_message.clear()
+        try:
+            await asyncio.wait_for(self.__has_new_message.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+
+        return True
+
+
+class MavlinkReader:
+    """
+    Reads every message from the connection whenever its socket is readable, without blocking
+    the event loop, and delivers each to the mailboxes of its type.
+
+    Only use from the event loop.
+    """
+
+    def __init__(self, connection: mavutil.mavfile, mailboxes: "list[MessageMailbox]") -> None:
+        """
+        connection: Connection with a file descriptor, such as tcp or udp.
+        mailboxes: Where messages are delivered, a message can go to several.
+        """
+        self.__connection = connection
+        self.__mailboxes = mailboxes
+        self.__is_reading = False
+        self.__is_closed = False
+
+    def start(self) -> bool:
+        """
+        Starts reading on the running event loop.
+
+        Returns False if the connection cannot be waited on.
+        """
+        if self.__connection.fd is None:
+            return False
+
+        asyncio.get_running_loop().add_reader(self.__connection.fd, self.__read)
+        self.__is_reading = True
+        return True
+
+    def stop(self) -> None:
+        """
+        Stops reading. Does nothing if not reading.
+        """
+        if not self.__is_reading:
+            return
+
+        asyncio.get_running_loop().remove_reader(self.__connection.fd)
+        self.__is_reading = False
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the other end closed the connection, which stops reading.
+        """
+        return self.__is_closed
+
+    def __read(self) -> None:
+        """
+        Delivers every message that can be read without blocking.
+        """
+        try:
+            byte_count, messages = mavlink_receiver.read_available(self.__connection)
+        except OSError:
+            # Reset by the other end
+            self.__close()
+            return
+
+        for msg in messages:
+            for mailbox in self.__mailboxes:
+                if msg.get_type() in mailbox.message_types:
+                    mailbox.deliver(msg)
+
+        # Readable without any bytes is the end of the stream
+        if byte_count == 0:
+            self.__close()
+
+    def __close(self) -> None:
+        """
+        Stops reading from a closed connection.
+        """
+        self.stop()
+        self.__is_closed = True
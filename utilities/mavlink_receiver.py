@@ -0,0 +1,290 @@
+"""
+Event driven receiving of MAVLink messages from the file descriptor of a connection.
+"""
+
+import selectors
+import struct
+import time
+
+from pymavlink import mavutil
+
+from utilities import mavlink_frame
+from utilities.workers import worker_controller
+
+
+# Bytes asked for per read, more than the socket usually has buffered
+READ_SIZE = 65536
+# Most reads per call of read_available(), so a stream that never pauses cannot starve the caller
+MAX_READ_COUNT = 16
+
+
+def _read_bytes(connection: mavutil.mavfile) -> bytes:
+    """
+    Reads every byte that can be read without blocking, in large reads instead of the few bytes
+    recv_msg() reads per call.
+
+    Returns the bytes, empty if there were none.
+    Raises OSError if the other end reset the connection.
+    """
+    connection.pre_message()
+    chunks = []
+    for _ in range(MAX_READ_COUNT):
+        chunk = connection.recv(READ_SIZE)
+        if not chunk:
+            break
+
+        chunks.append(chunk)
+
+    data = b"".join(chunks)
+    if len(data) == 0:
+        return data
+
+    if connection.logfile_raw:
+        connection.logfile_raw.write(data)
+
+    if connection.first_byte:
+        # Can replace connection.mav
+        connection.auto_mavlink_version(data)
+
+    return data
+
+
+def _record_message(connection: mavutil.mavfile, msg: object) -> None:
+    """
+    Records a received message on the connection like recv_msg() does.
+    """
+    if connection.logfile and msg.get_type() != "BAD_DATA":
+        usec = int(time.time() * 1.0e6) & ~3
+        connection.logfile.write(struct.pack(">Q", usec) + msg.get_msgbuf())
+
+    connection.post_message(msg)
+
+
+def read_available(connection: mavutil.mavfile) -> "tuple[int, list[object]]":
+    """
+    Reads every byte that can be read without blocking and decodes every message in them.
+
+    Returns the number of bytes read, and the messages parsed in order.
+    Raises OSError if the other end reset the connection.
+    """
+    data = _read_bytes(connection)
+    if len(data) == 0:
+        return 0, []
+
+    messages = connection.mav.parse_buffer(data) or []
+    for msg in messages:
+        _record_message(connection, msg)
+
+    return len(data), messages
+
+
+class ReceiverStatistics:
+    """
+    Reads by a MavlinkReceiver.
+    """
+
+    def __init__(self) -> None:
+        self.wakeup_count = 0
+        self.byte_count = 0
+        # Valid frames, and those of no subscribed type, which were not decoded
+        self.frame_count = 0
+        self.skipped_count = 0
+        self.bad_frame_count = 0
+        # Gaps in the sequence numbers
+        self.lost_count = 0
+
+    def __str__(self) -> str:
+        return (
+            f"wakeups: {self.wakeup_count}, "
+            f"bytes: {self.byte_count}, "
+            f"frames per wakeup: {self.frame_count / max(self.wakeup_count, 1):.2f}, "
+            f"skipped: {self.skipped_count}, "
+            f"bad: {self.bad_frame_count}, "
+            f"lost: {self.lost_count}"
+        )
+
+
+class MavlinkReceiver:  # pylint: disable=too-many-instance-attributes
+    """
+    Waits on the file descriptor of a connection with a selector (epoll on Linux) registered
+    once, reads every available byte per wakeup, and calls the callbacks of the type of each
+    message as soon as it is parsed. Latency is bounded by the arrival of the bytes instead of a
+    polling period.
+
+    Frames are checked and only the frames of subscribed types are decoded, see FrameParser .
+    The connection records only the decoded messages.
+
+    Only for connections with a file descriptor, such as tcp or udp, and only one receiver or
+    reader per connection. The file descriptor is registered once, call reregister() after the
+    connection reopens its socket.
+    """
+
+    def __init__(
+        self,
+        connection: mavutil.mavfile,
+        controller: worker_controller.WorkerController | None = None,
+    ) -> None:
+        """
+        connection: Connection to receive from.
+        controller: If given, waiting stops as soon as exit or pause is requested. Retire requests
+            are seen at the end of the wait.
+        """
+        if connection.fd is None:
+            raise ValueError("MAVLink receiver requires a connection with a file descriptor")
+
+        self.__connection = connection
+        self.__parser = mavlink_frame.FrameParser()
+        # Callbacks by message ID
+        self.__message_callbacks = {}
+        self.__frame_callbacks = {}
+        self.__every_message_callbacks = []
+        self.__message_types = {}
+        self.__wake_fd = None
+        if controller is not None:
+            self.__wake_fd = controller.get_wake_fd()
+
+        self.__selector = self.__create_selector()
+
+        self.statistics = ReceiverStatistics()
+
+    def __create_selector(self) -> selectors.BaseSelector:
+        """
+        Returns a selector of the file descriptor of the connection and the wake file descriptor.
+        """
+        selector = selectors.DefaultSelector()
+        selector.register(self.__connection.fd, selectors.EVENT_READ)
+        if self.__wake_fd is not None:
+            selector.register(self.__wake_fd, selectors.EVENT_READ)
+
+        return selector
+
+    def __add_message_types(self, message_types: "list[str]") -> "set[int]":
+        """
+        Returns the message IDs of the types.
+        Raises ValueError if a type is not in the dialect.
+        """
+        message_ids = mavlink_frame.get_message_ids(message_types)
+        for message_id in message_ids:
+            self.__message_types[message_id] = mavutil.mavlink.mavlink_map[message_id].msgname
+
+        return message_ids
+
+    def subscribe(
+        self, message_types: "list[str] | None", callback: "(object) -> None"  # type: ignore
+    ) -> None:
+        """
+        Calls the callback with every decoded message of the types, in the order received.
+
+        message_types: Types of messages, such as HEARTBEAT, None for every type, which decodes
+            every frame.
+        Raises ValueError if a type is not in the dialect.
+        """
+        if message_types is None:
+            self.__every_message_callbacks.append(callback)
+            return
+
+        for message_id in self.__add_message_types(message_types):
+            self.__message_callbacks.setdefault(message_id, []).append(callback)
+
+    def subscribe_frames(
+        self, message_types: "list[str]", callback: "(str, bytes) -> None"  # type: ignore
+    ) -> None:
+        """
+        Calls the callback with the type and the encoded frame of every message of the types, in
+        the order received, without decoding them.
+
+        message_types: Types of messages, such as HEARTBEAT .
+        Raises ValueError if a type is not in the dialect.
+        """
+        for message_id in self.__add_message_types(message_types):
+            self.__frame_callbacks.setdefault(message_id, []).append(callback)
+
+    def receive_available(self) -> int:
+        """
+        Reads and dispatches every message that can be read without blocking.
+
+        Returns the number of bytes read.
+        Raises OSError if the other end reset the connection.
+        """
+        data = _read_bytes(self.__connection)
+        if len(data) == 0:
+            return 0
+
+        message_ids = None
+        if len(self.__every_message_callbacks) == 0:
+            message_ids = self.__message_types.keys()
+
+        frames = self.__parser.parse(data, message_ids)
+        for message_id, frame in frames:
+            for callback in self.__frame_callbacks.get(message_id, []):
+                callback(self.__message_types[message_id], frame)
+
+            message_callbacks = self.__message_callbacks.get(message_id, [])
+            if len(message_callbacks) == 0 and len(self.__every_message_callbacks) == 0:
+                continue
+
+            try:
+                msg = self.__connection.mav.decode(bytearray(frame))
+            except mavutil.mavlink.MAVError:
+                # Checked by the parser, only a dialect mismatch gets here
+                continue
+
+            _record_message(self.__connection, msg)
+            for callback in message_callbacks + self.__every_message_callbacks:
+                callback(msg)
+
+        self.statistics.wakeup_count += 1
+        self.statistics.byte_count += len(data)
+        self.statistics.skipped_count += self.__parser.frame_count - self.statistics.frame_count
+        self.statistics.skipped_count -= len(frames)
+        self.statistics.frame_count = self.__parser.frame_count
+        self.statistics.bad_frame_count = self.__parser.bad_frame_count
+        self.statistics.lost_count = self.__parser.lost_count
+
+        return len(data)
+
+    def poll(self, timeout: float) -> "tuple[bool, bool]":
+        """
+        Waits until the connection is readable, the timeout, or exit or pause is requested, then
+        dispatches every message that arrived.
+
+        timeout: Time waiting in seconds.
+
+        Returns whether exit or pause was requested, and False if the other end closed the
+        connection.
+        """
+        is_readable = False
+        is_wake_requested = False
+        for key, _ in self.__selector.select(timeout):
+            if key.fd == self.__wake_fd:
+                is_wake_requested = True
+            else:
+                is_readable = True
+
+        if not is_readable:
+            return is_wake_requested, True
+
+        try:
+            byte_count = self.receive_available()
+        except OSError:
+            # Reset by the other end
+            return is_wake_requested, False
+
+        # Readable without any bytes is the end of the stream
+        return is_wake_requested, byte_count > 0
+
+    def reregister(self) -> None:
+        """
+        Waits on the current file descriptor of the connection, after it reopened its socket, such
+        as a ReconnectingConnection . The parser starts over, see FrameParser.clear() .
+        """
+        # A new selector, epoll keeps reporting the old socket while a forked process holds a copy
+        self.__selector.close()
+        self.__selector = self.__create_selector()
+        self.__parser.clear()
+
+    def close(self) -> None:
+        """
+        Frees the selector. The connection stays open.
+        """
+        self.__selector.close()
@@ -0,0 +1,426 @@
+"""
+MAVLink connection that reconnects in the background when the link is lost.
+"""
+
+import random
+import socket
+import threading
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+
+
+class ReconnectPolicy:
+    """
+    When a ReconnectingConnection detects a lost link and how often it tries to reconnect.
+
+    The link is lost when the other end closes or resets a TCP connection, or when nothing is
+    received for `silence_timeout` seconds, which also catches UDP links and TCP connections that
+    were never closed. The first attempt is made at once, after that each attempt waits
+    `backoff_initial * backoff_multiplier ** (failed attempts in a row - 1)` seconds,
+    up to `backoff_max`, randomized by +-`jitter` of itself.
+    """
+
+    def __init__(
+        self,
+        silence_timeout: "float | None" = None,  # seconds
+        backoff_initial: float = 0.1,  # seconds
+        backoff_max: float = 1.0,  # seconds
+        backoff_multiplier: float = 2.0,
+        jitter: float = 0.2,
+    ) -> None:
+        """
+        silence_timeout: Time in seconds without receiving anything before the link is lost,
+            None to only detect closed connections. Requires something to keep reading.
+        backoff_initial: Wait in seconds after the first failed attempt.
+        backoff_max: Longest wait in seconds between attempts.
+        backoff_multiplier: Growth of the wait per failed attempt in a row.
+        jitter: Fraction of the wait to randomize by, between 0 and 1 .
+        """
+        if silence_timeout is not None and silence_timeout <= 0.0:
+            raise ValueError(
+                f"Reconnect policy requires silence_timeout > 0, got {silence_timeout}"
+            )
+
+        if not 0.0 <= jitter <= 1.0:
+            raise ValueError(f"Reconnect policy requires 0 <= jitter <= 1, got {jitter}")
+
+        self.silence_timeout = silence_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.backoff_multiplier = backoff_multiplier
+        self.jitter = jitter
+
+    def backoff(self, failure_count: int) -> float:
+        """
+        Returns the time in seconds to wait before the next attempt after the failed attempts in
+        a row.
+        """
+        if failure_count <= 0:
+            return 0.0
+
+        delay = min(
+            self.backoff_max,
+            self.backoff_initial * self.backoff_multiplier ** (failure_count - 1),
+        )
+        return delay * random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+
+
+class ConnectionStatus:
+    """
+    Link history of a ReconnectingConnection at a point in time.
+    """
+
+    def __init__(
+        self,
+        is_connected: bool,
+        reconnect_count: int,
+        failed_attempt_count: int,
+        downtime: float,  # seconds
+        longest_outage: float,  # seconds
+        dropped_write_count: int,
+    ) -> None:
+        self.is_connected = is_connected
+        self.reconnect_count = reconnect_count
+        self.failed_attempt_count = failed_attempt_count
+        # Including the current outage
+        self.downtime = downtime
+        self.longest_outage = longest_outage
+        # Writes while the link was lost, which are not sent
+        self.dropped_write_count = dropped_write_count
+
+    def __str__(self) -> str:
+        return (
+            f"{'connected' if self.is_connected else 'lost'}, "
+            f"reconnects: {self.reconnect_count}, "
+            f"failed attempts: {self.failed_attempt_count}, "
+            f"downtime: {self.downtime:.3f} s, "
+            f"longest outage: {self.longest_outage:.3f} s, "
+            f"dropped writes: {self.dropped_write_count}"
+        )
+
+
+class ReconnectingConnection:  # pylint: disable=too-many-instance-attributes
+    """
+    Stable handle of a MAVLink connection. Attributes are those of the current connection, so
+    logic written for a connection uses it, and keeps using it across reconnects.
+
+    A background thread opens a new connection with backoff once the link is lost, see
+    ReconnectPolicy . The file descriptor changes, so callers waiting on it wait again, see
+    wait_connected() . While the link is lost, reads return nothing, waits last until it is
+    reconnected or their timeout, and writes are dropped.
+
+    Only reconnects in the process that created it, so workers using it run as threads of that
+    process. pymavlink's own autoreconnect retries inside the read or write that found the link
+    lost, blocking the caller, and keeps the file descriptor of the closed socket.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        connection_string: str,
+        policy: ReconnectPolicy,
+        local_logger: logger.Logger,
+        **connection_options: object,
+    ) -> "tuple[bool, ReconnectingConnection | None]":
+        """
+        Opens the connection and starts reconnecting in the background.
+
+        connection_string: Device of mavutil.mavlink_connection() , such as tcp:localhost:5760 .
+        policy: When the link is lost and how often to reconnect.
+        local_logger: Logs lost links and reconnects.
+        connection_options: Other arguments of mavutil.mavlink_connection() , such as
+            source_system .
+
+        Returns False if the first connection could not be opened, or the connection string is
+        invalid.
+        """
+        try:
+            connection = mavutil.mavlink_connection(connection_string, **connection_options)
+        except (OSError, ValueError) as e:
+            local_logger.error(f"Failed to open connection {connection_string}: {e}")
+            return False, None
+
+        return True, ReconnectingConnection(
+            cls.__create_key,
+            connection,
+            connection_string,
+            policy,
+            local_logger,
+            connection_options,
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        connection: mavutil.mavfile,
+        connection_string: str,
+        policy: ReconnectPolicy,
+        local_logger: logger.Logger,
+        connection_options: "dict[str, object]",
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert (
+            class_private_create_key is ReconnectingConnection.__create_key
+        ), "Use create() method"
+
+        # Set first, other attributes are looked up on it
+        self.__connection = connection
+        self.__connection_string = connection_string
+        self.__policy = policy
+        self.__logger = local_logger
+        # A single attempt per reconnect, the backoff is the policy's
+        self.__connection_options = dict(connection_options)
+        self.__connection_options["retries"] = 0
+
+        # Guards everything below, notified when the link is lost, reconnected or closed
+        self.__state_changed = threading.Condition()
+        self.__is_connected = True
+        self.__is_closed = False
+        self.__last_receive_time = time.monotonic()
+        self.__lost_time = 0.0
+        self.__reconnect_count = 0
+        self.__failed_attempt_count = 0
+        self.__downtime = 0.0
+        self.__longest_outage = 0.0
+        self.__dropped_write_count = 0
+
+        self.__attach(connection)
+        self.__reconnect_thread = threading.Thread(target=self.__run, daemon=True)
+        self.__reconnect_thread.start()
+
+    def __getattr__(self, name: str) -> object:
+        """
+        Attributes of the current connection.
+        """
+        return getattr(self.__connection, name)
+
+    def __attach(self, connection: mavutil.mavfile) -> None:
+        """
+        Hooks the reads, waits, writes and end of stream handlers of the connection, so the link
+        is seen lost by whichever thread finds it first. Once the connection is replaced, its hooks
+        use the current connection, so references kept to it, such as its mav, keep working.
+        """
+        read = connection.recv
+        select = connection.select
+        write = connection.write
+
+        def hooked_recv(n: "int | None" = None) -> bytes:
+            current_connection = self.__connection
+            if current_connection is not connection:
+                return current_connection.recv(n)
+
+            if not self.__is_connected:
+                return b""
+
+            data = read(n)
+            if len(data) > 0:
+                self.__last_receive_time = time.monotonic()
+
+            return data
+
+        def hooked_select(timeout: float) -> bool:
+            current_connection = self.__connection
+            if current_connection is not connection:
+                return current_connection.select(timeout)
+
+            if not self.__is_connected:
+                # Instead of the closed socket, which fails at once
+                self.wait_connected(timeout)
+                return False
+
+            return select(timeout)
+
+        def hooked_write(buffer: bytes) -> None:
+            current_connection = self.__connection
+            if current_connection is not connection:
+                current_connection.write(buffer)
+                return
+
+            if not self.__is_connected:
+                with self.__state_changed:
+                    self.__dropped_write_count += 1
+
+                return
+
+            write(buffer)
+
+        def handle_lost() -> None:
+            self.__report_lost(connection, "closed by the other end")
+
+        connection.recv = hooked_recv
+        connection.select = hooked_select
+        connection.write = hooked_write
+        # Instead of pymavlink's reconnect, which blocks the caller
+        connection.handle_eof = handle_lost
+        connection.handle_disconnect = handle_lost
+
+    def __report_lost(
+        self, connection: mavutil.mavfile, reason: str, lost_time: "float | None" = None
+    ) -> None:
+        """
+        Marks the link lost if the connection is the current one.
+
+        lost_time: time.monotonic() the link was lost, None for now.
+        """
+        with self.__state_changed:
+            if connection is not self.__connection or not self.__is_connected:
+                return
+
+            self.__is_connected = False
+            self.__lost_time = time.monotonic() if lost_time is None else lost_time
+            self.__state_changed.notify_all()
+
+        self.__logger.warning(f"Connection {self.__connection_string} lost, {reason}")
+
+    def __wait_lost(self) -> bool:
+        """
+        Waits until the link is lost, including by silence.
+
+        Returns False if the handle was closed.
+        """
+        with self.__state_changed:
+            while self.__is_connected and not self.__is_closed:
+                timeout = None
+                if self.__policy.silence_timeout is not None:
+                    silence = time.monotonic() - self.__last_receive_time
+                    timeout = self.__policy.silence_timeout - silence
+                    if timeout <= 0.0:
+                        break
+
+                self.__state_changed.wait(timeout)
+
+            if self.__is_closed:
+                return False
+
+        if self.__is_connected:
+            # Down since the last bytes arrived
+            self.__report_lost(self.__connection, "nothing received", self.__last_receive_time)
+
+        return True
+
+    def __run(self) -> None:
+        """
+        Reconnects each time the link is lost, until the handle is closed.
+        """
+        while self.__wait_lost():
+            lost_connection = self.__connection
+            # Closes the link even if a forked process holds a copy of the socket
+            port = getattr(lost_connection, "port", None)
+            try:
+                if isinstance(port, socket.socket):
+                    port.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+            try:
+                lost_connection.close()
+            except OSError:
+                pass
+
+            failure_count = 0
+            while True:
+                with self.__state_changed:
+                    # Returns early if the handle was closed
+                    self.__state_changed.wait_for(
+                        lambda: self.__is_closed, self.__policy.backoff(failure_count)
+                    )
+                    if self.__is_closed:
+                        return
+
+                try:
+                    connection = mavutil.mavlink_connection(
+                        self.__connection_string, **self.__connection_options
+                    )
+                except OSError:
+                    failure_count += 1
+                    with self.__state_changed:
+                        self.__failed_attempt_count += 1
+
+                    continue
+
+                break
+
+            self.__attach(connection)
+            with self.__state_changed:
+                outage = time.monotonic() - self.__lost_time
+                self.__connection = connection
+                self.__is_connected = True
+                self.__last_receive_time = time.monotonic()
+                self.__reconnect_count += 1
+                self.__downtime += outage
+                self.__longest_outage = max(self.__longest_outage, outage)
+                self.__state_changed.notify_all()
+
+            self.__logger.info(
+                f"Connection {self.__connection_string} reconnected after {outage:.3f} s, "
+                f"{failure_count + 1} attempts"
+            )
+
+    def wait_connected(self, timeout: float) -> "tuple[bool, int]":
+        """
+        Waits until the link is connected or the timeout.
+
+        timeout: Time waiting in seconds.
+
+        Returns whether the link is connected, and the number of reconnects so far, which changes
+        with the connection and its file descriptor.
+        """
+        with self.__state_changed:
+            self.__state_changed.wait_for(lambda: self.__is_connected or self.__is_closed, timeout)
+            return self.__is_connected and not self.__is_closed, self.__reconnect_count
+
+    def report_lost(self, reconnect_count: int) -> None:
+        """
+        Marks the link lost, such as after an error using it. Ignored if it has reconnected since.
+
+        reconnect_count: Number of reconnects when the error happened, see wait_connected() .
+        """
+        with self.__state_changed:
+            if reconnect_count != self.__reconnect_count:
+                return
+
+            connection = self.__connection
+
+        self.__report_lost(connection, "error using it")
+
+    def get_status(self) -> ConnectionStatus:
+        """
+        Returns the link history so far.
+        """
+        with self.__state_changed:
+            downtime = self.__downtime
+            longest_outage = self.__longest_outage
+            if not self.__is_connected:
+                outage = time.monotonic() - self.__lost_time
+                downtime += outage
+                longest_outage = max(longest_outage, outage)
+
+            return ConnectionStatus(
+                self.__is_connected,
+                self.__reconnect_count,
+                self.__failed_attempt_count,
+                downtime,
+                longest_outage,
+                self.__dropped_write_count,
+            )
+
+    def close(self) -> None:
+        """
+        Stops reconnecting and closes the connection.
+        """
+        with self.__state_changed:
+            self.__is_closed = True
+            self.__state_changed.notify_all()
+
+        self.__reconnect_thread.join()
+        try:
+            self.__connection.close()
+        except OSError:
+            pass
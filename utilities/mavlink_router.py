@@ -0,0 +1,405 @@
+"""
+Routes the messages of a MAVLink connection to worker processes by type.
+"""
+
+import collections
+import os
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from utilities import mavlink_receiver
+from utilities import mavlink_reconnect
+from utilities import mavlink_sender  # pylint: disable=unused-import
+from utilities.workers import closable_queue
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+
+# Longest wait in seconds for the socket before checking for exit or pause
+ROUTER_WAIT_TIMEOUT_S = 0.5
+# Wait in seconds between reads of connections that cannot be waited on, such as serial ports
+ROUTER_POLL_PERIOD_S = 0.01
+# Longest wait in seconds for routed messages, without a controller, between checks of the deadline
+ROUTED_WAIT_SLICE_S = 0.1
+
+
+class Subscription:
+    """
+    Messages of some types routed to a queue.
+    """
+
+    def __init__(
+        self, message_types: "list[str]", subscription_queue: queue_proxy_wrapper.QueueProxyWrapper
+    ) -> None:
+        """
+        message_types: Types of messages routed to the queue, such as HEARTBEAT .
+        subscription_queue: Queue the encoded messages are put in, see RoutedConnection .
+            Dropping the oldest keeps a slow subscriber from holding up the others.
+        """
+        if len(message_types) == 0:
+            raise ValueError("Subscription requires at least one message type")
+
+        self.message_types = frozenset(message_types)
+        self.queue = subscription_queue
+
+
+class _ReceiveOnlyFile:
+    """
+    File the encoder of a RoutedConnection without a sending connection writes to.
+    """
+
+    def write(self, buffer: bytes) -> None:
+        """
+        Raises OSError, the connection is only written by the sender.
+        """
+        raise OSError(
+            f"Routed connection cannot send {len(buffer)} bytes, send with a sending connection"
+        )
+
+
+class RoutedConnection:  # pylint: disable=too-many-instance-attributes
+    """
+    Messages of a subscription, with the receiving surface of a connection, so logic written for
+    a connection reads from it. Sends go to the sending connection of the stage, if it has one.
+
+    Each message is parsed from the stream once by the router, and only the frames of the
+    subscribed types are decoded here.
+
+    Only the dialect and source IDs of the connection are kept, so it is pickled into worker
+    processes without the connection, whatever their start method.
+    """
+
+    def __init__(
+        self,
+        connection: mavutil.mavfile,
+        subscription: Subscription,
+        controller: "worker_controller.WorkerController | None" = None,
+        sending_connection: "mavlink_sender.SendingConnection | None" = None,
+    ) -> None:
+        """
+        connection: Connection the router reads, for the dialect and source IDs.
+        subscription: Messages routed to this connection.
+        controller: If given, waiting for messages stops as soon as exit or pause is requested.
+        sending_connection: Where sends go, None to raise OSError on sends.
+        """
+        self.__dialect = type(connection.mav)
+        self.__source_system = connection.mav.srcSystem
+        self.__source_component = connection.mav.srcComponent
+        self.__sending_connection = sending_connection
+        # Nothing to wait on, wait with a blocking recv_match() instead
+        self.fd = None
+        self.message_types = subscription.message_types
+        self.__subscription_queue = subscription.queue
+        self.__controller = controller
+        # Decoded messages not taken yet, bounded like the queue
+        self.__messages = collections.deque(maxlen=max(1, subscription.queue.maxsize))
+        self.__create_encoders()
+
+    def __create_encoders(self) -> None:
+        """
+        Creates the encoder sends go through, and the decoder of routed messages.
+        """
+        if self.__sending_connection is None:
+            self.mav = self.__dialect(
+                _ReceiveOnlyFile(), self.__source_system, self.__source_component
+            )
+        else:
+            self.mav = self.__sending_connection.mav
+
+        # Same dialect as the connection, without a file since it only decodes
+        self.__decoder = self.__dialect(None)
+
+    def __getstate__(self) -> "dict[str, object]":
+        """
+        Pickled into spawned and forkserver processes, without the encoders and the decoded
+        messages.
+        """
+        state = self.__dict__.copy()
+        del state["mav"]
+        del state["_RoutedConnection__decoder"]
+        state["_RoutedConnection__messages"] = collections.deque(maxlen=self.__messages.maxlen)
+        return state
+
+    def __setstate__(self, state: "dict[str, object]") -> None:
+        """
+        Unpickled in spawned and forkserver processes.
+        """
+        self.__dict__.update(state)
+        self.__create_encoders()
+
+    def __receive(self, timeout: float) -> bool:
+        """
+        Decodes the messages routed until the timeout, or until the first arrive.
+
+        Returns whether exit or pause was requested.
+        Raises EOFError if the subscription was closed.
+        """
+        try:
+            if self.__controller is None:
+                is_wake_requested = False
+                buffers = self.__subscription_queue.get_many(0, timeout)
+            else:
+                is_wake_requested, buffers = self.__controller.wait_for_items(
+                    self.__subscription_queue, timeout
+                )
+        except closable_queue.Closed as e:
+            raise EOFError("MAVLink router subscription closed") from e
+
+        for buffer in buffers:
+            try:
+                self.__messages.append(self.__decoder.decode(bytearray(buffer)))
+            except mavutil.mavlink.MAVError:
+                # Already checked by the router, only a dialect mismatch gets here
+                continue
+
+        return is_wake_requested
+
+    def __take(self, message_types: "list[str] | None") -> "object | None":
+        """
+        Returns the oldest message of the types, None if there is none.
+        """
+        for index, msg in enumerate(self.__messages):
+            if message_types is None or msg.get_type() in message_types:
+                del self.__messages[index]
+                return msg
+
+        return None
+
+    # Same signature as mavutil.mavfile.recv_match()
+    def recv_match(  # pylint: disable=redefined-builtin,unused-argument
+        self,
+        condition: "str | None" = None,
+        type: "str | list[str] | None" = None,
+        blocking: bool = False,
+        timeout: "float | None" = None,
+    ) -> "object | None":
+        """
+        Takes the oldest message of the type, waiting for one if blocking.
+        Conditions are not supported.
+
+        Returns the message, None if there is none or exit or pause was requested.
+        Raises EOFError if the subscription was closed.
+        """
+        if isinstance(type, str):
+            type = [type]
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # Take what has already arrived first
+        is_waiting = False
+        while True:
+            msg = self.__take(type)
+            if msg is not None:
+                return msg
+
+            if is_waiting and not blocking:
+                return None
+
+            wait_time = 0.0
+            if is_waiting:
+                if deadline is None:
+                    wait_time = ROUTED_WAIT_SLICE_S
+                else:
+                    wait_time = deadline - time.monotonic()
+                    if wait_time <= 0.0:
+                        return None
+
+            if self.__receive(wait_time):
+                return self.__take(type)
+
+            is_waiting = True
+
+
+class RouterStatistics:
+    """
+    Messages handled by a router.
+    """
+
+    def __init__(self) -> None:
+        self.parsed_count = 0
+        self.delivered_count = 0
+        self.unsubscribed_count = 0
+
+    def __str__(self) -> str:
+        return (
+            f"parsed: {self.parsed_count}, "
+            f"delivered: {self.delivered_count}, "
+            f"no subscriber: {self.unsubscribed_count}"
+        )
+
+
+def _batch_message(
+    msg: object,
+    routes: "dict[str, list[queue_proxy_wrapper.QueueProxyWrapper]]",
+    batches: "dict[int, tuple[queue_proxy_wrapper.QueueProxyWrapper, list[bytes]]]",
+    statistics: RouterStatistics,
+) -> None:
+    """
+    Adds the encoded message to the batch of each queue of its type.
+    """
+    statistics.parsed_count += 1
+    route_queues = routes.get(msg.get_type())
+    if route_queues is None:
+        statistics.unsubscribed_count += 1
+        return
+
+    _batch_frame(bytes(msg.get_msgbuf()), route_queues, batches)
+
+
+def _batch_frame(
+    frame: bytes,
+    route_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    batches: "dict[int, tuple[queue_proxy_wrapper.QueueProxyWrapper, list[bytes]]]",
+) -> None:
+    """
+    Adds the encoded message to the batch of each of the queues.
+    """
+    for route_queue in route_queues:
+        batches.setdefault(id(route_queue), (route_queue, []))[1].append(frame)
+
+
+def _deliver_batches(
+    routes: "dict[str, list[queue_proxy_wrapper.QueueProxyWrapper]]",
+    batches: "dict[int, tuple[queue_proxy_wrapper.QueueProxyWrapper, list[bytes]]]",
+    statistics: RouterStatistics,
+) -> None:
+    """
+    Puts each batch in its queue, then empties the batches. Closed queues are removed from the
+    routes.
+    """
+    for route_queue, buffers in batches.values():
+        try:
+            route_queue.put_many(buffers)
+        except closable_queue.Closed:
+            for route_queues in routes.values():
+                if route_queue in route_queues:
+                    route_queues.remove(route_queue)
+
+            continue
+
+        statistics.delivered_count += len(buffers)
+
+    batches.clear()
+
+
+def route_available(
+    connection: mavutil.mavfile,
+    routes: "dict[str, list[queue_proxy_wrapper.QueueProxyWrapper]]",
+    statistics: RouterStatistics,
+) -> bool:
+    """
+    Parses every message that can be read without blocking and puts each in the queues of its
+    type, a batch per queue.
+
+    routes: Queues of each message type. Closed queues are removed.
+
+    Returns False if the other end closed the connection.
+    """
+    try:
+        byte_count, messages = mavlink_receiver.read_available(connection)
+    except OSError:
+        # Reset by the other end
+        return False
+
+    batches = {}
+    for msg in messages:
+        _batch_message(msg, routes, batches, statistics)
+
+    _deliver_batches(routes, batches, statistics)
+
+    # Readable without any bytes is the end of the stream
+    return connection.fd is None or byte_count > 0
+
+
+def mavlink_router_worker(
+    connection: "mavutil.mavfile | mavlink_reconnect.ReconnectingConnection",
+    subscriptions: "list[Subscription]",
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Worker process that alone reads the connection, so receiving workers do not take each
+    other's messages or each parse the whole stream.
+
+    connection: Connection to read, workers keep sending on it. A reconnecting connection is
+        waited for while its link is lost, instead of stopping the router.
+    subscriptions: Where the messages of each type are routed, see RoutedConnection .
+    """
+    # Instantiate logger
+    process_id = os.getpid()
+    result, local_logger = logger.Logger.create(f"mavlink_router_worker_{process_id}", True)
+    if not result:
+        print("ERROR: Worker failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    local_logger.info("Logger initialized", True)
+
+    routes = {}
+    for subscription in subscriptions:
+        for message_type in subscription.message_types:
+            routes.setdefault(message_type, []).append(subscription.queue)
+
+    statistics = RouterStatistics()
+    # Connections that cannot be waited on, such as serial ports on Windows, are polled
+    if connection.fd is None:
+        while not controller.is_exit_requested():
+            controller.check_pause()
+
+            controller.wait(ROUTER_POLL_PERIOD_S)
+            if not route_available(connection, routes, statistics):
+                local_logger.error("Connection closed by the other end", True)
+                break
+
+        local_logger.info(f"Router done, {statistics}", True)
+        return
+
+    # Frames are routed as they are parsed without being decoded, then each batch is delivered
+    # once per wakeup. Frames of other types are only checked.
+    receiver = mavlink_receiver.MavlinkReceiver(connection, controller)
+    batches = {}
+
+    def route_frame(message_type: str, frame: bytes) -> None:
+        statistics.parsed_count += 1
+        _batch_frame(frame, routes[message_type], batches)
+
+    try:
+        receiver.subscribe_frames(list(routes), route_frame)
+    except ValueError as e:
+        local_logger.error(f"Invalid subscriptions: {e}", True)
+        receiver.close()
+        return
+
+    is_reconnecting = isinstance(connection, mavlink_reconnect.ReconnectingConnection)
+    reconnect_count = 0
+    while not controller.is_exit_requested():
+        controller.check_pause()
+
+        if is_reconnecting:
+            is_connected, current_reconnect_count = connection.wait_connected(ROUTER_WAIT_TIMEOUT_S)
+            if not is_connected:
+                continue
+
+            # New socket
+            if current_reconnect_count != reconnect_count:
+                reconnect_count = current_reconnect_count
+                receiver.reregister()
+
+        _, is_open = receiver.poll(ROUTER_WAIT_TIMEOUT_S)
+        _deliver_batches(routes, batches, statistics)
+        if is_open:
+            continue
+
+        if is_reconnecting:
+            connection.report_lost(reconnect_count)
+            continue
+
+        local_logger.error("Connection closed by the other end", True)
+        break
+
+    receiver.close()
+    statistics.parsed_count += receiver.statistics.skipped_count
+    statistics.unsubscribed_count += receiver.statistics.skipped_count
+    local_logger.info(f"Router done, {statistics}, {receiver.statistics}", True)
@@ -0,0 +1,404 @@
+"""
+Sends the MAVLink messages of worker processes from a single writer.
+"""
+
+import ctypes
+import multiprocessing as mp
+import os
+import struct
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from utilities import mavlink_frame
+from utilities.workers import closable_queue
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+
+# Longest wait in seconds for messages before checking for exit or pause
+SENDER_WAIT_TIMEOUT_S = 0.5
+# Messages held back per command instead of per type, so one command does not replace another
+COMMAND_MESSAGE_IDS = frozenset(
+    [mavutil.mavlink.MAVLINK_MSG_ID_COMMAND_LONG, mavutil.mavlink.MAVLINK_MSG_ID_COMMAND_INT]
+)
+# Offset in bytes of the uint16 command in the payload of both, after 7 fields of 4 bytes
+COMMAND_PAYLOAD_OFFSET = 28
+
+
+def _renumber(frame: bytes, seq: int) -> bytes:
+    """
+    Sets the sequence number of an encoded message, recalculating the checksum.
+    Signed messages are returned unchanged, the signature covers the sequence number.
+    """
+    if frame[0] == mavlink_frame.MAVLINK_2_START:
+        if (
+            frame[mavlink_frame.MAVLINK_2_INCOMPAT_FLAGS_INDEX]
+            & mavlink_frame.MAVLINK_2_SIGNED_FLAG
+        ):
+            return frame
+
+        seq_index = mavlink_frame.MAVLINK_2_SEQ_INDEX
+        crc_index = mavlink_frame.MAVLINK_2_HEADER_LENGTH + frame[1]
+    else:
+        seq_index = mavlink_frame.MAVLINK_1_SEQ_INDEX
+        crc_index = mavlink_frame.MAVLINK_1_HEADER_LENGTH + frame[1]
+
+    message_class = mavutil.mavlink.mavlink_map.get(mavlink_frame.get_message_id(frame))
+    if message_class is None:
+        return frame
+
+    renumbered = bytearray(frame)
+    renumbered[seq_index] = seq
+    crc = mavlink_frame.calculate_crc(renumbered, 0, crc_index, message_class.crc_extra)
+    renumbered[crc_index : crc_index + mavlink_frame.CRC_LENGTH] = struct.pack("<H", crc)
+
+    return bytes(renumbered)
+
+
+def _get_hold_key(frame: bytes) -> "tuple[int, int | None]":
+    """
+    Returns the message ID of the frame, and the command of a command message, None otherwise.
+    A held back message is only replaced by a newer message with the same key.
+    """
+    message_id = mavlink_frame.get_message_id(frame)
+    if message_id not in COMMAND_MESSAGE_IDS:
+        return message_id, None
+
+    header_length = mavlink_frame.MAVLINK_1_HEADER_LENGTH
+    if frame[0] == mavlink_frame.MAVLINK_2_START:
+        header_length = mavlink_frame.MAVLINK_2_HEADER_LENGTH
+
+    # MAVLink 2 drops trailing zero bytes of the payload
+    payload = frame[header_length : header_length + frame[1]].ljust(
+        COMMAND_PAYLOAD_OFFSET + 2, b"\0"
+    )
+    (command,) = struct.unpack_from("<H", payload, COMMAND_PAYLOAD_OFFSET)
+    return message_id, command
+
+
+class _QueueFile:
+    """
+    File the encoder of a SendingConnection writes to, putting each message in the send queue
+    with the time it was submitted.
+    """
+
+    def __init__(self, send_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        self.__send_queue = send_queue
+
+    def write(self, buffer: bytes) -> None:
+        """
+        Submits an encoded message.
+        Raises EOFError if the send queue was closed, like a closed connection.
+        """
+        try:
+            self.__send_queue.queue.put((time.monotonic(), bytes(buffer)))
+        except closable_queue.Closed as e:
+            raise EOFError("MAVLink send queue closed") from e
+
+
+class SendingConnection:
+    """
+    Sending surface of a connection, so logic written for a connection sends through it. Messages
+    are encoded here and written to the connection by the single sender.
+
+    Sequence numbers are set by the sender, so they count up across every sending worker.
+
+    Only the dialect and source IDs of the connection are kept, so it is pickled into worker
+    processes without the connection, whatever their start method.
+    """
+
+    def __init__(
+        self, connection: mavutil.mavfile, send_queue: queue_proxy_wrapper.QueueProxyWrapper
+    ) -> None:
+        """
+        connection: Connection the sender writes to, for the dialect and source IDs.
+        send_queue: Queue read by the sender, see mavlink_sender_worker() .
+        """
+        self.__dialect = type(connection.mav)
+        self.__source_system = connection.mav.srcSystem
+        self.__source_component = connection.mav.srcComponent
+        self.__send_queue = send_queue
+        self.mav = self.__create_encoder()
+
+    def __create_encoder(self) -> object:
+        """
+        Returns an encoder of the dialect writing to the send queue.
+        """
+        return self.__dialect(
+            _QueueFile(self.__send_queue), self.__source_system, self.__source_component
+        )
+
+    def __getstate__(self) -> "dict[str, object]":
+        """
+        Pickled into spawned and forkserver processes, without the encoder.
+        """
+        state = self.__dict__.copy()
+        del state["mav"]
+        return state
+
+    def __setstate__(self, state: "dict[str, object]") -> None:
+        """
+        Unpickled in spawned and forkserver processes.
+        """
+        self.__dict__.update(state)
+        self.mav = self.__create_encoder()
+
+
+class SendRateCaps:
+    """
+    Most messages sent per second of each message type.
+
+    Messages of a capped type that come too soon are held back until the cap allows, and a newer
+    message of the type replaces the one held back, so the latest value is the one sent.
+    Commands (COMMAND_LONG and COMMAND_INT) are only replaced by a newer message of the same
+    command, so different commands are delayed and sent in turn instead of lost.
+    """
+
+    def __init__(self, rates: "dict[str, float]") -> None:
+        """
+        rates: Most messages per second of each message type, such as COMMAND_LONG .
+        """
+        self.min_intervals = {}  # seconds, by message ID
+        for message_type, rate in rates.items():
+            message_id = getattr(mavutil.mavlink, f"MAVLINK_MSG_ID_{message_type}", None)
+            if message_id is None:
+                raise ValueError(f"Send rate cap of unknown message type {message_type}")
+
+            if rate <= 0.0:
+                raise ValueError(f"Send rate cap of {message_type} requires rate > 0, got {rate}")
+
+            self.min_intervals[message_id] = 1.0 / rate
+
+
+class SenderStatisticsSnapshot:
+    """
+    Messages sent by a sender from the start of its statistics to a point in time.
+    """
+
+    def __init__(
+        self,
+        elapsed: float,  # seconds
+        message_count: int,
+        byte_count: int,
+        write_count: int,
+        replaced_count: int,
+        total_queueing_delay: float,  # seconds
+        max_queueing_delay: float,  # seconds
+    ) -> None:
+        self.elapsed = elapsed
+        self.message_count = message_count
+        self.byte_count = byte_count
+        self.write_count = write_count
+        # Replaced by a newer message of the type or command while held back by the rate cap
+        self.replaced_count = replaced_count
+        # Time in seconds from submitting a message to writing it
+        self.total_queueing_delay = total_queueing_delay
+        self.max_queueing_delay = max_queueing_delay
+
+    def __str__(self) -> str:
+        elapsed = max(self.elapsed, 1e-9)
+        mean_queueing_delay = self.total_queueing_delay / max(self.message_count, 1)
+        return (
+            f"{self.byte_count / elapsed:.0f} bytes/s, "
+            f"{self.message_count / elapsed:.1f} messages/s, "
+            f"messages per write: {self.message_count / max(self.write_count, 1):.2f}, "
+            f"replaced by rate cap: {self.replaced_count}, "
+            f"queueing delay mean: {mean_queueing_delay * 1e3:.3f} ms "
+            f"max: {self.max_queueing_delay * 1e3:.3f} ms"
+        )
+
+
+class SenderStatistics:
+    """
+    Counters of the messages sent by a sender, shared with the process that created them so
+    main can log them while the sender runs, like queue statistics.
+    """
+
+    # Indices into the count array
+    __MESSAGES = 0
+    __BYTES = 1
+    __WRITES = 2
+    __REPLACED = 3
+    __COUNT_LENGTH = 4
+
+    # Indices into the time array
+    __TOTAL_QUEUEING_DELAY = 0
+    __MAX_QUEUEING_DELAY = 1
+    __TIME_LENGTH = 2
+
+    def __init__(self, context: "mp.context.BaseContext | None" = None) -> None:
+        """
+        Constructor creates the shared counters.
+
+        context: Creates the lock, the context of the sender worker, None for the default context.
+        """
+        if context is None:
+            context = mp.get_context()
+
+        self.__start_time = time.monotonic()
+        self.__lock = context.Lock()
+        self.__counts = mp.RawArray(ctypes.c_int64, self.__COUNT_LENGTH)
+        self.__times = mp.RawArray(ctypes.c_double, self.__TIME_LENGTH)
+
+    def record_write(self, submit_times: "list[float]", byte_count: int, write_time: float) -> None:
+        """
+        Records a write of the messages submitted at the times.
+        """
+        with self.__lock:
+            self.__counts[self.__MESSAGES] += len(submit_times)
+            self.__counts[self.__BYTES] += byte_count
+            self.__counts[self.__WRITES] += 1
+            for submit_time in submit_times:
+                queueing_delay = max(0.0, write_time - submit_time)
+                self.__times[self.__TOTAL_QUEUEING_DELAY] += queueing_delay
+                self.__times[self.__MAX_QUEUEING_DELAY] = max(
+                    self.__times[self.__MAX_QUEUEING_DELAY], queueing_delay
+                )
+
+    def record_replaced(self) -> None:
+        """
+        Records a held back message replaced by a newer one.
+        """
+        with self.__lock:
+            self.__counts[self.__REPLACED] += 1
+
+    def snapshot(self) -> SenderStatisticsSnapshot:
+        """
+        Returns a consistent copy of the counters.
+        """
+        with self.__lock:
+            counts = list(self.__counts)
+            times = list(self.__times)
+
+        return SenderStatisticsSnapshot(
+            time.monotonic() - self.__start_time,
+            counts[self.__MESSAGES],
+            counts[self.__BYTES],
+            counts[self.__WRITES],
+            counts[self.__REPLACED],
+            times[self.__TOTAL_QUEUEING_DELAY],
+            times[self.__MAX_QUEUEING_DELAY],
+        )
+
+
+def send_available(
+    connection: mavutil.mavfile,
+    submitted: "list[tuple[float, bytes]]",
+    held: "dict[tuple[int, int | None], tuple[float, bytes]]",
+    last_send_times: "dict[int, float]",
+    rate_caps: SendRateCaps,
+    statistics: SenderStatistics,
+) -> None:
+    """
+    Writes the submitted messages and the held back messages the rate caps allow, in the order
+    they were submitted, with a single write.
+
+    submitted: Submit time and encoded message of each new message.
+    held: Messages held back by the rate caps, by message ID and command, see _get_hold_key() .
+        Updated.
+    last_send_times: time.monotonic() each capped message type was last sent. Updated.
+    """
+    pending = []
+    for submit_time, frame in submitted:
+        hold_key = _get_hold_key(frame)
+        if hold_key[0] not in rate_caps.min_intervals:
+            pending.append((submit_time, frame))
+            continue
+
+        if hold_key in held:
+            statistics.record_replaced()
+
+        held[hold_key] = (submit_time, frame)
+
+    now = time.monotonic()
+    # Oldest first, so held commands of a type are sent in turn, one per interval
+    for hold_key, held_message in sorted(held.items(), key=lambda item: item[1][0]):
+        message_id = hold_key[0]
+        last_send_time = last_send_times.get(message_id)
+        if last_send_time is None or now - last_send_time >= rate_caps.min_intervals[message_id]:
+            pending.append(held_message)
+            last_send_times[message_id] = now
+            del held[hold_key]
+
+    if len(pending) == 0:
+        return
+
+    pending.sort(key=lambda message: message[0])
+    frames = []
+    for _, frame in pending:
+        frames.append(_renumber(frame, connection.mav.seq))
+        connection.mav.seq = (connection.mav.seq + 1) % 256
+
+    buffer = b"".join(frames)
+    connection.write(buffer)
+    statistics.record_write([submit_time for submit_time, _ in pending], len(buffer), now)
+
+
+def get_hold_timeout(
+    held: "dict[tuple[int, int | None], tuple[float, bytes]]",
+    last_send_times: "dict[int, float]",
+    rate_caps: SendRateCaps,
+) -> float:
+    """
+    Returns the time in seconds until the first held back message can be sent.
+    """
+    timeout = SENDER_WAIT_TIMEOUT_S
+    now = time.monotonic()
+    for message_id, _ in held:
+        due_time = last_send_times[message_id] + rate_caps.min_intervals[message_id]
+        timeout = min(timeout, max(0.0, due_time - now))
+
+    return timeout
+
+
+def mavlink_sender_worker(
+    connection: mavutil.mavfile,
+    rates: "dict[str, float]",
+    statistics: SenderStatistics,
+    send_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Worker process that alone writes to the connection, so the messages of sending workers are
+    not interleaved, and everything submitted together is sent with one write.
+
+    connection: Connection to write to.
+    rates: Most messages per second of each message type, see SendRateCaps .
+    statistics: Counters of the messages sent, read by main.
+    send_queue: Messages submitted by SendingConnection .
+    """
+    # Instantiate logger
+    process_id = os.getpid()
+    result, local_logger = logger.Logger.create(f"mavlink_sender_worker_{process_id}", True)
+    if not result:
+        print("ERROR: Worker failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    local_logger.info("Logger initialized", True)
+
+    try:
+        rate_caps = SendRateCaps(rates)
+    except ValueError as e:
+        local_logger.error(f"Invalid send rate caps: {e}", True)
+        return
+
+    held = {}
+    last_send_times = {}
+    while not controller.is_exit_requested():
+        controller.check_pause()
+
+        try:
+            _, submitted = controller.wait_for_items(
+                send_queue, get_hold_timeout(held, last_send_times, rate_caps)
+            )
+        except closable_queue.Closed:
+            break
+
+        send_available(connection, submitted, held, last_send_times, rate_caps, statistics)
+
+    local_logger.info(f"Sender done, {statistics.snapshot()}", True)
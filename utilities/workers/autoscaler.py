@@ -0,0 +1,163 @@
+"""
+Scales a worker pool to the load on its input queues.
+"""
+
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_manager
+
+
+class AutoscalePolicy:
+    """
+    Bounds and thresholds of an Autoscaler.
+    """
+
+    def __init__(
+        self,
+        min_workers: int,
+        max_workers: int,
+        scale_up_depth: int = 5,
+        scale_up_residence: float = 0.1,  # seconds
+        scale_down_idle: float = 0.5,  # fraction, 0 to 1
+        cooldown_up: float = 2.0,  # seconds
+        cooldown_down: float = 10.0,  # seconds
+    ) -> None:
+        """
+        min_workers: Fewest workers, must be greater than 0 .
+        max_workers: Most workers, must be at least min_workers .
+        scale_up_depth: Items waiting in the input queues at which a worker is added.
+        scale_up_residence: Mean time in seconds items waited since the last update at which a
+            worker is added, only for instrumented queues.
+        scale_down_idle: Fraction of worker time spent waiting for items since the last update
+            at which a worker is retired, only for instrumented queues.
+        cooldown_up: Time in seconds after scaling before adding a worker.
+        cooldown_down: Time in seconds after scaling before retiring a worker.
+        """
+        if min_workers <= 0 or max_workers < min_workers:
+            raise ValueError(
+                "Autoscale policy requires 0 < min_workers <= max_workers, "
+                f"got {min_workers} and {max_workers}"
+            )
+
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.scale_up_depth = scale_up_depth
+        self.scale_up_residence = scale_up_residence
+        self.scale_down_idle = scale_down_idle
+        self.cooldown_up = cooldown_up
+        self.cooldown_down = cooldown_down
+
+
+class Autoscaler:
+    """
+    Adds a worker while items back up in the input queues, and retires one while the queues are
+    empty and the workers mostly wait, at most one per update.
+
+    Residence and idle time need instrumented input queues. Without them, only the depth is
+    used and empty queues count as idle.
+    """
+
+    def __init__(
+        self,
+        manager: worker_manager.WorkerManager,
+        policy: AutoscalePolicy,
+        local_logger: logger.Logger,
+    ) -> None:
+        """
+        manager: Workers to scale.
+        policy: Bounds and thresholds.
+        local_logger: Existing logger from process.
+        """
+        self.__manager = manager
+        self.__policy = policy
+        self.__local_logger = local_logger
+
+        self.__last_scale_time = time.monotonic()
+        self.__previous_snapshots = [statistics for _, statistics in self.__get_snapshots()]
+
+    def __get_snapshots(self) -> "list[tuple[object, object]]":
+        """
+        Returns each input queue with its statistics, None if not instrumented.
+        """
+        snapshots = []
+        for input_queue in self.__manager.get_input_queues():
+            _, statistics = input_queue.get_statistics()
+            snapshots.append((input_queue, statistics))
+
+        return snapshots
+
+    def __sample(self, worker_count: int) -> "tuple[int, float | None, float | None]":
+        """
+        Returns the depth, and the mean residence time and idle fraction since the last sample,
+        None if unknown.
+        """
+        depth = 0
+        dequeued_count = 0
+        residence_time = 0.0
+        wait_time = 0.0
+        elapsed = 0.0
+        is_instrumented = True
+
+        snapshots = self.__get_snapshots()
+        for index, (input_queue, statistics) in enumerate(snapshots):
+            previous = self.__previous_snapshots[index]
+            if statistics is None or previous is None:
+                depth += input_queue.queue.qsize()
+                is_instrumented = False
+                continue
+
+            depth += statistics.depth
+            dequeued_count += statistics.dequeued_count - previous.dequeued_count
+            residence_time += statistics.residence_time - previous.residence_time
+            wait_time += statistics.consumer_wait_time - previous.consumer_wait_time
+            elapsed = max(elapsed, statistics.timestamp - previous.timestamp)
+
+        self.__previous_snapshots = [statistics for _, statistics in snapshots]
+
+        if not is_instrumented or elapsed <= 0.0:
+            return depth, None, None
+
+        mean_residence_time = residence_time / dequeued_count if dequeued_count > 0 else 0.0
+        idle_fraction = wait_time / (elapsed * worker_count)
+
+        return depth, mean_residence_time, idle_fraction
+
+    def update(self) -> bool:
+        """
+        Samples the input queues and scales by at most one worker. Call periodically.
+
+        Returns whether the workers were able to be scaled, True if nothing changed.
+        """
+        now = time.monotonic()
+        worker_count = self.__manager.get_worker_count()
+        depth, mean_residence_time, idle_fraction = self.__sample(worker_count)
+        since_scale = now - self.__last_scale_time
+
+        is_backed_up = depth >= self.__policy.scale_up_depth or (
+            mean_residence_time is not None
+            and mean_residence_time >= self.__policy.scale_up_residence
+        )
+        is_idle = depth == 0 and (
+            idle_fraction is None or idle_fraction >= self.__policy.scale_down_idle
+        )
+
+        target_count = worker_count
+        if worker_count < self.__policy.min_workers:
+            target_count = self.__policy.min_workers
+        elif worker_count > self.__policy.max_workers:
+            target_count = self.__policy.max_workers
+        elif is_backed_up and since_scale >= self.__policy.cooldown_up:
+            target_count = min(worker_count + 1, self.__policy.max_workers)
+        elif is_idle and since_scale >= self.__policy.cooldown_down:
+            target_count = max(worker_count - 1, self.__policy.min_workers)
+
+        if target_count == worker_count:
+            return True
+
+        self.__last_scale_time = now
+        self.__local_logger.info(
+            f"Scaling from {worker_count} to {target_count} workers, depth: {depth}", True
+        )
+
+        return self.__manager.scale_to(target_count)
@@ -0,0 +1,220 @@
+"""
+What producers do when the queue is full.
+"""
+
+import ctypes
+import enum
+import multiprocessing as mp
+import queue
+
+
+class BackpressurePolicy(enum.Enum):
+    """
+    What `put()` does when the queue is full.
+
+    BLOCK: Wait for space.
+    DROP_NEWEST: Discard the item being put.
+    DROP_OLDEST: Discard the oldest items in the queue to make space.
+    SAMPLE: Only put every Nth item, waiting for space like BLOCK, and discard the rest.
+    """
+
+    BLOCK = 0
+    DROP_NEWEST = 1
+    DROP_OLDEST = 2
+    SAMPLE = 3
+
+
+class BackpressureQueue:
+    """
+    Applies a backpressure policy to every put into an underlying queue.
+
+    Drop counters are shared by every process using the queue.
+    """
+
+    def __init__(
+        self,
+        inner_queue: object,
+        policy: BackpressurePolicy,
+        sample_period: int,
+        context: "mp.context.BaseContext | None" = None,
+    ) -> None:
+        """
+        inner_queue: Queue with the `queue.Queue` surface.
+        policy: What to do when the queue is full.
+        sample_period: Put 1 of every this many items, only used by SAMPLE.
+        context: Creates the lock, the context of the workers using the queue, None for the
+            default context.
+        """
+        if sample_period <= 0:
+            raise ValueError(f"Backpressure requires sample_period > 0, got {sample_period}")
+
+        self.__inner_queue = inner_queue
+        self.__policy = policy
+        self.__sample_period = sample_period
+
+        if context is None:
+            context = mp.get_context()
+
+        self.__lock = context.Lock()
+        # Number of items dropped per policy
+        self.__dropped_counts = mp.RawArray(ctypes.c_int64, len(BackpressurePolicy))
+        # Number of items offered with SAMPLE, to choose which to keep
+        self.__offered_count = mp.RawValue(ctypes.c_int64, 0)
+
+    def __record_drop(self, policy: BackpressurePolicy, count: int) -> None:
+        """
+        Adds to the dropped count of the policy.
+        """
+        if count <= 0:
+            return
+
+        with self.__lock:
+            self.__dropped_counts[policy.value] += count
+
+    def __sample(self, items: "list[object]") -> "list[object]":
+        """
+        Returns the items to keep, recording the rest as dropped.
+        """
+        with self.__lock:
+            first_offered = self.__offered_count.value
+            self.__offered_count.value += len(items)
+
+        kept_items = [
+            item
+            for index, item in enumerate(items, first_offered)
+            if index % self.__sample_period == 0
+        ]
+        self.__record_drop(BackpressurePolicy.SAMPLE, len(items) - len(kept_items))
+
+        return kept_items
+
+    def __evict(self, count: int) -> None:
+        """
+        Discards up to count of the oldest items without blocking.
+        """
+        evicted_count = 0
+        try:
+            while evicted_count < count:
+                self.__inner_queue.get_nowait()
+                evicted_count += 1
+        except queue.Empty:
+            pass
+
+        self.__record_drop(BackpressurePolicy.DROP_OLDEST, evicted_count)
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts the item according to the policy.
+        Only BLOCK and SAMPLE block or raise `queue.Full` .
+        """
+        if self.__policy == BackpressurePolicy.SAMPLE:
+            if len(self.__sample([item])) == 0:
+                return
+
+        if self.__policy in (BackpressurePolicy.BLOCK, BackpressurePolicy.SAMPLE):
+            self.__inner_queue.put(item, block, timeout)
+            return
+
+        while True:
+            try:
+                self.__inner_queue.put_nowait(item)
+                return
+            except queue.Full:
+                if self.__policy == BackpressurePolicy.DROP_NEWEST:
+                    self.__record_drop(BackpressurePolicy.DROP_NEWEST, 1)
+                    return
+
+            # Another producer may take the space first, so try again
+            self.__evict(1)
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Gets an item.
+        """
+        return self.__inner_queue.get(block, timeout)
+
+    def put_many(self, items: "list[object]", timeout: "float | None" = None) -> int:
+        """
+        Puts the items according to the policy. Only for inner queues with `put_many()`.
+
+        Returns the number of items accepted, including dropped items except with BLOCK.
+        """
+        if self.__policy == BackpressurePolicy.BLOCK:
+            return self.__inner_queue.put_many(items, timeout)
+
+        if self.__policy == BackpressurePolicy.SAMPLE:
+            kept_items = self.__sample(items)
+            put_count = self.__inner_queue.put_many(kept_items, timeout)
+            return len(items) - len(kept_items) + put_count
+
+        put_count = self.__inner_queue.put_many(items, 0.0)
+        if self.__policy == BackpressurePolicy.DROP_NEWEST:
+            self.__record_drop(BackpressurePolicy.DROP_NEWEST, len(items) - put_count)
+            return len(items)
+
+        while put_count < len(items):
+            self.__evict(len(items) - put_count)
+            put_count += self.__inner_queue.put_many(items[put_count:], 0.0)
+
+        return put_count
+
+    def get_many(self, max_items: int = 0, timeout: "float | None" = None) -> "list[object]":
+        """
+        Gets available items. Only for inner queues with `get_many()`.
+        """
+        return self.__inner_queue.get_many(max_items, timeout)
+
+    def dropped_counts(self) -> "dict[BackpressurePolicy, int]":
+        """
+        Returns the number of items dropped by each policy that drops.
+        """
+        with self.__lock:
+            dropped_counts = list(self.__dropped_counts)
+
+        return {
+            policy: dropped_counts[policy.value]
+            for policy in BackpressurePolicy
+            if policy != BackpressurePolicy.BLOCK
+        }
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Puts the item according to the policy without blocking.
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Gets an item without blocking, raises `queue.Empty` if there is none.
+        """
+        return self.get(False)
+
+    def qsize(self) -> int:
+        """
+        Returns the approximate number of items in the queue.
+        """
+        return self.__inner_queue.qsize()
+
+    def empty(self) -> bool:
+        """
+        Returns whether the queue is approximately empty.
+        """
+        return self.__inner_queue.empty()
+
+    def full(self) -> bool:
+        """
+        Returns whether the queue is approximately full.
+        """
+        return self.__inner_queue.full()
+
+    def close(self) -> None:
+        """
+        Closes the inner queue.
+        """
+        self.__inner_queue.close()
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the inner queue is closed.
+        """
+        return self.__inner_queue.is_closed()
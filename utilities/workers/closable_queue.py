@@ -0,0 +1,129 @@
+"""
+Close protocol for queues.
+"""
+
+import ctypes
+import multiprocessing as mp
+import queue
+
+
+class Closed(Exception):
+    """
+    Raised by `put()` and `get()` once the queue is closed, including calls that were blocked
+    when it was closed.
+    """
+
+
+class _ClosedSentinel:
+    """
+    Put into a closed manager queue to wake blocked consumers.
+    """
+
+
+class ClosableManagerQueue:
+    """
+    Adds the close protocol to a manager queue proxy.
+
+    The manager cannot interrupt a blocked call, so close() drains the queue to wake blocked
+    producers and then puts a sentinel that every consumer passes on to the next.
+    """
+
+    def __init__(self, inner_queue: object) -> None:
+        """
+        inner_queue: Manager queue proxy.
+        """
+        self.__inner_queue = inner_queue
+        self.__is_closed = mp.RawValue(ctypes.c_bool, False)
+
+    def __pass_on_sentinel(self) -> None:
+        """
+        Puts the sentinel back for the next consumer, if there is space.
+        """
+        try:
+            self.__inner_queue.put_nowait(_ClosedSentinel())
+        except queue.Full:
+            pass
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts the item, raises `Closed` if the queue is or becomes closed.
+        """
+        if self.__is_closed.value:
+            raise Closed
+
+        self.__inner_queue.put(item, block, timeout)
+
+        # Woken by close()
+        if self.__is_closed.value:
+            raise Closed
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Gets an item, raises `Closed` if the queue is or becomes closed.
+        """
+        if self.__is_closed.value:
+            raise Closed
+
+        item = self.__inner_queue.get(block, timeout)
+        if isinstance(item, _ClosedSentinel):
+            self.__pass_on_sentinel()
+            raise Closed
+
+        if self.__is_closed.value:
+            raise Closed
+
+        return item
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Puts the item without blocking, raises `queue.Full` if there is no space.
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Gets an item without blocking, raises `queue.Empty` if there is none.
+        """
+        return self.get(False)
+
+    def qsize(self) -> int:
+        """
+        Returns the approximate number of items in the queue.
+        """
+        return self.__inner_queue.qsize()
+
+    def empty(self) -> bool:
+        """
+        Returns whether the queue is approximately empty.
+        """
+        return self.__inner_queue.empty()
+
+    def full(self) -> bool:
+        """
+        Returns whether the queue is approximately full.
+        """
+        return self.__inner_queue.full()
+
+    def close(self) -> None:
+        """
+        Closes the queue, discarding its items. Does nothing if already closed.
+        """
+        if self.__is_closed.value:
+            return
+
+        self.__is_closed.value = True
+
+        # Producers woken by the drain see the flag and do not put again
+        try:
+            while True:
+                self.__inner_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+        self.__pass_on_sentinel()
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the queue is closed.
+        """
+        return self.__is_closed.value
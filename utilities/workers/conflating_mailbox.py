@@ -0,0 +1,220 @@
+"""
+Mailbox that only keeps the latest item.
+"""
+
+import ctypes
+import multiprocessing as mp
+import multiprocessing.shared_memory
+import queue
+import struct
+
+from . import closable_queue
+from . import shared_memory_queue
+
+
+class ConflatingMailbox:
+    """
+    Single slot in shared memory where every put replaces the previous item.
+
+    Has the same `put()`/`get()` surface as `queue.Queue`, but `put()` never blocks: an item that
+    has not been taken yet is overwritten and counted as dropped. For control loop data where only
+    the newest sample matters, so a slow consumer never steers on stale samples and never stalls
+    the producer.
+    """
+
+    # Number of items put, sequence number of the last item taken, number of items dropped
+    __HEADER_FORMAT = struct.Struct("=QQQ")
+    __SLOT_OFFSET = __HEADER_FORMAT.size
+
+    def __init__(
+        self,
+        slot_size: int = shared_memory_queue.DEFAULT_SLOT_SIZE,
+        context: "mp.context.BaseContext | None" = None,
+    ) -> None:
+        """
+        slot_size: Largest encoded item in bytes, must be greater than 0 .
+        context: Creates the condition, the context of the workers using the mailbox, None for the
+            default context.
+        """
+        if slot_size <= 0:
+            raise ValueError(f"Conflating mailbox requires slot_size > 0, got {slot_size}")
+
+        self.maxsize = 1
+        self.__slot_size = slot_size
+
+        self.__shared_memory = multiprocessing.shared_memory.SharedMemory(
+            create=True,
+            size=self.__SLOT_OFFSET + shared_memory_queue.SLOT_HEADER_FORMAT.size + slot_size,
+        )
+        self.__HEADER_FORMAT.pack_into(self.__shared_memory.buf, 0, 0, 0, 0)
+
+        if context is None:
+            context = mp.get_context()
+
+        self.__condition = context.Condition(context.Lock())
+        self.__is_closed = mp.RawValue(ctypes.c_bool, False)
+
+    def __read_header(self) -> "tuple[int, int, int]":
+        """
+        Returns the put count, last taken sequence number, and dropped count.
+        """
+        return self.__HEADER_FORMAT.unpack_from(self.__shared_memory.buf, 0)
+
+    def __has_new_item(self) -> bool:
+        """
+        Returns whether there is an item that has not been taken. Caller must hold the lock.
+        """
+        sequence, taken_sequence, _ = self.__read_header()
+        return sequence > taken_sequence
+
+    def __has_new_item_or_closed(self) -> bool:
+        """
+        Returns whether a get can return without waiting. Caller must hold the lock.
+        """
+        return self.__is_closed.value or self.__has_new_item()
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Replaces the item in the mailbox, never blocks. Raises `closable_queue.Closed` if closed.
+
+        block: Unused, for compatibility with `queue.Queue` .
+        timeout: Unused, for compatibility with `queue.Queue` .
+        """
+        # Compatibility arguments
+        _ = block
+        _ = timeout
+
+        payload_kind, payload = shared_memory_queue.encode_item(item, self.__slot_size)
+
+        buffer = self.__shared_memory.buf
+        with self.__condition:
+            if self.__is_closed.value:
+                raise closable_queue.Closed
+
+            sequence, taken_sequence, dropped_count = self.__read_header()
+            if sequence > taken_sequence:
+                dropped_count += 1
+
+            offset = self.__SLOT_OFFSET
+            shared_memory_queue.SLOT_HEADER_FORMAT.pack_into(
+                buffer, offset, len(payload), payload_kind
+            )
+            offset += shared_memory_queue.SLOT_HEADER_FORMAT.size
+            buffer[offset : offset + len(payload)] = payload
+
+            self.__HEADER_FORMAT.pack_into(buffer, 0, sequence + 1, taken_sequence, dropped_count)
+            self.__condition.notify_all()
+
+    def get_with_sequence(
+        self, block: bool = True, timeout: "float | None" = None
+    ) -> "tuple[int, object]":
+        """
+        Takes the latest item, which is then gone until the next put.
+
+        block: Whether to wait for an item.
+        timeout: Time waiting in seconds before raising `queue.Empty`, None waits forever.
+
+        Raises `closable_queue.Closed` if closed, including while waiting.
+
+        Returns the sequence number of the item (starting at 1) and the item.
+        The difference from the previous sequence number is how many items were skipped.
+        """
+        buffer = self.__shared_memory.buf
+        with self.__condition:
+            if not self.__condition.wait_for(
+                self.__has_new_item_or_closed, timeout if block else 0.0
+            ):
+                raise queue.Empty
+
+            if self.__is_closed.value:
+                raise closable_queue.Closed
+
+            sequence, _, dropped_count = self.__read_header()
+
+            offset = self.__SLOT_OFFSET
+            length, payload_kind = shared_memory_queue.SLOT_HEADER_FORMAT.unpack_from(
+                buffer, offset
+            )
+            offset += shared_memory_queue.SLOT_HEADER_FORMAT.size
+            payload = bytes(buffer[offset : offset + length])
+
+            self.__HEADER_FORMAT.pack_into(buffer, 0, sequence, sequence, dropped_count)
+
+        return sequence, shared_memory_queue.decode_item(payload_kind, payload)
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Takes the latest item, which is then gone until the next put.
+
+        block: Whether to wait for an item.
+        timeout: Time waiting in seconds before raising `queue.Empty`, None waits forever.
+        """
+        _, item = self.get_with_sequence(block, timeout)
+        return item
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Replaces the item in the mailbox.
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Takes the latest item without blocking, raises `queue.Empty` if there is none.
+        """
+        return self.get(False)
+
+    def sequence(self) -> int:
+        """
+        Returns the sequence number of the latest item put, which is the total number of puts.
+        """
+        sequence, _, _ = self.__read_header()
+        return sequence
+
+    def dropped_count(self) -> int:
+        """
+        Returns the number of items overwritten before they were taken.
+        """
+        _, _, dropped_count = self.__read_header()
+        return dropped_count
+
+    def qsize(self) -> int:
+        """
+        Returns 1 if there is an item that has not been taken, otherwise 0 .
+        """
+        sequence, taken_sequence, _ = self.__read_header()
+        return 1 if sequence > taken_sequence else 0
+
+    def empty(self) -> bool:
+        """
+        Returns whether there is no item to take.
+        """
+        return self.qsize() == 0
+
+    def full(self) -> bool:
+        """
+        Always False since a put never blocks.
+        """
+        return False
+
+    def close(self) -> None:
+        """
+        Closes the mailbox, discarding its item. Does nothing if already closed.
+        """
+        with self.__condition:
+            self.__is_closed.value = True
+            self.__condition.notify_all()
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the mailbox is closed.
+        """
+        return self.__is_closed.value
+
+    def unlink(self) -> None:
+        """
+        Frees the shared memory. Only the process that created the mailbox should call this,
+        after all other processes are done with it.
+        """
+        self.__shared_memory.close()
+        self.__shared_memory.unlink()
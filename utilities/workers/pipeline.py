@@ -0,0 +1,741 @@
+"""
+Worker pools and the queues between them, built from a configuration.
+"""
+
+import importlib
+import multiprocessing as mp
+import multiprocessing.managers
+
+from modules.common.modules.logger import logger
+from utilities import mavlink_router
+from utilities import mavlink_sender
+from utilities.workers import backpressure_queue
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shared_memory_queue
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+from utilities.workers import worker_restart  # pylint: disable=unused-import
+from utilities.workers import worker_scheduling
+
+
+# Default of each setting that can be left out
+QUEUE_DEFAULTS = {
+    "backend": "MANAGER",
+    "max_size": 0,
+    "slot_size": shared_memory_queue.DEFAULT_SLOT_SIZE,
+    "instrumented": False,
+    "backpressure": "BLOCK",
+    "sample_period": 1,
+}
+STAGE_DEFAULTS = {
+    "args": [],
+    "count": 1,
+    "spare_count": 0,
+    "input_queues": [],
+    "output_queues": [],
+    "executor": "PROCESS",
+    "cpus": None,
+    "nice": None,
+    "fifo_priority": None,
+    "subscribe": None,
+    "send": None,
+}
+# Types each setting may have, checked before the settings are used
+QUEUE_TYPES = {
+    "backend": (str,),
+    "max_size": (int,),
+    "slot_size": (int,),
+    "instrumented": (bool,),
+    "backpressure": (str,),
+    "sample_period": (int,),
+}
+STAGE_TYPES = {
+    "target": (str,),
+    "args": (list,),
+    "count": (int,),
+    "spare_count": (int,),
+    "input_queues": (list,),
+    "output_queues": (list,),
+    "executor": (str,),
+    "cpus": (list, type(None)),
+    "nice": (int, type(None)),
+    "fifo_priority": (int, type(None)),
+    "subscribe": (dict, type(None)),
+    "send": (str, type(None)),
+}
+# Work arguments starting with this are replaced with the resource of that name
+RESOURCE_PREFIX = "$"
+# Resources created by the pipeline for routing MAVLink messages, see utilities/mavlink_router.py
+# Every subscription, for the router stage
+SUBSCRIPTIONS_RESOURCE = "subscriptions"
+# A connection receiving the messages the stage subscribes to, sending through the sending
+# connection of the stage
+ROUTED_CONNECTION_RESOURCE = "routed_connection"
+# Resource created by the pipeline for sending MAVLink messages, see utilities/mavlink_sender.py
+# A connection submitting the messages the stage sends to its send queue
+SENDING_CONNECTION_RESOURCE = "sending_connection"
+# Resource only usable by threads of main: it cannot be pickled, and a forked copy of its socket
+# bypasses the sender and the reconnects of main. Routed and sending connections are pickled
+# without it, so worker processes of any start method get those.
+CONNECTION_RESOURCE = "connection"
+
+
+def _get_consumed_queues(definition: "dict[str, object]") -> "list[str]":
+    """
+    Returns the input queues of the stage, including the queue it subscribes to.
+    """
+    if definition["subscribe"] is None:
+        return definition["input_queues"]
+
+    return definition["input_queues"] + [definition["subscribe"]["queue"]]
+
+
+def _get_produced_queues(definition: "dict[str, object]") -> "list[str]":
+    """
+    Returns the output queues of the stage, including the queues it routes or sends messages to.
+    """
+    if definition["send"] is None:
+        return definition["output_queues"] + definition["routed_queues"]
+
+    return definition["output_queues"] + definition["routed_queues"] + [definition["send"]]
+
+
+def _apply_defaults(
+    kind: str,
+    name: str,
+    definition: object,
+    defaults: "dict[str, object]",
+    required: "list[str]",
+    types: "dict[str, tuple[type, ...]]",
+) -> "tuple[bool, dict[str, object] | str]":
+    """
+    Fills in the settings left out, and checks the type of each setting.
+
+    Returns the settings, or the reason they are invalid.
+    """
+    if not isinstance(definition, dict):
+        return False, f"{kind} {name} must be a mapping"
+
+    for key in definition:
+        if key not in defaults and key not in required:
+            return False, f"{kind} {name} has unknown setting {key}"
+
+    for key in required:
+        if key not in definition:
+            return False, f"{kind} {name} is missing setting {key}"
+
+    settings = {**defaults, **definition}
+    for key, setting_types in types.items():
+        value = settings[key]
+        # YAML true and false are bool, which is an int
+        if not isinstance(value, setting_types) or (
+            isinstance(value, bool) and bool not in setting_types
+        ):
+            type_names = " or ".join(
+                "None" if setting_type is type(None) else setting_type.__name__
+                for setting_type in setting_types
+            )
+            return False, f"{kind} {name} setting {key} must be {type_names}, got {value!r}"
+
+    return True, settings
+
+
+class Pipeline:
+    """
+    Queues and worker pools described by stage definitions, so worker counts, queue kinds and
+    sizes are tuned in the configuration instead of the code.
+
+    Configuration:
+    ```
+    queues:
+      <name>: {backend, max_size, slot_size, instrumented, backpressure, sample_period}
+    main_input_queues: [<queue names read by main>]
+    stages:
+      <name>:
+        target: <module>.<function>
+        args: [<work arguments, "$<resource>" for objects created by main>]
+        {count, spare_count, input_queues, output_queues, executor, cpus, nice, fifo_priority}
+        subscribe: {queue: <queue name>, message_types: [<MAVLink message types>]}
+        send: <queue name>
+    ```
+    Enum settings are member names, such as `SHARED_MEMORY` or `THREAD` .
+
+    A stage that subscribes receives the messages of its types from the single stage with
+    "$subscriptions" in its args, such as the MAVLink router, through "$routed_connection" .
+    A stage that sends submits its messages through "$sending_connection" to its send queue, read
+    by a single stage such as the MAVLink sender.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        config: "dict[str, object]",
+        resources: "dict[str, object]",
+        controller: worker_controller.WorkerController,
+        mp_manager: multiprocessing.managers.SyncManager,
+        local_logger: logger.Logger,
+        restart_policy: "worker_restart.RestartPolicy | None" = None,
+        start_method: "str | None" = None,
+    ) -> "tuple[bool, Pipeline | None]":
+        """
+        Validates the stage graph, then creates the queues and the workers of every stage.
+
+        config: Pipeline section of the configuration.
+        resources: Objects work arguments can refer to by name, such as the connection.
+        controller: Worker controller of every stage.
+        mp_manager: Manager for queue proxies.
+        local_logger: Existing logger from process.
+        restart_policy: Limits on restarting dead workers of every stage.
+        start_method: How worker processes of every stage are started, None for the default.
+            Queues are created with its context. Forkserver keeps workers started after the
+            threads of main from inheriting its locks and sockets.
+
+        Returns whether the pipeline was able to be created and the Pipeline.
+        """
+        result, definitions = cls.__parse(config, resources, start_method)
+        if not result:
+            local_logger.error(f"Invalid pipeline: {definitions}", True)
+            return False, None
+
+        queue_definitions, stage_definitions, main_input_queue_names, stage_order = definitions
+
+        queues = {}
+        try:
+            for name, definition in queue_definitions.items():
+                queues[name] = queue_proxy_wrapper.QueueProxyWrapper(
+                    mp_manager,
+                    definition["max_size"],
+                    queue_proxy_wrapper.QueueBackend[definition["backend"]],
+                    definition["slot_size"],
+                    definition["instrumented"],
+                    backpressure_queue.BackpressurePolicy[definition["backpressure"]],
+                    definition["sample_period"],
+                    mp.get_context(start_method),
+                )
+        except ValueError as e:
+            local_logger.error(f"Failed to create queue {name}: {e}", True)
+            for created_queue in queues.values():
+                created_queue.release()
+
+            return False, None
+
+        work_arguments = Pipeline.__replace_routing_resources(
+            stage_definitions, stage_order, queues, resources, controller
+        )
+
+        managers = {}
+        for name in stage_order:
+            definition = stage_definitions[name]
+            result, worker_properties = worker_manager.WorkerProperties.create(
+                count=definition["count"],
+                target=definition["target"],
+                work_arguments=work_arguments[name],
+                input_queues=[queues[queue_name] for queue_name in definition["input_queues"]],
+                output_queues=[queues[queue_name] for queue_name in definition["output_queues"]],
+                controller=controller,
+                local_logger=local_logger,
+                restart_policy=restart_policy,
+                start_method=start_method,
+                executor_kind=worker_manager.ExecutorKind[definition["executor"]],
+                scheduling_policy=definition["scheduling_policy"],
+            )
+            if result:
+                # Get Pylance to stop complaining
+                assert worker_properties is not None
+
+                result, managers[name] = worker_manager.WorkerManager.create(
+                    worker_properties=worker_properties,
+                    local_logger=local_logger,
+                    spare_count=definition["spare_count"],
+                )
+
+            if not result:
+                local_logger.error(f"Failed to create workers of stage {name}", True)
+                for created_queue in queues.values():
+                    created_queue.release()
+
+                return False, None
+
+        return True, Pipeline(
+            cls.__create_key,
+            queues,
+            managers,
+            [queues[queue_name] for queue_name in main_input_queue_names],
+        )
+
+    @staticmethod
+    def __replace_routing_resources(
+        stage_definitions: "dict[str, dict[str, object]]",
+        stage_order: "list[str]",
+        queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]",
+        resources: "dict[str, object]",
+        controller: worker_controller.WorkerController,
+    ) -> "dict[str, tuple]":
+        """
+        Creates the subscription and routed connection of each subscribing stage, and the
+        sending connection of each sending stage.
+
+        Returns the work arguments of each stage, with the routing resources replaced.
+        """
+        sending_connections = {}
+        for name in stage_order:
+            send_queue_name = stage_definitions[name]["send"]
+            if send_queue_name is not None and CONNECTION_RESOURCE in resources:
+                sending_connections[name] = mavlink_sender.SendingConnection(
+                    resources[CONNECTION_RESOURCE], queues[send_queue_name]
+                )
+
+        subscriptions = []
+        routed_connections = {}
+        for name in stage_order:
+            subscribe = stage_definitions[name]["subscribe"]
+            if subscribe is None:
+                continue
+
+            subscription = mavlink_router.Subscription(
+                subscribe["message_types"], queues[subscribe["queue"]]
+            )
+            subscriptions.append(subscription)
+            if CONNECTION_RESOURCE in resources:
+                # Sends of the stage go to its send queue, never to the connection
+                routed_connections[name] = mavlink_router.RoutedConnection(
+                    resources[CONNECTION_RESOURCE],
+                    subscription,
+                    controller,
+                    sending_connections.get(name),
+                )
+
+        work_arguments = {}
+        for name in stage_order:
+            args = []
+            for arg in stage_definitions[name]["args"]:
+                if arg == RESOURCE_PREFIX + SUBSCRIPTIONS_RESOURCE:
+                    arg = subscriptions
+                elif arg == RESOURCE_PREFIX + ROUTED_CONNECTION_RESOURCE:
+                    arg = routed_connections[name]
+                elif arg == RESOURCE_PREFIX + SENDING_CONNECTION_RESOURCE:
+                    arg = sending_connections[name]
+
+                args.append(arg)
+
+            work_arguments[name] = tuple(args)
+
+        return work_arguments
+
+    @staticmethod
+    def __parse(
+        config: "dict[str, object]", resources: "dict[str, object]", start_method: "str | None"
+    ) -> "tuple[bool, tuple | str]":
+        """
+        Fills in defaults, imports targets, replaces resources, and checks the graph.
+
+        Returns the queue and stage definitions, the queues read by main, and the stage order,
+        or the reason the configuration is invalid.
+        """
+        queue_configs = config.get("queues", {})
+        stage_configs = config.get("stages", {})
+        main_input_queue_names = config.get("main_input_queues", [])
+        if not isinstance(queue_configs, dict) or not isinstance(stage_configs, dict):
+            return False, "queues and stages must be mappings"
+
+        if not isinstance(main_input_queue_names, list):
+            return False, "main_input_queues must be a list"
+
+        if start_method is not None and start_method not in mp.get_all_start_methods():
+            return False, f"Start method {start_method} is not available"
+
+        queue_definitions = {}
+        for name, queue_config in queue_configs.items():
+            result, definition = _apply_defaults(
+                "Queue", name, queue_config, QUEUE_DEFAULTS, [], QUEUE_TYPES
+            )
+            if not result:
+                return False, definition
+
+            if definition["backend"] not in queue_proxy_wrapper.QueueBackend.__members__:
+                return False, f"Queue {name} has unknown backend {definition['backend']}"
+
+            if definition["backpressure"] not in backpressure_queue.BackpressurePolicy.__members__:
+                return False, f"Queue {name} has unknown backpressure {definition['backpressure']}"
+
+            queue_definitions[name] = definition
+
+        stage_definitions = {}
+        for name, stage_config in stage_configs.items():
+            result, definition = _apply_defaults(
+                "Stage", name, stage_config, STAGE_DEFAULTS, ["target"], STAGE_TYPES
+            )
+            if not result:
+                return False, definition
+
+            module_name, _, function_name = definition["target"].rpartition(".")
+            try:
+                definition["target"] = getattr(importlib.import_module(module_name), function_name)
+            except (ImportError, AttributeError, ValueError):
+                return False, f"Stage {name} target {definition['target']} cannot be imported"
+
+            args = []
+            uses_connection = False
+            for arg in definition["args"]:
+                if isinstance(arg, str) and arg.startswith(RESOURCE_PREFIX):
+                    resource_name = arg[len(RESOURCE_PREFIX) :]
+                    if resource_name == CONNECTION_RESOURCE:
+                        uses_connection = True
+
+                    # Created with the queues, see __replace_routing_resources()
+                    if resource_name in [
+                        SUBSCRIPTIONS_RESOURCE,
+                        ROUTED_CONNECTION_RESOURCE,
+                        SENDING_CONNECTION_RESOURCE,
+                    ]:
+                        args.append(arg)
+                        continue
+
+                    if resource_name not in resources:
+                        return False, f"Stage {name} uses unknown resource {resource_name}"
+
+                    arg = resources[resource_name]
+
+                args.append(arg)
+
+            definition["args"] = args
+
+            if definition["count"] <= 0 or definition["spare_count"] < 0:
+                return False, f"Stage {name} requires count > 0 and spare_count >= 0"
+
+            if definition["executor"] not in worker_manager.ExecutorKind.__members__:
+                return False, f"Stage {name} has unknown executor {definition['executor']}"
+
+            if (
+                definition["executor"] == worker_manager.ExecutorKind.PROCESS.name
+                and uses_connection
+            ):
+                return (
+                    False,
+                    f"Stage {name} gets {CONNECTION_RESOURCE}, which only threads of main can use, "
+                    "run it as THREAD",
+                )
+
+            definition["scheduling_policy"] = None
+            if any(definition[key] is not None for key in ["cpus", "nice", "fifo_priority"]):
+                try:
+                    definition["scheduling_policy"] = worker_scheduling.SchedulingPolicy(
+                        None if definition["cpus"] is None else set(definition["cpus"]),
+                        definition["nice"],
+                        definition["fifo_priority"],
+                    )
+                except ValueError as e:
+                    return False, f"Stage {name} has invalid scheduling: {e}"
+
+            for queue_name in definition["input_queues"] + definition["output_queues"]:
+                if not isinstance(queue_name, str) or queue_name not in queue_definitions:
+                    return False, f"Stage {name} uses unknown queue {queue_name}"
+
+            stage_definitions[name] = definition
+
+        for queue_name in main_input_queue_names:
+            if not isinstance(queue_name, str) or queue_name not in queue_definitions:
+                return False, f"Main uses unknown queue {queue_name}"
+
+        result, reason = Pipeline.__parse_subscriptions(
+            queue_definitions, stage_definitions, resources
+        )
+        if not result:
+            return False, reason
+
+        result, reason = Pipeline.__parse_sends(queue_definitions, stage_definitions, resources)
+        if not result:
+            return False, reason
+
+        result, reason = Pipeline.__check_queue_sizes(
+            queue_definitions, stage_definitions, main_input_queue_names
+        )
+        if not result:
+            return False, reason
+
+        result, stage_order = Pipeline.__order_stages(stage_definitions)
+        if not result:
+            return False, stage_order
+
+        return True, (queue_definitions, stage_definitions, main_input_queue_names, stage_order)
+
+    @staticmethod
+    def __parse_subscriptions(
+        queue_definitions: "dict[str, dict[str, object]]",
+        stage_definitions: "dict[str, dict[str, object]]",
+        resources: "dict[str, object]",
+    ) -> "tuple[bool, str | None]":
+        """
+        Checks the subscriptions and the routing resources, and records the queues routed to by
+        the router stage.
+
+        Returns the reason if the subscriptions are invalid.
+        """
+        subscribed_queue_names = []
+        router_names = []
+        for name, definition in stage_definitions.items():
+            definition["routed_queues"] = []
+            subscribe = definition["subscribe"]
+            uses_routed_connection = RESOURCE_PREFIX + ROUTED_CONNECTION_RESOURCE in [
+                arg for arg in definition["args"] if isinstance(arg, str)
+            ]
+            if RESOURCE_PREFIX + SUBSCRIPTIONS_RESOURCE in [
+                arg for arg in definition["args"] if isinstance(arg, str)
+            ]:
+                router_names.append(name)
+
+            if subscribe is None:
+                if uses_routed_connection:
+                    return (
+                        False,
+                        f"Stage {name} uses {ROUTED_CONNECTION_RESOURCE} without subscribe",
+                    )
+
+                continue
+
+            # A mapping, see STAGE_TYPES
+            if (
+                set(subscribe) != {"queue", "message_types"}
+                or not isinstance(subscribe["queue"], str)
+                or not isinstance(subscribe["message_types"], list)
+                or len(subscribe["message_types"]) == 0
+                or not all(
+                    isinstance(message_type, str) for message_type in subscribe["message_types"]
+                )
+            ):
+                return False, f"Stage {name} subscribe requires a queue and message_types"
+
+            if subscribe["queue"] not in queue_definitions:
+                return False, f"Stage {name} subscribes to unknown queue {subscribe['queue']}"
+
+            if subscribe["queue"] in subscribed_queue_names:
+                return False, f"Stage {name} subscribes to queue {subscribe['queue']} of another"
+
+            if uses_routed_connection and CONNECTION_RESOURCE not in resources:
+                return False, f"Stage {name} uses {ROUTED_CONNECTION_RESOURCE} without connection"
+
+            subscribed_queue_names.append(subscribe["queue"])
+
+        if len(router_names) > 1:
+            return False, f"Stages {', '.join(router_names)} all route, only one may"
+
+        if len(router_names) == 1:
+            router_definition = stage_definitions[router_names[0]]
+            # A second router would take messages from the first
+            if router_definition["count"] != 1 or router_definition["spare_count"] != 0:
+                return (
+                    False,
+                    f"Stage {router_names[0]} routes, so it requires count 1 and no spares",
+                )
+
+            router_definition["routed_queues"] = subscribed_queue_names
+        elif len(subscribed_queue_names) > 0:
+            return False, f"Stages subscribe but no stage has ${SUBSCRIPTIONS_RESOURCE} in its args"
+
+        return True, None
+
+    @staticmethod
+    def __parse_sends(
+        queue_definitions: "dict[str, dict[str, object]]",
+        stage_definitions: "dict[str, dict[str, object]]",
+        resources: "dict[str, object]",
+    ) -> "tuple[bool, str | None]":
+        """
+        Checks the send queues and the sending connections.
+
+        Returns the reason if the sends are invalid.
+        """
+        send_queue_names = set()
+        for name, definition in stage_definitions.items():
+            send_queue_name = definition["send"]
+            uses_sending_connection = RESOURCE_PREFIX + SENDING_CONNECTION_RESOURCE in [
+                arg for arg in definition["args"] if isinstance(arg, str)
+            ]
+            if send_queue_name is None:
+                if uses_sending_connection:
+                    return False, f"Stage {name} uses {SENDING_CONNECTION_RESOURCE} without send"
+
+                continue
+
+            if send_queue_name not in queue_definitions:
+                return False, f"Stage {name} sends to unknown queue {send_queue_name}"
+
+            if uses_sending_connection and CONNECTION_RESOURCE not in resources:
+                return False, f"Stage {name} uses {SENDING_CONNECTION_RESOURCE} without connection"
+
+            send_queue_names.add(send_queue_name)
+
+        for send_queue_name in send_queue_names:
+            writer_names = [
+                name
+                for name, definition in stage_definitions.items()
+                if send_queue_name in definition["input_queues"]
+            ]
+            if len(writer_names) != 1:
+                return False, f"Send queue {send_queue_name} requires a single stage reading it"
+
+            writer_definition = stage_definitions[writer_names[0]]
+            # A second writer would interleave its writes with the first
+            if writer_definition["count"] != 1 or writer_definition["spare_count"] != 0:
+                return (
+                    False,
+                    f"Stage {writer_names[0]} writes sends, so it requires count 1 and no spares",
+                )
+
+        return True, None
+
+    @staticmethod
+    def __check_queue_sizes(
+        queue_definitions: "dict[str, dict[str, object]]",
+        stage_definitions: "dict[str, dict[str, object]]",
+        main_input_queue_names: "list[str]",
+    ) -> "tuple[bool, str | None]":
+        """
+        Every queue needs a producer and a consumer, and bounded queues need a max size of at
+        least the larger of the producer and consumer counts.
+
+        Returns the reason if a queue is invalid.
+        """
+        producer_counts = {name: 0 for name in queue_definitions}
+        consumer_counts = {name: 0 for name in queue_definitions}
+        for definition in stage_definitions.values():
+            for queue_name in _get_produced_queues(definition):
+                producer_counts[queue_name] += definition["count"]
+
+            for queue_name in _get_consumed_queues(definition):
+                consumer_counts[queue_name] += definition["count"]
+
+        for queue_name in main_input_queue_names:
+            consumer_counts[queue_name] += 1
+
+        for name, definition in queue_definitions.items():
+            if producer_counts[name] == 0 or consumer_counts[name] == 0:
+                return False, f"Queue {name} is orphaned, it needs a producer and a consumer"
+
+            # Conflating queues hold a single item however many use them
+            if definition["backend"] == queue_proxy_wrapper.QueueBackend.CONFLATING.name:
+                continue
+
+            required_size = max(producer_counts[name], consumer_counts[name])
+            if 0 < definition["max_size"] < required_size:
+                return False, f"Queue {name} requires max_size >= {required_size}"
+
+        return True, None
+
+    @staticmethod
+    def __order_stages(
+        stage_definitions: "dict[str, dict[str, object]]",
+    ) -> "tuple[bool, list[str] | str]":
+        """
+        Orders the stages so every stage comes after the stages producing its input,
+        otherwise keeping the configuration order.
+
+        Returns the stage names, or the reason if the stages form a cycle.
+        """
+        producers = {}
+        for name, definition in stage_definitions.items():
+            for queue_name in _get_produced_queues(definition):
+                producers.setdefault(queue_name, set()).add(name)
+
+        dependencies = {
+            name: {
+                producer
+                for queue_name in _get_consumed_queues(definition)
+                for producer in producers.get(queue_name, set())
+                if producer != name
+            }
+            for name, definition in stage_definitions.items()
+        }
+
+        stage_order = []
+        while len(stage_order) < len(stage_definitions):
+            ready_names = [
+                name
+                for name in stage_definitions
+                if name not in stage_order and dependencies[name].issubset(stage_order)
+            ]
+            if len(ready_names) == 0:
+                remaining_names = [name for name in stage_definitions if name not in stage_order]
+                return False, f"Stages {', '.join(remaining_names)} form a cycle"
+
+            stage_order.append(ready_names[0])
+
+        return True, stage_order
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]",
+        managers: "dict[str, worker_manager.WorkerManager]",
+        main_input_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is Pipeline.__create_key, "Use create() method"
+
+        self.__queues = queues
+        self.__managers = managers
+        self.__main_input_queues = main_input_queues
+
+    def get_queue(self, name: str) -> "tuple[bool, queue_proxy_wrapper.QueueProxyWrapper | None]":
+        """
+        Returns the queue of the name, False if there is none.
+        """
+        if name not in self.__queues:
+            return False, None
+
+        return True, self.__queues[name]
+
+    def get_queues(self) -> "dict[str, queue_proxy_wrapper.QueueProxyWrapper]":
+        """
+        Returns every queue by name.
+        """
+        return self.__queues
+
+    def get_main_input_queues(self) -> "list[queue_proxy_wrapper.QueueProxyWrapper]":
+        """
+        Returns the queues read by main, in configuration order.
+        """
+        return self.__main_input_queues
+
+    def get_managers(self) -> "dict[str, worker_manager.WorkerManager]":
+        """
+        Returns the worker manager of every stage by name, in start order.
+        """
+        return self.__managers
+
+    def start(self) -> None:
+        """
+        Starts the workers, producers before the stages consuming their output.
+        """
+        for manager in self.__managers.values():
+            manager.start_workers()
+
+    def join(
+        self,
+        deadline: "float | None" = None,
+        escalation_timeout: float = 1.0,  # seconds
+    ) -> worker_manager.WorkerJoinReport:
+        """
+        Joins the workers of every stage together, closing their queues.
+        Workers still running at the deadline are terminated, see WorkerManager.join_all() .
+
+        deadline: time.monotonic() to start terminating workers at, None waits forever.
+        escalation_timeout: Time in seconds each of SIGTERM and SIGKILL is given to take effect.
+
+        Returns how each worker exited.
+        """
+        return worker_manager.WorkerManager.join_all(
+            list(self.__managers.values()), deadline, escalation_timeout
+        )
+
+    def release(self) -> None:
+        """
+        Frees resources held by the queues.
+        Only call from the process that created the pipeline, after joining.
+        """
+        for pipeline_queue in self.__queues.values():
+            pipeline_queue.release()
@@ -0,0 +1,164 @@
+"""
+Consumer side of several queues served by priority.
+"""
+
+import queue
+import time
+
+from . import closable_queue
+from . import queue_proxy_wrapper
+
+
+class PriorityLanes:
+    """
+    Serves items from several queues (lanes), always from the highest priority lane with items
+    first, except every `fairness_period`-th item, which is served from the lower lanes in turn.
+    So while a lower lane has items, it gets at least 1 of every
+    `fairness_period * (lane count - 1)` items served.
+
+    Producers put into the lanes as usual, so each lane keeps its own backend, capacity, and
+    backpressure policy. Instrument the lanes to measure latency per lane, see
+    QueueProxyWrapper.get_statistics() .
+
+    Fairness is counted per consumer process.
+    """
+
+    __QUEUE_WAIT_SLICE = 0.02  # seconds
+
+    def __init__(
+        self, lanes: "list[queue_proxy_wrapper.QueueProxyWrapper]", fairness_period: int
+    ) -> None:
+        """
+        lanes: Queues from highest to lowest priority.
+        fairness_period: Serve the lower lanes first every this many items, must be greater
+            than 0 .
+        """
+        if len(lanes) == 0:
+            raise ValueError("Priority lanes requires at least 1 lane")
+
+        if fairness_period <= 0:
+            raise ValueError(f"Priority lanes requires fairness_period > 0, got {fairness_period}")
+
+        self.lanes = lanes
+        self.__fairness_period = fairness_period
+        self.__served_count = 0
+        self.__served_counts = [0] * len(lanes)
+
+    def __service_order(self) -> "list[int]":
+        """
+        Returns the lane indices in the order to try for the next item.
+        """
+        order = list(range(len(self.lanes)))
+        if len(self.lanes) == 1 or self.__served_count % self.__fairness_period != (
+            self.__fairness_period - 1
+        ):
+            return order
+
+        # Take turns starting from each lower lane
+        first_lane = 1 + (self.__served_count // self.__fairness_period) % (len(self.lanes) - 1)
+        return [first_lane] + order[:first_lane] + order[first_lane + 1 :]
+
+    def __record_served(self, lane_index: int) -> None:
+        """
+        Counts an item served from the lane.
+        """
+        self.__served_count += 1
+        self.__served_counts[lane_index] += 1
+
+    def __take(self) -> "tuple[bool, int, object]":
+        """
+        Gets an item from the first lane in service order with one, without waiting.
+
+        Returns whether there was an item, its lane index, and the item.
+        """
+        for lane_index in self.__service_order():
+            try:
+                item = self.lanes[lane_index].queue.get_nowait()
+            except (queue.Empty, closable_queue.Closed):
+                continue
+
+            self.__record_served(lane_index)
+            return True, lane_index, item
+
+        return False, 0, None
+
+    def get(self, timeout: "float | None" = None) -> "tuple[int, object]":
+        """
+        Waits for an item from any lane. Waits on the highest priority open lane so its items
+        are served at once, and checks the other lanes between short waits.
+
+        timeout: Time waiting in seconds before raising `queue.Empty`, None waits forever.
+
+        Raises `closable_queue.Closed` if every lane is closed.
+
+        Returns the lane index and the item.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            result, lane_index, item = self.__take()
+            if result:
+                return lane_index, item
+
+            open_lane_indices = [
+                lane_index for lane_index, lane in enumerate(self.lanes) if not lane.is_closed()
+            ]
+            if len(open_lane_indices) == 0:
+                raise closable_queue.Closed
+
+            wait_time = self.__QUEUE_WAIT_SLICE
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0.0:
+                    raise queue.Empty
+
+                wait_time = min(remaining, wait_time)
+
+            lane_index = open_lane_indices[0]
+            try:
+                item = self.lanes[lane_index].queue.get(timeout=wait_time)
+            except (queue.Empty, closable_queue.Closed):
+                continue
+
+            self.__record_served(lane_index)
+            return lane_index, item
+
+    def get_many(
+        self, max_items: int = 0, timeout: "float | None" = None
+    ) -> "list[tuple[int, object]]":
+        """
+        Waits for an item, then gets every other available item without waiting, in service
+        order.
+
+        max_items: Most items to return, <= 0 for no limit.
+        timeout: Time waiting in seconds for the first item, None waits forever.
+
+        Raises `closable_queue.Closed` if every lane is closed.
+
+        Returns the lane index and item of each, empty if timed out.
+        """
+        try:
+            entries = [self.get(timeout)]
+        except queue.Empty:
+            return []
+
+        while max_items <= 0 or len(entries) < max_items:
+            result, lane_index, item = self.__take()
+            if not result:
+                break
+
+            entries.append((lane_index, item))
+
+        return entries
+
+    def served_counts(self) -> "list[int]":
+        """
+        Returns the number of items served from each lane by this consumer.
+        """
+        return list(self.__served_counts)
+
+    def close(self) -> None:
+        """
+        Closes every lane.
+        """
+        for lane in self.lanes:
+            lane.close()
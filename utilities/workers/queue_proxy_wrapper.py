@@ -2,59 +2,184 @@
 Queue.
 """
 
+import enum
 import multiprocessing.managers
 import queue
 import time
 
+from . import backpressure_queue
+from . import closable_queue
+from . import conflating_mailbox
+from . import queue_statistics
+from . import shared_memory_queue
+
+
+class QueueBackend(enum.Enum):
+    """
+    Storage behind the queue.
+
+    MANAGER: Queue proxy, every call is a round trip to the manager server process.
+    SHARED_MEMORY: Ring buffer in shared memory, requires `maxsize > 0` .
+    CONFLATING: Single slot in shared memory holding only the latest item, `put()` never blocks.
+    """
+
+    MANAGER = 0
+    SHARED_MEMORY = 1
+    CONFLATING = 2
+
 
 class QueueProxyWrapper:
     """
     Wrapper for an underlying queue proxy which also stores `maxsize`.
 
     `maxsize <= 0` means infinite size.
+
+    Once close() is called, blocked and later calls raise `closable_queue.Closed` .
     """
 
-    __QUEUE_TIMEOUT = 0.1  # seconds
-    __QUEUE_DELAY = 0.1  # seconds
+    def __init__(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        maxsize: int = 0,
+        backend: QueueBackend = QueueBackend.MANAGER,
+        slot_size: int = shared_memory_queue.DEFAULT_SLOT_SIZE,
+        instrumented: bool = False,
+        backpressure: backpressure_queue.BackpressurePolicy = (
+            backpressure_queue.BackpressurePolicy.BLOCK
+        ),
+        sample_period: int = 1,
+        context: "multiprocessing.context.BaseContext | None" = None,
+    ) -> None:
+        """
+        mp_manager: Manager for the queue proxy, only used by the manager backend.
+        maxsize: Maximum number of items, unused by the conflating backend.
+        backend: Storage behind the queue.
+        slot_size: Largest item in bytes after pickling, only used by the shared memory backends.
+            Instrumented queues add queue_statistics.ENQUEUE_TIME_HEADER.size bytes to `bytes`
+            items.
+        instrumented: Whether to record statistics, see get_statistics() .
+        backpressure: What producers do when the queue is full, see get_dropped_counts() .
+        sample_period: Put 1 of every this many items, only used by the SAMPLE policy.
+        context: Multiprocessing context of the workers using the queue, None for the default
+            context. Spawn and forkserver workers require locks created with their context.
+        """
+        if backend == QueueBackend.SHARED_MEMORY:
+            self.__backend_queue = shared_memory_queue.SharedMemoryQueue(
+                maxsize, slot_size, context
+            )
+        elif backend == QueueBackend.CONFLATING:
+            self.__backend_queue = conflating_mailbox.ConflatingMailbox(slot_size, context)
+        else:
+            self.__backend_queue = closable_queue.ClosableManagerQueue(mp_manager.Queue(maxsize))
+
+        self.__statistics = None
+        self.queue = self.__backend_queue
+        if instrumented:
+            capacity = 1 if backend == QueueBackend.CONFLATING else maxsize
+            self.__statistics = queue_statistics.QueueStatistics(capacity, context)
+            self.queue = queue_statistics.InstrumentedQueue(self.__backend_queue, self.__statistics)
+
+        # Outermost so only accepted items are recorded, and evictions are recorded as dequeues
+        self.__backpressure_queue = None
+        if backpressure != backpressure_queue.BackpressurePolicy.BLOCK:
+            self.__backpressure_queue = backpressure_queue.BackpressureQueue(
+                self.queue, backpressure, sample_period, context
+            )
+            self.queue = self.__backpressure_queue
 
-    def __init__(self, mp_manager: multiprocessing.managers.SyncManager, maxsize: int = 0) -> None:
-        self.queue = mp_manager.Queue(maxsize)
         self.maxsize = maxsize
+        self.backend = backend
+        self.backpressure = backpressure
 
-    def fill_queue_with_sentinel(self, timeout: float = 0.0) -> None:
+    def put_many(self, items: "list[object]", timeout: "float | None" = None) -> int:
         """
-        Fills the queue with sentinel (None).
+        Puts the items in order. With the shared memory backend, all items that fit are moved in
+        a single transaction, otherwise each item is put separately.
 
-        timeout: Time waiting before giving up, must be greater than 0 .
+        timeout: Total time waiting in seconds for space, None waits forever.
+
+        Returns the number of items put, the rest were not put because of the timeout.
         """
-        if timeout <= 0.0:
-            timeout = self.__QUEUE_TIMEOUT
+        if self.backend == QueueBackend.SHARED_MEMORY:
+            return self.queue.put_many(items, timeout)
 
+        deadline = None if timeout is None else time.monotonic() + timeout
+        put_count = 0
         try:
-            for _ in range(self.maxsize):
-                self.queue.put(None, timeout=timeout)
+            for item in items:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                self.queue.put(item, timeout=remaining)
+                put_count += 1
         except queue.Full:
-            return
+            pass
+
+        return put_count
 
-    def drain_queue(self, timeout: float = 0.0) -> None:
+    def get_many(self, max_items: int = 0, timeout: "float | None" = None) -> "list[object]":
         """
-        Drains the queue.
+        Waits for an item, then gets every other available item without waiting.
+        With the shared memory backend, the items are moved in a single transaction.
 
-        timeout: Time waiting in seconds before giving up, must be greater than 0 .
+        max_items: Most items to return, <= 0 for no limit.
+        timeout: Time waiting in seconds for the first item, None waits forever.
+
+        Returns the items in order, empty if timed out.
         """
-        if timeout <= 0.0:
-            timeout = self.__QUEUE_TIMEOUT
+        if self.backend == QueueBackend.SHARED_MEMORY:
+            return self.queue.get_many(max_items, timeout)
 
+        items = []
         try:
-            for _ in range(self.maxsize):
-                self.queue.get(timeout=timeout)
+            items.append(self.queue.get(timeout=timeout))
+            while max_items <= 0 or len(items) < max_items:
+                items.append(self.queue.get_nowait())
         except queue.Empty:
-            return
+            pass
+
+        return items
+
+    def get_statistics(self) -> "tuple[bool, queue_statistics.QueueStatisticsSnapshot | None]":
+        """
+        Statistics across all processes using the queue, can be called from any of them.
+
+        Returns False if the queue is not instrumented, otherwise the current statistics.
+        """
+        if self.__statistics is None:
+            return False, None
+
+        return True, self.__statistics.snapshot()
+
+    def get_dropped_counts(
+        self,
+    ) -> "tuple[bool, dict[backpressure_queue.BackpressurePolicy, int] | None]":
+        """
+        Drop counters across all processes using the queue, can be called from any of them.
+
+        Returns False if the policy is BLOCK, otherwise the number of items dropped per policy.
+        """
+        if self.__backpressure_queue is None:
+            return False, None
+
+        return True, self.__backpressure_queue.dropped_counts()
+
+    def close(self) -> None:
+        """
+        Closes the queue and discards its items. Every blocked producer and consumer wakes and
+        raises `closable_queue.Closed`, as does every later call.
+        Can be called from any process, does nothing if already closed.
+        """
+        self.queue.close()
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the queue is closed.
+        """
+        return self.queue.is_closed()
 
-    def fill_and_drain_queue(self) -> None:
+    def release(self) -> None:
         """
-        Fill with sentinel and then drain.
+        Frees resources held by the queue.
+        Only call from the process that created the queue, after all workers have been joined.
         """
-        self.fill_queue_with_sentinel()
-        time.sleep(self.__QUEUE_DELAY)
-        self.drain_queue()
+        if self.backend in (QueueBackend.SHARED_MEMORY, QueueBackend.CONFLATING):
+            self.__backend_queue.unlink()
@@ -0,0 +1,368 @@
+"""
+Queue instrumentation.
+"""
+
+import bisect
+import ctypes
+import multiprocessing as mp
+import queue
+import struct
+import time
+
+
+# Upper bounds in seconds of each histogram bucket, the last bucket has no upper bound
+HISTOGRAM_BUCKET_BOUNDS = (0.0001, 0.001, 0.01, 0.1, 1.0)
+
+# Enqueue time prefixed to `bytes` items by InstrumentedQueue, time.monotonic()
+ENQUEUE_TIME_HEADER = struct.Struct("<d")
+
+
+class QueueStatisticsSnapshot:  # pylint: disable=too-many-instance-attributes
+    """
+    Queue statistics at a point in time.
+    """
+
+    def __init__(
+        self,
+        timestamp: float,  # seconds, time.monotonic()
+        enqueued_count: int,
+        dequeued_count: int,
+        depth: int,
+        high_water_depth: int,
+        producer_blocked_count: int,
+        producer_blocked_time: float,  # seconds
+        consumer_wait_histogram: "list[int]",
+        consumer_wait_time: float,  # seconds
+        residence_histogram: "list[int]",
+        residence_time: float,  # seconds
+    ) -> None:
+        self.timestamp = timestamp
+        self.enqueued_count = enqueued_count
+        self.dequeued_count = dequeued_count
+        self.depth = depth
+        self.high_water_depth = high_water_depth
+        self.producer_blocked_count = producer_blocked_count
+        self.producer_blocked_time = producer_blocked_time
+        self.consumer_wait_histogram = consumer_wait_histogram
+        self.consumer_wait_time = consumer_wait_time
+        self.residence_histogram = residence_histogram
+        self.residence_time = residence_time
+
+    def mean_residence_time(self) -> float:
+        """
+        Returns the mean time in seconds items spent in the queue, 0 if none have been dequeued.
+        """
+        if self.dequeued_count == 0:
+            return 0.0
+
+        return self.residence_time / self.dequeued_count
+
+    def throughput_since(self, previous: "QueueStatisticsSnapshot") -> float:
+        """
+        Returns items dequeued per second between the previous snapshot and this one.
+        """
+        elapsed = self.timestamp - previous.timestamp
+        if elapsed <= 0.0:
+            return 0.0
+
+        return (self.dequeued_count - previous.dequeued_count) / elapsed
+
+    def __str__(self) -> str:
+        return (
+            f"enqueued: {self.enqueued_count}, "
+            f"dequeued: {self.dequeued_count}, "
+            f"depth: {self.depth}, "
+            f"high water depth: {self.high_water_depth}, "
+            f"producer blocked: {self.producer_blocked_count} times {self.producer_blocked_time:.3f} s, "
+            f"consumer wait: {self.consumer_wait_time:.3f} s {self.consumer_wait_histogram}, "
+            f"mean residence: {self.mean_residence_time() * 1000:.3f} ms {self.residence_histogram}"
+        )
+
+
+class QueueStatistics:
+    """
+    Counters shared by every process using a queue.
+
+    Histograms count observations per bucket of HISTOGRAM_BUCKET_BOUNDS . The consumer wait
+    histogram counts the gets that returned items, the consumer wait time includes timed out gets.
+    Depth is approximate since counters are updated just after each queue operation.
+    """
+
+    # Indices into the count array
+    __ENQUEUED = 0
+    __DEQUEUED = 1
+    __HIGH_WATER = 2
+    __PRODUCER_BLOCKED = 3
+    __CONSUMER_WAIT_HISTOGRAM = 4
+    __RESIDENCE_HISTOGRAM = __CONSUMER_WAIT_HISTOGRAM + len(HISTOGRAM_BUCKET_BOUNDS) + 1
+    __COUNT_LENGTH = __RESIDENCE_HISTOGRAM + len(HISTOGRAM_BUCKET_BOUNDS) + 1
+
+    # Indices into the time array
+    __PRODUCER_BLOCKED_TIME = 0
+    __CONSUMER_WAIT_TIME = 1
+    __RESIDENCE_TIME = 2
+    __TIME_LENGTH = 3
+
+    def __init__(self, maxsize: int, context: "mp.context.BaseContext | None" = None) -> None:
+        """
+        Constructor creates the shared counters.
+
+        maxsize: Capacity of the queue to bound the depth, <= 0 for unbounded.
+        context: Creates the lock, the context of the workers using the queue, None for the
+            default context.
+        """
+        if context is None:
+            context = mp.get_context()
+
+        self.__maxsize = maxsize
+        self.__lock = context.Lock()
+        self.__counts = mp.RawArray(ctypes.c_int64, self.__COUNT_LENGTH)
+        self.__times = mp.RawArray(ctypes.c_double, self.__TIME_LENGTH)
+
+    def __depth(self, enqueued_count: int, dequeued_count: int) -> int:
+        """
+        Returns the depth bounded by the capacity.
+        """
+        depth = max(0, enqueued_count - dequeued_count)
+        if self.__maxsize > 0:
+            depth = min(depth, self.__maxsize)
+
+        return depth
+
+    @staticmethod
+    def __bucket(duration: float) -> int:
+        """
+        Returns the histogram bucket of the duration.
+        """
+        return bisect.bisect_left(HISTOGRAM_BUCKET_BOUNDS, duration)
+
+    def record_enqueue(self, count: int, blocked_time: float) -> None:
+        """
+        Records items put into the queue.
+
+        count: Number of items.
+        blocked_time: Time in seconds the producer waited for space, 0 if it did not wait.
+        """
+        with self.__lock:
+            self.__counts[self.__ENQUEUED] += count
+            depth = self.__depth(self.__counts[self.__ENQUEUED], self.__counts[self.__DEQUEUED])
+            self.__counts[self.__HIGH_WATER] = max(self.__counts[self.__HIGH_WATER], depth)
+            if blocked_time > 0.0:
+                self.__counts[self.__PRODUCER_BLOCKED] += 1
+                self.__times[self.__PRODUCER_BLOCKED_TIME] += blocked_time
+
+    def record_dequeue(self, wait_time: float, residence_times: "list[float]") -> None:
+        """
+        Records a get from the queue.
+
+        wait_time: Time in seconds the consumer waited for an item, 0 if it did not wait.
+        residence_times: Time in seconds each item spent in the queue, empty if timed out.
+        """
+        with self.__lock:
+            # Idle time, but not a wait for an item, so polling in short waits such as
+            # WorkerController.wait_for_items() does not fill the histogram with the poll period
+            self.__times[self.__CONSUMER_WAIT_TIME] += wait_time
+            if len(residence_times) == 0:
+                return
+
+            self.__counts[self.__CONSUMER_WAIT_HISTOGRAM + self.__bucket(wait_time)] += 1
+            self.__counts[self.__DEQUEUED] += len(residence_times)
+            for residence_time in residence_times:
+                self.__counts[self.__RESIDENCE_HISTOGRAM + self.__bucket(residence_time)] += 1
+                self.__times[self.__RESIDENCE_TIME] += residence_time
+
+    def snapshot(self) -> QueueStatisticsSnapshot:
+        """
+        Returns a consistent copy of the counters.
+        """
+        with self.__lock:
+            counts = list(self.__counts)
+            times = list(self.__times)
+
+        histogram_length = len(HISTOGRAM_BUCKET_BOUNDS) + 1
+        return QueueStatisticsSnapshot(
+            time.monotonic(),
+            counts[self.__ENQUEUED],
+            counts[self.__DEQUEUED],
+            self.__depth(counts[self.__ENQUEUED], counts[self.__DEQUEUED]),
+            counts[self.__HIGH_WATER],
+            counts[self.__PRODUCER_BLOCKED],
+            times[self.__PRODUCER_BLOCKED_TIME],
+            counts[
+                self.__CONSUMER_WAIT_HISTOGRAM : self.__CONSUMER_WAIT_HISTOGRAM + histogram_length
+            ],
+            times[self.__CONSUMER_WAIT_TIME],
+            counts[self.__RESIDENCE_HISTOGRAM : self.__RESIDENCE_HISTOGRAM + histogram_length],
+            times[self.__RESIDENCE_TIME],
+        )
+
+
+class InstrumentedQueue:
+    """
+    Records statistics of every call to an underlying queue.
+
+    Items are stored with their enqueue time to measure residence time. `bytes` items get the
+    time as a fixed header of ENQUEUE_TIME_HEADER.size bytes, so they are still copied as is by
+    the shared memory backends, all other items are stored in a tuple with it.
+    """
+
+    def __init__(self, inner_queue: object, statistics: QueueStatistics) -> None:
+        """
+        inner_queue: Queue with the `queue.Queue` surface.
+        statistics: Where to record.
+        """
+        self.__inner_queue = inner_queue
+        self.__statistics = statistics
+
+    @staticmethod
+    def __to_entry(enqueue_time: float, item: object) -> object:
+        """
+        Returns the item stored with its enqueue time.
+        """
+        if isinstance(item, bytes):
+            return ENQUEUE_TIME_HEADER.pack(enqueue_time) + item
+
+        return (enqueue_time, item)
+
+    @staticmethod
+    def __from_entry(entry: object) -> "tuple[float, object]":
+        """
+        Returns the enqueue time and the item of the entry.
+        """
+        if isinstance(entry, bytes):
+            (enqueue_time,) = ENQUEUE_TIME_HEADER.unpack_from(entry)
+            return enqueue_time, entry[ENQUEUE_TIME_HEADER.size :]
+
+        return entry
+
+    def __record_dequeue(self, wait_time: float, entries: "list[object]") -> "list[object]":
+        """
+        Records the dequeued entries.
+
+        Returns the items of the entries.
+        """
+        now = time.monotonic()
+        timed_items = [InstrumentedQueue.__from_entry(entry) for entry in entries]
+        self.__statistics.record_dequeue(
+            wait_time,
+            [now - enqueue_time for enqueue_time, _ in timed_items],
+        )
+
+        return [item for _, item in timed_items]
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts the item, recording how long the producer was blocked.
+        """
+        try:
+            self.__inner_queue.put(InstrumentedQueue.__to_entry(time.monotonic(), item), False)
+            self.__statistics.record_enqueue(1, 0.0)
+            return
+        except queue.Full:
+            if not block:
+                raise
+
+        start_time = time.monotonic()
+        put_count = 0
+        try:
+            # Timestamp again so residence excludes the time blocked
+            self.__inner_queue.put(
+                InstrumentedQueue.__to_entry(time.monotonic(), item), True, timeout
+            )
+            put_count = 1
+        finally:
+            self.__statistics.record_enqueue(put_count, time.monotonic() - start_time)
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Gets an item, recording how long the consumer waited and how long the item was queued.
+        """
+        try:
+            entry = self.__inner_queue.get(False)
+            return self.__record_dequeue(0.0, [entry])[0]
+        except queue.Empty:
+            # Polling an empty queue is not waiting
+            if not block:
+                raise
+
+        start_time = time.monotonic()
+        entries = []
+        try:
+            entries.append(self.__inner_queue.get(True, timeout))
+        finally:
+            items = self.__record_dequeue(time.monotonic() - start_time, entries)
+
+        return items[0]
+
+    def put_many(self, items: "list[object]", timeout: "float | None" = None) -> int:
+        """
+        Puts the items, recording how long the producer was blocked.
+        Only for inner queues with `put_many()`.
+        """
+        enqueue_time = time.monotonic()
+        entries = [InstrumentedQueue.__to_entry(enqueue_time, item) for item in items]
+        put_count = self.__inner_queue.put_many(entries, 0.0)
+        if put_count == len(entries):
+            self.__statistics.record_enqueue(put_count, 0.0)
+            return put_count
+
+        start_time = time.monotonic()
+        put_count += self.__inner_queue.put_many(entries[put_count:], timeout)
+        self.__statistics.record_enqueue(put_count, time.monotonic() - start_time)
+
+        return put_count
+
+    def get_many(self, max_items: int = 0, timeout: "float | None" = None) -> "list[object]":
+        """
+        Gets available items, recording how long the consumer waited and how long each item was
+        queued. Only for inner queues with `get_many()`.
+        """
+        entries = self.__inner_queue.get_many(max_items, 0.0)
+        if len(entries) > 0:
+            return self.__record_dequeue(0.0, entries)
+
+        start_time = time.monotonic()
+        entries = self.__inner_queue.get_many(max_items, timeout)
+        return self.__record_dequeue(time.monotonic() - start_time, entries)
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Puts the item without blocking, raises `queue.Full` if there is no space.
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Gets an item without blocking, raises `queue.Empty` if there is none.
+        """
+        return self.get(False)
+
+    def qsize(self) -> int:
+        """
+        Returns the approximate number of items in the queue.
+        """
+        return self.__inner_queue.qsize()
+
+    def empty(self) -> bool:
+        """
+        Returns whether the queue is approximately empty.
+        """
+        return self.__inner_queue.empty()
+
+    def full(self) -> bool:
+        """
+        Returns whether the queue is approximately full.
+        """
+        return self.__inner_queue.full()
+
+    def close(self) -> None:
+        """
+        Closes the inner queue.
+        """
+        self.__inner_queue.close()
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the inner queue is closed.
+        """
+        return self.__inner_queue.is_closed()
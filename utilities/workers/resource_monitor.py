@@ -0,0 +1,179 @@
+"""
+Worker resource sampling from /proc .
+"""
+
+import os
+import time
+
+
+# Units of /proc/<pid>/stat
+CLOCK_TICKS_PER_SECOND = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096  # bytes
+# Fields of /proc/<pid>/stat counted from the one after the command name, which can have spaces
+STAT_UTIME_INDEX = 11
+STAT_STIME_INDEX = 12
+STAT_RSS_INDEX = 21
+
+
+class WorkerResourceSnapshot:  # pylint: disable=too-many-instance-attributes
+    """
+    Resource usage of a worker at a point in time.
+
+    Thread workers share the memory and file descriptors of their process, so their RSS and open
+    file descriptor count are those of the process.
+    """
+
+    def __init__(
+        self,
+        timestamp: float,  # seconds, time.monotonic()
+        worker_id: int,
+        cpu_time: float,  # seconds
+        rss: int,  # bytes
+        voluntary_context_switch_count: int,
+        involuntary_context_switch_count: int,
+        open_fd_count: int,
+    ) -> None:
+        self.timestamp = timestamp
+        self.worker_id = worker_id
+        self.cpu_time = cpu_time
+        self.rss = rss
+        self.voluntary_context_switch_count = voluntary_context_switch_count
+        self.involuntary_context_switch_count = involuntary_context_switch_count
+        self.open_fd_count = open_fd_count
+        # Set by ResourceMonitor from the previous snapshot of the worker
+        self.cpu_fraction = None
+
+    def cpu_fraction_since(self, previous: "WorkerResourceSnapshot") -> float:
+        """
+        Returns the fraction of a CPU used between the previous snapshot and this one.
+        """
+        elapsed = self.timestamp - previous.timestamp
+        if elapsed <= 0.0:
+            return 0.0
+
+        return max(0.0, self.cpu_time - previous.cpu_time) / elapsed
+
+    def __str__(self) -> str:
+        cpu_text = "n/a" if self.cpu_fraction is None else f"{self.cpu_fraction * 100:.1f}%"
+        return (
+            f"worker {self.worker_id}, "
+            f"CPU: {cpu_text} ({self.cpu_time:.2f} s), "
+            f"RSS: {self.rss / 2**20:.1f} MiB, "
+            f"context switches: {self.voluntary_context_switch_count} voluntary "
+            f"{self.involuntary_context_switch_count} involuntary, "
+            f"open FDs: {self.open_fd_count}"
+        )
+
+
+def _read_task(task_path: str) -> "tuple[float, int, int, int]":
+    """
+    Reads a process or thread directory of /proc .
+
+    Returns the CPU time in seconds, the RSS in bytes, and the voluntary and involuntary context
+    switch counts of the task itself.
+    """
+    with open(os.path.join(task_path, "stat"), "rb") as stat_file:
+        stat = stat_file.read()
+
+    fields = stat[stat.rindex(b")") + 2 :].split()
+    cpu_ticks = int(fields[STAT_UTIME_INDEX]) + int(fields[STAT_STIME_INDEX])
+    cpu_time = cpu_ticks / CLOCK_TICKS_PER_SECOND
+    rss = int(fields[STAT_RSS_INDEX]) * PAGE_SIZE
+
+    voluntary_count = 0
+    involuntary_count = 0
+    with open(os.path.join(task_path, "status"), "rb") as status_file:
+        for line in status_file:
+            if line.startswith(b"voluntary_ctxt_switches:"):
+                voluntary_count = int(line.split()[1])
+            elif line.startswith(b"nonvoluntary_ctxt_switches:"):
+                involuntary_count = int(line.split()[1])
+
+    return cpu_time, rss, voluntary_count, involuntary_count
+
+
+def sample_worker(worker_id: int, is_thread: bool) -> "tuple[bool, WorkerResourceSnapshot | None]":
+    """
+    Reads the resource usage of a worker from /proc . Linux only.
+
+    worker_id: Process ID, or native thread ID of a thread of this process.
+    is_thread: Whether the worker is a thread of this process.
+
+    Returns whether the worker could be sampled, False if it has exited.
+    """
+    process_path = f"/proc/{os.getpid() if is_thread else worker_id}"
+    try:
+        if is_thread:
+            cpu_time, rss, voluntary_count, involuntary_count = _read_task(
+                f"{process_path}/task/{worker_id}"
+            )
+        else:
+            # CPU time is of the whole process, context switches are counted per thread
+            cpu_time, rss, voluntary_count, involuntary_count = _read_task(process_path)
+            voluntary_count = 0
+            involuntary_count = 0
+            for thread_id in os.listdir(f"{process_path}/task"):
+                _, _, thread_voluntary_count, thread_involuntary_count = _read_task(
+                    f"{process_path}/task/{thread_id}"
+                )
+                voluntary_count += thread_voluntary_count
+                involuntary_count += thread_involuntary_count
+
+        open_fd_count = len(os.listdir(f"{process_path}/fd"))
+    except (OSError, ValueError, IndexError):
+        # Exited while reading, or not Linux
+        return False, None
+
+    return True, WorkerResourceSnapshot(
+        time.monotonic(),
+        worker_id,
+        cpu_time,
+        rss,
+        voluntary_count,
+        involuntary_count,
+        open_fd_count,
+    )
+
+
+class ResourceMonitor:
+    """
+    Samples workers and keeps their previous snapshot, for the CPU used between samples.
+
+    A sample is a few small reads of /proc per worker thread, cheap enough to run every second.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor.
+        """
+        # Latest snapshot of each worker sampled last time
+        self.__previous_snapshots = {}
+
+    def sample(self, workers: "list[tuple[int, bool]]") -> "list[WorkerResourceSnapshot]":
+        """
+        Samples the workers, skipping those that have exited.
+
+        workers: ID of each worker and whether it is a thread of this process.
+
+        Returns the snapshot of each worker, with the CPU fraction since the previous sample of
+        the worker.
+        """
+        snapshots = {}
+        for worker_id, is_thread in workers:
+            result, snapshot = sample_worker(worker_id, is_thread)
+            if not result:
+                continue
+
+            # Get Pylance to stop complaining
+            assert snapshot is not None
+
+            previous = self.__previous_snapshots.get(worker_id)
+            if previous is not None:
+                snapshot.cpu_fraction = snapshot.cpu_fraction_since(previous)
+
+            snapshots[worker_id] = snapshot
+
+        # Forget exited workers, so a reused ID starts over
+        self.__previous_snapshots = snapshots
+
+        return list(snapshots.values())
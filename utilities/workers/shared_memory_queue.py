@@ -0,0 +1,343 @@
+"""
+Queue backed by shared memory.
+"""
+
+import ctypes
+import multiprocessing as mp
+import multiprocessing.shared_memory
+import multiprocessing.synchronize
+import pickle
+import queue
+import struct
+import time
+
+from . import closable_queue
+
+
+DEFAULT_SLOT_SIZE = 4096  # bytes
+
+# Payload length and payload kind, written in front of every payload
+SLOT_HEADER_FORMAT = struct.Struct("=IB")
+
+PAYLOAD_PICKLE = 0
+PAYLOAD_BYTES = 1
+
+
+def encode_item(item: object, slot_size: int) -> "tuple[int, bytes]":
+    """
+    Encodes an item for a shared memory slot. `bytes` are used as is, all else is pickled.
+
+    slot_size: Largest payload in bytes, raises `ValueError` if the payload does not fit.
+
+    Returns the payload kind and payload.
+    """
+    if isinstance(item, bytes):
+        payload_kind, payload = PAYLOAD_BYTES, item
+    else:
+        payload_kind = PAYLOAD_PICKLE
+        payload = pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+
+    if len(payload) > slot_size:
+        raise ValueError(f"Item of {len(payload)} bytes does not fit in slot of {slot_size} bytes")
+
+    return payload_kind, payload
+
+
+def decode_item(payload_kind: int, payload: bytes) -> object:
+    """
+    Returns the item encoded by encode_item().
+    """
+    if payload_kind == PAYLOAD_BYTES:
+        return payload
+
+    return pickle.loads(payload)
+
+
+class SharedMemoryQueue:  # pylint: disable=too-many-instance-attributes
+    """
+    Bounded FIFO queue stored in a fixed slot ring buffer in shared memory.
+
+    Has the same `put()`/`get()` surface as `queue.Queue` so it can stand in for a manager queue
+    proxy, without a round trip through the manager server process. `bytes` items are copied in
+    as is, all other items are pickled.
+
+    After close(), every call raises `closable_queue.Closed`, including blocked ones: close()
+    releases each semaphore once, and each woken caller releases it again for the next.
+    """
+
+    # Head and tail are the total number of items read and written, slot index is count % maxsize
+    # Each is only written under its own lock
+    __INDEX_FORMAT = struct.Struct("=Q")
+    __HEAD_OFFSET = 0
+    __TAIL_OFFSET = __INDEX_FORMAT.size
+    __SLOTS_OFFSET = __INDEX_FORMAT.size * 2
+
+    def __init__(
+        self,
+        maxsize: int,
+        slot_size: int = DEFAULT_SLOT_SIZE,
+        context: "mp.context.BaseContext | None" = None,
+    ) -> None:
+        """
+        maxsize: Number of slots, must be greater than 0 .
+        slot_size: Largest encoded item in bytes, must be greater than 0 .
+        context: Creates the semaphores, the context of the workers using the queue, None for the
+            default context.
+        """
+        if maxsize <= 0:
+            raise ValueError(f"Shared memory queue requires maxsize > 0, got {maxsize}")
+
+        if slot_size <= 0:
+            raise ValueError(f"Shared memory queue requires slot_size > 0, got {slot_size}")
+
+        self.maxsize = maxsize
+        self.__slot_size = slot_size
+        self.__slot_stride = SLOT_HEADER_FORMAT.size + slot_size
+
+        self.__shared_memory = multiprocessing.shared_memory.SharedMemory(
+            create=True,
+            size=self.__SLOTS_OFFSET + self.__slot_stride * maxsize,
+        )
+        self.__INDEX_FORMAT.pack_into(self.__shared_memory.buf, self.__HEAD_OFFSET, 0)
+        self.__INDEX_FORMAT.pack_into(self.__shared_memory.buf, self.__TAIL_OFFSET, 0)
+
+        if context is None:
+            context = mp.get_context()
+
+        self.__free_slots = context.Semaphore(maxsize)
+        self.__used_slots = context.Semaphore(0)
+        self.__put_lock = context.Lock()
+        self.__get_lock = context.Lock()
+        self.__is_closed = mp.RawValue(ctypes.c_bool, False)
+
+    def __slot_offset(self, count: int) -> int:
+        """
+        Returns the offset in bytes of the slot used by the item at this count.
+        """
+        return self.__SLOTS_OFFSET + (count % self.maxsize) * self.__slot_stride
+
+    def __write_slots(self, payloads: "list[tuple[int, bytes]]") -> None:
+        """
+        Writes to consecutive slots starting at the tail. Caller must hold a free slot per payload.
+        """
+        buffer = self.__shared_memory.buf
+        with self.__put_lock:
+            (tail,) = self.__INDEX_FORMAT.unpack_from(buffer, self.__TAIL_OFFSET)
+            for payload_kind, payload in payloads:
+                offset = self.__slot_offset(tail)
+                SLOT_HEADER_FORMAT.pack_into(buffer, offset, len(payload), payload_kind)
+                offset += SLOT_HEADER_FORMAT.size
+                buffer[offset : offset + len(payload)] = payload
+                tail += 1
+
+            self.__INDEX_FORMAT.pack_into(buffer, self.__TAIL_OFFSET, tail)
+
+    def __read_slots(self, count: int) -> "list[tuple[int, bytes]]":
+        """
+        Reads from consecutive slots starting at the head. Caller must hold count used slots.
+        """
+        payloads = []
+        buffer = self.__shared_memory.buf
+        with self.__get_lock:
+            (head,) = self.__INDEX_FORMAT.unpack_from(buffer, self.__HEAD_OFFSET)
+            for _ in range(count):
+                offset = self.__slot_offset(head)
+                length, payload_kind = SLOT_HEADER_FORMAT.unpack_from(buffer, offset)
+                offset += SLOT_HEADER_FORMAT.size
+                payloads.append((payload_kind, bytes(buffer[offset : offset + length])))
+                head += 1
+
+            self.__INDEX_FORMAT.pack_into(buffer, self.__HEAD_OFFSET, head)
+
+        return payloads
+
+    def __check_acquired(self, semaphore: "mp.synchronize.Semaphore", count: int) -> None:
+        """
+        Raises `closable_queue.Closed` if closed, passing the acquired units on to wake the next
+        blocked caller.
+        """
+        if not self.__is_closed.value:
+            return
+
+        for _ in range(max(count, 1)):
+            semaphore.release()
+
+        raise closable_queue.Closed
+
+    def __acquire(
+        self, semaphore: "mp.synchronize.Semaphore", block: bool, timeout: "float | None"
+    ) -> bool:
+        """
+        Acquires one unit of the semaphore.
+
+        Returns whether it was acquired before the timeout.
+        """
+        if self.__is_closed.value:
+            raise closable_queue.Closed
+
+        if not semaphore.acquire(block, timeout):
+            return False
+
+        self.__check_acquired(semaphore, 1)
+        return True
+
+    def __acquire_many(
+        self, semaphore: "mp.synchronize.Semaphore", count: int, deadline: "float | None"
+    ) -> int:
+        """
+        Waits until the deadline for one unit of the semaphore, then takes up to count in total
+        without waiting.
+
+        Returns the number of units acquired.
+        """
+        if self.__is_closed.value:
+            raise closable_queue.Closed
+
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        if not semaphore.acquire(True, timeout):
+            return 0
+
+        acquired = 1
+        while acquired < count and semaphore.acquire(False):
+            acquired += 1
+
+        self.__check_acquired(semaphore, acquired)
+        return acquired
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts the item at the tail of the queue.
+
+        block: Whether to wait for a free slot.
+        timeout: Time waiting in seconds before raising `queue.Full`, None waits forever.
+        """
+        payload_kind, payload = encode_item(item, self.__slot_size)
+
+        if not self.__acquire(self.__free_slots, block, timeout):
+            raise queue.Full
+
+        self.__write_slots([(payload_kind, payload)])
+        self.__used_slots.release()
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Removes and returns the item at the head of the queue.
+
+        block: Whether to wait for an item.
+        timeout: Time waiting in seconds before raising `queue.Empty`, None waits forever.
+        """
+        if not self.__acquire(self.__used_slots, block, timeout):
+            raise queue.Empty
+
+        payload_kind, payload = self.__read_slots(1)[0]
+        self.__free_slots.release()
+
+        return decode_item(payload_kind, payload)
+
+    def put_many(self, items: "list[object]", timeout: "float | None" = None) -> int:
+        """
+        Puts the items at the tail of the queue in order, writing every item that fits under a
+        single lock acquisition.
+
+        timeout: Total time waiting in seconds for free slots, None waits forever.
+
+        Returns the number of items put, the rest were not put because of the timeout.
+        """
+        payloads = [encode_item(item, self.__slot_size) for item in items]
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        put_count = 0
+        while put_count < len(payloads):
+            slot_count = self.__acquire_many(self.__free_slots, len(payloads) - put_count, deadline)
+            if slot_count == 0:
+                break
+
+            self.__write_slots(payloads[put_count : put_count + slot_count])
+            for _ in range(slot_count):
+                self.__used_slots.release()
+
+            put_count += slot_count
+
+        return put_count
+
+    def get_many(self, max_items: int = 0, timeout: "float | None" = None) -> "list[object]":
+        """
+        Waits for an item, then removes and returns every item available in a single lock
+        acquisition.
+
+        max_items: Most items to return, <= 0 for no limit.
+        timeout: Time waiting in seconds for the first item, None waits forever.
+
+        Returns the items in order, empty if timed out.
+        """
+        if max_items <= 0:
+            max_items = self.maxsize
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        slot_count = self.__acquire_many(self.__used_slots, max_items, deadline)
+        if slot_count == 0:
+            return []
+
+        payloads = self.__read_slots(slot_count)
+        for _ in range(slot_count):
+            self.__free_slots.release()
+
+        return [decode_item(payload_kind, payload) for payload_kind, payload in payloads]
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Puts the item without blocking, raises `queue.Full` if there is no free slot.
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Gets an item without blocking, raises `queue.Empty` if there is none.
+        """
+        return self.get(False)
+
+    def qsize(self) -> int:
+        """
+        Returns the approximate number of items in the queue.
+        """
+        buffer = self.__shared_memory.buf
+        (head,) = self.__INDEX_FORMAT.unpack_from(buffer, self.__HEAD_OFFSET)
+        (tail,) = self.__INDEX_FORMAT.unpack_from(buffer, self.__TAIL_OFFSET)
+        return max(0, tail - head)
+
+    def empty(self) -> bool:
+        """
+        Returns whether the queue is approximately empty.
+        """
+        return self.qsize() == 0
+
+    def full(self) -> bool:
+        """
+        Returns whether the queue is approximately full.
+        """
+        return self.qsize() >= self.maxsize
+
+    def close(self) -> None:
+        """
+        Closes the queue, discarding its items. Does nothing if already closed.
+        """
+        if self.__is_closed.value:
+            return
+
+        self.__is_closed.value = True
+        self.__free_slots.release()
+        self.__used_slots.release()
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the queue is closed.
+        """
+        return self.__is_closed.value
+
+    def unlink(self) -> None:
+        """
+        Frees the shared memory. Only the process that created the queue should call this,
+        after all other processes are done with it.
+        """
+        self.__shared_memory.close()
+        self.__shared_memory.unlink()
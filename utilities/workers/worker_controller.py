@@ -2,71 +2,280 @@
 For controlling workers.
 """
 
+import ctypes
 import multiprocessing as mp
+import multiprocessing.connection
+import multiprocessing.util
+import threading
 import time
 
+from . import queue_proxy_wrapper
 
-class WorkerController:
+
+class WorkerController:  # pylint: disable=too-many-instance-attributes
     """
     For interprocess communication from main to worker.
     Contains exit and pause requests.
+
+    Requests are flags in shared memory, so the checks in the worker loop are a read without
+    locking and requests take effect on the next check.
+    Workers block with wait() and wait_for_items() so they wake as soon as exit or pause is
+    requested.
+    Each worker reports it is ready on its first check_pause(), and the process that created the
+    controller reads the reports with pop_ready_time() .
+    Single workers can be retired, which is an exit request for that worker only.
+
+    Workers are identified by process ID, or by native thread ID for workers running as threads,
+    which is the process ID for the main thread of a process.
     """
 
-    __QUEUE_DELAY = 0.1  # seconds
+    __QUEUE_WAIT_SLICE = 0.02  # seconds
+    __RETIRE_SLOT_COUNT = 16
+
+    def __init__(self, context: "mp.context.BaseContext | None" = None) -> None:
+        """
+        Constructor creates shared flags, the resume event, and the wake pipe.
+
+        context: Creates the event and lock, the context of the workers, None for the default
+            context.
+        """
+        if context is None:
+            context = mp.get_context()
+
+        self.__is_exit_requested = mp.RawValue(ctypes.c_bool, False)
+        self.__is_pause_requested = mp.RawValue(ctypes.c_bool, False)
+        # Paused workers wait on this, set when resumed or when exit is requested
+        self.__wake_paused = context.Event()
+        self.__wake_paused.set()
+        # Readable while exit or pause is requested, so it can be waited on with sockets
+        # The byte is only read out once neither is requested, so all waiters see it
+        self.__wake_reader, self.__wake_writer = mp.Pipe(duplex=False)
+        self.__is_wake_sent = mp.RawValue(ctypes.c_bool, False)
+        self.__wake_lock = context.Lock()
+        # Worker ID and time.monotonic() of each worker when ready
+        # Reports are small enough that concurrent sends do not interleave
+        self.__ready_reader, self.__ready_writer = mp.Pipe(duplex=False)
+        # Only used by the creating process
+        self.__ready_times = {}
+        # Whether each worker thread has reported, replaced in every new process
+        self.__ready_reported = threading.local()
+        multiprocessing.util.register_after_fork(self, WorkerController.__clear_ready_reported)
+        # Worker IDs requested to retire, 0 for a free slot
+        self.__retiring_worker_ids = mp.RawArray(ctypes.c_int64, self.__RETIRE_SLOT_COUNT)
+        self.__retiring_count = mp.RawValue(ctypes.c_int32, 0)
+
+    def __getstate__(self) -> "dict[str, object]":
+        """
+        Pickled into spawned processes, which have not reported ready.
+        """
+        state = self.__dict__.copy()
+        del state["_WorkerController__ready_reported"]
+        state["_WorkerController__ready_times"] = {}
+        return state
+
+    def __setstate__(self, state: "dict[str, object]") -> None:
+        """
+        Unpickled in spawned processes.
+        """
+        self.__dict__.update(state)
+        self.__ready_reported = threading.local()
+
+    def __clear_ready_reported(self) -> None:
+        """
+        Runs in forked processes, which have not reported ready.
+        """
+        self.__ready_reported = threading.local()
+        self.__ready_times = {}
+
+    def __is_wake_requested(self) -> bool:
+        """
+        Returns whether exit or pause is requested.
+        """
+        return self.__is_exit_requested.value or self.__is_pause_requested.value
+
+    def __is_retire_requested(self) -> bool:
+        """
+        Returns whether this worker is requested to retire.
+        """
+        return (
+            self.__retiring_count.value > 0
+            and threading.get_native_id() in self.__retiring_worker_ids
+        )
 
-    def __init__(self) -> None:
+    def __update_wake(self) -> None:
         """
-        Constructor creates internal queue and semaphore.
+        Makes the wake pipe readable if and only if exit or pause is requested.
         """
-        self.__pause = mp.BoundedSemaphore(1)
-        self.__is_paused = False
-        self.__exit_queue = mp.Queue(1)
+        with self.__wake_lock:
+            is_wake_requested = self.__is_wake_requested()
+            if is_wake_requested and not self.__is_wake_sent.value:
+                self.__wake_writer.send_bytes(b"\0")
+                self.__is_wake_sent.value = True
+            elif not is_wake_requested and self.__is_wake_sent.value:
+                self.__wake_reader.recv_bytes()
+                self.__is_wake_sent.value = False
 
     def request_pause(self) -> None:
         """
         Requests worker processes to pause.
         """
-        if not self.__is_paused:
-            self.__pause.acquire()
-            self.__is_paused = True
+        self.__is_pause_requested.value = True
+        if not self.__is_exit_requested.value:
+            self.__wake_paused.clear()
+
+        self.__update_wake()
 
     def request_resume(self) -> None:
         """
         Requests worker processes to resume.
         """
-        if self.__is_paused:
-            self.__pause.release()
-            self.__is_paused = False
+        self.__is_pause_requested.value = False
+        self.__wake_paused.set()
+        self.__update_wake()
 
     def check_pause(self) -> None:
         """
         Blocks worker if main has requested it to pause, otherwise continues.
+        A paused worker also continues once exit is requested.
+        The first call in a worker reports that it is ready.
         """
-        self.__pause.acquire()
-        self.__pause.release()
+        if not getattr(self.__ready_reported, "value", False):
+            self.__ready_reported.value = True
+            self.__ready_writer.send((threading.get_native_id(), time.monotonic()))
+
+        while self.__is_pause_requested.value and not self.__is_exit_requested.value:
+            self.__wake_paused.wait()
 
     def request_exit(self) -> None:
         """
         Requests worker processes to exit.
         Does nothing if already requested.
         """
-        time.sleep(self.__QUEUE_DELAY)
-        if self.__exit_queue.empty():
-            self.__exit_queue.put(None)
+        self.__is_exit_requested.value = True
+        self.__wake_paused.set()
+        self.__update_wake()
 
     def clear_exit(self) -> None:
         """
         Clears the exit request condition.
         Does nothing if already cleared.
         """
-        time.sleep(self.__QUEUE_DELAY)
-        if not self.__exit_queue.empty():
-            _ = self.__exit_queue.get()
+        self.__is_exit_requested.value = False
+        if self.__is_pause_requested.value:
+            self.__wake_paused.clear()
+
+        self.__update_wake()
+
+    def request_retire(self, worker_id: int) -> bool:
+        """
+        Requests a single worker to exit, it sees the request at its next check.
+        Only call from the process that created the controller.
+
+        worker_id: Worker process ID, or native thread ID.
+
+        Returns False if too many workers are already retiring.
+        """
+        for index, retiring_worker_id in enumerate(self.__retiring_worker_ids):
+            if retiring_worker_id == 0:
+                # Slot before count, so a worker that sees the count also finds the slot
+                self.__retiring_worker_ids[index] = worker_id
+                self.__retiring_count.value += 1
+                return True
+
+        return False
+
+    def clear_retire(self, worker_id: int) -> None:
+        """
+        Clears the retire request once the worker has exited.
+        Only call from the process that created the controller.
+        """
+        for index, retiring_worker_id in enumerate(self.__retiring_worker_ids):
+            if retiring_worker_id == worker_id:
+                self.__retiring_worker_ids[index] = 0
+                self.__retiring_count.value -= 1
 
     def is_exit_requested(self) -> bool:
         """
-        Returns whether main has requested the worker process to exit.
+        Returns whether main has requested the worker process to exit, or to retire.
         There is a race condition, but it's fine because the worker process
         will do at most 1 additional loop.
         """
-        return not self.__exit_queue.empty()
+        return self.__is_exit_requested.value or self.__is_retire_requested()
+
+    def pop_ready_time(self, worker_id: int) -> "tuple[bool, float | None]":
+        """
+        Only call from the process that created the controller, regularly so reports do not fill
+        the pipe.
+
+        worker_id: Worker process ID, or native thread ID.
+
+        Returns whether the worker has reported ready and when, as time.monotonic() .
+        """
+        while self.__ready_reader.poll():
+            ready_worker_id, ready_time = self.__ready_reader.recv()
+            self.__ready_times[ready_worker_id] = ready_time
+
+        if worker_id not in self.__ready_times:
+            return False, None
+
+        return True, self.__ready_times.pop(worker_id)
+
+    def wait(
+        self, timeout: float, wait_objects: "list[object] | None" = None
+    ) -> "tuple[bool, list[object]]":
+        """
+        Blocks worker until the timeout, exit or pause is requested, or an object is ready.
+        Use instead of sleeping or blocking reads.
+        Does not block a retiring worker, but does not wake one either.
+
+        timeout: Time waiting in seconds.
+        wait_objects: Sockets, file descriptors, or connections to wait for until readable.
+
+        Returns whether exit or pause was requested and the objects that are ready.
+        """
+        if wait_objects is None:
+            wait_objects = []
+
+        if self.__is_wake_requested() or self.__is_retire_requested():
+            return True, []
+
+        ready = multiprocessing.connection.wait([self.__wake_reader] + wait_objects, timeout)
+
+        return self.__is_wake_requested(), [obj for obj in ready if obj is not self.__wake_reader]
+
+    def get_wake_fd(self) -> int:
+        """
+        Returns the file descriptor that is readable while exit or pause is requested, to register
+        with a selector once instead of calling wait() every time. Never read from it.
+        """
+        return self.__wake_reader.fileno()
+
+    def wait_for_items(
+        self,
+        input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+        timeout: float,
+        max_items: int = 0,
+    ) -> "tuple[bool, list[object]]":
+        """
+        Blocks worker until the timeout, exit, pause, or retire is requested, or there are items
+        in the queue. Queues cannot be waited on with the wake pipe, so this checks for a request
+        between short waits on the queue.
+
+        input_queue: Queue to get from.
+        timeout: Time waiting in seconds.
+        max_items: Most items to return, <= 0 for no limit.
+
+        Returns whether exit, pause, or retire was requested and the items, see get_many() .
+        Items are returned even if requested, so they are not lost.
+        """
+        deadline = time.monotonic() + timeout
+        while not self.__is_wake_requested() and not self.__is_retire_requested():
+            remaining = deadline - time.monotonic()
+            items = input_queue.get_many(
+                max_items,
+                max(0.0, min(remaining, self.__QUEUE_WAIT_SLICE)),
+            )
+            if len(items) > 0 or remaining <= self.__QUEUE_WAIT_SLICE:
+                return self.__is_wake_requested() or self.__is_retire_requested(), items
+
+        return True, []
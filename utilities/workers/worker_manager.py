@@ -2,14 +2,137 @@
 For managing workers.
 """
 
+import enum
 import multiprocessing as mp
+import multiprocessing.connection
+import threading
+import time
 
 from modules.common.modules.logger import logger
 from utilities.workers import worker_controller
 from utilities.workers import queue_proxy_wrapper
+from utilities.workers import resource_monitor
+from utilities.workers import worker_restart
+from utilities.workers import worker_scheduling
 
 
-class WorkerProperties:
+class ExecutorKind(enum.Enum):
+    """
+    What runs each worker.
+
+    PROCESS: A process per worker.
+    THREAD: A thread per worker in the process of the WorkerManager, for targets that mostly wait
+        on sockets, sleeps, or queues. Threads of a process run Python code one at a time, and a
+        thread that does not exit when requested cannot be killed.
+    """
+
+    PROCESS = 0
+    THREAD = 1
+
+
+# Longest wait in seconds for thread workers to exit between checks, threads have no sentinel
+THREAD_JOIN_POLL_PERIOD_S = 0.01
+
+
+class WorkerExitKind(enum.Enum):
+    """
+    How a joined worker exited.
+
+    EXITED: Exited by itself before the deadline.
+    TERMINATED: Exited after SIGTERM at the deadline.
+    KILLED: Exited after SIGKILL, as it ignored SIGTERM .
+    ALIVE: Did not exit. Threads cannot be terminated, they are daemons so they do not keep the
+        process from exiting.
+    """
+
+    EXITED = 0
+    TERMINATED = 1
+    KILLED = 2
+    ALIVE = 3
+
+
+class WorkerJoinResult:
+    """
+    How a single worker exited when joined.
+    """
+
+    def __init__(
+        self,
+        target_name: str,
+        worker_name: str,
+        exit_kind: WorkerExitKind,
+        exit_code: "int | None",
+        exit_time: "float | None",  # seconds
+    ) -> None:
+        """
+        target_name: Name of the worker target.
+        worker_name: Name of the process or thread.
+        exit_kind: How the worker exited.
+        exit_code: Exit code of a process, negative for the signal that ended it, None for a
+            thread or a worker that did not exit.
+        exit_time: Time in seconds from the start of the join until the worker exited, None if it
+            did not exit.
+        """
+        self.target_name = target_name
+        self.worker_name = worker_name
+        self.exit_kind = exit_kind
+        self.exit_code = exit_code
+        self.exit_time = exit_time
+
+    def is_clean(self) -> bool:
+        """
+        Returns whether the worker exited by itself without an error.
+        """
+        return self.exit_kind == WorkerExitKind.EXITED and self.exit_code in (0, None)
+
+    def __str__(self) -> str:
+        exit_time = "n/a" if self.exit_time is None else f"{self.exit_time:.3f} s"
+        return (
+            f"{self.target_name} {self.worker_name}: {self.exit_kind.name}, "
+            f"exit code: {self.exit_code}, exit time: {exit_time}"
+        )
+
+
+class WorkerJoinReport:
+    """
+    How every joined worker exited, in the order of their pools.
+    """
+
+    def __init__(self, results: "list[WorkerJoinResult]") -> None:
+        self.results = results
+
+    def is_all_exited(self) -> bool:
+        """
+        Returns whether every worker exited, including terminated and killed workers.
+        """
+        return all(result.exit_kind != WorkerExitKind.ALIVE for result in self.results)
+
+    def is_all_clean(self) -> bool:
+        """
+        Returns whether every worker exited by itself without an error.
+        """
+        return all(result.is_clean() for result in self.results)
+
+    def get_unclean_results(self) -> "list[WorkerJoinResult]":
+        """
+        Returns the workers that errored, were terminated or killed, or did not exit.
+        """
+        return [result for result in self.results if not result.is_clean()]
+
+    def __str__(self) -> str:
+        kind_counts = {exit_kind: 0 for exit_kind in WorkerExitKind}
+        for result in self.results:
+            kind_counts[result.exit_kind] += 1
+
+        exit_times = [result.exit_time for result in self.results if result.exit_time is not None]
+        slowest = "n/a" if len(exit_times) == 0 else f"{max(exit_times):.3f} s"
+        return (
+            ", ".join(f"{exit_kind.name}: {count}" for exit_kind, count in kind_counts.items())
+            + f", slowest exit: {slowest}"
+        )
+
+
+class WorkerProperties:  # pylint: disable=too-many-instance-attributes
     """
     Worker Properties.
     """
@@ -26,6 +149,10 @@ class WorkerProperties:
         output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         controller: worker_controller.WorkerController,
         local_logger: logger.Logger,
+        restart_policy: "worker_restart.RestartPolicy | None" = None,
+        start_method: "str | None" = None,
+        executor_kind: ExecutorKind = ExecutorKind.PROCESS,
+        scheduling_policy: "worker_scheduling.SchedulingPolicy | None" = None,
     ) -> "tuple[bool, WorkerProperties | None]":
         """
         Creates worker properties.
@@ -37,6 +164,15 @@ class WorkerProperties:
         output_queues: Output queues.
         controller: Worker controller.
         local_logger: Existing logger from process.
+        restart_policy: Limits on restarting dead workers, None for the default limits.
+        start_method: How worker processes are started: fork, spawn, or forkserver,
+            None for the default start method. Spawn and forkserver pickle the arguments, so
+            locks and queues among them must be created with the context of the start method,
+            see the context argument of WorkerController and QueueProxyWrapper .
+        executor_kind: Whether workers run as processes or threads, the controller and queues
+            work the same with both. Start method is only used by processes.
+        scheduling_policy: CPU affinity and scheduling priority each worker applies as it starts,
+            None to inherit them from this process.
 
         Returns the WorkerProperties object.
         """
@@ -47,6 +183,23 @@ class WorkerProperties:
             )
             return False, None
 
+        if restart_policy is None:
+            restart_policy = worker_restart.RestartPolicy()
+
+        if start_method is not None and start_method not in mp.get_all_start_methods():
+            local_logger.error(
+                f"Start method {start_method} is not available, no workers were created", True
+            )
+            return False, None
+
+        if scheduling_policy is not None:
+            result, reason = scheduling_policy.check()
+            if not result:
+                local_logger.error(
+                    f"Scheduling policy cannot be applied: {reason}, no workers were created", True
+                )
+                return False, None
+
         return True, WorkerProperties(
             cls.__create_key,
             count,
@@ -55,6 +208,10 @@ class WorkerProperties:
             input_queues,
             output_queues,
             controller,
+            restart_policy,
+            mp.get_context(start_method),
+            executor_kind,
+            scheduling_policy,
         )
 
     def __init__(
@@ -66,6 +223,10 @@ class WorkerProperties:
         input_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         controller: worker_controller.WorkerController,
+        restart_policy: worker_restart.RestartPolicy,
+        context: "mp.context.BaseContext",
+        executor_kind: ExecutorKind,
+        scheduling_policy: "worker_scheduling.SchedulingPolicy | None",
     ) -> None:
         """
         Private constructor, use create() method.
@@ -78,6 +239,10 @@ class WorkerProperties:
         self.__input_queues = input_queues
         self.__output_queues = output_queues
         self.__controller = controller
+        self.__restart_policy = restart_policy
+        self.__context = context
+        self.__executor_kind = executor_kind
+        self.__scheduling_policy = scheduling_policy
 
     def get_worker_arguments(self) -> "tuple":
         """
@@ -110,6 +275,42 @@ class WorkerProperties:
         """
         return self.__input_queues
 
+    def get_output_queues(self) -> "list[queue_proxy_wrapper.QueueProxyWrapper]":
+        """
+        Returns the output queues.
+        """
+        return self.__output_queues
+
+    def get_controller(self) -> worker_controller.WorkerController:
+        """
+        Returns the worker controller.
+        """
+        return self.__controller
+
+    def get_restart_policy(self) -> worker_restart.RestartPolicy:
+        """
+        Returns the restart policy.
+        """
+        return self.__restart_policy
+
+    def get_context(self) -> "mp.context.BaseContext":
+        """
+        Returns the multiprocessing context that starts the workers.
+        """
+        return self.__context
+
+    def get_executor_kind(self) -> ExecutorKind:
+        """
+        Returns what runs each worker.
+        """
+        return self.__executor_kind
+
+    def get_scheduling_policy(self) -> "worker_scheduling.SchedulingPolicy | None":
+        """
+        Returns the scheduling policy, None if workers inherit it.
+        """
+        return self.__scheduling_policy
+
     def get_target_name(self) -> str:
         """
         Returns the name of the target.
@@ -117,10 +318,70 @@ class WorkerProperties:
         return self.__target.__name__
 
 
-class WorkerManager:
+def _run_when_activated(
+    activation_reader: multiprocessing.connection.Connection,
+    target: "(...) -> object",  # type: ignore
+    args: "tuple",
+) -> None:
+    """
+    Warm spare entry point, parks until activated and then runs the target.
+    Exits without running the target if retired.
+    Only the process start and the scheduling policy are done ahead of time, the target builds
+    its own state, such as its logger, once activated.
+
+    activation_reader: Receives True to activate or False to retire.
+    target: Function.
+    args: Target function arguments.
+    """
+    try:
+        is_activated = activation_reader.recv()
+    except EOFError:
+        return
+
+    if not is_activated:
+        return
+
+    target(*args)
+
+
+def _run_with_scheduling_policy(
+    scheduling_policy: worker_scheduling.SchedulingPolicy,
+    target: "(...) -> object",  # type: ignore
+    args: "tuple",
+) -> None:
+    """
+    Worker entry point that applies the scheduling policy and then runs the target.
+    A policy the operating system refuses raises before the worker is ready, so it counts as a
+    failed start for the restart policy.
+
+    scheduling_policy: CPU affinity and scheduling priority.
+    target: Function.
+    args: Target function arguments.
+    """
+    scheduling_policy.apply()
+    target(*args)
+
+
+def _get_worker_id(worker: "mp.Process | threading.Thread") -> int:
+    """
+    Returns the ID of the started worker in the worker controller, see WorkerController .
+    """
+    if isinstance(worker, threading.Thread):
+        return worker.native_id
+
+    return worker.pid
+
+
+class WorkerManager:  # pylint: disable=too-many-instance-attributes
     """
     For interprocess communication from main to worker.
     Contains exit and pause requests.
+
+    Optionally keeps warm spares: started processes parked before the worker target, so replacing
+    a dead worker is a message to a spare instead of starting a process. The target still sets
+    itself up after activation, see _run_when_activated() .
+
+    Workers can also run as threads of this process, see ExecutorKind .
     """
 
     __create_key = object()
@@ -130,18 +391,21 @@ class WorkerManager:
         cls,
         worker_properties: WorkerProperties,
         local_logger: logger.Logger,
+        spare_count: int = 0,
     ) -> "tuple[bool, WorkerManager | None]":
         """
         Create identical workers and append them to a workers list.
 
         worker_properties: Worker properties.
         local_logger: Existing logger from process.
+        spare_count: Number of warm spares to keep for replacing dead workers.
 
         Returns whether the workers were able to be created and the Worker Manager.
         """
         workers = []
         for _ in range(0, worker_properties.get_worker_count()):
             result, worker = WorkerManager.__create_single_worker(
+                worker_properties,
                 worker_properties.get_worker_target(),
                 worker_properties.get_worker_arguments(),
                 local_logger,
@@ -152,9 +416,19 @@ class WorkerManager:
 
             workers.append(worker)
 
+        spares = []
+        for _ in range(0, spare_count):
+            result, spare = WorkerManager.__create_spare(worker_properties, local_logger)
+            if not result:
+                local_logger.error("Failed to create warm spare", True)
+                return False, None
+
+            spares.append(spare)
+
         return True, WorkerManager(
             cls.__create_key,
             workers,
+            spares,
             worker_properties,
             local_logger,
         )
@@ -162,7 +436,8 @@ class WorkerManager:
     def __init__(
         self,
         class_private_create_key: object,
-        workers: "list[mp.Process]",
+        workers: "list[mp.Process | threading.Thread]",
+        spares: "list[tuple[mp.Process | threading.Thread, multiprocessing.connection.Connection]]",
         worker_properties: WorkerProperties,
         local_logger: logger.Logger,
     ) -> None:
@@ -172,22 +447,46 @@ class WorkerManager:
         assert class_private_create_key is WorkerManager.__create_key, "Use create() method"
 
         self.__workers = workers
+        # Each spare with the sending end of its activation pipe
+        self.__spares = spares
+        self.__spare_count = len(spares)
+        self.__restart_tracker = worker_restart.RestartTracker(
+            worker_properties.get_restart_policy()
+        )
+        # Number of dead workers not restarted yet
+        self.__dead_worker_count = 0
+        # Start or activation time.monotonic() of each worker that has not reported ready
+        self.__start_times = {}
+        # Requested to retire and not exited yet
+        self.__retiring_workers = []
+        self.__resource_monitor = resource_monitor.ResourceMonitor()
         self.__worker_properties = worker_properties
         self.__local_logger = local_logger
 
     @staticmethod
-    def __create_single_worker(target: "(...) -> object", args: "tuple", local_logger: logger.Logger) -> "tuple[bool, mp.Process | None]":  # type: ignore
+    def __create_single_worker(worker_properties: WorkerProperties, target: "(...) -> object", args: "tuple", local_logger: logger.Logger) -> "tuple[bool, mp.Process | threading.Thread | None]":  # type: ignore
         """
         Creates a single worker.
 
+        worker_properties: Worker properties, for how the worker is run.
         target: Function.
         args: Target function arguments.
         local_logger: Existing logger from process.
 
         Returns whether a worker was created and the worker.
         """
+        # Applied at the start of the worker, so warm spares are already placed when activated
+        scheduling_policy = worker_properties.get_scheduling_policy()
+        if scheduling_policy is not None:
+            args = (scheduling_policy, target, args)
+            target = _run_with_scheduling_policy
+
         try:
-            worker = mp.Process(target=target, args=args)
+            if worker_properties.get_executor_kind() == ExecutorKind.THREAD:
+                # Daemon so a stuck worker does not keep the process from exiting
+                worker = threading.Thread(target=target, args=args, daemon=True)
+            else:
+                worker = worker_properties.get_context().Process(target=target, args=args)
         # Catching all exceptions for library call
         # pylint: disable-next=broad-exception-caught
         except Exception as e:
@@ -196,52 +495,455 @@ class WorkerManager:
 
         return True, worker
 
+    @staticmethod
+    def __create_spare(
+        worker_properties: WorkerProperties, local_logger: logger.Logger
+    ) -> "tuple[bool, tuple[mp.Process | threading.Thread, multiprocessing.connection.Connection] | None]":
+        """
+        Creates a single warm spare.
+
+        worker_properties: Worker properties.
+        local_logger: Existing logger from process.
+
+        Returns whether a spare was created, and the spare with the sending end of its activation
+        pipe.
+        """
+        activation_reader, activation_writer = mp.Pipe(duplex=False)
+        result, spare = WorkerManager.__create_single_worker(
+            worker_properties,
+            _run_when_activated,
+            (
+                activation_reader,
+                worker_properties.get_worker_target(),
+                worker_properties.get_worker_arguments(),
+            ),
+            local_logger,
+        )
+        if not result:
+            return False, None
+
+        return True, (spare, activation_writer)
+
     def start_workers(self) -> None:
         """
-        Start workers.
+        Start workers and warm spares.
         """
         for worker in self.__workers:
             worker.start()
+            self.__start_times[_get_worker_id(worker)] = time.monotonic()
 
-    def join_workers(self) -> None:
+        for spare, _ in self.__spares:
+            spare.start()
+
+    def __retire_spares(self) -> None:
         """
-        Join workers.
+        Tells every warm spare to exit without running the target.
         """
-        for worker in self.__workers:
-            worker.join()
+        for _, activation_writer in self.__spares:
+            try:
+                activation_writer.send(False)
+            except (BrokenPipeError, OSError):
+                # Spare already exited
+                pass
+
+    def begin_join(self) -> "list[tuple[str, mp.Process | threading.Thread]]":
+        """
+        First phase of join_all() : closes the input and output queues so blocked workers exit,
+        and retires warm spares.
 
-    def check_and_restart_dead_workers(self) -> bool:
+        Returns the target name and worker of every worker, retiring worker and spare to join.
+        """
+        for worker_queue in (
+            self.__worker_properties.get_input_queues()
+            + self.__worker_properties.get_output_queues()
+        ):
+            worker_queue.close()
+
+        self.__retire_spares()
+        target_name = self.__worker_properties.get_target_name()
+        workers = self.__workers + self.__retiring_workers + [spare for spare, _ in self.__spares]
+        return [(target_name, worker) for worker in workers]
+
+    def end_join(self, results: "list[WorkerJoinResult]") -> None:
         """
-        Check and restart dead workers.
+        Last phase of join_all() : forgets retired workers and logs the workers that did not exit
+        cleanly.
 
-        Returns whether the dead workers were able to be restarted.
+        results: How each worker returned by begin_join() exited.
         """
-        new_workers = []
-        for worker in self.__workers:
-            if worker.is_alive():
-                new_workers.append(worker)
-                continue
+        self.__reap_retired()
+        for result in results:
+            if not result.is_clean():
+                self.__local_logger.warning(f"Worker did not exit cleanly: {result}", True)
 
-            # Log dead worker
-            target_and_worker_name = f"{self.__worker_properties.get_target_name()} {worker.name}"
-            self.__local_logger.warning(
-                f"Worker died, restarting {target_and_worker_name}",
-                True,
+    @staticmethod
+    def __wait_for_exits(
+        pending: "list[tuple[str, mp.Process | threading.Thread]]",
+        deadline: "float | None",
+        join_start_time: float,
+        exit_kind: WorkerExitKind,
+        results: "dict[int, WorkerJoinResult]",
+    ) -> "list[tuple[str, mp.Process | threading.Thread]]":
+        """
+        Waits for any of the workers to exit until all have exited or the deadline, recording
+        each as it exits.
+
+        pending: Target name and worker of each worker that has not exited.
+        deadline: time.monotonic() to stop waiting at, None waits forever.
+        join_start_time: time.monotonic() the join started, for the exit times.
+        exit_kind: Recorded for the workers that exit.
+        results: Result of each exited worker by id() of the worker.
+
+        Returns the workers that have not exited.
+        """
+        while True:
+            still_pending = []
+            for target_name, worker in pending:
+                if worker.is_alive():
+                    still_pending.append((target_name, worker))
+                    continue
+
+                worker.join()
+                results[id(worker)] = WorkerJoinResult(
+                    target_name,
+                    worker.name,
+                    exit_kind,
+                    None if isinstance(worker, threading.Thread) else worker.exitcode,
+                    time.monotonic() - join_start_time,
+                )
+
+            pending = still_pending
+            now = time.monotonic()
+            if len(pending) == 0 or (deadline is not None and now >= deadline):
+                return pending
+
+            timeout = None if deadline is None else deadline - now
+            sentinels = []
+            for _, worker in pending:
+                if isinstance(worker, threading.Thread):
+                    timeout = (
+                        THREAD_JOIN_POLL_PERIOD_S
+                        if timeout is None
+                        else min(timeout, THREAD_JOIN_POLL_PERIOD_S)
+                    )
+                else:
+                    sentinels.append(worker.sentinel)
+
+            if len(sentinels) > 0:
+                multiprocessing.connection.wait(sentinels, timeout)
+            else:
+                time.sleep(timeout)
+
+    @staticmethod
+    def join_all(
+        managers: "list[WorkerManager]",
+        deadline: "float | None" = None,
+        escalation_timeout: float = 1.0,  # seconds
+    ) -> WorkerJoinReport:
+        """
+        Closes the queues of every manager so blocked workers exit, then waits for the workers of
+        all managers together. Workers still running at the deadline are sent SIGTERM, and those
+        still running escalation_timeout after that are sent SIGKILL.
+        Exit should already be requested with the controller.
+
+        managers: Worker managers to join.
+        deadline: time.monotonic() to start terminating workers at, None waits forever.
+        escalation_timeout: Time in seconds each of SIGTERM and SIGKILL is given to take effect,
+            so joining ends at most 2 * escalation_timeout after the deadline.
+
+        Returns how each worker exited.
+        """
+        join_start_time = time.monotonic()
+        manager_workers = [manager.begin_join() for manager in managers]
+        workers = [worker for joined_workers in manager_workers for worker in joined_workers]
+
+        results = {}
+        pending = WorkerManager.__wait_for_exits(
+            workers, deadline, join_start_time, WorkerExitKind.EXITED, results
+        )
+
+        # Escalate, threads cannot be signalled so they are left running
+        for exit_kind in [WorkerExitKind.TERMINATED, WorkerExitKind.KILLED]:
+            if len(pending) == 0:
+                break
+
+            for _, worker in pending:
+                if isinstance(worker, threading.Thread):
+                    continue
+
+                if exit_kind == WorkerExitKind.TERMINATED:
+                    worker.terminate()
+                else:
+                    worker.kill()
+
+            pending = WorkerManager.__wait_for_exits(
+                pending,
+                time.monotonic() + escalation_timeout,
+                join_start_time,
+                exit_kind,
+                results,
             )
 
+        for target_name, worker in pending:
+            results[id(worker)] = WorkerJoinResult(
+                target_name, worker.name, WorkerExitKind.ALIVE, None, None
+            )
+
+        for manager, joined_workers in zip(managers, manager_workers):
+            manager.end_join([results[id(worker)] for _, worker in joined_workers])
+
+        return WorkerJoinReport([results[id(worker)] for _, worker in workers])
+
+    def join_workers(
+        self,
+        deadline: "float | None" = None,
+        escalation_timeout: float = 1.0,  # seconds
+    ) -> WorkerJoinReport:
+        """
+        Joins the workers of this manager, see join_all() .
+
+        deadline: time.monotonic() to start terminating workers at, None waits forever.
+        escalation_timeout: Time in seconds each of SIGTERM and SIGKILL is given to take effect.
+
+        Returns how each worker exited.
+        """
+        return WorkerManager.join_all([self], deadline, escalation_timeout)
+
+    def __start_worker(self) -> bool:
+        """
+        Adds a worker, activating a warm spare if there is one.
+
+        Returns whether the worker was started.
+        """
+        result, new_worker = self.__activate_spare()
+        if not result:
             # Create a new worker
             result, new_worker = WorkerManager.__create_single_worker(
+                self.__worker_properties,
                 self.__worker_properties.get_worker_target(),
                 self.__worker_properties.get_worker_arguments(),
                 self.__local_logger,
             )
             if not result:
-                self.__local_logger.error(f"Failed to restart {target_and_worker_name}", True)
                 return False
 
-            # Append the new worker
-            new_workers.append(new_worker)
+            new_worker.start()
+
+        self.__start_times[_get_worker_id(new_worker)] = time.monotonic()
+
+        # Append the new worker
+        self.__workers.append(new_worker)
+
+        return True
+
+    def __reap_retired(self) -> None:
+        """
+        Clears the retire requests of retired workers that have exited.
+        """
+        controller = self.__worker_properties.get_controller()
+        retiring_workers = []
+        for worker in self.__retiring_workers:
+            if worker.is_alive():
+                retiring_workers.append(worker)
+                continue
+
+            worker.join()
+            controller.clear_retire(_get_worker_id(worker))
+            self.__start_times.pop(_get_worker_id(worker), None)
+
+        self.__retiring_workers = retiring_workers
+
+    def get_worker_count(self) -> int:
+        """
+        Returns the number of workers, including dead workers not restarted yet and excluding
+        retiring workers.
+        """
+        return len(self.__workers) + self.__dead_worker_count
+
+    def get_input_queues(self) -> "list[queue_proxy_wrapper.QueueProxyWrapper]":
+        """
+        Returns the input queues of the workers.
+        """
+        return self.__worker_properties.get_input_queues()
+
+    def scale_to(self, count: int) -> bool:
+        """
+        Starts or retires workers until there are count workers.
+        Retired workers finish the item they are working on and exit at their next
+        controller.is_exit_requested(), leaving the rest of the queue for the other workers.
+
+        count: Number of workers, must be greater than 0 .
+
+        Returns whether the workers were able to be started or retired.
+        """
+        if count <= 0:
+            self.__local_logger.error(
+                "Worker count requested is less than or equal to zero, no workers were changed",
+                True,
+            )
+            return False
+
+        self.__reap_retired()
+
+        while self.get_worker_count() < count:
+            if not self.__start_worker():
+                self.__local_logger.error(
+                    f"Failed to add {self.__worker_properties.get_target_name()} worker", True
+                )
+                return False
+
+        # Dead workers are dropped before live workers are retired
+        while self.get_worker_count() > count and self.__dead_worker_count > 0:
+            self.__dead_worker_count -= 1
+
+        controller = self.__worker_properties.get_controller()
+        while self.get_worker_count() > count:
+            # Newest first, which are the least likely to be busy
+            worker = self.__workers[-1]
+            if not controller.request_retire(_get_worker_id(worker)):
+                self.__local_logger.error(
+                    f"Failed to retire {self.__worker_properties.get_target_name()} worker", True
+                )
+                return False
+
+            self.__workers.pop()
+            self.__retiring_workers.append(worker)
+
+        return True
+
+    def __update_ready(self) -> None:
+        """
+        Records the time to ready of started workers that have reported ready.
+        """
+        controller = self.__worker_properties.get_controller()
+        for process_id in list(self.__start_times):
+            result, ready_time = controller.pop_ready_time(process_id)
+            if not result:
+                continue
+
+            start_time = self.__start_times.pop(process_id)
+            self.__restart_tracker.record_ready(max(0.0, ready_time - start_time))
+
+    def check_and_restart_dead_workers(self) -> bool:
+        """
+        Check and restart dead workers, activating a warm spare if there is one.
+        Restarts follow the restart policy, so a dead worker may be restarted by a later call.
+
+        Returns whether the dead workers allowed by the policy were able to be restarted.
+        """
+        self.__update_ready()
+        self.__reap_retired()
+        now = time.monotonic()
+
+        alive_workers = []
+        for worker in self.__workers:
+            if worker.is_alive():
+                alive_workers.append(worker)
+                continue
+
+            # Log dead worker
+            target_and_worker_name = f"{self.__worker_properties.get_target_name()} {worker.name}"
+            self.__local_logger.warning(f"Worker died: {target_and_worker_name}", True)
+
+            was_ready = self.__start_times.pop(_get_worker_id(worker), None) is None
+            self.__restart_tracker.record_death(now, was_ready)
+            self.__dead_worker_count += 1
+
+        self.__workers = alive_workers
+
+        previous_circuit_state = self.__restart_tracker.status().circuit_state
+        while self.__dead_worker_count > 0 and self.__restart_tracker.is_restart_allowed(now):
+            if not self.__start_worker():
+                self.__local_logger.error(
+                    f"Failed to restart {self.__worker_properties.get_target_name()}", True
+                )
+                return False
+
+            self.__restart_tracker.record_restart(now)
+            self.__dead_worker_count -= 1
+
+        status = self.__restart_tracker.status()
+        if (
+            status.circuit_state == worker_restart.CircuitState.OPEN
+            and previous_circuit_state != worker_restart.CircuitState.OPEN
+        ):
+            self.__local_logger.error(
+                f"Too many restarts, stopped restarting {self.__worker_properties.get_target_name()}",
+                True,
+            )
 
-        self.__workers = new_workers
+        self.__replenish_spares()
 
         return True
+
+    def get_restart_status(self) -> worker_restart.RestartStatus:
+        """
+        Returns the restart history, for main to escalate if the workers keep dying.
+        """
+        self.__update_ready()
+        return self.__restart_tracker.status()
+
+    def get_resource_usage(self) -> "list[resource_monitor.WorkerResourceSnapshot]":
+        """
+        Samples the CPU, memory, context switches and open files of each live worker from /proc ,
+        Linux only. Warm spares and retiring workers are not sampled.
+
+        Returns the snapshot of each worker, with the CPU fraction since the previous call.
+        """
+        is_thread = self.__worker_properties.get_executor_kind() == ExecutorKind.THREAD
+        return self.__resource_monitor.sample(
+            [(_get_worker_id(worker), is_thread) for worker in self.__workers if worker.is_alive()]
+        )
+
+    def __activate_spare(self) -> "tuple[bool, mp.Process | threading.Thread | None]":
+        """
+        Activates a warm spare, discarding spares that died while parked or cannot be reached.
+
+        Returns whether there was a spare and the activated spare, which is now a worker.
+        """
+        while len(self.__spares) > 0:
+            spare, activation_writer = self.__spares.pop(0)
+            if not spare.is_alive():
+                activation_writer.close()
+                continue
+
+            try:
+                activation_writer.send(True)
+            except (BrokenPipeError, OSError) as e:
+                self.__local_logger.warning(
+                    f"Failed to activate warm spare {self.__worker_properties.get_target_name()} "
+                    f"{spare.name}: {e}",
+                    True,
+                )
+                activation_writer.close()
+                # Parked, so it has not run the target. Other workers may hold a copy of the
+                # pipe, so it might never see the pipe close. A thread spare is a daemon
+                if not isinstance(spare, threading.Thread):
+                    spare.terminate()
+
+                continue
+
+            activation_writer.close()
+            self.__local_logger.info(
+                f"Activated warm spare {self.__worker_properties.get_target_name()} {spare.name}",
+                True,
+            )
+            return True, spare
+
+        return False, None
+
+    def __replenish_spares(self) -> None:
+        """
+        Starts warm spares to replace the ones activated or discarded.
+        """
+        while len(self.__spares) < self.__spare_count:
+            result, spare = WorkerManager.__create_spare(
+                self.__worker_properties, self.__local_logger
+            )
+            if not result:
+                # Dead workers are still replaced, only slower
+                self.__local_logger.error("Failed to create warm spare", True)
+                return
+
+            spare[0].start()
+            self.__spares.append(spare)
@@ -0,0 +1,219 @@
+"""
+When to restart dead workers.
+"""
+
+import collections
+import enum
+import random
+
+
+class CircuitState(enum.Enum):
+    """
+    Whether dead workers are restarted.
+
+    CLOSED: Restarts are allowed, subject to backoff.
+    OPEN: Too many restarts in the window, no restarts until the reset time.
+    HALF_OPEN: A single trial restart is allowed, the circuit closes once it is ready.
+    """
+
+    CLOSED = 0
+    OPEN = 1
+    HALF_OPEN = 2
+
+
+class RestartPolicy:
+    """
+    Limits on restarting dead workers of a WorkerManager.
+
+    A worker that dies before it is ready (its first controller.check_pause() ) is a failure.
+    The first failure in a row is restarted at once, after that each restart waits
+    `backoff_initial * backoff_multiplier ** (failures in a row - 2)` seconds,
+    up to `backoff_max`, randomized by +-`jitter` of itself.
+    """
+
+    def __init__(
+        self,
+        max_restarts: int = 5,
+        window: float = 60.0,  # seconds
+        backoff_initial: float = 0.1,  # seconds
+        backoff_max: float = 10.0,  # seconds
+        backoff_multiplier: float = 2.0,
+        jitter: float = 0.2,
+        circuit_reset: float = 60.0,  # seconds
+    ) -> None:
+        """
+        max_restarts: Most restarts in the window before the circuit opens.
+        window: Time in seconds restarts are counted over.
+        backoff_initial: Wait in seconds before the second restart in a row of failures.
+        backoff_max: Longest wait in seconds between restarts.
+        backoff_multiplier: Growth of the wait per failure in a row.
+        jitter: Fraction of the wait to randomize by, between 0 and 1 .
+        circuit_reset: Time in seconds the circuit stays open before a trial restart.
+        """
+        if max_restarts <= 0:
+            raise ValueError(f"Restart policy requires max_restarts > 0, got {max_restarts}")
+
+        if not 0.0 <= jitter <= 1.0:
+            raise ValueError(f"Restart policy requires 0 <= jitter <= 1, got {jitter}")
+
+        self.max_restarts = max_restarts
+        self.window = window
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.backoff_multiplier = backoff_multiplier
+        self.jitter = jitter
+        self.circuit_reset = circuit_reset
+
+    def backoff(self, failure_count: int) -> float:
+        """
+        Returns the time in seconds to wait before restarting after the failures in a row.
+        """
+        if failure_count <= 1:
+            return 0.0
+
+        delay = min(
+            self.backoff_max,
+            self.backoff_initial * self.backoff_multiplier ** (failure_count - 2),
+        )
+        return delay * random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+
+
+class RestartStatus:
+    """
+    Restart history of a WorkerManager at a point in time.
+    """
+
+    def __init__(
+        self,
+        restart_count: int,
+        failure_count: int,
+        circuit_state: CircuitState,
+        last_time_to_ready: "float | None",  # seconds
+        max_time_to_ready: "float | None",  # seconds
+    ) -> None:
+        self.restart_count = restart_count
+        self.failure_count = failure_count
+        self.circuit_state = circuit_state
+        self.last_time_to_ready = last_time_to_ready
+        self.max_time_to_ready = max_time_to_ready
+
+    def __str__(self) -> str:
+        last_time_to_ready = (
+            "n/a" if self.last_time_to_ready is None else f"{self.last_time_to_ready:.3f} s"
+        )
+        max_time_to_ready = (
+            "n/a" if self.max_time_to_ready is None else f"{self.max_time_to_ready:.3f} s"
+        )
+        return (
+            f"restarts: {self.restart_count}, "
+            f"failures in a row: {self.failure_count}, "
+            f"circuit: {self.circuit_state.name}, "
+            f"time to ready: last {last_time_to_ready} max {max_time_to_ready}"
+        )
+
+
+class RestartTracker:  # pylint: disable=too-many-instance-attributes
+    """
+    Applies a restart policy to the deaths and restarts of a WorkerManager.
+    Only used in the process that owns the WorkerManager, times are time.monotonic() .
+    """
+
+    def __init__(self, policy: RestartPolicy) -> None:
+        """
+        policy: Limits on restarting.
+        """
+        self.__policy = policy
+        self.__restart_times = collections.deque()
+        self.__restart_count = 0
+        self.__failure_count = 0
+        self.__next_restart_time = 0.0
+        self.__circuit_state = CircuitState.CLOSED
+        self.__circuit_close_time = 0.0
+        self.__is_trial_pending = False
+        self.__last_time_to_ready = None
+        self.__max_time_to_ready = None
+
+    def __open_circuit(self, now: float) -> None:
+        """
+        Stops restarts until the reset time.
+        """
+        self.__circuit_state = CircuitState.OPEN
+        self.__circuit_close_time = now + self.__policy.circuit_reset
+        self.__is_trial_pending = False
+
+    def record_ready(self, time_to_ready: float) -> None:
+        """
+        Records a worker becoming ready, which ends a run of failures.
+
+        time_to_ready: Time in seconds from starting the worker until it was ready.
+        """
+        self.__failure_count = 0
+        self.__last_time_to_ready = time_to_ready
+        if self.__max_time_to_ready is None or time_to_ready > self.__max_time_to_ready:
+            self.__max_time_to_ready = time_to_ready
+
+        if self.__circuit_state == CircuitState.HALF_OPEN:
+            self.__circuit_state = CircuitState.CLOSED
+            self.__is_trial_pending = False
+            self.__restart_times.clear()
+
+    def record_death(self, now: float, was_ready: bool) -> None:
+        """
+        Records a worker dying and sets when it may be restarted.
+
+        was_ready: Whether the worker became ready before dying.
+        """
+        if was_ready:
+            self.__failure_count = 0
+
+        self.__failure_count += 1
+        self.__next_restart_time = now + self.__policy.backoff(self.__failure_count)
+
+        if self.__circuit_state == CircuitState.HALF_OPEN and self.__is_trial_pending:
+            self.__open_circuit(now)
+
+    def is_restart_allowed(self, now: float) -> bool:
+        """
+        Returns whether a dead worker may be restarted now.
+        Opens the circuit if the window is already full.
+        """
+        if self.__circuit_state == CircuitState.OPEN:
+            if now < self.__circuit_close_time:
+                return False
+
+            self.__circuit_state = CircuitState.HALF_OPEN
+
+        if self.__circuit_state == CircuitState.HALF_OPEN:
+            return not self.__is_trial_pending and now >= self.__next_restart_time
+
+        while len(self.__restart_times) > 0 and (
+            now - self.__restart_times[0] > self.__policy.window
+        ):
+            self.__restart_times.popleft()
+
+        if len(self.__restart_times) >= self.__policy.max_restarts:
+            self.__open_circuit(now)
+            return False
+
+        return now >= self.__next_restart_time
+
+    def record_restart(self, now: float) -> None:
+        """
+        Records a dead worker being restarted.
+        """
+        self.__restart_count += 1
+        self.__restart_times.append(now)
+        if self.__circuit_state == CircuitState.HALF_OPEN:
+            self.__is_trial_pending = True
+
+    def status(self) -> RestartStatus:
+        """
+        Returns the restart history.
+        """
+        return RestartStatus(
+            self.__restart_count,
+            self.__failure_count,
+            self.__circuit_state,
+            self.__last_time_to_ready,
+            self.__max_time_to_ready,
+        )
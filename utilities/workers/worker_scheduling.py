@@ -0,0 +1,97 @@
+"""
+Where and how urgently the operating system runs workers.
+"""
+
+import os
+
+
+class SchedulingPolicy:
+    """
+    CPU affinity and scheduling priority of the workers of a WorkerManager, applied by each worker
+    as it starts, before the worker target.
+
+    Linux only. Linux schedules threads, so a thread worker only changes itself and not the rest
+    of its process.
+    """
+
+    def __init__(
+        self,
+        cpus: "set[int] | None" = None,
+        nice: "int | None" = None,
+        fifo_priority: "int | None" = None,
+    ) -> None:
+        """
+        cpus: CPUs the workers may run on, None for any CPU.
+        nice: Niceness from -20 (most favourable) to 19, None to inherit. Lowering niceness below
+            the current niceness requires CAP_SYS_NICE or RLIMIT_NICE .
+        fifo_priority: Real time SCHED_FIFO priority from 1 to 99, None for the default scheduler.
+            Requires CAP_SYS_NICE or RLIMIT_RTPRIO . A SCHED_FIFO worker that never waits stops
+            everything of lower priority on its CPUs, so only use it for workers that wait on
+            their queues or the socket.
+        """
+        if cpus is not None and len(cpus) == 0:
+            raise ValueError("Scheduling policy requires at least one CPU")
+
+        if nice is not None and not -20 <= nice <= 19:
+            raise ValueError(f"Scheduling policy requires -20 <= nice <= 19, got {nice}")
+
+        if fifo_priority is not None and not 1 <= fifo_priority <= 99:
+            raise ValueError(
+                f"Scheduling policy requires 1 <= fifo_priority <= 99, got {fifo_priority}"
+            )
+
+        self.cpus = None if cpus is None else set(cpus)
+        self.nice = nice
+        self.fifo_priority = fifo_priority
+
+    def check(self) -> "tuple[bool, str | None]":
+        """
+        Checks that this process could apply the policy, so a policy that cannot be applied is
+        rejected in main instead of killing every worker as it starts.
+
+        Returns the reason if the policy cannot be applied.
+        """
+        if not hasattr(os, "sched_setaffinity"):
+            return False, "CPU affinity and scheduling priority are only supported on Linux"
+
+        if self.cpus is not None:
+            unavailable_cpus = self.cpus - os.sched_getaffinity(0)
+            if len(unavailable_cpus) > 0:
+                return False, f"CPUs {sorted(unavailable_cpus)} are not available"
+
+        if self.nice is None and self.fifo_priority is None:
+            return True, None
+
+        # Unix only, imported here so importing the worker framework works everywhere
+        try:
+            import resource  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            return False, "Scheduling priority is not supported on this platform"
+
+        is_privileged = os.geteuid() == 0
+        if self.nice is not None and self.nice < os.getpriority(os.PRIO_PROCESS, 0):
+            # RLIMIT_NICE allows niceness down to 20 - limit
+            nice_limit, _ = resource.getrlimit(resource.RLIMIT_NICE)
+            if not is_privileged and 20 - nice_limit > self.nice:
+                return False, f"Not permitted to lower niceness to {self.nice}"
+
+        if self.fifo_priority is not None:
+            priority_limit, _ = resource.getrlimit(resource.RLIMIT_RTPRIO)
+            if not is_privileged and priority_limit < self.fifo_priority:
+                return False, f"Not permitted to use SCHED_FIFO priority {self.fifo_priority}"
+
+        return True, None
+
+    def apply(self) -> None:
+        """
+        Applies the policy to the calling thread.
+        Raises OSError if the operating system refuses.
+        """
+        if self.cpus is not None:
+            os.sched_setaffinity(0, self.cpus)
+
+        if self.nice is not None:
+            os.setpriority(os.PRIO_PROCESS, 0, self.nice)
+
+        if self.fifo_priority is not None:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.fifo_priority))